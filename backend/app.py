@@ -1,14 +1,37 @@
+import logging
+
 from flask import Flask, jsonify, Response, send_from_directory
 from flask_cors import CORS
 
 from .config import config
-from .db import close_pool, init_db_pool
+from .db import get_connection, init_db_pool, release_connection
 from .clinic import clinic_bp
 from .income import income_bp
 from .outcome import outcome_bp
 from .staff import staff_bp
 from .patients import patients_bp
 from .schedule import schedule_bp
+from .events import broker as events_broker, events_bp
+from .appointments import appointments_bp
+from .audit import audit_bp, drainer as audit_drainer
+from .calendar_sync import calendar_bp
+from .parallel import add_server_timing
+from . import compression, http_cache, lookups
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_lookups() -> None:
+    conn = get_connection()
+    try:
+        lookups.cache.warm(conn)
+        conn.rollback()
+    except Exception:
+        logger.warning("Lookup cache warm-up failed; tables load on first use", exc_info=True)
+        conn.rollback()
+    finally:
+        release_connection(conn)
 
 
 def create_app(testing: bool = False) -> Flask:
@@ -16,11 +39,17 @@ def create_app(testing: bool = False) -> Flask:
     app.config["SECRET_KEY"] = config.SECRET_KEY
 
     app.config["TESTING"] = testing
+    app.config["HTTP_CACHE"] = config.HTTP_CACHE and not testing
+    app.config["COMPRESSION"] = config.COMPRESSION
 
     CORS(app, resources={r"/api/*": {"origins": config.CORS_ORIGINS}})
 
+    # Other workers' writes are noticed through table_versions; tests load lookups per app.
+    lookups.configure(None if testing else lookups.RECHECK_SECONDS)
     if not testing:
         init_db_pool()
+        warm_lookups()
+        audit_drainer.start()
 
     app.register_blueprint(clinic_bp, url_prefix="/api/clinic")
     app.register_blueprint(income_bp, url_prefix="/api/income")
@@ -28,15 +57,20 @@ def create_app(testing: bool = False) -> Flask:
     app.register_blueprint(staff_bp, url_prefix="/api/staff")
     app.register_blueprint(patients_bp, url_prefix="/api/patients")
     app.register_blueprint(schedule_bp, url_prefix="/api/schedule")
+    app.register_blueprint(events_bp, url_prefix="/api/events")
+    app.register_blueprint(appointments_bp, url_prefix="/api/appointments")
+    app.register_blueprint(audit_bp, url_prefix="/api/audit")
+    app.register_blueprint(calendar_bp, url_prefix="/api/calendar")
+
+    app.after_request(add_server_timing)
+    # Registered first so its after_request hook runs last, once the ETag is set.
+    compression.init_app(app)
+    http_cache.init_app(app)
 
     @app.route("/api/health")
     def health():
         return jsonify({"status": "ok"})
 
-    @app.teardown_appcontext
-    def teardown(exception):
-        close_pool()
-
     @app.errorhandler(400)
     def bad_request(error):
         return jsonify({"error": "bad_request", "message": str(error)}), 400
@@ -86,6 +120,22 @@ def create_app(testing: bool = False) -> Flask:
     return app
 
 
+def create_events_app(testing: bool = False) -> Flask:
+    """Serves only /api/events/stream, for a gevent worker fanning out from one LISTEN connection."""
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = config.SECRET_KEY
+    app.config["TESTING"] = testing
+
+    CORS(app, resources={r"/api/*": {"origins": config.CORS_ORIGINS}})
+    app.register_blueprint(events_bp, url_prefix="/api/events")
+
+    @app.route("/api/events/health")
+    def health():
+        return jsonify({"status": "ok", "subscribers": events_broker.subscriber_count()})
+
+    return app
+
+
 if __name__ == "__main__":
     application = create_app()
     application.run(host="0.0.0.0", port=5000)
@@ -1,16 +1,31 @@
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 import json
 
 from flask import Blueprint, jsonify, request
+import psycopg2
+
+from .availability import MAX_APPOINTMENT_LENGTH, fetch_busy_intervals, free_slots
 from .db import get_connection, release_connection
+from . import lookups
 
 appointments_bp = Blueprint("appointments", __name__)
 
 def parse_iso_datetime(dt_str: str) -> datetime:
     return datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
 
+
+def as_utc(moment: datetime) -> datetime:
+    """Aware UTC datetime; naive input is taken to be UTC."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def valid_duration(minutes: int) -> bool:
+    return 0 < minutes and timedelta(minutes=minutes) <= MAX_APPOINTMENT_LENGTH
+
 @appointments_bp.route("", methods=["GET"])
 def list_appointments():
     start_str = request.args.get("start")
@@ -107,6 +122,8 @@ def create_appointment():
         
     except ValueError:
         return jsonify({"error": "invalid_data_format"}), 400
+    if not valid_duration(duration):
+        return jsonify({"error": "invalid_duration"}), 400
 
     conn = get_connection()
     try:
@@ -199,6 +216,9 @@ def update_appointment(apt_id):
         
         new_start = parse_iso_datetime(data["start_time"]) if "start_time" in data else curr_start
         new_dur = int(data["duration_minutes"]) if "duration_minutes" in data else curr_dur
+        if "duration_minutes" in data and not valid_duration(new_dur):
+            conn.rollback()
+            return jsonify({"error": "invalid_duration"}), 400
         
         if "start_time" in data or "duration_minutes" in data:
             from datetime import timedelta
@@ -235,3 +255,49 @@ def delete_appointment(apt_id):
         return jsonify({"error": str(e)}), 500
     finally:
         release_connection(conn)
+
+
+AVAILABILITY_MAX_DAYS = 92
+AVAILABILITY_MAX_SLOTS = 200
+
+
+@appointments_bp.route("/availability", methods=["GET"])
+def find_availability():
+    try:
+        duration = timedelta(minutes=int(request.args.get("duration", 30)))
+        limit = min(int(request.args.get("limit", 10)), AVAILABILITY_MAX_SLOTS)
+        step_param = request.args.get("step")
+        step = timedelta(minutes=int(step_param)) if step_param else None
+        # Mixing a naive and an aware bound would fail to compare, and the
+        # rows come back aware, so both bounds are aware UTC.
+        start = as_utc(parse_iso_datetime(request.args["from"])) if request.args.get("from") else datetime.now(timezone.utc)
+        end = as_utc(parse_iso_datetime(request.args["to"])) if request.args.get("to") else start + timedelta(days=30)
+        doctor_ids = [int(v) for v in request.args.get("doctor_id", "").split(",") if v.strip()]
+    except ValueError:
+        return jsonify({"error": "invalid_data_format"}), 400
+
+    if duration <= timedelta(0) or limit <= 0 or (step is not None and step <= timedelta(0)):
+        return jsonify({"error": "invalid_data_format"}), 400
+    if end <= start or end - start > timedelta(days=AVAILABILITY_MAX_DAYS):
+        return jsonify({"error": "invalid_date_range"}), 400
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        if not doctor_ids:
+            cur.execute(
+                "SELECT id FROM staff WHERE role_id = %s AND is_active = TRUE ORDER BY id",
+                (lookups.role_id(conn, "doctor"),),
+            )
+            doctor_ids = [int(row[0]) for row in cur.fetchall()]
+        if not doctor_ids:
+            return jsonify({"slots": []})
+        try:
+            shifts, appointments = fetch_busy_intervals(cur, doctor_ids, start, end)
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+            return jsonify({"slots": []})
+    finally:
+        release_connection(conn)
+
+    return jsonify({"slots": free_slots(shifts, appointments, duration, limit, step)})
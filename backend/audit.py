@@ -0,0 +1,178 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from flask import Blueprint, jsonify, request
+
+from .db import get_connection, release_connection
+
+
+logger = logging.getLogger(__name__)
+
+audit_bp = Blueprint("audit", __name__)
+
+DRAIN_INTERVAL_SECONDS = 2.0
+DRAIN_BATCH_SIZE = 500
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def record(
+    cur,
+    entity_type: str,
+    entity_id: Optional[int],
+    action: str,
+    actor_id: Optional[int],
+    payload: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queues an audit event in the caller's transaction; it commits or rolls back with the change."""
+    cur.execute(
+        """
+        INSERT INTO audit_outbox (entity_type, entity_id, action, actor_id, payload)
+        VALUES (%s, %s, %s, %s, %s::jsonb)
+        """,
+        (entity_type, entity_id, action, actor_id, json.dumps(payload or {}, default=str)),
+    )
+
+
+def drain(conn, batch_size: int = DRAIN_BATCH_SIZE) -> int:
+    cur = conn.cursor()
+    total = 0
+    while True:
+        cur.execute("SELECT drain_audit_outbox(%s)", (batch_size,))
+        row = cur.fetchone()
+        moved = int(row[0] or 0) if row else 0
+        conn.commit()
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+class AuditDrainer:
+    """Moves queued audit events into audit_events in the background."""
+
+    def __init__(self, interval: float = DRAIN_INTERVAL_SECONDS):
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-drainer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            conn = None
+            try:
+                conn = get_connection()
+                drain(conn)
+            except Exception:
+                logger.exception("Audit outbox drain failed")
+                if conn is not None:
+                    conn.rollback()
+            finally:
+                release_connection(conn)
+
+
+drainer = AuditDrainer()
+
+
+def _parse_cursor(value: str):
+    stamp, _, event_id = value.rpartition(",")
+    return datetime.fromisoformat(stamp), int(event_id)
+
+
+def _serialize(row) -> Dict[str, Any]:
+    return {
+        "id": int(row[0]),
+        "occurred_at": row[1].isoformat(),
+        "entity_type": row[2],
+        "entity_id": row[3],
+        "action": row[4],
+        "actor_id": row[5],
+        "payload": row[6] if isinstance(row[6], dict) else json.loads(row[6] or "{}"),
+    }
+
+
+@audit_bp.route("/events", methods=["GET"])
+def list_audit_events():
+    from .staff import get_authenticated_staff
+
+    auth = get_authenticated_staff()
+    if not auth:
+        return jsonify({"error": "unauthorized"}), 401
+    if str(auth.get("role") or "").lower() not in {"admin", "administrator"}:
+        return jsonify({"error": "forbidden"}), 403
+
+    conditions = []
+    params = []
+    try:
+        if request.args.get("entity_type"):
+            conditions.append("entity_type = %s")
+            params.append(request.args["entity_type"])
+        if request.args.get("entity_id"):
+            conditions.append("entity_id = %s")
+            params.append(int(request.args["entity_id"]))
+        if request.args.get("actor_id"):
+            conditions.append("actor_id = %s")
+            params.append(int(request.args["actor_id"]))
+        if request.args.get("from"):
+            conditions.append("occurred_at >= %s")
+            params.append(datetime.fromisoformat(request.args["from"]))
+        if request.args.get("to"):
+            conditions.append("occurred_at < %s")
+            params.append(datetime.fromisoformat(request.args["to"]))
+        if request.args.get("before"):
+            conditions.append("(occurred_at, id) < (%s, %s)")
+            params.extend(_parse_cursor(request.args["before"]))
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "invalid_filter"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    where_sql = " AND ".join(conditions) or "TRUE"
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # Events still waiting in the outbox are included, so a change is
+        # visible here as soon as it commits.
+        cur.execute(
+            f"""
+            SELECT id, occurred_at, entity_type, entity_id, action, actor_id, payload
+            FROM (
+                (SELECT id, occurred_at, entity_type, entity_id, action, actor_id, payload
+                 FROM audit_events
+                 WHERE {where_sql}
+                 ORDER BY occurred_at DESC, id DESC
+                 LIMIT %s)
+                UNION ALL
+                (SELECT id, occurred_at, entity_type, entity_id, action, actor_id, payload
+                 FROM audit_outbox
+                 WHERE {where_sql}
+                 ORDER BY occurred_at DESC, id DESC
+                 LIMIT %s)
+            ) events
+            ORDER BY occurred_at DESC, id DESC
+            LIMIT %s
+            """,
+            params + [limit] + params + [limit, limit],
+        )
+        rows = cur.fetchall()
+    finally:
+        release_connection(conn)
+
+    items = [_serialize(row) for row in rows]
+    next_cursor = None
+    if len(items) == limit:
+        next_cursor = f"{items[-1]['occurred_at']},{items[-1]['id']}"
+    return jsonify({"items": items, "next_cursor": next_cursor})
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .shift_ranges import overlaps
+
+Interval = Tuple[datetime, datetime]
+
+SLOT_ALIGNMENT = timedelta(minutes=5)
+# Longest appointment allowed (appointments_max_length, migration 031). It
+# bounds how far before a window an overlapping appointment can start.
+MAX_APPOINTMENT_LENGTH = timedelta(hours=24)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(free: Sequence[Interval], busy: Sequence[Interval]) -> List[Interval]:
+    """Removes busy time from free time. Both inputs must be sorted and non-overlapping."""
+    result: List[Interval] = []
+    i = 0
+    for start, end in free:
+        cursor = start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                result.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def _align(moment: datetime) -> datetime:
+    offset = (moment - moment.replace(minute=0, second=0, microsecond=0)) % SLOT_ALIGNMENT
+    return moment if not offset else moment + (SLOT_ALIGNMENT - offset)
+
+
+def iter_slots(gaps: Iterable[Interval], duration: timedelta, step: timedelta) -> Iterator[Interval]:
+    for start, end in gaps:
+        slot_start = _align(start)
+        while slot_start + duration <= end:
+            yield slot_start, slot_start + duration
+            slot_start += step
+
+
+def _tagged(doctor_id: int, slots: Iterator[Interval]) -> Iterator[Tuple[datetime, int, datetime]]:
+    for start, end in slots:
+        yield start, doctor_id, end
+
+
+def free_slots(
+    shifts: Dict[int, List[Interval]],
+    appointments: Dict[int, List[Interval]],
+    duration: timedelta,
+    limit: int,
+    step: Optional[timedelta] = None,
+) -> List[Dict]:
+    """Earliest `limit` slots across doctors: each doctor's shifts minus their appointments."""
+    step = step or duration
+    streams = []
+    for doctor_id, doctor_shifts in shifts.items():
+        gaps = subtract_intervals(merge_intervals(doctor_shifts), merge_intervals(appointments.get(doctor_id, [])))
+        streams.append(_tagged(doctor_id, iter_slots(gaps, duration, step)))
+    return [
+        {"doctor_id": doctor_id, "start": start.isoformat(), "end": end.isoformat()}
+        for start, doctor_id, end in itertools.islice(heapq.merge(*streams), limit)
+    ]
+
+
+def fetch_busy_intervals(cur, doctor_ids: Sequence[int], start: datetime, end: datetime):
+    # Shifts go through the (staff_id, period) GiST index, appointments
+    # through (doctor_id, start_time) as a range scan bounded on both sides.
+    cur.execute(
+        f"""
+        SELECT staff_id, GREATEST(start_time, %s), LEAST(end_time, %s)
+        FROM shifts
+        WHERE staff_id = ANY(%s) AND {overlaps("shifts")}
+        ORDER BY staff_id, start_time
+        """,
+        (start, end, list(doctor_ids), start, end),
+    )
+    shifts: Dict[int, List[Interval]] = {doctor_id: [] for doctor_id in doctor_ids}
+    for staff_id, shift_start, shift_end in cur.fetchall():
+        shifts.setdefault(staff_id, []).append((shift_start, shift_end))
+
+    cur.execute(
+        """
+        SELECT doctor_id, start_time, end_time
+        FROM appointments
+        WHERE doctor_id = ANY(%s)
+          AND start_time > %s AND start_time < %s
+          AND end_time > %s
+          AND status <> 'cancelled'
+        ORDER BY doctor_id, start_time
+        """,
+        (list(doctor_ids), start - MAX_APPOINTMENT_LENGTH, end, start),
+    )
+    appointments: Dict[int, List[Interval]] = {}
+    for doctor_id, apt_start, apt_end in cur.fetchall():
+        appointments.setdefault(doctor_id, []).append((apt_start, apt_end))
+    return shifts, appointments
@@ -0,0 +1,60 @@
+"""Times a month-wide free-slot search over every active doctor.
+
+Reports the time spent in the two range queries (shifts and
+appointments) and in the interval arithmetic separately.
+
+    python -m backend.benchmarks.availability [--days 30] [--duration 30] [--limit 20]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from .. import lookups
+from ..availability import fetch_busy_intervals, free_slots
+from ..db import get_connection, release_connection
+
+
+def run(days: int, duration_minutes: int, limit: int):
+    start = datetime.now(timezone.utc)
+    end = start + timedelta(days=days)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id FROM staff WHERE role_id = %s AND is_active = TRUE",
+            (lookups.role_id(conn, "doctor"),),
+        )
+        doctor_ids = [int(row[0]) for row in cur.fetchall()]
+        started = time.perf_counter()
+        shifts, appointments = fetch_busy_intervals(cur, doctor_ids, start, end)
+        queried = time.perf_counter()
+        slots = free_slots(shifts, appointments, timedelta(minutes=duration_minutes), limit)
+        computed = time.perf_counter()
+        conn.rollback()
+    finally:
+        release_connection(conn)
+    return {
+        "doctors": len(doctor_ids),
+        "shifts": sum(len(v) for v in shifts.values()),
+        "appointments": sum(len(v) for v in appointments.values()),
+        "slots": len(slots),
+        "query_ms": round((queried - started) * 1000, 2),
+        "compute_ms": round((computed - queried) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    result = run(args.days, args.duration, args.limit)
+    print(
+        f"{result['doctors']} doctors, {result['shifts']} shifts, {result['appointments']} appointments -> "
+        f"{result['slots']} slots; queries {result['query_ms']} ms, interval arithmetic {result['compute_ms']} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
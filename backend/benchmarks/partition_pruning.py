@@ -0,0 +1,112 @@
+"""Shows partition pruning for the year view of the clinic dashboard.
+
+Runs the year-period queries of /api/clinic/dashboard-data under
+EXPLAIN (ANALYZE) and reports how many monthly partitions each one
+touched versus how many exist.
+
+    python -m backend.benchmarks.partition_pruning [--year 2025]
+"""
+import argparse
+import json
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from ..db import get_connection, release_connection
+
+
+def year_view_queries(year: int) -> List[Tuple[str, str, tuple]]:
+    start = date(year, 1, 1)
+    end = date(year, 12, 31)
+    return [
+        (
+            "income_total",
+            "SELECT COALESCE(SUM(amount), 0) FROM income_records WHERE service_date BETWEEN %s AND %s",
+            (start, end),
+        ),
+        (
+            "outcome_total",
+            "SELECT COALESCE(SUM(amount), 0) FROM outcome_records WHERE expense_date BETWEEN %s AND %s",
+            (start, end),
+        ),
+        (
+            "income_by_month",
+            """
+            SELECT DATE_TRUNC('month', service_date) AS month, SUM(amount)
+            FROM income_records
+            WHERE service_date BETWEEN %s AND %s
+            GROUP BY month
+            """,
+            (start, end),
+        ),
+        (
+            "doctor_performance",
+            """
+            SELECT doctor_id, SUM(amount), COUNT(DISTINCT patient_id)
+            FROM income_records
+            WHERE service_date BETWEEN %s AND %s
+            GROUP BY doctor_id
+            """,
+            (start, end),
+        ),
+    ]
+
+
+def scanned_relations(plan: Dict[str, Any]) -> List[str]:
+    found = []
+    if plan.get("Relation Name"):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(scanned_relations(child))
+    return found
+
+
+def count_partitions(cur, parent: str) -> int:
+    cur.execute("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = %s::regclass", (parent,))
+    return int(cur.fetchone()[0])
+
+
+def run(year: int) -> List[Dict[str, Any]]:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        totals = {
+            "income_records": count_partitions(cur, "income_records"),
+            "outcome_records": count_partitions(cur, "outcome_records"),
+        }
+        results = []
+        for name, sql, params in year_view_queries(year):
+            cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+            explain = cur.fetchone()[0]
+            if isinstance(explain, str):
+                explain = json.loads(explain)
+            explain = explain[0]
+            relations = scanned_relations(explain["Plan"])
+            parent = "outcome_records" if any(r.startswith("outcome_records") for r in relations) else "income_records"
+            results.append(
+                {
+                    "query": name,
+                    "partitions_scanned": len(set(relations)),
+                    "partitions_total": totals[parent],
+                    "planning_ms": round(explain.get("Planning Time", 0.0), 3),
+                    "execution_ms": round(explain.get("Execution Time", 0.0), 3),
+                }
+            )
+        conn.rollback()
+    finally:
+        release_connection(conn)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=date.today().year)
+    args = parser.parse_args()
+    for row in run(args.year):
+        print(
+            f"{row['query']:<20} partitions {row['partitions_scanned']:>3}/{row['partitions_total']:<3} "
+            f"planning {row['planning_ms']:>8} ms  execution {row['execution_ms']:>8} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compares shift range predicates over a synthetic multi-year history.
+
+Inserts `--years` of daily shifts for up to `--staff` active staff
+members in a transaction that is rolled back afterwards; a third of
+them are evening shifts that run to midnight. A one-week lookup is then
+run under EXPLAIN (ANALYZE) with the old containment predicate, a plain
+start/end overlap and the period overlap from backend/shift_ranges.py,
+clinic-wide and for one staff member.
+
+    python -m backend.benchmarks.shift_ranges [--years 5] [--staff 40]
+"""
+import argparse
+import json
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from ..db import get_connection, release_connection
+from ..shift_ranges import overlaps
+
+PREDICATES: List[Tuple[str, str, bool]] = [
+    # (name, predicate, params are (start, end) rather than (end, start))
+    ("contained", "s.start_time >= %s AND s.end_time <= %s", True),
+    ("overlap_start_end", "s.start_time < %s AND s.end_time > %s", False),
+    ("overlap_period", overlaps("s"), True),
+]
+
+
+def seed_history(cur, years: int, staff_limit: int) -> Tuple[List[int], int]:
+    cur.execute("SELECT id FROM staff WHERE is_active = TRUE ORDER BY id LIMIT %s", (staff_limit,))
+    staff_ids = [int(row[0]) for row in cur.fetchall()]
+    if not staff_ids:
+        raise SystemExit("No active staff to attach benchmark shifts to")
+    cur.execute(
+        """
+        INSERT INTO shifts (staff_id, start_time, end_time, note)
+        SELECT st.id,
+               d + interval '8 hours' + (st.id %% 3) * interval '4 hours',
+               d + interval '16 hours' + (st.id %% 3) * interval '4 hours',
+               'benchmark'
+        FROM unnest(%s::int[]) AS st(id)
+        CROSS JOIN generate_series(
+            (CURRENT_DATE - make_interval(years => %s))::timestamptz, CURRENT_DATE::timestamptz, interval '1 day'
+        ) AS d
+        """,
+        (staff_ids, years),
+    )
+    inserted = cur.rowcount
+    cur.execute("ANALYZE shifts")
+    return staff_ids, inserted
+
+
+def index_names(plan: Dict[str, Any]) -> List[str]:
+    found = [plan["Index Name"]] if plan.get("Index Name") else []
+    for child in plan.get("Plans", []):
+        found.extend(index_names(child))
+    return found
+
+
+def explain(cur, predicate: str, params: tuple) -> Dict[str, Any]:
+    cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT s.id FROM shifts s WHERE {predicate}", params)
+    result = cur.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]
+
+
+def run(years: int, staff_limit: int) -> Dict[str, Any]:
+    today = datetime.combine(datetime.now(timezone.utc).date(), time(0, 0), tzinfo=timezone.utc)
+    start, end = today - timedelta(days=7), today
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        staff_ids, inserted = seed_history(cur, years, staff_limit)
+        results = []
+        for scope, extra, extra_params in (("clinic", "", ()), ("one staff", " AND s.staff_id = %s", (staff_ids[0],))):
+            for name, predicate, start_first in PREDICATES:
+                params = ((start, end) if start_first else (end, start)) + extra_params
+                plan = explain(cur, predicate + extra, params)
+                results.append({
+                    "scope": scope,
+                    "predicate": name,
+                    "rows": plan["Plan"].get("Actual Rows", 0),
+                    "indexes": sorted(set(index_names(plan["Plan"]))) or ["seq scan"],
+                    "execution_ms": round(plan.get("Execution Time", 0.0), 3),
+                })
+    finally:
+        conn.rollback()
+        release_connection(conn)
+    return {"staff": len(staff_ids), "inserted": inserted, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--staff", type=int, default=40)
+    args = parser.parse_args()
+    report = run(args.years, args.staff)
+    print(f"{report['inserted']} synthetic shifts for {report['staff']} staff over {args.years} years")
+    for row in report["results"]:
+        print(
+            f"{row['scope']:<10} {row['predicate']:<18} rows {row['rows']:>6}  "
+            f"{row['execution_ms']:>9} ms  {', '.join(row['indexes'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measures cold worker startup: importing backend.app and calling create_app().
+
+Each run is a fresh interpreter, so nothing is cached between runs. The
+report lists heavy libraries that got imported during startup; PDF and
+imaging stacks should only load when a PDF is rendered.
+
+    python -m backend.benchmarks.startup [--runs 5] [--budget-ms 400]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+HEAVY_MODULES = ("reportlab", "PIL", "psycopg_pool", "brotli")
+# Directory that contains the backend package.
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.app
+imported = time.perf_counter()
+backend.app.create_app(testing=True)
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_ms": (created - imported) * 1000,
+    "heavy": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def probe(root: Optional[Path] = None) -> Dict[str, Any]:
+    # The child must import this checkout's backend whatever the caller's cwd.
+    root = Path(root or PROJECT_ROOT)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(root), env.get("PYTHONPATH")) if p)
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=str(root),
+        env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = [probe() for _ in range(runs)]
+    totals = [s["import_ms"] + s["create_ms"] for s in samples]
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "create_ms": round(statistics.median(s["create_ms"] for s in samples), 1),
+        "total_ms": round(statistics.median(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "heavy": sorted({m for s in samples for m in s["heavy"]}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+    result = run(args.runs)
+    print(
+        f"import {result['import_ms']} ms  create_app {result['create_ms']} ms  "
+        f"total {result['total_ms']} ms (median of {result['runs']}, max {result['max_ms']} ms)"
+    )
+    print(f"heavy modules loaded: {', '.join(result['heavy']) or 'none'}")
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"over budget of {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Blueprint, Response, jsonify, request
+
+from .db import get_connection, release_connection
+from .http_cache import cache_tables
+from .shift_ranges import overlaps
+from .staff import ensure_staff_authorized, get_authenticated_staff
+
+calendar_bp = Blueprint("calendar", __name__)
+
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 180
+INITIAL_SYNC_PAST_DAYS = 30
+# Tombstones older than this are pruned, so older tokens force a full resync.
+TOMBSTONE_RETENTION_DAYS = 90
+ICS_LINE_LIMIT = 75
+
+
+def current_token(cur) -> str:
+    # Taken before any data is read: rows written by transactions still in
+    # flight have an xid at or above this xmin and are sent on the next sync.
+    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")
+    return f"{cur.fetchone()[0]}-{int(time.time())}"
+
+
+def parse_token(token: str) -> Tuple[str, int]:
+    xid, _, issued = token.partition("-")
+    if not xid.isdigit() or not issued.isdigit():
+        raise ValueError("invalid_sync_token")
+    return xid, int(issued)
+
+
+def prune_tombstones(conn, retention_days: int = TOMBSTONE_RETENTION_DAYS) -> int:
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM calendar_tombstones WHERE deleted_at < NOW() - make_interval(days => %s)",
+        (retention_days,),
+    )
+    return cur.rowcount
+
+
+def fetch_shifts(cur, condition: str, params: List[Any]) -> List[tuple]:
+    cur.execute(
+        f"""
+        SELECT s.id, s.staff_id, s.start_time, s.end_time, s.note, s.updated_at, st.first_name, st.last_name
+        FROM shifts s
+        JOIN staff st ON st.id = s.staff_id
+        WHERE {condition}
+        ORDER BY s.start_time, s.id
+        """,
+        params,
+    )
+    return cur.fetchall()
+
+
+def fetch_appointments(cur, condition: str, params: List[Any]) -> List[tuple]:
+    cur.execute(
+        f"""
+        SELECT a.id, a.doctor_id, a.patient_name, a.type, a.start_time, a.end_time,
+               a.duration_minutes, a.status, a.note, a.updated_at, st.first_name, st.last_name
+        FROM appointments a
+        JOIN staff st ON st.id = a.doctor_id
+        WHERE {condition}
+        ORDER BY a.start_time, a.id
+        """,
+        params,
+    )
+    return cur.fetchall()
+
+
+def _scoped(condition: str, column: str, staff_id: Optional[int], params: List[Any]) -> Tuple[str, List[Any]]:
+    if staff_id is None:
+        return condition, params
+    return f"{condition} AND {column} = %s", params + [staff_id]
+
+
+def _serialize_shift(row) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "staff_id": row[1],
+        "start": row[2].isoformat(),
+        "end": row[3].isoformat(),
+        "note": row[4],
+        "staff_name": f"{row[6] or ''} {row[7] or ''}".strip(),
+    }
+
+
+def _serialize_appointment(row) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "doctor_id": row[1],
+        "patient_name": row[2],
+        "type": row[3],
+        "start": row[4].isoformat(),
+        "end": row[5].isoformat(),
+        "duration_minutes": row[6],
+        "status": row[7],
+        "note": row[8],
+        "doctor_name": f"{row[10] or ''} {row[11] or ''}".strip(),
+    }
+
+
+@calendar_bp.route("/sync", methods=["GET"])
+def sync_calendar():
+    """Shifts and appointments changed since `token`, or everything from `from` on without one."""
+    token = request.args.get("token")
+    try:
+        staff_id = int(request.args["staff_id"]) if request.args.get("staff_id") else None
+        since_xid = None
+        if token:
+            since_xid, issued = parse_token(token)
+            if issued < time.time() - TOMBSTONE_RETENTION_DAYS * 86400:
+                return jsonify({"error": "sync_token_expired"}), 410
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else (
+            date.today() - timedelta(days=INITIAL_SYNC_PAST_DAYS)
+        )
+    except ValueError:
+        return jsonify({"error": "invalid_sync_token" if token else "invalid_filter"}), 400
+
+    # The sync carries patient names, unlike the ICS feeds: staff may sync
+    # their own calendar, only admins the whole clinic.
+    if staff_id is not None:
+        auth_error = ensure_staff_authorized(staff_id)
+        if auth_error:
+            return auth_error
+    else:
+        auth = get_authenticated_staff()
+        if not auth:
+            return jsonify({"error": "unauthorized"}), 401
+        if str(auth.get("role") or "").lower() not in {"admin", "administrator"}:
+            return jsonify({"error": "forbidden"}), 403
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        next_token = current_token(cur)
+        deleted: List[Dict[str, Any]] = []
+        if since_xid is None:
+            shift_filter = _scoped("s.end_time >= %s", "s.staff_id", staff_id, [start])
+            appointment_filter = _scoped("a.end_time >= %s", "a.doctor_id", staff_id, [start])
+        else:
+            shift_filter = _scoped("s.change_xid >= %s::xid8", "s.staff_id", staff_id, [since_xid])
+            appointment_filter = _scoped("a.change_xid >= %s::xid8", "a.doctor_id", staff_id, [since_xid])
+            condition, params = _scoped("change_xid >= %s::xid8", "staff_id", staff_id, [since_xid])
+            cur.execute(
+                f"SELECT entity_type, entity_id FROM calendar_tombstones WHERE {condition} ORDER BY id",
+                params,
+            )
+            deleted = [{"type": row[0], "id": row[1]} for row in cur.fetchall()]
+        shifts = [_serialize_shift(row) for row in fetch_shifts(cur, *shift_filter)]
+        appointments = [_serialize_appointment(row) for row in fetch_appointments(cur, *appointment_filter)]
+        conn.rollback()
+    finally:
+        release_connection(conn)
+
+    # A shift moved to another staff member leaves a tombstone but still
+    # exists; clinic-wide clients must not drop it.
+    present = {("shift", item["id"]) for item in shifts} | {("appointment", item["id"]) for item in appointments}
+    deleted = [item for item in deleted if (item["type"], item["id"]) not in present]
+    return jsonify({
+        "full": since_xid is None,
+        "shifts": shifts,
+        "appointments": appointments,
+        "deleted": deleted,
+        "sync_token": next_token,
+    })
+
+
+def _ics_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_stamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line: str) -> Iterable[str]:
+    """Splits a content line into 75-octet pieces without cutting a UTF-8 sequence (RFC 5545 3.1)."""
+    data = line.encode("utf-8")
+    prefix, limit = "", ICS_LINE_LIMIT
+    while len(data) > limit:
+        cut = limit
+        while (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        yield prefix + data[:cut].decode("utf-8")
+        data = data[cut:]
+        # Continuation lines start with a space, which counts towards the limit.
+        prefix, limit = " ", ICS_LINE_LIMIT - 1
+    yield prefix + data.decode("utf-8")
+
+
+def build_ics(name: str, events: Iterable[Dict[str, Any]]) -> str:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//KarlinDent//Schedule//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_text(name)}",
+    ]
+    for event in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{event['uid']}",
+            # Derived from the row rather than the clock, so an unchanged
+            # schedule renders to the same bytes as its cached ETag.
+            f"DTSTAMP:{_ics_stamp(event.get('last_modified') or event['start'])}",
+            f"DTSTART:{_ics_stamp(event['start'])}",
+            f"DTEND:{_ics_stamp(event['end'])}",
+            f"SUMMARY:{_ics_text(event['summary'])}",
+        ]
+        if event.get("description"):
+            lines.append(f"DESCRIPTION:{_ics_text(event['description'])}")
+        if event.get("last_modified"):
+            lines.append(f"LAST-MODIFIED:{_ics_stamp(event['last_modified'])}")
+        if event.get("cancelled"):
+            lines.append("STATUS:CANCELLED")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(part for line in lines for part in _fold(line)) + "\r\n"
+
+
+def _feed_events(cur, staff_id: Optional[int]) -> List[Dict[str, Any]]:
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today - timedelta(days=FEED_PAST_DAYS)
+    window_end = today + timedelta(days=FEED_FUTURE_DAYS)
+    events = []
+    for row in fetch_shifts(cur, *_scoped(overlaps("s"), "s.staff_id", staff_id, [window_start, window_end])):
+        name = f"{row[6] or ''} {row[7] or ''}".strip()
+        events.append({
+            "uid": f"shift-{row[0]}@karlindent",
+            "start": row[2],
+            "end": row[3],
+            "summary": "Shift" if staff_id is not None else f"Shift: {name}",
+            "description": row[4],
+            "last_modified": row[5],
+        })
+    condition = "a.start_time < %s AND a.end_time > %s"
+    for row in fetch_appointments(cur, *_scoped(condition, "a.doctor_id", staff_id, [window_end, window_start])):
+        name = f"{row[10] or ''} {row[11] or ''}".strip()
+        # Feeds are read by calendar apps without credentials, so patient names stay out.
+        events.append({
+            "uid": f"appointment-{row[0]}@karlindent",
+            "start": row[4],
+            "end": row[5],
+            "summary": f"Appointment: {row[3]}" if staff_id is not None else f"Appointment: {row[3]} ({name})",
+            "last_modified": row[9],
+            "cancelled": row[7] == "cancelled",
+        })
+    events.sort(key=lambda event: event["start"])
+    return events
+
+
+def _ics_response(name: str, filename: str, staff_id: Optional[int]) -> Response:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        body = build_ics(name, _feed_events(cur, staff_id))
+        conn.rollback()
+    finally:
+        release_connection(conn)
+    response = Response(body, mimetype="text/calendar")
+    response.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
+
+
+@calendar_bp.route("/clinic.ics", methods=["GET"])
+@cache_tables("shifts", "appointments", "staff")
+def clinic_feed():
+    return _ics_response("KarlinDent schedule", "clinic.ics", None)
+
+
+@calendar_bp.route("/staff/<int:staff_id>.ics", methods=["GET"])
+@cache_tables("shifts", "appointments", "staff")
+def staff_feed(staff_id):
+    return _ics_response("KarlinDent shifts", f"staff-{staff_id}.ics", staff_id)
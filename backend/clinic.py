@@ -1,24 +1,15 @@
-import csv
 import calendar
 from datetime import date, datetime, timedelta
-from io import BytesIO, StringIO
+from io import BytesIO
 from typing import Any, Dict, List
 
-import psycopg2
 from flask import Blueprint, Response, jsonify, request
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.pdfgen import canvas
-    PDF_AVAILABLE = True
-except Exception:
-    A4 = None
-    mm = None
-    canvas = None
-    PDF_AVAILABLE = False
-
-from .config import config
+
 from .db import get_connection, release_connection
+from .exports import csv_response
+from .http_cache import cache_tables
+from . import lookups
+from .parallel import fanout_stats, run_queries
 
 
 clinic_bp = Blueprint("clinic", __name__)
@@ -32,14 +23,38 @@ def fetch_daily_pnl(start: date, end: date) -> List[Dict[str, Any]]:
     conn = get_connection()
     try:
         cur = conn.cursor()
+        # Same figures as the daily_pnl view, but each source is filtered on its
+        # partition key so only the requested months are scanned.
         cur.execute(
             """
-            SELECT day, total_income, total_outcome, pnl
-            FROM daily_pnl
-            WHERE day BETWEEN %s AND %s
+            SELECT d::DATE AS day,
+                   COALESCE(inc.total_income, 0) AS total_income,
+                   COALESCE(out.total_outcome, 0) + COALESCE(sal.total_salaries, 0) AS total_outcome,
+                   COALESCE(inc.total_income, 0)
+                       - COALESCE(out.total_outcome, 0)
+                       - COALESCE(sal.total_salaries, 0) AS pnl
+            FROM generate_series(%s::DATE, LEAST(%s::DATE, CURRENT_DATE), '1 day'::INTERVAL) d
+            LEFT JOIN (
+                SELECT service_date AS day, SUM(amount) AS total_income
+                FROM income_records
+                WHERE service_date BETWEEN %s AND %s
+                GROUP BY service_date
+            ) inc ON inc.day = d::DATE
+            LEFT JOIN (
+                SELECT expense_date AS day, SUM(amount) AS total_outcome
+                FROM outcome_records
+                WHERE expense_date BETWEEN %s AND %s
+                GROUP BY expense_date
+            ) out ON out.day = d::DATE
+            LEFT JOIN (
+                SELECT payment_date AS day, SUM(amount) AS total_salaries
+                FROM salary_payments
+                WHERE payment_date BETWEEN %s AND %s
+                GROUP BY payment_date
+            ) sal ON sal.day = d::DATE
             ORDER BY day
             """,
-            (start, end),
+            (start, end, start, end, start, end, start, end),
         )
         rows = cur.fetchall()
     finally:
@@ -62,16 +77,15 @@ def compute_doctor_avg_salary(start: date, end: date) -> float:
         cur.execute(
             """
             SELECT s.id,
-                   COALESCE(SUM(ir.amount * s.commission_rate), 0) AS earnings
+                   COALESCE(SUM(ir.amount * ir.commission_rate), 0) AS earnings
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
             LEFT JOIN income_records ir
               ON ir.doctor_id = s.id
              AND ir.service_date BETWEEN %s AND %s
-            WHERE r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.role_id = %s AND s.is_active = TRUE
             GROUP BY s.id
             """,
-            (start, end),
+            (start, end, lookups.role_id(conn, "doctor")),
         )
         rows = cur.fetchall()
     finally:
@@ -110,6 +124,9 @@ def pct_change(current: float, previous: float) -> float:
 
 
 @clinic_bp.route("/dashboard", methods=["GET"])
+@cache_tables(
+    "income_records", "outcome_records", "salary_payments", "salary_adjustments", "staff", "patients", "clinic_settings"
+)
 def dashboard():
     today = date.today()
     start_param = request.args.get("from")
@@ -125,11 +142,8 @@ def dashboard():
     conn = get_connection()
     try:
         cur = conn.cursor()
-        cur.execute(
-            "SELECT setting_value FROM clinic_settings WHERE setting_key = 'monthly_lease_cost'"
-        )
-        lease_row = cur.fetchone()
-        lease_cost = float(lease_row[0]) if lease_row and lease_row[0] is not None else 0.0
+        lease_value = lookups.setting(conn, "monthly_lease_cost")
+        lease_cost = float(lease_value) if lease_value is not None else 0.0
 
         cur.execute("SELECT avg_payment FROM avg_patient_payment")
         avg_payment_row = cur.fetchone()
@@ -241,11 +255,7 @@ def dashboard():
         cur.execute(
             """
             SELECT COUNT(*)
-            FROM (
-              SELECT patient_id, MIN(service_date) AS first_visit
-              FROM income_records
-              GROUP BY patient_id
-            ) sub
+            FROM patient_stats
             WHERE first_visit BETWEEN %s AND %s
             """,
             (start, end),
@@ -316,12 +326,11 @@ def dashboard():
                    COALESCE(AVG(ir.amount), 0) AS avg_visit_value
             FROM income_records ir
             JOIN staff s ON s.id = ir.doctor_id
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE r.name = 'doctor' AND ir.service_date BETWEEN %s AND %s
+            WHERE s.role_id = %s AND ir.service_date BETWEEN %s AND %s
             GROUP BY s.id, s.first_name, s.last_name
             ORDER BY total_income DESC
             """,
-            (start, end),
+            (lookups.role_id(conn, "doctor"), start, end),
         )
         doctor_rows = cur.fetchall()
 
@@ -374,43 +383,20 @@ def dashboard():
         )
         busiest_rows = cur.fetchall()
 
-        try:
-            cur.execute(
-                """
-                SELECT s.id,
-                       s.first_name,
-                       s.last_name,
-                       s.total_revenue,
-                       s.commission_rate,
-                       COALESCE(SUM(sp.amount), 0) AS paid
-                FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                LEFT JOIN salary_payments sp ON sp.staff_id = s.id
-                WHERE r.name = 'doctor' AND s.is_active = TRUE
-                GROUP BY s.id, s.first_name, s.last_name, s.total_revenue, s.commission_rate
-                """
-            )
-            commission_rows = cur.fetchall()
-            commission_rate_default = None
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT s.id,
-                       s.first_name,
-                       s.last_name,
-                       s.total_revenue,
-                       COALESCE(SUM(sp.amount), 0) AS paid
-                FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                LEFT JOIN salary_payments sp ON sp.staff_id = s.id
-                WHERE r.name = 'doctor' AND s.is_active = TRUE
-                GROUP BY s.id, s.first_name, s.last_name, s.total_revenue
-                """
-            )
-            commission_rows = cur.fetchall()
-            commission_rate_default = config.DOCTOR_COMMISSION_RATE
+        cur.execute(
+            """
+            SELECT s.id,
+                   s.first_name,
+                   s.last_name,
+                   COALESCE(co.outstanding, 0) AS outstanding
+            FROM staff s
+            LEFT JOIN commission_outstanding co ON co.doctor_id = s.id
+            WHERE s.role_id = %s AND s.is_active = TRUE
+            ORDER BY s.id
+            """,
+            (lookups.role_id(conn, "doctor"),),
+        )
+        commission_rows = cur.fetchall()
     finally:
         release_connection(conn)
 
@@ -489,32 +475,14 @@ def dashboard():
         {"dow": int(row[0]), "count": int(row[1] or 0)} for row in busiest_rows
     ]
 
-    outstanding_commission = []
-    if commission_rate_default is None:
-        for row in commission_rows:
-            total_revenue = float(row[3] or 0)
-            commission_rate = float(row[4] or 0)
-            paid = float(row[5] or 0)
-            outstanding = max(total_revenue * commission_rate - paid, 0)
-            outstanding_commission.append(
-                {
-                    "id": int(row[0]),
-                    "name": " ".join(filter(None, [row[1], row[2]])).strip(),
-                    "amount": round(outstanding, 2),
-                }
-            )
-    else:
-        for row in commission_rows:
-            total_revenue = float(row[3] or 0)
-            paid = float(row[4] or 0)
-            outstanding = max(total_revenue * commission_rate_default - paid, 0)
-            outstanding_commission.append(
-                {
-                    "id": int(row[0]),
-                    "name": " ".join(filter(None, [row[1], row[2]])).strip(),
-                    "amount": round(outstanding, 2),
-                }
-            )
+    outstanding_commission = [
+        {
+            "id": int(row[0]),
+            "name": " ".join(filter(None, [row[1], row[2]])).strip(),
+            "amount": round(max(float(row[3] or 0), 0.0), 2),
+        }
+        for row in commission_rows
+    ]
 
     lab_ratio = round((lab_total / total_income) * 100, 2) if total_income > 0 else 0.0
     cash_ratio = round((cash_total / total_income) * 100, 2) if total_income > 0 else 0.0
@@ -577,33 +545,22 @@ def export_daily_pnl_csv():
 
     pnl_series = fetch_daily_pnl(start, end)
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["day", "total_income", "total_outcome", "pnl"])
-    for item in pnl_series:
-        writer.writerow(
-            [
-                item["day"],
-                item["total_income"],
-                item["total_outcome"],
-                item["pnl"],
-            ]
-        )
-
-    csv_data = output.getvalue()
-
-    return Response(
-        csv_data,
-        mimetype="text/csv",
-        headers={
-            "Content-Disposition": "attachment; filename=daily_pnl.csv",
-        },
+    return csv_response(
+        ["day", "total_income", "total_outcome", "pnl"],
+        pnl_series,
+        "daily_pnl.csv",
+        to_row=lambda item: [item["day"], item["total_income"], item["total_outcome"], item["pnl"]],
     )
 
 
 @clinic_bp.route("/daily-pnl/export/pdf", methods=["GET"])
 def export_daily_pnl_pdf():
-    if not PDF_AVAILABLE:
+    # ReportLab costs ~30 ms to import; only PDF requests pay for it.
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.pdfgen import canvas
+    except Exception:
         return jsonify({"error": "pdf_export_unavailable"}), 503
     today = date.today()
     start_param = request.args.get("from")
@@ -665,6 +622,9 @@ def export_daily_pnl_pdf():
 
 
 @clinic_bp.route("/dashboard-data", methods=["GET"])
+@cache_tables(
+    "income_records", "outcome_records", "salary_payments", "salary_adjustments", "staff", "patients"
+)
 def get_dashboard_data():
     period = request.args.get("period", "month")  # day, week, month, year
     date_param = request.args.get("date", date.today().isoformat())
@@ -694,151 +654,109 @@ def get_dashboard_data():
         start_date = ref_date.replace(month=1, day=1)
         end_date = ref_date.replace(month=12, day=31)
     
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        
-        # 1. Fetch Stats Summary
-        cur.execute(
-            """
-            SELECT 
-                COALESCE(SUM(amount), 0) as income
-            FROM income_records
-            WHERE service_date BETWEEN %s AND %s
-            """,
-            (start_date, end_date)
-        )
-        total_income = float(cur.fetchone()[0])
-
-        cur.execute(
-            """
-            SELECT 
-                COALESCE(SUM(amount), 0) as expenses
-            FROM outcome_records
-            WHERE expense_date BETWEEN %s AND %s
-            """,
-            (start_date, end_date)
-        )
-        total_expenses = float(cur.fetchone()[0])
-
-        cur.execute(
-            """
-            SELECT 
-                COALESCE(SUM(amount), 0) as salaries
-            FROM salary_payments
-            WHERE payment_date BETWEEN %s AND %s
-            """,
-            (start_date, end_date)
-        )
-        total_salaries = float(cur.fetchone()[0])
-        
-        cur.execute(
-            """
-            SELECT COUNT(DISTINCT patient_id)
-            FROM income_records
-            WHERE service_date BETWEEN %s AND %s
-            """,
-            (start_date, end_date)
-        )
-        total_patients = int(cur.fetchone()[0])
-
-        stats = {
-            "total_income": total_income,
-            "total_expenses": total_expenses,
-            "total_salaries": total_salaries,
-            "net_profit": total_income - total_expenses - total_salaries,
-            "total_patients": total_patients
-        }
-        
-        # Extended Metrics Calculations
-        
-        # Financial Overview - Ratios
-        cur.execute(
-            """
-            SELECT
-              COALESCE(SUM(CASE WHEN payment_method = 'cash' THEN amount END), 0),
-              COALESCE(SUM(CASE WHEN payment_method = 'card' THEN amount END), 0)
-            FROM income_records
-            WHERE service_date BETWEEN %s AND %s
-            """,
-            (start_date, end_date),
-        )
-        cash_total, card_total = cur.fetchone()
-        cash_total = float(cash_total or 0)
-        card_total = float(card_total or 0)
-        
-        has_lab_cost = column_exists(conn, "income_records", "lab_cost")
-        if has_lab_cost:
-            cur.execute(
+    # Independent period aggregates run concurrently
+    results = run_queries(
+        {
+            "income": (
                 """
-                SELECT COALESCE(SUM(lab_cost), 0)
+                SELECT COALESCE(SUM(amount), 0),
+                       COUNT(DISTINCT patient_id),
+                       COALESCE(SUM(CASE WHEN payment_method = 'cash' THEN amount END), 0),
+                       COALESCE(SUM(CASE WHEN payment_method = 'card' THEN amount END), 0),
+                       COALESCE(SUM(lab_cost), 0)
                 FROM income_records
                 WHERE service_date BETWEEN %s AND %s
                 """,
                 (start_date, end_date),
-            )
-            lab_total = float(cur.fetchone()[0] or 0)
-        else:
-            lab_total = 0.0
-            
-        lab_ratio = round((lab_total / total_income) * 100, 2) if total_income > 0 else 0.0
-        cash_ratio = round((cash_total / total_income) * 100, 2) if total_income > 0 else 0.0
-        card_ratio = round((card_total / total_income) * 100, 2) if total_income > 0 else 0.0
-        
-        financial_overview = {
-            "net_profit": stats["net_profit"],
-            "lab_ratio": lab_ratio,
-            "cash_total": cash_total,
-            "card_total": card_total,
-            "cash_ratio": cash_ratio,
-            "card_ratio": card_ratio
-        }
+            ),
+            "expenses": (
+                "SELECT COALESCE(SUM(amount), 0) FROM outcome_records WHERE expense_date BETWEEN %s AND %s",
+                (start_date, end_date),
+            ),
+            "salaries": (
+                "SELECT COALESCE(SUM(amount), 0) FROM salary_payments WHERE payment_date BETWEEN %s AND %s",
+                (start_date, end_date),
+            ),
+            "new_patients": (
+                "SELECT COUNT(*) FROM patient_stats WHERE first_visit BETWEEN %s AND %s",
+                (start_date, end_date),
+            ),
+            "avg_payment": ("SELECT avg_payment FROM avg_patient_payment", ()),
+            "top_patients": (
+                """
+                SELECT p.id,
+                       p.first_name,
+                       p.last_name,
+                       COALESCE(SUM(ir.amount), 0) AS total_spend
+                FROM income_records ir
+                JOIN patients p ON p.id = ir.patient_id
+                WHERE ir.service_date BETWEEN %s AND %s
+                GROUP BY p.id, p.first_name, p.last_name
+                ORDER BY total_spend DESC
+                LIMIT 5
+                """,
+                (start_date, end_date),
+            ),
+        },
+        connect=get_connection,
+        release=release_connection,
+    )
 
-        # Patient Insights
-        cur.execute(
-            """
-            SELECT COUNT(*)
-            FROM (
-              SELECT patient_id, MIN(service_date) AS first_visit
-              FROM income_records
-              GROUP BY patient_id
-            ) sub
-            WHERE first_visit BETWEEN %s AND %s
-            """,
-            (start_date, end_date),
-        )
-        new_patients = int(cur.fetchone()[0] or 0)
-        
-        cur.execute("SELECT avg_payment FROM avg_patient_payment")
-        avg_payment_row = cur.fetchone()
-        avg_payment = (float(avg_payment_row[0]) if avg_payment_row and avg_payment_row[0] is not None else 0.0)
-        
-        cur.execute(
-            """
-            SELECT p.id,
-                   p.first_name,
-                   p.last_name,
-                   COALESCE(SUM(ir.amount), 0) AS total_spend
-            FROM income_records ir
-            JOIN patients p ON p.id = ir.patient_id
-            WHERE ir.service_date BETWEEN %s AND %s
-            GROUP BY p.id, p.first_name, p.last_name
-            ORDER BY total_spend DESC
-            LIMIT 5
-            """,
-            (start_date, end_date),
-        )
-        top_patients = [
-            {"id": row[0], "name": f"{row[1]} {row[2]}", "total_spend": float(row[3])}
-            for row in cur.fetchall()
-        ]
-        
-        patient_insights = {
-            "unique_patients": stats["total_patients"],
-            "new_patients": new_patients,
-            "avg_revenue_per_visit": avg_payment,
-            "top_patients": top_patients
-        }
+    def first_row(name: str, width: int) -> tuple:
+        rows = results[name]
+        return rows[0] if rows else (0,) * width
+
+    total_income, total_patients, cash_total, card_total, lab_total = first_row("income", 5)
+    total_income = float(total_income or 0)
+    total_patients = int(total_patients or 0)
+    cash_total = float(cash_total or 0)
+    card_total = float(card_total or 0)
+    lab_total = float(lab_total or 0)
+    total_expenses = float(first_row("expenses", 1)[0] or 0)
+    total_salaries = float(first_row("salaries", 1)[0] or 0)
+    new_patients = int(first_row("new_patients", 1)[0] or 0)
+    avg_payment_row = results["avg_payment"][0] if results["avg_payment"] else None
+    avg_payment = (float(avg_payment_row[0]) if avg_payment_row and avg_payment_row[0] is not None else 0.0)
+    top_patients = [
+        {"id": row[0], "name": f"{row[1]} {row[2]}", "total_spend": float(row[3])}
+        for row in results["top_patients"]
+    ]
+
+    stats = {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "total_salaries": total_salaries,
+        "net_profit": total_income - total_expenses - total_salaries,
+        "total_patients": total_patients
+    }
+
+    # Extended Metrics Calculations
+
+    # Financial Overview - Ratios
+    lab_ratio = round((lab_total / total_income) * 100, 2) if total_income > 0 else 0.0
+    cash_ratio = round((cash_total / total_income) * 100, 2) if total_income > 0 else 0.0
+    card_ratio = round((card_total / total_income) * 100, 2) if total_income > 0 else 0.0
+
+    financial_overview = {
+        "net_profit": stats["net_profit"],
+        "lab_ratio": lab_ratio,
+        "cash_total": cash_total,
+        "card_total": card_total,
+        "cash_ratio": cash_ratio,
+        "card_ratio": card_ratio
+    }
+
+    # Patient Insights
+    patient_insights = {
+        "unique_patients": stats["total_patients"],
+        "new_patients": new_patients,
+        "avg_revenue_per_visit": avg_payment,
+        "top_patients": top_patients
+    }
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
         
         # Doctor Performance
         cur.execute(
@@ -851,12 +769,11 @@ def get_dashboard_data():
                    COALESCE(AVG(ir.amount), 0) AS avg_visit_value
             FROM income_records ir
             JOIN staff s ON s.id = ir.doctor_id
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE r.name = 'doctor' AND ir.service_date BETWEEN %s AND %s
+            WHERE s.role_id = %s AND ir.service_date BETWEEN %s AND %s
             GROUP BY s.id, s.first_name, s.last_name
             ORDER BY total_income DESC
             """,
-            (start_date, end_date),
+            (lookups.role_id(conn, "doctor"), start_date, end_date),
         )
         doctor_performance = [
             {
@@ -1058,72 +975,27 @@ def get_dashboard_data():
         busiest_days = [{"dow": int(row[0]), "count": int(row[1])} for row in busiest_rows]
 
         # Outstanding Commission
-        try:
-            cur.execute(
-                """
-                SELECT s.id,
-                       s.first_name,
-                       s.last_name,
-                       s.total_revenue,
-                       s.commission_rate,
-                       COALESCE(SUM(sp.amount), 0) AS paid
-                FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                LEFT JOIN salary_payments sp ON sp.staff_id = s.id
-                WHERE r.name = 'doctor' AND s.is_active = TRUE
-                GROUP BY s.id, s.first_name, s.last_name, s.total_revenue, s.commission_rate
-                """
-            )
-            commission_rows = cur.fetchall()
-            commission_rate_default = None
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT s.id,
-                       s.first_name,
-                       s.last_name,
-                       s.total_revenue,
-                       COALESCE(SUM(sp.amount), 0) AS paid
-                FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                LEFT JOIN salary_payments sp ON sp.staff_id = s.id
-                WHERE r.name = 'doctor' AND s.is_active = TRUE
-                GROUP BY s.id, s.first_name, s.last_name, s.total_revenue
-                """
-            )
-            commission_rows = cur.fetchall()
-            commission_rate_default = config.DOCTOR_COMMISSION_RATE
-            
-        outstanding_commission = []
-        if commission_rate_default is None:
-            for row in commission_rows:
-                total_revenue = float(row[3] or 0)
-                commission_rate = float(row[4] or 0)
-                paid = float(row[5] or 0)
-                outstanding = max(total_revenue * commission_rate - paid, 0)
-                if outstanding > 0:
-                    outstanding_commission.append(
-                        {
-                            "id": int(row[0]),
-                            "name": " ".join(filter(None, [row[1], row[2]])).strip(),
-                            "amount": round(outstanding, 2),
-                        }
-                    )
-        else:
-            for row in commission_rows:
-                total_revenue = float(row[3] or 0)
-                paid = float(row[4] or 0)
-                outstanding = max(total_revenue * commission_rate_default - paid, 0)
-                if outstanding > 0:
-                    outstanding_commission.append(
-                        {
-                            "id": int(row[0]),
-                            "name": " ".join(filter(None, [row[1], row[2]])).strip(),
-                            "amount": round(outstanding, 2),
-                        }
-                    )
+        cur.execute(
+            """
+            SELECT s.id,
+                   s.first_name,
+                   s.last_name,
+                   co.outstanding
+            FROM commission_outstanding co
+            JOIN staff s ON s.id = co.doctor_id
+            WHERE s.role_id = %s AND s.is_active = TRUE AND co.outstanding > 0
+            ORDER BY s.id
+            """,
+            (lookups.role_id(conn, "doctor"),),
+        )
+        outstanding_commission = [
+            {
+                "id": int(row[0]),
+                "name": " ".join(filter(None, [row[1], row[2]])).strip(),
+                "amount": round(float(row[3] or 0), 2),
+            }
+            for row in cur.fetchall()
+        ]
 
         # 4. Detailed Stats (if Day view) - keep existing logic
         details = {}
@@ -1197,6 +1069,7 @@ def get_dashboard_data():
 
 
 @clinic_bp.route("/dashboard/stats", methods=["GET"])
+@cache_tables("income_records", "outcome_records", "salary_payments")
 def get_dashboard_stats():
     granularity = request.args.get("granularity", "month")  # day, week, month, year
     
@@ -1214,265 +1087,240 @@ def get_dashboard_stats():
         start = parse_date(start_param) if start_param else today.replace(day=1)
         end = parse_date(end_param) if end_param else today
 
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        
-        data = []
-        labels = []
-        
-        if granularity == "day":
-            # Hourly breakdown for a specific day
-            # Income
-            cur.execute(
-                """
-                SELECT EXTRACT(HOUR FROM service_time) as h, COALESCE(SUM(amount), 0)
-                FROM income_records
-                WHERE service_date = %s
-                GROUP BY h
-                ORDER BY h
-                """,
-                (start,)
-            )
-            income_rows = {int(r[0]): float(r[1]) for r in cur.fetchall()}
-            
-            # Outcome
-            cur.execute(
-                """
-                SELECT EXTRACT(HOUR FROM expense_time) as h, COALESCE(SUM(amount), 0)
-                FROM outcome_records
-                WHERE expense_date = %s
-                GROUP BY h
-                ORDER BY h
-                """,
-                (start,)
-            )
-            outcome_rows = {int(r[0]): float(r[1]) for r in cur.fetchall()}
-            
-            # Salaries (usually no time, assume 00:00 or spread? For now ignore or put at 0)
-            # Salaries are usually daily. Maybe just show as a separate stat or at noon?
-            # User requirement: "Day view: Display hourly timestamps"
-            # We will generate 0-23 hours
-            for h in range(24):
-                time_label = f"{h:02d}:00"
-                inc = income_rows.get(h, 0.0)
-                out = outcome_rows.get(h, 0.0)
-                data.append({
-                    "label": time_label,
-                    "income": inc,
-                    "outcome": out,
-                    "timestamp": f"{start.isoformat()}T{time_label}" # Pseudo ISO for clicking
-                })
+    data = []
 
-        elif granularity == "year":
-            # Monthly breakdown
-            # Income
-            cur.execute(
-                """
-                SELECT TO_CHAR(service_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
-                FROM income_records
-                WHERE service_date BETWEEN %s AND %s
-                GROUP BY 1
-                ORDER BY 1
-                """,
-                (start, end)
-            )
-            income_rows = {r[0]: float(r[1]) for r in cur.fetchall()}
-            
-            # Outcome
-            cur.execute(
-                """
-                SELECT TO_CHAR(expense_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
-                FROM outcome_records
-                WHERE expense_date BETWEEN %s AND %s
-                GROUP BY 1
-                ORDER BY 1
-                """,
-                (start, end)
-            )
-            outcome_rows = {r[0]: float(r[1]) for r in cur.fetchall()}
-            
-            # Salaries
-            cur.execute(
-                """
-                SELECT TO_CHAR(payment_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
-                FROM salary_payments
-                WHERE payment_date BETWEEN %s AND %s
-                GROUP BY 1
-                ORDER BY 1
-                """,
-                (start, end)
-            )
-            salary_rows = {r[0]: float(r[1]) for r in cur.fetchall()}
-            
-            # Generate months in range
-            curr = start.replace(day=1)
-            while curr <= end:
-                key = curr.strftime("%Y-%m")
-                month_label = curr.strftime("%B") # Full month name
-                inc = income_rows.get(key, 0.0)
-                out = outcome_rows.get(key, 0.0) + salary_rows.get(key, 0.0)
-                data.append({
-                    "label": month_label,
-                    "key": key, # For navigation
-                    "income": inc,
-                    "outcome": out
-                })
-                # Move to next month
-                if curr.month == 12:
-                    curr = curr.replace(year=curr.year + 1, month=1)
-                else:
-                    curr = curr.replace(month=curr.month + 1)
-                    
-        else:
-            # Week/Month view -> Daily breakdown
-            # Use daily_pnl view
-            cur.execute(
-                """
-                SELECT day, total_income, total_outcome
-                FROM daily_pnl
-                WHERE day BETWEEN %s AND %s
-                ORDER BY day
-                """,
-                (start, end)
-            )
-            rows = cur.fetchall()
-            row_map = {r[0].isoformat(): {"income": float(r[1]), "outcome": float(r[2])} for r in rows}
-            
-            # Fill all days
-            curr = start
-            while curr <= end:
-                key = curr.isoformat()
-                val = row_map.get(key, {"income": 0.0, "outcome": 0.0})
-                
-                # Label format
-                if granularity == "week":
-                    label = curr.strftime("%A") # Monday, Tuesday...
-                else:
-                    label = curr.strftime("%d") # 1, 2...
-                    
-                data.append({
-                    "label": label,
-                    "key": key,
-                    "income": val["income"],
-                    "outcome": val["outcome"]
-                })
-                curr += timedelta(days=1)
+    if granularity == "day":
+        # Hourly breakdown for a specific day
+        results = run_queries(
+            {
+                "income": (
+                    """
+                    SELECT EXTRACT(HOUR FROM service_time) as h, COALESCE(SUM(amount), 0)
+                    FROM income_records
+                    WHERE service_date = %s
+                    GROUP BY h
+                    ORDER BY h
+                    """,
+                    (start,),
+                ),
+                "outcome": (
+                    """
+                    SELECT EXTRACT(HOUR FROM expense_time) as h, COALESCE(SUM(amount), 0)
+                    FROM outcome_records
+                    WHERE expense_date = %s
+                    GROUP BY h
+                    ORDER BY h
+                    """,
+                    (start,),
+                ),
+            },
+            connect=get_connection,
+            release=release_connection,
+        )
+        income_rows = {int(r[0]): float(r[1]) for r in results["income"] if r[0] is not None}
+        outcome_rows = {int(r[0]): float(r[1]) for r in results["outcome"] if r[0] is not None}
+
+        # Salaries have no time of day, so the hourly view shows income and outcome only
+        for h in range(24):
+            time_label = f"{h:02d}:00"
+            inc = income_rows.get(h, 0.0)
+            out = outcome_rows.get(h, 0.0)
+            data.append({
+                "label": time_label,
+                "income": inc,
+                "outcome": out,
+                "timestamp": f"{start.isoformat()}T{time_label}" # Pseudo ISO for clicking
+            })
 
-    finally:
-        release_connection(conn)
+    elif granularity == "year":
+        # Monthly breakdown
+        results = run_queries(
+            {
+                "income": (
+                    """
+                    SELECT TO_CHAR(service_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
+                    FROM income_records
+                    WHERE service_date BETWEEN %s AND %s
+                    GROUP BY 1
+                    ORDER BY 1
+                    """,
+                    (start, end),
+                ),
+                "outcome": (
+                    """
+                    SELECT TO_CHAR(expense_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
+                    FROM outcome_records
+                    WHERE expense_date BETWEEN %s AND %s
+                    GROUP BY 1
+                    ORDER BY 1
+                    """,
+                    (start, end),
+                ),
+                "salaries": (
+                    """
+                    SELECT TO_CHAR(payment_date, 'YYYY-MM'), COALESCE(SUM(amount), 0)
+                    FROM salary_payments
+                    WHERE payment_date BETWEEN %s AND %s
+                    GROUP BY 1
+                    ORDER BY 1
+                    """,
+                    (start, end),
+                ),
+            },
+            connect=get_connection,
+            release=release_connection,
+        )
+        income_rows = {r[0]: float(r[1]) for r in results["income"]}
+        outcome_rows = {r[0]: float(r[1]) for r in results["outcome"]}
+        salary_rows = {r[0]: float(r[1]) for r in results["salaries"]}
+
+        # Generate months in range
+        curr = start.replace(day=1)
+        while curr <= end:
+            key = curr.strftime("%Y-%m")
+            month_label = curr.strftime("%B") # Full month name
+            inc = income_rows.get(key, 0.0)
+            out = outcome_rows.get(key, 0.0) + salary_rows.get(key, 0.0)
+            data.append({
+                "label": month_label,
+                "key": key, # For navigation
+                "income": inc,
+                "outcome": out
+            })
+            # Move to next month
+            if curr.month == 12:
+                curr = curr.replace(year=curr.year + 1, month=1)
+            else:
+                curr = curr.replace(month=curr.month + 1)
+
+    else:
+        # Week/Month view -> Daily breakdown from daily_pnl
+        row_map = {
+            row["day"]: {"income": row["total_income"], "outcome": row["total_outcome"]}
+            for row in fetch_daily_pnl(start, end)
+        }
+
+        # Fill all days
+        curr = start
+        while curr <= end:
+            key = curr.isoformat()
+            val = row_map.get(key, {"income": 0.0, "outcome": 0.0})
+
+            # Label format
+            if granularity == "week":
+                label = curr.strftime("%A") # Monday, Tuesday...
+            else:
+                label = curr.strftime("%d") # 1, 2...
+
+            data.append({
+                "label": label,
+                "key": key,
+                "income": val["income"],
+                "outcome": val["outcome"]
+            })
+            curr += timedelta(days=1)
 
     return jsonify(data)
 
 
+@clinic_bp.route("/dashboard/fanout-stats", methods=["GET"])
+def get_fanout_stats():
+    return jsonify(fanout_stats())
+
+
 @clinic_bp.route("/dashboard/day-details", methods=["GET"])
+@cache_tables("income_records", "outcome_records", "salary_payments", "staff")
 def get_day_details():
     date_param = request.args.get("date")
     if not date_param:
         return jsonify({"error": "date_required"}), 400
     
     target_date = parse_date(date_param)
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        
-        # 1. Highest earning doctor
-        cur.execute(
-            """
-            SELECT s.id, s.first_name, s.last_name, SUM(ir.amount) as total
-            FROM income_records ir
-            JOIN staff s ON s.id = ir.doctor_id
-            WHERE ir.service_date = %s
-            GROUP BY s.id
-            ORDER BY total DESC
-            LIMIT 1
-            """,
-            (target_date,)
-        )
-        doctor_row = cur.fetchone()
-        highest_earning_doctor = None
-        if doctor_row:
-            highest_earning_doctor = {
-                "id": doctor_row[0],
-                "name": f"{doctor_row[1]} {doctor_row[2]}",
-                "amount": float(doctor_row[3])
-            }
-            
-        # 2. Revenue Breakdown (Cash/Card)
-        cur.execute(
-            """
-            SELECT payment_method, SUM(amount)
-            FROM income_records
-            WHERE service_date = %s
-            GROUP BY payment_method
-            """,
-            (target_date,)
-        )
-        revenue_breakdown = {r[0]: float(r[1]) for r in cur.fetchall()}
-        
-        # 3. Patient Count
-        cur.execute(
-            """
-            SELECT COUNT(DISTINCT patient_id)
-            FROM income_records
-            WHERE service_date = %s
-            """,
-            (target_date,)
-        )
-        patient_count = int(cur.fetchone()[0] or 0)
-        
-        # 4. Metrics
-        cur.execute(
-            """
-            SELECT COALESCE(SUM(amount), 0) FROM income_records WHERE service_date = %s
-            """,
-            (target_date,)
-        )
-        total_income = float(cur.fetchone()[0] or 0)
-        
-        cur.execute(
-            """
-            SELECT COALESCE(SUM(amount), 0) FROM outcome_records WHERE expense_date = %s
-            """,
-            (target_date,)
-        )
-        total_expenses = float(cur.fetchone()[0] or 0)
-        
-        cur.execute(
-            """
-            SELECT COALESCE(SUM(amount), 0) FROM salary_payments WHERE payment_date = %s
-            """,
-            (target_date,)
-        )
-        total_salaries = float(cur.fetchone()[0] or 0)
-        
-        # 5. Appointment Types (derived from note if possible, or just list recent)
-        # We will list top 5 notes/types
-        cur.execute(
-            """
-            SELECT note, COUNT(*)
-            FROM income_records
-            WHERE service_date = %s AND note IS NOT NULL AND note != ''
-            GROUP BY note
-            ORDER BY COUNT(*) DESC
-            LIMIT 5
-            """,
-            (target_date,)
-        )
-        appointment_types = [{"type": r[0], "count": r[1]} for r in cur.fetchall()]
-        
-        return jsonify({
-            "date": target_date.isoformat(),
-            "metrics": {
-                "total_income": total_income,
-                "total_outcome": total_expenses + total_salaries,
-                "net_profit": total_income - (total_expenses + total_salaries)
-            },
-            "highest_earning_doctor": highest_earning_doctor,
-            "revenue_breakdown": revenue_breakdown,
-            "patient_count": patient_count,
-            "appointment_types": appointment_types
-        })
-        
-    finally:
-        release_connection(conn)
+    results = run_queries(
+        {
+            # 1. Highest earning doctor
+            "doctor": (
+                """
+                SELECT s.id, s.first_name, s.last_name, SUM(ir.amount) as total
+                FROM income_records ir
+                JOIN staff s ON s.id = ir.doctor_id
+                WHERE ir.service_date = %s
+                GROUP BY s.id
+                ORDER BY total DESC
+                LIMIT 1
+                """,
+                (target_date,),
+            ),
+            # 2. Revenue Breakdown (Cash/Card)
+            "revenue": (
+                """
+                SELECT payment_method, SUM(amount)
+                FROM income_records
+                WHERE service_date = %s
+                GROUP BY payment_method
+                """,
+                (target_date,),
+            ),
+            # 3. Patient count and income
+            "income": (
+                """
+                SELECT COUNT(DISTINCT patient_id), COALESCE(SUM(amount), 0)
+                FROM income_records
+                WHERE service_date = %s
+                """,
+                (target_date,),
+            ),
+            # 4. Expenses and salaries
+            "expenses": (
+                "SELECT COALESCE(SUM(amount), 0) FROM outcome_records WHERE expense_date = %s",
+                (target_date,),
+            ),
+            "salaries": (
+                "SELECT COALESCE(SUM(amount), 0) FROM salary_payments WHERE payment_date = %s",
+                (target_date,),
+            ),
+            # 5. Appointment Types (top 5 notes)
+            "types": (
+                """
+                SELECT note, COUNT(*)
+                FROM income_records
+                WHERE service_date = %s AND note IS NOT NULL AND note != ''
+                GROUP BY note
+                ORDER BY COUNT(*) DESC
+                LIMIT 5
+                """,
+                (target_date,),
+            ),
+        },
+        connect=get_connection,
+        release=release_connection,
+    )
+
+    highest_earning_doctor = None
+    if results["doctor"]:
+        doctor_row = results["doctor"][0]
+        highest_earning_doctor = {
+            "id": doctor_row[0],
+            "name": f"{doctor_row[1]} {doctor_row[2]}",
+            "amount": float(doctor_row[3])
+        }
+    revenue_breakdown = {r[0]: float(r[1]) for r in results["revenue"]}
+    patient_count, total_income = results["income"][0] if results["income"] else (0, 0)
+    patient_count = int(patient_count or 0)
+    total_income = float(total_income or 0)
+    total_expenses = float(results["expenses"][0][0] or 0) if results["expenses"] else 0.0
+    total_salaries = float(results["salaries"][0][0] or 0) if results["salaries"] else 0.0
+    appointment_types = [{"type": r[0], "count": r[1]} for r in results["types"]]
+
+    return jsonify({
+        "date": target_date.isoformat(),
+        "metrics": {
+            "total_income": total_income,
+            "total_outcome": total_expenses + total_salaries,
+            "net_profit": total_income - (total_expenses + total_salaries)
+        },
+        "highest_earning_doctor": highest_earning_doctor,
+        "revenue_breakdown": revenue_breakdown,
+        "patient_count": patient_count,
+        "appointment_types": appointment_types
+    })
@@ -0,0 +1,193 @@
+import gzip
+import io
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+from flask import Flask, Response, current_app, jsonify, request
+
+from .config import config
+from .exports import gzip_chunks
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except Exception:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Request bodies are only inflated with a bounded output buffer, which the
+# brotli bindings offer from 1.1 on.
+BROTLI_REQUESTS = BROTLI_AVAILABLE and hasattr(brotli.Decompressor, "can_accept_more_data")
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/pdf",
+    "application/yaml",
+    "text/calendar",
+    "text/csv",
+    "text/html",
+    "text/plain",
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Compressed request bodies are inflated in memory; anything larger is refused.
+MAX_REQUEST_BODY = 16 * 1024 * 1024
+
+
+def response_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def etag_variants(etag: str) -> Tuple[str, ...]:
+    """Entity tags a client may hold for one representation: identity plus one per encoding."""
+    return (etag,) + tuple(f"{etag}-{encoding}" for encoding in response_encodings())
+
+
+def _choose_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    best = accepted.best_match(response_encodings())
+    if best and accepted[best] > 0:
+        return best
+    return None
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        compressed = compressor.process(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def _encoded_stream(source: Iterable, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    encoded = _brotli_chunks(chunks) if encoding == "br" else gzip_chunks(chunks)
+    try:
+        yield from encoded
+    finally:
+        # Close the original body too, so stream_query releases its connection on disconnect.
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+
+def _compressible(response: Response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return False
+    if "no-transform" in (response.headers.get("Cache-Control") or ""):
+        return False
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response: Response) -> Response:
+    if not current_app.config.get("COMPRESSION") or not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Size is unknown up front, so streamed bodies are always encoded.
+        response.response = _encoded_stream(response.response, response.iter_encoded(), encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config.COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(_compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong tag names exact bytes, so each encoding gets its own.
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def _inflate_brotli(data: bytes) -> bytes:
+    decompressor = brotli.Decompressor()
+    inflated = bytearray()
+    pending = data
+    while not decompressor.is_finished():
+        piece = b""
+        if pending and decompressor.can_accept_more_data():
+            piece, pending = pending, b""
+        # The decoder stops near the limit (it rounds up to its buffer size),
+        # so a bomb is never inflated much past MAX_REQUEST_BODY.
+        chunk = decompressor.process(piece, output_buffer_limit=MAX_REQUEST_BODY + 1 - len(inflated))
+        inflated += chunk
+        if len(inflated) > MAX_REQUEST_BODY:
+            break
+        if not chunk and not pending and decompressor.can_accept_more_data():
+            raise ValueError("truncated_brotli_body")
+    return bytes(inflated)
+
+
+def _inflate(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        inflated = _inflate_brotli(data)
+    else:
+        wbits = 31 if encoding == "gzip" else zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        inflated = decompressor.decompress(data, MAX_REQUEST_BODY + 1)
+    if len(inflated) > MAX_REQUEST_BODY:
+        raise OverflowError("request_body_too_large")
+    return inflated
+
+
+def read_body(limit: int) -> bytes:
+    """Reads at most `limit` bytes of the raw request body."""
+    stream = request.stream
+    chunks = []
+    size = 0
+    while size < limit:
+        chunk = stream.read(min(64 * 1024, limit - size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks)
+
+
+def decompress_request():
+    encoding = (request.headers.get("Content-Encoding") or "").strip().lower()
+    if not encoding or encoding == "identity":
+        return None
+    if encoding not in ("gzip", "deflate") and not (encoding == "br" and BROTLI_REQUESTS):
+        return jsonify({"error": "unsupported_content_encoding"}), 415
+
+    # The compressed body is read into memory too, so it gets the same cap.
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BODY:
+        return jsonify({"error": "request_body_too_large"}), 413
+    data = read_body(MAX_REQUEST_BODY + 1)
+    if len(data) > MAX_REQUEST_BODY:
+        return jsonify({"error": "request_body_too_large"}), 413
+
+    try:
+        body = _inflate(data, encoding)
+    except OverflowError:
+        return jsonify({"error": "request_body_too_large"}), 413
+    except Exception:
+        return jsonify({"error": "invalid_compressed_body"}), 400
+
+    environ = request.environ
+    environ["wsgi.input"] = io.BytesIO(body)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ.pop("HTTP_CONTENT_ENCODING", None)
+    request.__dict__.pop("stream", None)
+    return None
+
+
+def init_app(app: Flask) -> None:
+    app.before_request(decompress_request)
+    app.after_request(compress_response)
@@ -9,7 +9,55 @@ class Config:
     DB_USER = os.environ.get("DB_USER", "policlinic")
     DB_PASSWORD = os.environ.get("DB_PASSWORD", "policlinic")
     CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "*")
+    # Shift templates store wall-clock times in this zone.
+    CLINIC_TIMEZONE = os.environ.get("CLINIC_TIMEZONE", "Europe/Prague")
+    # local | s3; see backend/storage.py. The local path defaults to
+    # backend/documents/salary_reports.
+    DOCUMENT_STORAGE = os.environ.get("DOCUMENT_STORAGE", "local").lower()
+    DOCUMENT_STORAGE_PATH = os.environ.get("DOCUMENT_STORAGE_PATH", "")
+    DOCUMENT_S3_BUCKET = os.environ.get("DOCUMENT_S3_BUCKET", "")
+    DOCUMENT_S3_PREFIX = os.environ.get("DOCUMENT_S3_PREFIX", "")
+    DOCUMENT_S3_ENDPOINT_URL = os.environ.get("DOCUMENT_S3_ENDPOINT_URL", "")
     DOCTOR_COMMISSION_RATE = float(os.environ.get("DOCTOR_COMMISSION_RATE", "0.3"))
+    HTTP_CACHE = os.environ.get("HTTP_CACHE", "1").lower() in ("1", "true", "yes")
+    COMPRESSION = os.environ.get("COMPRESSION", "1").lower() in ("1", "true", "yes")
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+    # Request threads per gunicorn worker; gunicorn.conf.py reads the same variable.
+    WORKER_THREADS = int(os.environ.get("GUNICORN_THREADS", "4"))
+    # Connections one dashboard fan-out uses, leader included; see backend/parallel.py.
+    FANOUT_WIDTH = 4
+    # Per worker process: one connection per thread, one fan-out's worth on
+    # top, and one for the audit drainer. Every FANOUT_WIDTH added beyond
+    # that lets one more fan-out run at once; see backend/parallel.py.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", str(WORKER_THREADS + FANOUT_WIDTH + 1)))
+    # auto | async | threads | sequential; see backend/parallel.py
+    QUERY_MODE = os.environ.get("QUERY_MODE", "auto").lower()
+    ASYNC_POOL_SIZE = int(os.environ.get("ASYNC_POOL_SIZE", str(FANOUT_WIDTH)))
+    # PostgreSQL's max_connections, and how many of them to leave to
+    # everything but the API workers: superuser slots, the events process,
+    # migrations, maintenance tasks and psql sessions.
+    DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", "100"))
+    DB_RESERVED_CONNECTIONS = int(os.environ.get("DB_RESERVED_CONNECTIONS", "10"))
+
+    @property
+    def connections_per_worker(self) -> int:
+        # The async pool only opens when QUERY_MODE can pick it.
+        async_pool = self.ASYNC_POOL_SIZE if self.QUERY_MODE in ("auto", "async") else 0
+        return self.DB_POOL_SIZE + async_pool
+
+    @property
+    def max_workers(self) -> int:
+        return max((self.DB_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS) // self.connections_per_worker, 1)
+
+    def check_connection_budget(self, workers: int) -> None:
+        needed = workers * self.connections_per_worker + self.DB_RESERVED_CONNECTIONS
+        if needed > self.DB_MAX_CONNECTIONS:
+            raise RuntimeError(
+                f"{workers} workers × {self.connections_per_worker} connections + "
+                f"{self.DB_RESERVED_CONNECTIONS} reserved = {needed}, over "
+                f"DB_MAX_CONNECTIONS={self.DB_MAX_CONNECTIONS}; lower WEB_CONCURRENCY, "
+                f"GUNICORN_THREADS or DB_POOL_SIZE"
+            )
 
     @property
     def database_dsn(self) -> str:
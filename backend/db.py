@@ -1,15 +1,64 @@
+import atexit
+import threading
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
 import time
 import sys
 
 from .config import config
 
 
-def init_db_pool(minconn: int = 1, maxconn: int = 10) -> None:
-    return None
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that waits for a free connection instead of raising PoolError."""
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None, timeout: float = 30):
+        if not self._slots.acquire(timeout=timeout):
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_db_pool(minconn: int = 1, maxconn: int = config.DB_POOL_SIZE) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return
+        max_retries = 5
+        retry_delay = 2
+        for attempt in range(max_retries):
+            try:
+                _pool = BlockingConnectionPool(minconn, maxconn, dsn=config.database_dsn)
+                atexit.register(close_pool)
+                return
+            except psycopg2.OperationalError:
+                if attempt == max_retries - 1:
+                    raise
+                print(f"Database pool init attempt {attempt + 1}/{max_retries} failed. Retrying in {retry_delay}s...", file=sys.stderr)
+                time.sleep(retry_delay)
 
 
 def get_connection():
+    if _pool is not None:
+        return _pool.getconn()
+
     max_retries = 5
     retry_delay = 2
     last_exception = None
@@ -21,15 +70,33 @@ def get_connection():
             last_exception = e
             print(f"Database connection attempt {attempt + 1}/{max_retries} failed. Retrying in {retry_delay}s...", file=sys.stderr)
             time.sleep(retry_delay)
-    
+
     print("Could not connect to database after several attempts.", file=sys.stderr)
     raise last_exception
 
 
 def release_connection(conn) -> None:
-    if conn:
+    if not conn:
+        return
+    if _pool is None:
         conn.close()
+        return
+    broken = bool(conn.closed)
+    if not broken:
+        try:
+            # Hand the connection back clean: no open transaction, default settings.
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except psycopg2.Error:
+            broken = True
+    _pool.putconn(conn, close=broken)
 
 
 def close_pool() -> None:
-    return None
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
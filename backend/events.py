@@ -0,0 +1,171 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+import psycopg2
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from .config import config
+
+
+logger = logging.getLogger(__name__)
+
+events_bp = Blueprint("events", __name__)
+
+EVENT_CHANNEL = "clinic_events"
+EVENT_TOPICS = ("income", "outcome", "salary", "shift")
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_DELAY = 5
+
+
+def _listen_connection():
+    # Kept outside the request pool: the listener holds it for the life of the process.
+    return psycopg2.connect(dsn=config.database_dsn)
+
+
+def _close_connection(conn) -> None:
+    conn.close()
+
+
+class EventBroker:
+    """Holds a single LISTEN connection and fans notifications out to subscriber queues."""
+
+    def __init__(self, connect: Callable = _listen_connection, release: Callable = _close_connection):
+        self._connect = connect
+        self._release = release
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._next_id = 0
+
+    def subscribe(self) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._next_id += 1
+            event = dict(event, seq=self._next_id)
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # A stalled client gets a resync marker instead of unbounded buffering.
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait({"topic": "resync", "seq": event["seq"]})
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="clinic-events", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {EVENT_CHANNEL}")
+                # Clients may have missed changes while the listener was down.
+                self.publish({"topic": "resync"})
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], HEARTBEAT_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed event payload: %s", notify.payload)
+            except Exception:
+                logger.exception("Event listener failed; reconnecting in %ss", RECONNECT_DELAY)
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    try:
+                        self._release(conn)
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    lines = []
+    if event.get("seq") is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"event: {event.get('topic', 'message')}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'), default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(topics: Optional[Set[str]], heartbeat: float = HEARTBEAT_SECONDS,
+                  q: Optional[queue.Queue] = None) -> Iterator[str]:
+    if q is None:
+        q = broker.subscribe()
+    try:
+        yield f"retry: {RECONNECT_DELAY * 1000}\n\n"
+        while True:
+            try:
+                event = q.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            topic = event.get("topic")
+            if topics and topic != "resync" and topic not in topics:
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(q)
+
+
+@events_bp.route("/stream", methods=["GET"])
+def event_stream():
+    raw_topics = request.args.get("topics")
+    topics = None
+    if raw_topics:
+        topics = {t.strip() for t in raw_topics.split(",") if t.strip()}
+        if not topics <= set(EVENT_TOPICS):
+            return jsonify({"error": "invalid_topic"}), 400
+
+    # In production the stream is served by create_events_app() under gevent
+    # (events_gunicorn.conf.py), where an open feed costs a greenlet rather
+    # than one of the API's request threads.
+    q = broker.subscribe()
+    if not current_app.testing:
+        broker.start()
+    response = Response(
+        stream_events(topics, q=q),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # The generator's own cleanup only runs once it has started.
+    response.call_on_close(lambda: broker.unsubscribe(q))
+    return response
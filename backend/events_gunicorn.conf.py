@@ -0,0 +1,15 @@
+import os
+
+
+# Serves backend.events_wsgi:application. Each open /api/events/stream is a
+# greenlet waiting on its queue, so one process holds every browser's feed
+# and relays them all from a single LISTEN connection.
+bind = os.environ.get("EVENTS_BIND", "0.0.0.0:5001")
+workers = 1
+worker_class = "gevent"
+worker_connections = int(os.environ.get("EVENTS_WORKER_CONNECTIONS", "1000"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 10
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
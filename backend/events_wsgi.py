@@ -0,0 +1,4 @@
+from .app import create_events_app
+
+
+application = create_events_app()
@@ -0,0 +1,138 @@
+import csv
+import uuid
+import zipfile
+import zlib
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Response, request
+
+from .db import get_connection, release_connection
+
+
+EXPORT_FETCH_SIZE = 2000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class _LineBuffer:
+    def write(self, value: str) -> str:
+        return value
+
+
+class _ChunkSink:
+    # zipfile sees no tell()/seek() here, so it writes data descriptors after
+    # each member instead of seeking back to patch the local headers.
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> List[bytes]:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def wants_gzip() -> bool:
+    return (request.args.get("gzip") or "").lower() in ("1", "true", "yes")
+
+
+def stream_query(
+    sql: str,
+    params: Sequence[Any] = (),
+    connect: Callable = get_connection,
+    release: Callable = release_connection,
+    fetch_size: int = EXPORT_FETCH_SIZE,
+) -> Iterator[tuple]:
+    # Named cursors stay on the server, so only fetch_size rows are held in memory.
+    conn = connect()
+    try:
+        cur = conn.cursor(name=f"export_{uuid.uuid4().hex}")
+        cur.itersize = fetch_size
+        cur.execute(sql, params)
+        for row in cur:
+            yield row
+        cur.close()
+    finally:
+        conn.rollback()
+        release(conn)
+
+
+def iter_csv(header: List[str], rows: Iterable[Any], to_row: Optional[Callable] = None) -> Iterator[bytes]:
+    writer = csv.writer(_LineBuffer())
+    chunk = [writer.writerow(header)]
+    size = len(chunk[0])
+    for row in rows:
+        line = writer.writerow(to_row(row) if to_row else row)
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk).encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def csv_response(
+    header: List[str],
+    rows: Iterable[Any],
+    filename: str,
+    to_row: Optional[Callable] = None,
+    compress: Optional[bool] = None,
+) -> Response:
+    body = iter_csv(header, rows, to_row)
+    if compress is None:
+        compress = wants_gzip()
+    if compress:
+        return Response(
+            gzip_chunks(body),
+            mimetype="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"},
+        )
+    return Response(
+        body,
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def iter_zip(entries: Iterable[Tuple[zipfile.ZipInfo, Iterable[bytes]]]) -> Iterator[bytes]:
+    # Members are written as their chunks arrive; only the central directory
+    # (one ZipInfo per member) is held until the end.
+    sink = _ChunkSink()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for info, chunks in entries:
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, "w", force_zip64=True) as member:
+                    for chunk in chunks:
+                        member.write(chunk)
+                        yield from sink.drain()
+                yield from sink.drain()
+        yield from sink.drain()
+    finally:
+        # Close the entry source too, so a stream_query behind it releases its connection.
+        close = getattr(entries, "close", None)
+        if close is not None:
+            close()
+
+
+def zip_response(entries: Iterable[Tuple[zipfile.ZipInfo, Iterable[bytes]]], filename: str) -> Response:
+    return Response(
+        iter_zip(entries),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,47 @@
+import importlib.util
+import multiprocessing
+import os
+
+
+def _load_config():
+    # gunicorn reads this file before the app directory is importable, and
+    # importing the backend package would load the whole app in the arbiter.
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py")
+    spec = importlib.util.spec_from_file_location("_clinic_config", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.config
+
+
+app_config = _load_config()
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+# By default as many workers as the CPUs suit and PostgreSQL's connections allow.
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, app_config.max_workers)))
+# gthread suits the blocking psycopg2 handlers. /api/events/stream is served
+# by its own gevent process; see events_gunicorn.conf.py.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# backend/config.py sizes each worker's connection pools from GUNICORN_THREADS;
+# on_starting refuses to boot when the workers would exceed DB_MAX_CONNECTIONS.
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+
+# PDF and image libraries load on first use. A worker pool dedicated to
+# report rendering can set PRELOAD_PDF=1 to pay that cost at boot instead.
+preload_pdf = os.environ.get("PRELOAD_PDF", "0").lower() in ("1", "true", "yes")
+
+
+def on_starting(server):
+    app_config.check_connection_budget(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    if preload_pdf:
+        import PIL.Image  # noqa: F401
+        import reportlab.pdfgen.canvas  # noqa: F401
+        import reportlab.platypus  # noqa: F401
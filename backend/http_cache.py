@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+from .compression import etag_variants
+from .db import get_connection, release_connection
+
+
+logger = logging.getLogger(__name__)
+
+VARY_HEADERS = ("X-Staff-Id", "X-Staff-Role")
+
+
+def cache_tables(*tables: str) -> Callable:
+    """Marks a GET view as cacheable; its validators change whenever one of the tables is written."""
+
+    def decorator(view: Callable) -> Callable:
+        view._cache_tables = tuple(tables)
+        return view
+
+    return decorator
+
+
+def fetch_table_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    names = sorted(set(tables))
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT table_name, COALESCE(SUM(version), 0), MAX(updated_at)
+            FROM table_versions
+            WHERE table_name = ANY(%s)
+            GROUP BY table_name
+            """,
+            (names,),
+        )
+        rows = cur.fetchall()
+        conn.rollback()
+    finally:
+        release_connection(conn)
+    versions = {name: (0, None) for name in names}
+    for name, version, updated_at in rows:
+        versions[name] = (int(version or 0), updated_at)
+    return versions
+
+
+def build_validators(versions: Dict[str, Tuple[int, Optional[datetime]]]) -> Tuple[str, Optional[datetime]]:
+    parts = [
+        request.endpoint or "",
+        request.full_path,
+        repr(sorted((request.view_args or {}).items())),
+        # Handlers default to "today", so the same URL means something else tomorrow.
+        date.today().isoformat(),
+    ]
+    parts.extend(request.headers.get(name, "") for name in VARY_HEADERS)
+    parts.extend(f"{name}={versions[name][0]}" for name in sorted(versions))
+    etag = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    last_modified = max(stamps).astimezone(timezone.utc).replace(microsecond=0) if stamps else None
+    return etag, last_modified
+
+
+def _apply_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> Response:
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Browsers may keep the body but must revalidate before reusing it.
+    response.headers["Cache-Control"] = "private, no-cache"
+    for name in VARY_HEADERS:
+        response.vary.add(name)
+    return response
+
+
+def _check_conditional():
+    if request.method not in ("GET", "HEAD") or not current_app.config.get("HTTP_CACHE"):
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    tables = getattr(view, "_cache_tables", None)
+    if not tables:
+        return None
+
+    try:
+        versions = fetch_table_versions(tables)
+    except Exception:
+        logger.warning("Skipping HTTP cache validators for %s", request.endpoint, exc_info=True)
+        return None
+
+    etag, last_modified = build_validators(versions)
+    g.http_cache_validators = (etag, last_modified)
+
+    # Only If-None-Match can produce a 304. Last-Modified has one-second
+    # resolution and leaves out the date and staff headers the ETag covers, so
+    # If-Modified-Since would answer 304 after a later write in the same second
+    # or after midnight.
+    matched = None
+    if request.if_none_match:
+        # The client may hold the tag of a compressed variant of this representation.
+        matched = next((tag for tag in etag_variants(etag) if request.if_none_match.contains(tag)), None)
+    if matched:
+        return _apply_validators(Response(status=304), matched, last_modified)
+    return None
+
+
+def _add_validators(response: Response) -> Response:
+    validators = g.get("http_cache_validators")
+    if validators and response.status_code == 200:
+        _apply_validators(response, *validators)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    app.before_request(_check_conditional)
+    app.after_request(_add_validators)
@@ -1,13 +1,14 @@
 from datetime import date, datetime
-import csv
-import io
 from typing import Any, Dict, List, Optional
 
 import psycopg2
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request
 
 from .config import config
 from .db import get_connection, release_connection
+from .exports import csv_response, stream_query
+from .http_cache import cache_tables
+from . import lookups
 from .patients import parse_patient_input
 
 
@@ -171,6 +172,7 @@ def list_patients():
 
 
 @income_bp.route("/records", methods=["GET"])
+@cache_tables("income_records", "patients", "staff")
 def list_income_records():
     today = date.today()
     start_param = request.args.get("from")
@@ -292,6 +294,77 @@ def list_income_records():
     return jsonify(items)
 
 
+@income_bp.route("/records/export", methods=["GET"])
+def export_income_records():
+    today = date.today()
+    start_param = request.args.get("from")
+    end_param = request.args.get("to")
+    payment_method_param = request.args.get("payment_method")
+    try:
+        start = parse_date(start_param) if start_param else today.replace(day=1)
+        end = parse_date(end_param) if end_param else today
+        if payment_method_param:
+            payment_method_param = validate_payment_method(payment_method_param)
+    except ValueError as exc:
+        error = str(exc) if str(exc) == "invalid_payment_method" else "invalid_date_format"
+        return jsonify({"error": error}), 400
+    if start > end:
+        return jsonify({"error": "invalid_date_range"}), 400
+
+    conditions = ["ir.service_date BETWEEN %s AND %s"]
+    params: List[Any] = [start, end]
+    if payment_method_param:
+        conditions.append("ir.payment_method = %s")
+        params.append(payment_method_param)
+    where_sql = " AND ".join(conditions)
+
+    rows = stream_query(
+        f"""
+        SELECT ir.id,
+               ir.service_date,
+               p.first_name,
+               p.last_name,
+               s.first_name,
+               s.last_name,
+               ir.amount,
+               ir.lab_cost,
+               ir.payment_method,
+               ir.salary_payment_id IS NOT NULL AS is_paid,
+               ir.note,
+               ir.created_at
+        FROM income_records ir
+        JOIN patients p ON p.id = ir.patient_id
+        JOIN staff s ON s.id = ir.doctor_id
+        WHERE {where_sql}
+        ORDER BY ir.service_date DESC, ir.id DESC
+        """,
+        params,
+        connect=get_connection,
+        release=release_connection,
+    )
+
+    def to_row(row):
+        return [
+            row[0],
+            row[1].isoformat(),
+            " ".join(filter(None, [row[2], row[3]])).strip(),
+            " ".join(filter(None, [row[4], row[5]])).strip(),
+            round(float(row[6] or 0), 2),
+            round(float(row[7] or 0), 2),
+            row[8],
+            "yes" if row[9] else "no",
+            row[10] or "",
+            row[11].isoformat() if row[11] else "",
+        ]
+
+    return csv_response(
+        ["ID", "Date", "Patient", "Doctor", "Amount", "Lab Cost", "Payment Method", "Paid Out", "Note", "Created At"],
+        rows,
+        f"income_records_{start.isoformat()}_{end.isoformat()}.csv",
+        to_row=to_row,
+    )
+
+
 @income_bp.route("/records/<int:record_id>", methods=["GET"])
 def get_income_record(record_id: int):
     conn = get_connection()
@@ -396,12 +469,12 @@ def delete_income_record(record_id: int):
             elif mode == "adjust_next":
                  # Deduct the commission that was paid
                  try:
-                    cur.execute("SELECT commission_rate FROM staff WHERE id = %s", (doctor_id,))
+                    cur.execute("SELECT commission_rate FROM income_records WHERE id = %s", (record_id,))
                     rate = float(cur.fetchone()[0] or 0)
                  except:
                     rate = 0.0
                  
-                 commission_paid = (amount * rate) - lab_cost
+                 commission_paid = (amount - max(lab_cost, 0)) * rate
                  adjustment = -commission_paid
                  
                  cur.execute(
@@ -512,13 +585,13 @@ def update_income_record(record_id: int):
         if salary_payment_id is not None:
              if salary_modification_mode == "adjust_next":
                  try:
-                    cur.execute("SELECT commission_rate FROM staff WHERE id = %s", (doctor_id,))
+                    cur.execute("SELECT commission_rate FROM income_records WHERE id = %s", (record_id,))
                     rate = float(cur.fetchone()[0] or 0)
                  except:
                     rate = 0.0
                  
-                 old_commission = (old_amount * rate) - old_lab_cost
-                 new_commission = (amount * rate) - lab_cost
+                 old_commission = (old_amount - max(old_lab_cost, 0)) * rate
+                 new_commission = (amount - max(lab_cost, 0)) * rate
                  diff = new_commission - old_commission
                  
                  if abs(diff) > 0.001:
@@ -599,10 +672,9 @@ def create_income_record():
                 """
                 SELECT s.id, s.commission_rate
                 FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+                WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
                 """,
-                (doctor_id,),
+                (doctor_id, lookups.role_id(conn, "doctor")),
             )
         except psycopg2.errors.UndefinedColumn:
             conn.rollback()
@@ -611,10 +683,9 @@ def create_income_record():
                 """
                 SELECT s.id, 0 AS commission_rate
                 FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+                WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
                 """,
-                (doctor_id,),
+                (doctor_id, lookups.role_id(conn, "doctor")),
             )
         doctor_row = cur.fetchone()
         if not doctor_row:
@@ -667,7 +738,7 @@ def create_income_record():
         income_id = int(row[0])
         
         # NOTE: Salary payment is now deferred. 
-        # We rely on staff.total_revenue (updated via trigger) and 
+        # The income trigger appends a revenue delta (see staff_revenue) and
         # later we will process unpaid income_records in staff.pay_salary.
 
         conn.commit()
@@ -695,10 +766,10 @@ def doctor_stats_by_patient():
 
     conn = get_connection()
     try:
+        doctor_role_id = lookups.role_id(conn, "doctor")
         cur1 = conn.cursor()
-        params1 = []
-        conditions = ["r.name = 'doctor'", "LOWER(p.last_name) LIKE %s"]
-        params1.append(f"%{patient_last_name}%")
+        params1 = [doctor_role_id, f"%{patient_last_name}%"]
+        conditions = ["s.role_id = %s", "LOWER(p.last_name) LIKE %s"]
         if start:
             conditions.append("ir.service_date >= %s")
             params1.append(start)
@@ -715,12 +786,11 @@ def doctor_stats_by_patient():
                    p.first_name,
                    p.last_name,
                    SUM(ir.amount) AS total_income,
-                   SUM(ir.amount * s.commission_rate) AS total_commission,
+                   SUM(ir.amount * ir.commission_rate) AS total_commission,
                    COUNT(ir.id) AS visit_count
             FROM income_records ir
             JOIN patients p ON p.id = ir.patient_id
             JOIN staff s ON s.id = ir.doctor_id
-            JOIN staff_roles r ON r.id = s.role_id
             WHERE {where_sql}
             GROUP BY s.id,
                      s.first_name,
@@ -782,9 +852,8 @@ def doctor_stats_by_patient():
             )
 
         cur2 = conn.cursor()
-        params2 = []
-        conditions2 = ["r.name = 'doctor'", "LOWER(p.last_name) LIKE %s"]
-        params2.append(f"%{patient_last_name}%")
+        params2 = [doctor_role_id, f"%{patient_last_name}%"]
+        conditions2 = ["s.role_id = %s", "LOWER(p.last_name) LIKE %s"]
         if start:
             conditions2.append("ir.service_date >= %s")
             params2.append(start)
@@ -797,11 +866,10 @@ def doctor_stats_by_patient():
             SELECT s.id,
                    DATE_TRUNC('month', ir.service_date)::DATE AS month,
                    SUM(ir.amount) AS total_income,
-                   SUM(ir.amount * s.commission_rate) AS total_commission
+                   SUM(ir.amount * ir.commission_rate) AS total_commission
             FROM income_records ir
             JOIN patients p ON p.id = ir.patient_id
             JOIN staff s ON s.id = ir.doctor_id
-            JOIN staff_roles r ON r.id = s.role_id
             WHERE {where_sql2}
             GROUP BY s.id, DATE_TRUNC('month', ir.service_date)
             ORDER BY month, s.last_name, s.first_name
@@ -825,9 +893,8 @@ def doctor_stats_by_patient():
             )
 
         cur3 = conn.cursor()
-        params3 = []
-        conditions3 = ["r.name = 'doctor'", "LOWER(p.last_name) LIKE %s"]
-        params3.append(f"%{patient_last_name}%")
+        params3 = [doctor_role_id, f"%{patient_last_name}%"]
+        conditions3 = ["s.role_id = %s", "LOWER(p.last_name) LIKE %s"]
         if start:
             conditions3.append("ir.service_date >= %s")
             params3.append(start)
@@ -840,11 +907,10 @@ def doctor_stats_by_patient():
             SELECT s.id,
                    DATE_TRUNC('year', ir.service_date)::DATE AS year,
                    SUM(ir.amount) AS total_income,
-                   SUM(ir.amount * s.commission_rate) AS total_commission
+                   SUM(ir.amount * ir.commission_rate) AS total_commission
             FROM income_records ir
             JOIN patients p ON p.id = ir.patient_id
             JOIN staff s ON s.id = ir.doctor_id
-            JOIN staff_roles r ON r.id = s.role_id
             WHERE {where_sql3}
             GROUP BY s.id, DATE_TRUNC('year', ir.service_date)
             ORDER BY year, s.last_name, s.first_name
@@ -1046,10 +1112,9 @@ def doctor_overview(doctor_id: int):
                 """
                 SELECT s.id, s.first_name, s.last_name, s.commission_rate
                 FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+                WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
                 """,
-                (doctor_id,),
+                (doctor_id, lookups.role_id(conn, "doctor")),
             )
         except psycopg2.errors.UndefinedColumn:
             conn.rollback()
@@ -1058,76 +1123,45 @@ def doctor_overview(doctor_id: int):
                 f"""
                 SELECT s.id, s.first_name, s.last_name, {config.DOCTOR_COMMISSION_RATE} AS commission_rate
                 FROM staff s
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+                WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
                 """,
-                (doctor_id,),
+                (doctor_id, lookups.role_id(conn, "doctor")),
             )
         doc = cur.fetchone()
         if not doc:
             return jsonify({"error": "invalid_doctor"}), 400
         commission_rate = float(doc[3] or 0)
 
-        try:
-            cur.execute(
-                """
-                SELECT
-                    COALESCE(SUM(ir.amount), 0) AS total_income,
-                    COALESCE(SUM(ir.amount * s.commission_rate), 0) AS total_commission,
-                    COUNT(ir.id) AS visit_count,
-                    COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                WHERE ir.doctor_id = %s
-                """,
-                (doctor_id,),
-            )
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    COALESCE(SUM(ir.amount), 0) AS total_income,
-                    COALESCE(SUM(ir.amount) * %s, 0) AS total_commission,
-                    COUNT(ir.id) AS visit_count,
-                    COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                WHERE ir.doctor_id = %s
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id),
-            )
+        cur.execute(
+            """
+            SELECT
+                COALESCE(SUM(f.total_income), 0) AS total_income,
+                COALESCE(SUM(f.total_commission), 0) AS total_commission,
+                COALESCE(SUM(f.visit_count), 0) AS visit_count,
+                (SELECT COUNT(DISTINCT ir.patient_id) FROM income_records ir WHERE ir.doctor_id = %s) AS patient_count
+            FROM doctor_daily_facts f
+            WHERE f.doctor_id = %s
+            """,
+            (doctor_id, doctor_id),
+        )
         life = cur.fetchone()
 
-        try:
-            cur.execute(
-                """
-                SELECT
-                    COALESCE(SUM(ir.amount), 0) AS total_income,
-                    COALESCE(SUM(ir.amount * s.commission_rate), 0) AS total_commission,
-                    COUNT(ir.id) AS visit_count,
-                    COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                WHERE ir.doctor_id = %s AND ir.service_date = %s
-                """,
-                (doctor_id, today),
-            )
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    COALESCE(SUM(ir.amount), 0) AS total_income,
-                    COALESCE(SUM(ir.amount) * %s, 0) AS total_commission,
-                    COUNT(ir.id) AS visit_count,
-                    COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                WHERE ir.doctor_id = %s AND ir.service_date = %s
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id, today),
-            )
+        cur.execute(
+            """
+            SELECT
+                COALESCE(SUM(f.total_income), 0) AS total_income,
+                COALESCE(SUM(f.total_commission), 0) AS total_commission,
+                COALESCE(SUM(f.visit_count), 0) AS visit_count,
+                (
+                    SELECT COUNT(DISTINCT ir.patient_id)
+                    FROM income_records ir
+                    WHERE ir.doctor_id = %s AND ir.service_date = %s
+                ) AS patient_count
+            FROM doctor_daily_facts f
+            WHERE f.doctor_id = %s AND f.day = %s
+            """,
+            (doctor_id, today, doctor_id, today),
+        )
         today_row = cur.fetchone()
     finally:
         release_connection(conn)
@@ -1171,44 +1205,26 @@ def doctor_daily_summary(doctor_id: int):
             """
             SELECT s.id
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         row = cur.fetchone()
         if not row:
             return jsonify({"error": "invalid_doctor"}), 400
 
-        try:
-            cur.execute(
-                """
-                SELECT ir.service_date,
-                       SUM(ir.amount) AS total_income,
-                       SUM(ir.amount * s.commission_rate) AS total_commission
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                WHERE ir.doctor_id = %s AND ir.service_date BETWEEN %s AND %s
-                GROUP BY ir.service_date
-                ORDER BY ir.service_date
-                """,
-                (doctor_id, start, end),
-            )
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT ir.service_date,
-                       SUM(ir.amount) AS total_income,
-                       SUM(ir.amount) * %s AS total_commission
-                FROM income_records ir
-                WHERE ir.doctor_id = %s AND ir.service_date BETWEEN %s AND %s
-                GROUP BY ir.service_date
-                ORDER BY ir.service_date
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id, start, end),
-            )
+        cur.execute(
+            """
+            SELECT f.day,
+                   SUM(f.total_income) AS total_income,
+                   SUM(f.total_commission) AS total_commission
+            FROM doctor_daily_facts f
+            WHERE f.doctor_id = %s AND f.day BETWEEN %s AND %s
+            GROUP BY f.day
+            ORDER BY f.day
+            """,
+            (doctor_id, start, end),
+        )
         rows = cur.fetchall()
     finally:
         release_connection(conn)
@@ -1234,44 +1250,26 @@ def doctor_monthly_summary(doctor_id: int):
             """
             SELECT s.id
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         row = cur.fetchone()
         if not row:
             return jsonify({"error": "invalid_doctor"}), 400
 
-        try:
-            cur.execute(
-                """
-                SELECT DATE_TRUNC('month', ir.service_date)::DATE AS month,
-                       SUM(ir.amount) AS total_income,
-                       SUM(ir.amount * s.commission_rate) AS total_commission
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                WHERE ir.doctor_id = %s
-                GROUP BY DATE_TRUNC('month', ir.service_date)
-                ORDER BY month
-                """,
-                (doctor_id,),
-            )
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT DATE_TRUNC('month', ir.service_date)::DATE AS month,
-                       SUM(ir.amount) AS total_income,
-                       SUM(ir.amount) * %s AS total_commission
-                FROM income_records ir
-                WHERE ir.doctor_id = %s
-                GROUP BY DATE_TRUNC('month', ir.service_date)
-                ORDER BY month
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id),
-            )
+        cur.execute(
+            """
+            SELECT DATE_TRUNC('month', f.day)::DATE AS month,
+                   SUM(f.total_income) AS total_income,
+                   SUM(f.total_commission) AS total_commission
+            FROM doctor_daily_facts f
+            WHERE f.doctor_id = %s
+            GROUP BY DATE_TRUNC('month', f.day)
+            ORDER BY month
+            """,
+            (doctor_id,),
+        )
         rows = cur.fetchall()
     finally:
         release_connection(conn)
@@ -1308,10 +1306,9 @@ def doctor_commissions(doctor_id: int):
             """
             SELECT s.id, s.first_name, s.last_name
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         doctor_row = cur.fetchone()
         if not doctor_row:
@@ -1332,18 +1329,17 @@ def doctor_commissions(doctor_id: int):
                        p.last_name,
                        s.first_name,
                        s.last_name,
-                       (ir.amount * s.commission_rate) AS commission
+                       (ir.amount * ir.commission_rate) AS commission
                 FROM income_records ir
                 JOIN patients p ON p.id = ir.patient_id
                 JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
                 WHERE s.id = %s
-                  AND r.name = 'doctor'
+                  AND s.role_id = %s
                   AND s.is_active = TRUE
                   AND ir.service_date BETWEEN %s AND %s
                 ORDER BY ir.service_date DESC, ir.id DESC
                 """,
-                (doctor_id, start, end),
+                (doctor_id, lookups.role_id(conn, "doctor"), start, end),
             )
             rows = cur.fetchall()
         except psycopg2.errors.UndefinedColumn:
@@ -1365,14 +1361,13 @@ def doctor_commissions(doctor_id: int):
                 FROM income_records ir
                 JOIN patients p ON p.id = ir.patient_id
                 JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
                 WHERE s.id = %s
-                  AND r.name = 'doctor'
+                  AND s.role_id = %s
                   AND s.is_active = TRUE
                   AND ir.service_date BETWEEN %s AND %s
                 ORDER BY ir.service_date DESC, ir.id DESC
                 """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id, start, end),
+                (config.DOCTOR_COMMISSION_RATE, doctor_id, lookups.role_id(conn, "doctor"), start, end),
             )
             rows = cur.fetchall()
     finally:
@@ -1455,95 +1450,56 @@ def export_doctor_commissions(doctor_id: int):
             """
             SELECT s.id, s.first_name, s.last_name
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         doctor_row = cur.fetchone()
         if not doctor_row:
             return jsonify({"error": "invalid_doctor"}), 400
 
         includes_service_time = column_exists(conn, "income_records", "service_time")
-        time_expr = "ir.service_time" if includes_service_time else "ir.created_at::time"
-        try:
-            cur.execute(
-                f"""
-                SELECT ir.service_date,
-                       {time_expr} AS service_time,
-                       p.first_name,
-                       p.last_name,
-                       ir.amount,
-                       (ir.amount * s.commission_rate) AS commission,
-                       ir.note
-                FROM income_records ir
-                JOIN patients p ON p.id = ir.patient_id
-                JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s
-                  AND r.name = 'doctor'
-                  AND s.is_active = TRUE
-                  AND ir.service_date BETWEEN %s AND %s
-                ORDER BY ir.service_date DESC, ir.id DESC
-                """,
-                (doctor_id, start, end),
-            )
-            rows = cur.fetchall()
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                f"""
-                SELECT ir.service_date,
-                       {time_expr} AS service_time,
-                       p.first_name,
-                       p.last_name,
-                       ir.amount,
-                       (ir.amount * %s) AS commission,
-                       ir.note
-                FROM income_records ir
-                JOIN patients p ON p.id = ir.patient_id
-                JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE s.id = %s
-                  AND r.name = 'doctor'
-                  AND s.is_active = TRUE
-                  AND ir.service_date BETWEEN %s AND %s
-                ORDER BY ir.service_date DESC, ir.id DESC
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id, start, end),
-            )
-            rows = cur.fetchall()
     finally:
         release_connection(conn)
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Patient", "Date", "Time", "Amount", "Commission", "Treatment Details"])
-    for row in rows:
+    time_expr = "ir.service_time" if includes_service_time else "ir.created_at::time"
+    rows = stream_query(
+        f"""
+        SELECT ir.service_date,
+               {time_expr} AS service_time,
+               p.first_name,
+               p.last_name,
+               ir.amount,
+               (ir.amount * ir.commission_rate) AS commission,
+               ir.note
+        FROM income_records ir
+        JOIN patients p ON p.id = ir.patient_id
+        WHERE ir.doctor_id = %s
+          AND ir.service_date BETWEEN %s AND %s
+        ORDER BY ir.service_date DESC, ir.id DESC
+        """,
+        (doctor_id, start, end),
+        connect=get_connection,
+        release=release_connection,
+    )
+
+    def to_row(row):
         service_date, service_time, p_first, p_last, amount, commission, note = row
-        patient_name = " ".join(filter(None, [p_first, p_last])).strip()
-        time_value = service_time.strftime("%H:%M") if service_time else ""
-        writer.writerow(
-            [
-                patient_name,
-                service_date.isoformat(),
-                time_value,
-                round(float(amount or 0), 2),
-                round(float(commission or 0), 2),
-                note or "",
-            ]
-        )
+        return [
+            " ".join(filter(None, [p_first, p_last])).strip(),
+            service_date.isoformat(),
+            service_time.strftime("%H:%M") if service_time else "",
+            round(float(amount or 0), 2),
+            round(float(commission or 0), 2),
+            note or "",
+        ]
 
-    output.seek(0)
-    buffer = io.BytesIO(output.getvalue().encode("utf-8"))
-    buffer.seek(0)
     filename = f"doctor_{doctor_id}_commissions_{start.isoformat()}_{end.isoformat()}.csv"
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype="text/csv",
+    return csv_response(
+        ["Patient", "Date", "Time", "Amount", "Commission", "Treatment Details"],
+        rows,
+        filename,
+        to_row=to_row,
     )
 
 
@@ -1564,57 +1520,24 @@ def doctor_hourly_summary(doctor_id: int):
             """
             SELECT s.id
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         row = cur.fetchone()
         if not row:
             return jsonify({"error": "invalid_doctor"}), 400
 
-        includes_service_time = column_exists(conn, "income_records", "service_time")
-        time_expr = "ir.service_time" if includes_service_time else "ir.created_at::time"
-        try:
-            cur.execute(
-                f"""
-                SELECT EXTRACT(HOUR FROM (ir.service_date::timestamp + {time_expr}))::INT AS hour,
-                       SUM(ir.amount * s.commission_rate) AS total_commission,
-                       COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE ir.doctor_id = %s
-                  AND r.name = 'doctor'
-                  AND s.is_active = TRUE
-                  AND ir.service_date = %s
-                GROUP BY hour
-                ORDER BY hour
-                """,
-                (doctor_id, target),
-            )
-            rows = cur.fetchall()
-        except psycopg2.errors.UndefinedColumn:
-            conn.rollback()
-            cur = conn.cursor()
-            cur.execute(
-                f"""
-                SELECT EXTRACT(HOUR FROM (ir.service_date::timestamp + {time_expr}))::INT AS hour,
-                       SUM(ir.amount * %s) AS total_commission,
-                       COUNT(DISTINCT ir.patient_id) AS patient_count
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                JOIN staff_roles r ON r.id = s.role_id
-                WHERE ir.doctor_id = %s
-                  AND r.name = 'doctor'
-                  AND s.is_active = TRUE
-                  AND ir.service_date = %s
-                GROUP BY hour
-                ORDER BY hour
-                """,
-                (config.DOCTOR_COMMISSION_RATE, doctor_id, target),
-            )
-            rows = cur.fetchall()
+        cur.execute(
+            """
+            SELECT f.hour, f.total_commission, f.patient_count
+            FROM doctor_daily_facts f
+            WHERE f.doctor_id = %s AND f.day = %s
+            ORDER BY f.hour
+            """,
+            (doctor_id, target),
+        )
+        rows = cur.fetchall()
     finally:
         release_connection(conn)
 
@@ -1651,10 +1574,9 @@ def export_doctor_hourly_summary(doctor_id: int):
             """
             SELECT s.id, s.first_name, s.last_name
             FROM staff s
-            JOIN staff_roles r ON r.id = s.role_id
-            WHERE s.id = %s AND r.name = 'doctor' AND s.is_active = TRUE
+            WHERE s.id = %s AND s.role_id = %s AND s.is_active = TRUE
             """,
-            (doctor_id,),
+            (doctor_id, lookups.role_id(conn, "doctor")),
         )
         doctor_row = cur.fetchone()
         if not doctor_row:
@@ -1668,19 +1590,10 @@ def export_doctor_hourly_summary(doctor_id: int):
     data = hourly_response.get_json() or {}
     hours = data.get("hours", [])
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Hour", "Total Commission", "Patient Count"])
-    for item in hours:
-        writer.writerow([item["label"], item["total_commission"], item["patient_count"]])
-
-    output.seek(0)
-    buffer = io.BytesIO(output.getvalue().encode("utf-8"))
-    buffer.seek(0)
     filename = f"doctor_{doctor_id}_hourly_commission_{target.isoformat()}.csv"
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype="text/csv",
+    return csv_response(
+        ["Hour", "Total Commission", "Patient Count"],
+        hours,
+        filename,
+        to_row=lambda item: [item["label"], item["total_commission"], item["patient_count"]],
     )
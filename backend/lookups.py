@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+
+from .http_cache import fetch_table_versions
+
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_TABLES = ("staff_roles", "outcome_categories", "medicine_presets", "clinic_settings")
+RECHECK_SECONDS = 5.0
+
+
+def _load_roles(conn) -> List[Dict[str, Any]]:
+    cur = conn.cursor()
+    cur.execute("SELECT id, name FROM staff_roles ORDER BY name")
+    return [{"id": int(row[0]), "name": row[1]} for row in cur.fetchall() or []]
+
+
+def _load_categories(conn) -> List[Dict[str, Any]]:
+    cur = conn.cursor()
+    cur.execute("SELECT id, name FROM outcome_categories ORDER BY name")
+    return [{"id": int(row[0]), "name": row[1]} for row in cur.fetchall() or []]
+
+
+def _load_medicines(conn) -> List[Dict[str, Any]]:
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id, name FROM medicine_presets ORDER BY name")
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return []
+    return [{"id": int(row[0]), "name": row[1]} for row in cur.fetchall() or []]
+
+
+def _load_settings(conn) -> Dict[str, Optional[str]]:
+    cur = conn.cursor()
+    cur.execute("SELECT setting_key, setting_value FROM clinic_settings")
+    return {row[0]: row[1] for row in cur.fetchall() or []}
+
+
+_LOADERS: Dict[str, Callable] = {
+    "staff_roles": _load_roles,
+    "outcome_categories": _load_categories,
+    "medicine_presets": _load_medicines,
+    "clinic_settings": _load_settings,
+}
+
+
+class LookupCache:
+    """Process-wide copy of the small lookup tables.
+
+    Writes made through this process call invalidate(); writes from other
+    workers are picked up by comparing table_versions every few seconds.
+    """
+
+    def __init__(self, recheck_seconds: Optional[float] = RECHECK_SECONDS):
+        self.recheck_seconds = recheck_seconds
+        self._data: Dict[str, Any] = {}
+        self._generation: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, conn, table: str):
+        self._revalidate()
+        with self._lock:
+            if table in self._data:
+                return self._data[table]
+            generation = self._generation.get(table, 0)
+        value = _LOADERS[table](conn)
+        with self._lock:
+            # Drop a load that raced with an invalidation; the next call reloads.
+            if self._generation.get(table, 0) == generation:
+                self._data[table] = value
+        return value
+
+    def invalidate(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables or LOOKUP_TABLES:
+                self._data.pop(table, None)
+                self._generation[table] = self._generation.get(table, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+            self._checked_at = 0.0
+
+    def warm(self, conn) -> None:
+        for table in LOOKUP_TABLES:
+            self.get(conn, table)
+
+    def _revalidate(self) -> None:
+        if self.recheck_seconds is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.recheck_seconds:
+                return
+            self._checked_at = now
+        try:
+            versions = fetch_table_versions(LOOKUP_TABLES)
+        except Exception:
+            logger.warning("Could not read lookup table versions", exc_info=True)
+            return
+        changed = []
+        with self._lock:
+            for table, (version, _) in versions.items():
+                if self._versions.get(table) != version:
+                    self._versions[table] = version
+                    changed.append(table)
+        if changed:
+            self.invalidate(*changed)
+
+
+cache = LookupCache()
+
+
+def configure(recheck_seconds: Optional[float]) -> None:
+    cache.clear()
+    cache.recheck_seconds = recheck_seconds
+
+
+def invalidate(*tables: str) -> None:
+    cache.invalidate(*tables)
+
+
+def roles(conn) -> List[Dict[str, Any]]:
+    return cache.get(conn, "staff_roles")
+
+
+def role_id(conn, name: str) -> Optional[int]:
+    for role in roles(conn):
+        if role["name"] == name:
+            return role["id"]
+    return None
+
+
+def categories(conn) -> List[Dict[str, Any]]:
+    return cache.get(conn, "outcome_categories")
+
+
+def medicines(conn) -> List[Dict[str, Any]]:
+    return cache.get(conn, "medicine_presets")
+
+
+def setting(conn, key: str, default: Optional[str] = None) -> Optional[str]:
+    value = cache.get(conn, "clinic_settings").get(key)
+    return default if value is None else value
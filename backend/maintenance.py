@@ -0,0 +1,111 @@
+import argparse
+import logging
+import sys
+from typing import Callable, Dict, List, Optional
+
+from . import audit, calendar_sync
+from .db import get_connection, release_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+def compact_revenue_ledger(conn) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT compact_doctor_revenue()")
+    row = cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+PARTITIONED_TABLES = (
+    ("income_records", "service_date"),
+    ("outcome_records", "expense_date"),
+    ("audit_events", "occurred_at"),
+)
+
+
+def ensure_partitions(conn, months_ahead: int = 3) -> int:
+    cur = conn.cursor()
+    created = 0
+    for table, key_column in PARTITIONED_TABLES:
+        cur.execute("SELECT ensure_monthly_partitions(%s, %s, %s)", (table, key_column, months_ahead))
+        row = cur.fetchone()
+        created += int(row[0] or 0) if row else 0
+    return created
+
+
+def compact_commission_ledger(conn) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT compact_commission_ledger()")
+    row = cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def rebuild_doctor_facts(conn) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT rebuild_doctor_daily_facts()")
+    row = cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def rebuild_patient_stats(conn) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT rebuild_patient_stats()")
+    row = cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def rebuild_accumulators(conn) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT rebuild_dashboard_accumulators()")
+    row = cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def drain_audit_outbox(conn) -> int:
+    return audit.drain(conn)
+
+
+def prune_calendar_tombstones(conn) -> int:
+    return calendar_sync.prune_tombstones(conn)
+
+
+TASKS: Dict[str, Callable] = {
+    "compact-revenue": compact_revenue_ledger,
+    "compact-commission": compact_commission_ledger,
+    "drain-audit": drain_audit_outbox,
+    "ensure-partitions": ensure_partitions,
+    "prune-tombstones": prune_calendar_tombstones,
+    "rebuild-doctor-facts": rebuild_doctor_facts,
+    "rebuild-patient-stats": rebuild_patient_stats,
+    "rebuild-accumulators": rebuild_accumulators,
+}
+
+
+def run_task(name: str) -> int:
+    task = TASKS[name]
+    conn = get_connection()
+    try:
+        result = task(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+    logger.info("Maintenance task %s finished: %s", name, result)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Clinic database maintenance tasks")
+    parser.add_argument("task", choices=sorted(TASKS))
+    args = parser.parse_args(argv)
+    result = run_task(args.task)
+    print(f"{args.task}: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -5,9 +5,14 @@ from typing import Any, Dict, List
 
 from flask import Blueprint, Response, jsonify, request
 import psycopg2
+from psycopg2.extras import execute_values
 
 from .db import get_connection, release_connection
-from .staff import pay_salary as staff_pay_salary
+from .compression import read_body
+from .exports import csv_response, stream_query
+from .http_cache import cache_tables
+from . import audit, lookups
+from .staff import get_authenticated_staff, pay_salary as staff_pay_salary
 
 
 outcome_bp = Blueprint("outcome", __name__)
@@ -76,6 +81,7 @@ def _calculate_hours(work_date: date, start_time, end_time) -> float:
 
 
 @outcome_bp.route("/records", methods=["GET"])
+@cache_tables("outcome_records", "outcome_categories", "salary_payments", "staff")
 def get_outcome_records():
     start_param = request.args.get("from")
     end_param = request.args.get("to")
@@ -155,6 +161,60 @@ def get_outcome_records():
     return jsonify(records)
 
 
+@outcome_bp.route("/records/export", methods=["GET"])
+def export_outcome_records():
+    start_param = request.args.get("from")
+    end_param = request.args.get("to")
+
+    today = date.today()
+    try:
+        start_date = parse_date(start_param) if start_param else today.replace(day=1)
+        end_date = parse_date(end_param) if end_param else today
+    except ValueError:
+        return jsonify({"error": "invalid_date_format"}), 400
+    if start_date > end_date:
+        return jsonify({"error": "invalid_date_range"}), 400
+
+    rows = stream_query(
+        """
+        SELECT 'outcome' AS type, o.id, o.expense_date AS day, c.name, NULL AS staff_name,
+               o.amount, o.description, o.created_at
+        FROM outcome_records o
+        JOIN outcome_categories c ON c.id = o.category_id
+        WHERE o.expense_date BETWEEN %s AND %s
+        UNION ALL
+        SELECT 'salary', sp.id, sp.payment_date, 'Salary', st.first_name || ' ' || st.last_name,
+               sp.amount, sp.note, sp.created_at
+        FROM salary_payments sp
+        JOIN staff st ON st.id = sp.staff_id
+        WHERE sp.payment_date BETWEEN %s AND %s
+        ORDER BY day DESC, created_at DESC
+        """,
+        (start_date, end_date, start_date, end_date),
+        connect=get_connection,
+        release=release_connection,
+    )
+
+    def to_row(row):
+        return [
+            row[0],
+            row[1],
+            row[2].isoformat(),
+            row[3],
+            row[4] or "",
+            round(float(row[5] or 0), 2),
+            row[6] or "",
+            row[7].isoformat() if row[7] else "",
+        ]
+
+    return csv_response(
+        ["Type", "ID", "Date", "Category", "Staff", "Amount", "Description", "Created At"],
+        rows,
+        f"outcome_records_{start_date.isoformat()}_{end_date.isoformat()}.csv",
+        to_row=to_row,
+    )
+
+
 @outcome_bp.route("/records", methods=["POST"])
 def add_outcome_record():
     data = request.get_json()
@@ -194,16 +254,15 @@ def add_salary_payment():
 
 
 @outcome_bp.route("/categories", methods=["GET"])
+@cache_tables("outcome_categories")
 def get_categories():
     conn = get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT id, name FROM outcome_categories ORDER BY name")
-        rows = cur.fetchall()
+        items = lookups.categories(conn)
     finally:
         release_connection(conn)
 
-    return jsonify([{"id": row[0], "name": row[1]} for row in rows])
+    return jsonify(items)
 
 
 @outcome_bp.route("/timesheets", methods=["GET"])
@@ -304,6 +363,207 @@ def create_timesheet():
     return jsonify({"id": int(row[0])}), 201
 
 
+TIMESHEET_BATCH_LIMIT = 2000
+# Room for TIMESHEET_BATCH_LIMIT rows with long notes.
+TIMESHEET_CSV_MAX_BYTES = 2 * 1024 * 1024
+TIMESHEET_CSV_COLUMNS = ("staff_id", "work_date", "start_time", "end_time", "note")
+
+
+def _parse_timesheet_entries(items: List[Dict[str, Any]]):
+    entries = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            staff_id = int(item.get("staff_id"))
+            work_date = parse_date(item.get("work_date"))
+            start_time = _parse_time(item.get("start_time"))
+            end_time = _parse_time(item.get("end_time"))
+        except Exception:
+            errors.append({"row": index, "error": "invalid_data"})
+            continue
+        if end_time <= start_time:
+            errors.append({"row": index, "error": "invalid_time_range"})
+            continue
+        entries.append(
+            {
+                "row": index,
+                "staff_id": staff_id,
+                "work_date": work_date,
+                "start_time": start_time,
+                "end_time": end_time,
+                "hours": _calculate_hours(work_date, start_time, end_time),
+                "note": (item.get("note") or "").strip() or None,
+            }
+        )
+    return entries, errors
+
+
+def _validate_timesheet_batch(cur, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # One round trip for the whole batch: unknown staff, overlaps with stored
+    # shifts and overlaps between rows of the batch itself.
+    cur.execute(
+        """
+        WITH batch AS (
+            SELECT *
+            FROM unnest(%s::int[], %s::int[], %s::date[], %s::time[], %s::time[])
+                 AS b(row_index, staff_id, work_date, start_time, end_time)
+        )
+        SELECT row_index, error
+        FROM (
+            SELECT b.row_index,
+                   CASE
+                       WHEN s.id IS NULL THEN 'staff_not_found'
+                       WHEN EXISTS (
+                           SELECT 1 FROM staff_timesheets t
+                           WHERE t.staff_id = b.staff_id
+                             AND t.work_date = b.work_date
+                             AND t.start_time < b.end_time
+                             AND b.start_time < t.end_time
+                       ) THEN 'overlaps_existing'
+                       WHEN EXISTS (
+                           SELECT 1 FROM batch o
+                           WHERE o.row_index <> b.row_index
+                             AND o.staff_id = b.staff_id
+                             AND o.work_date = b.work_date
+                             AND o.start_time < b.end_time
+                             AND b.start_time < o.end_time
+                       ) THEN 'overlaps_batch'
+                   END AS error
+            FROM batch b
+            LEFT JOIN staff s ON s.id = b.staff_id
+        ) checked
+        WHERE error IS NOT NULL
+        ORDER BY row_index
+        """,
+        (
+            [e["row"] for e in entries],
+            [e["staff_id"] for e in entries],
+            [e["work_date"] for e in entries],
+            [e["start_time"] for e in entries],
+            [e["end_time"] for e in entries],
+        ),
+    )
+    return [{"row": int(row[0]), "error": row[1]} for row in cur.fetchall()]
+
+
+def _create_timesheet_batch(items: List[Dict[str, Any]]):
+    if not items:
+        return jsonify({"error": "empty_batch"}), 400
+    if len(items) > TIMESHEET_BATCH_LIMIT:
+        return jsonify({"error": "batch_too_large", "limit": TIMESHEET_BATCH_LIMIT}), 400
+
+    entries, errors = _parse_timesheet_entries(items)
+    if errors:
+        return jsonify({"error": "invalid_batch", "rows": errors}), 400
+
+    auth = get_authenticated_staff()
+    staff_ids = {e["staff_id"] for e in entries}
+    # Without a staff header the import has no known actor.
+    changed_by_id = auth["id"] if auth else None
+
+    conn = get_connection()
+    try:
+        _ensure_timesheets_table(conn)
+        cur = conn.cursor()
+        # Two batches for the same staff member could both pass the overlap
+        # check before either inserts. A per-staff transaction lock, taken in
+        # id order so batches cannot deadlock, serialises them until commit.
+        cur.execute(
+            """
+            SELECT pg_advisory_xact_lock(hashtext('staff_timesheets'), staff_id)
+            FROM (SELECT DISTINCT unnest(%s::int[]) AS staff_id ORDER BY 1) locked
+            """,
+            (sorted(staff_ids),),
+        )
+        errors = _validate_timesheet_batch(cur, entries)
+        if errors:
+            conn.rollback()
+            return jsonify({"error": "invalid_batch", "rows": errors}), 409
+        rows = execute_values(
+            cur,
+            """
+            INSERT INTO staff_timesheets (staff_id, work_date, start_time, end_time, hours, note)
+            VALUES %s
+            RETURNING id
+            """,
+            [
+                (e["staff_id"], e["work_date"], e["start_time"], e["end_time"], e["hours"], e["note"])
+                for e in entries
+            ],
+            page_size=500,
+            fetch=True,
+        )
+        ids = [int(row[0]) for row in rows]
+        _log_timesheet_change(
+            conn,
+            None,
+            staff_ids.pop() if len(staff_ids) == 1 else None,
+            "bulk_create",
+            None,
+            {
+                "count": len(ids),
+                "ids": ids,
+                "entries": [
+                    {
+                        "staff_id": e["staff_id"],
+                        "work_date": e["work_date"].isoformat(),
+                        "start_time": e["start_time"].strftime("%H:%M"),
+                        "end_time": e["end_time"].strftime("%H:%M"),
+                    }
+                    for e in entries
+                ],
+            },
+            changed_by_id,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+    return jsonify({"created": len(ids), "ids": ids}), 201
+
+
+@outcome_bp.route("/timesheets/bulk", methods=["POST"])
+def create_timesheets_bulk():
+    data = request.get_json(silent=True) or {}
+    items = data.get("entries")
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "invalid_data"}), 400
+    return _create_timesheet_batch(items)
+
+
+@outcome_bp.route("/timesheets/import", methods=["POST"])
+def import_timesheets_csv():
+    if request.content_length is not None and request.content_length > TIMESHEET_CSV_MAX_BYTES:
+        return jsonify({"error": "request_body_too_large", "limit": TIMESHEET_CSV_MAX_BYTES}), 413
+    if request.mimetype == "multipart/form-data":
+        # The form parser buffers whatever it is sent, so it needs a known size.
+        if request.content_length is None:
+            return jsonify({"error": "length_required"}), 411
+        upload = request.files.get("file")
+        raw = upload.read(TIMESHEET_CSV_MAX_BYTES + 1) if upload else b""
+    else:
+        raw = read_body(TIMESHEET_CSV_MAX_BYTES + 1)
+    if len(raw) > TIMESHEET_CSV_MAX_BYTES:
+        return jsonify({"error": "request_body_too_large", "limit": TIMESHEET_CSV_MAX_BYTES}), 413
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return jsonify({"error": "invalid_csv"}), 400
+
+    reader = csv.DictReader(StringIO(text))
+    if not reader.fieldnames or not set(TIMESHEET_CSV_COLUMNS[:4]) <= {f.strip() for f in reader.fieldnames}:
+        return jsonify({"error": "invalid_csv", "columns": list(TIMESHEET_CSV_COLUMNS)}), 400
+    items = []
+    for row in reader:
+        if len(items) == TIMESHEET_BATCH_LIMIT:
+            return jsonify({"error": "batch_too_large", "limit": TIMESHEET_BATCH_LIMIT}), 400
+        items.append({(k or "").strip(): (v or "").strip() for k, v in row.items()})
+    return _create_timesheet_batch(items)
+
+
 @outcome_bp.route("/timesheets/<int:timesheet_id>", methods=["PUT"])
 def update_timesheet(timesheet_id: int):
     data = request.get_json(silent=True) or {}
@@ -519,45 +779,12 @@ def _ensure_timesheets_table(conn) -> None:
         conn.commit()
 
 
-def _ensure_timesheets_audit_table(conn) -> None:
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT 1 FROM timesheets_audit LIMIT 1")
-    except Exception:
-        conn.rollback()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS timesheets_audit (
-                id SERIAL PRIMARY KEY,
-                timesheet_id INTEGER,
-                staff_id INTEGER NOT NULL REFERENCES staff(id),
-                action VARCHAR(20) NOT NULL,
-                old_data JSONB,
-                new_data JSONB,
-                changed_by_id INTEGER NOT NULL REFERENCES staff(id),
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            )
-            """
-        )
-        conn.commit()
-
-
 def _log_timesheet_change(conn, timesheet_id, staff_id, action, old_data, new_data, changed_by_id):
-    _ensure_timesheets_audit_table(conn)
-    cur = conn.cursor()
-    import json
-    cur.execute(
-        """
-        INSERT INTO timesheets_audit (timesheet_id, staff_id, action, old_data, new_data, changed_by_id)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-        (
-            timesheet_id,
-            staff_id,
-            action,
-            json.dumps(old_data) if old_data else None,
-            json.dumps(new_data) if new_data else None,
-            changed_by_id
-        )
-    )
+    audit.record(
+        conn.cursor(),
+        "timesheet",
+        timesheet_id,
+        action,
+        changed_by_id,
+        {"staff_id": staff_id, "old": old_data, "new": new_data},
+    )
\ No newline at end of file
@@ -0,0 +1,278 @@
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import g, has_request_context, request
+
+from .config import config
+from .db import get_connection, release_connection
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+    ASYNC_AVAILABLE = True
+except Exception:
+    AsyncConnectionPool = None
+    ASYNC_AVAILABLE = False
+
+
+QuerySpec = Tuple[str, Sequence[Any]]
+Results = Dict[str, List[tuple]]
+Timings = Dict[str, float]
+
+QUERY_TIMEOUT_SECONDS = 30
+# Connections used by one fan-out, including the one that exports the snapshot.
+FANOUT_WIDTH = config.FANOUT_WIDTH
+
+SNAPSHOT_ISOLATION = "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+_SNAPSHOT_ID = re.compile(r"^[0-9A-F-]+$")
+
+
+def _snapshot_sql(snapshot: str) -> str:
+    # SET TRANSACTION SNAPSHOT takes no bind parameters; the id comes from pg_export_snapshot().
+    if not _SNAPSHOT_ID.match(snapshot):
+        raise ValueError("invalid_snapshot")
+    return f"SET TRANSACTION SNAPSHOT '{snapshot}'"
+
+
+def _split(queries: Dict[str, QuerySpec], width: int) -> List[List[str]]:
+    names = list(queries)
+    width = max(1, min(width, len(names)))
+    return [names[i::width] for i in range(width)]
+
+
+class _AsyncRunner:
+    """Runs query batches on a psycopg 3 async pool owned by one background event loop."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-queries", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _get_pool(self):
+        if self._pool is None:
+            pool = AsyncConnectionPool(
+                conninfo=config.database_dsn,
+                min_size=1,
+                max_size=config.ASYNC_POOL_SIZE,
+                open=False,
+            )
+            await pool.open()
+            self._pool = pool
+        return self._pool
+
+    async def _run_group(self, conn, queries: Dict[str, QuerySpec], names: List[str], results: Results, timings: Timings) -> None:
+        for name in names:
+            sql, params = queries[name]
+            started = time.perf_counter()
+            cur = await conn.execute(sql, params)
+            results[name] = await cur.fetchall()
+            timings[name] = (time.perf_counter() - started) * 1000
+
+    async def _follower(self, pool, snapshot: Optional[str], queries, names, results, timings) -> None:
+        async with pool.connection() as conn:
+            await conn.execute(SNAPSHOT_ISOLATION)
+            if snapshot:
+                await conn.execute(_snapshot_sql(snapshot))
+            await self._run_group(conn, queries, names, results, timings)
+            await conn.rollback()
+
+    async def _gather(self, queries: Dict[str, QuerySpec]) -> Tuple[Results, Timings]:
+        pool = await self._get_pool()
+        results: Results = {}
+        timings: Timings = {}
+        groups = _split(queries, FANOUT_WIDTH)
+        async with pool.connection() as leader:
+            await leader.execute(SNAPSHOT_ISOLATION)
+            row = await (await leader.execute("SELECT pg_export_snapshot()")).fetchone()
+            snapshot = row[0] if row else None
+            await asyncio.gather(
+                self._run_group(leader, queries, groups[0], results, timings),
+                *(self._follower(pool, snapshot, queries, names, results, timings) for names in groups[1:]),
+            )
+            await leader.rollback()
+        return results, timings
+
+    def run(self, queries: Dict[str, QuerySpec]) -> Tuple[Results, Timings]:
+        future = asyncio.run_coroutine_threadsafe(self._gather(queries), self._ensure_loop())
+        return future.result(QUERY_TIMEOUT_SECONDS)
+
+
+_async_runner = _AsyncRunner()
+
+# A leader holds its connection while it waits for its followers, so fan-outs
+# that together need more connections than the pool has would wait on each
+# other until QUERY_TIMEOUT_SECONDS. Only as many fan-outs run at once as the
+# pool can serve in full next to one connection per request thread and the
+# audit drainer's; the rest run sequentially on one connection.
+_THREAD_FANOUTS = (config.DB_POOL_SIZE - config.WORKER_THREADS - 1) // FANOUT_WIDTH
+_ASYNC_FANOUTS = config.ASYNC_POOL_SIZE // FANOUT_WIDTH
+_fanout_slots = {
+    "threads": threading.BoundedSemaphore(_THREAD_FANOUTS) if _THREAD_FANOUTS > 0 else None,
+    "async": threading.BoundedSemaphore(_ASYNC_FANOUTS) if _ASYNC_FANOUTS > 0 else None,
+}
+_executor = ThreadPoolExecutor(
+    max_workers=max(_THREAD_FANOUTS, 1) * max(FANOUT_WIDTH - 1, 1),
+    thread_name_prefix="queries",
+)
+
+
+def query_mode() -> str:
+    mode = config.QUERY_MODE
+    if mode == "auto":
+        return "async" if ASYNC_AVAILABLE else "threads"
+    if mode == "async" and not ASYNC_AVAILABLE:
+        return "threads"
+    return mode
+
+
+def _run_group(cur, queries: Dict[str, QuerySpec], names: List[str], results: Results, timings: Timings) -> None:
+    for name in names:
+        sql, params = queries[name]
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        results[name] = cur.fetchall()
+        timings[name] = (time.perf_counter() - started) * 1000
+
+
+def _follower(snapshot: Optional[str], queries, names, connect: Callable, release: Callable) -> Tuple[Results, Timings]:
+    results: Results = {}
+    timings: Timings = {}
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(SNAPSHOT_ISOLATION)
+        if snapshot:
+            cur.execute(_snapshot_sql(snapshot))
+        _run_group(cur, queries, names, results, timings)
+        conn.rollback()
+        return results, timings
+    finally:
+        release(conn)
+
+
+def _run_threads(queries: Dict[str, QuerySpec], connect: Callable, release: Callable) -> Tuple[Results, Timings]:
+    results: Results = {}
+    timings: Timings = {}
+    groups = _split(queries, FANOUT_WIDTH)
+    leader = connect()
+    try:
+        cur = leader.cursor()
+        cur.execute(SNAPSHOT_ISOLATION)
+        snapshot = None
+        if len(groups) > 1:
+            cur.execute("SELECT pg_export_snapshot()")
+            rows = cur.fetchall()
+            snapshot = rows[0][0] if rows else None
+        # The leader keeps its transaction open until every follower has imported the snapshot.
+        futures = [
+            _executor.submit(_follower, snapshot, queries, names, connect, release)
+            for names in groups[1:]
+        ]
+        _run_group(cur, queries, groups[0], results, timings)
+        for future in futures:
+            group_results, group_timings = future.result(QUERY_TIMEOUT_SECONDS)
+            results.update(group_results)
+            timings.update(group_timings)
+        leader.rollback()
+    finally:
+        release(leader)
+    return results, timings
+
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(label: str, queries: int, wall_ms: float, serial_ms: float) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(label, {"runs": 0, "queries": 0, "wall_ms": 0.0, "serial_ms": 0.0})
+        entry["runs"] += 1
+        entry["queries"] += queries
+        entry["wall_ms"] += wall_ms
+        entry["serial_ms"] += serial_ms
+    if has_request_context():
+        timings = g.setdefault("fanout_timings", [])
+        timings.append((wall_ms, serial_ms))
+
+
+def fanout_stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        snapshot = {label: dict(entry) for label, entry in _stats.items()}
+    report = {}
+    for label, entry in snapshot.items():
+        runs = entry["runs"] or 1
+        report[label] = {
+            "runs": entry["runs"],
+            "queries": entry["queries"],
+            "avg_wall_ms": round(entry["wall_ms"] / runs, 2),
+            "avg_serial_ms": round(entry["serial_ms"] / runs, 2),
+            "avg_saved_ms": round((entry["serial_ms"] - entry["wall_ms"]) / runs, 2),
+        }
+    return report
+
+
+def reset_fanout_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def add_server_timing(response):
+    timings = g.get("fanout_timings") if has_request_context() else None
+    if timings:
+        wall = sum(t[0] for t in timings)
+        serial = sum(t[1] for t in timings)
+        value = f"db;dur={wall:.1f};desc=\"fan-out\", db-serial;dur={serial:.1f};desc=\"sum of queries\""
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = f"{existing}, {value}" if existing else value
+    return response
+
+
+def run_queries(
+    queries: Dict[str, QuerySpec],
+    connect: Callable = get_connection,
+    release: Callable = release_connection,
+    label: Optional[str] = None,
+) -> Results:
+    """Runs independent read-only queries concurrently on one shared snapshot and returns all rows per name."""
+    started = time.perf_counter()
+    mode = query_mode()
+    slots = None
+    if mode in _fanout_slots and (mode == "async" or len(queries) > 1):
+        slots = _fanout_slots[mode]
+        if slots is None or not slots.acquire(blocking=False):
+            mode, slots = "sequential", None
+    try:
+        if mode == "async":
+            results, timings = _async_runner.run(queries)
+        elif mode == "threads" and len(queries) > 1:
+            results, timings = _run_threads(queries, connect, release)
+        else:
+            results = {}
+            timings = {}
+            conn = connect()
+            try:
+                cur = conn.cursor()
+                cur.execute(SNAPSHOT_ISOLATION)
+                _run_group(cur, queries, list(queries), results, timings)
+                conn.rollback()
+            finally:
+                release(conn)
+    finally:
+        if slots is not None:
+            slots.release()
+    wall_ms = (time.perf_counter() - started) * 1000
+    if label is None:
+        label = (request.endpoint if has_request_context() else None) or "unknown"
+    _record(label, len(queries), wall_ms, sum(timings.values()))
+    return {name: results[name] for name in queries}
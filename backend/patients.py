@@ -145,31 +145,23 @@ def search_patients():
         # Enrich the top result (or exact match) with financial banner info
         if results:
              top = results[0]
-             # If we have an exact match or just the top result, fetch stats
-             # fetching stats for ALL results is expensive, so we only do it for the top one
-             # to support the "banner" feature which typically shows info for the best match.
-             
-             pid = top["id"]
-             cur.execute(
-                "SELECT COALESCE(SUM(amount), 0) FROM income_records WHERE patient_id = %s",
-                (pid,)
-             )
-             total_paid = float(cur.fetchone()[0] or 0.0)
-             
+             # patient_stats keeps lifetime totals and the last visit per patient,
+             # so the banner is a single primary-key lookup.
              cur.execute(
                 """
-                SELECT s.first_name, s.last_name, ir.service_date
-                FROM income_records ir
-                JOIN staff s ON s.id = ir.doctor_id
-                WHERE ir.patient_id = %s
-                ORDER BY ir.service_date DESC, ir.id DESC
-                LIMIT 1
+                SELECT ps.lifetime_paid, s.first_name, s.last_name, ps.last_visit
+                FROM patient_stats ps
+                LEFT JOIN staff s ON s.id = ps.last_doctor_id
+                WHERE ps.patient_id = %s
                 """,
-                (pid,)
+                (top["id"],)
              )
-             last_row = cur.fetchone()
-             last_doctor = f"{last_row[0]} {last_row[1]}" if last_row else None
-             last_date = last_row[2].isoformat() if last_row and hasattr(last_row[2], "isoformat") else str(last_row[2]) if last_row else None
+             stats_row = cur.fetchone()
+             total_paid = float(stats_row[0] or 0.0) if stats_row else 0.0
+             last_doctor = f"{stats_row[1]} {stats_row[2]}" if stats_row and stats_row[1] else None
+             last_date = None
+             if stats_row and stats_row[3] is not None:
+                 last_date = stats_row[3].isoformat() if hasattr(stats_row[3], "isoformat") else str(stats_row[3])
              
              top["banner"] = {
                  "total_paid": total_paid,
@@ -183,6 +175,55 @@ def search_patients():
     return jsonify(results)
 
 
+@patients_bp.route("/cohorts", methods=["GET"])
+def patient_cohorts():
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.args.get("from") or today.replace(month=1, day=1).isoformat())
+        end = date.fromisoformat(request.args.get("to") or today.isoformat())
+    except ValueError:
+        return jsonify({"error": "invalid_date_format"}), 400
+    if start > end:
+        return jsonify({"error": "invalid_date_range"}), 400
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT date_trunc('month', first_visit)::date AS cohort,
+                   COUNT(*) AS new_patients,
+                   COUNT(*) FILTER (WHERE visit_count > 1) AS returning_patients,
+                   COALESCE(SUM(lifetime_paid), 0) AS lifetime_paid,
+                   COALESCE(AVG(visit_count), 0) AS avg_visits
+            FROM patient_stats
+            WHERE first_visit BETWEEN %s AND %s
+            GROUP BY cohort
+            ORDER BY cohort
+            """,
+            (start, end),
+        )
+        rows = cur.fetchall()
+    finally:
+        release_connection(conn)
+
+    cohorts: List[Dict[str, Any]] = []
+    for cohort, new_patients, returning_patients, lifetime_paid, avg_visits in rows:
+        new_patients = int(new_patients or 0)
+        returning_patients = int(returning_patients or 0)
+        cohorts.append(
+            {
+                "cohort": cohort.isoformat() if hasattr(cohort, "isoformat") else str(cohort),
+                "new_patients": new_patients,
+                "returning_patients": returning_patients,
+                "retention_rate": round(returning_patients / new_patients, 4) if new_patients else 0.0,
+                "lifetime_paid": float(lifetime_paid or 0),
+                "avg_visits": round(float(avg_visits or 0), 2),
+            }
+        )
+    return jsonify(cohorts)
+
+
 @patients_bp.route("/receipt-reasons", methods=["GET"])
 def receipt_reasons():
     items = [
@@ -1,13 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional, Dict, Any
-import json
 import io
 
 from flask import Blueprint, jsonify, request, send_file
 import psycopg2
 
+from .config import config
 from .db import get_connection, release_connection
-from .staff import get_role_id
+from .http_cache import cache_tables
+from .shift_ranges import overlaps, overlaps_row
+from . import audit
+from .staff import get_authenticated_staff, get_role_id
 
 schedule_bp = Blueprint("schedule", __name__)
 
@@ -16,15 +19,14 @@ def parse_iso_datetime(dt_str: str) -> datetime:
     return datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
 
 def check_conflicts(cur, staff_id: int, start_time: datetime, end_time: datetime, exclude_shift_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    query = """
+    query = f"""
         SELECT s.id, s.start_time, s.end_time, st.first_name, st.last_name
         FROM shifts s
         JOIN staff st ON s.staff_id = st.id
         WHERE s.staff_id = %s
-          AND s.start_time < %s
-          AND s.end_time > %s
+          AND {overlaps("s")}
     """
-    params = [staff_id, end_time, start_time]
+    params = [staff_id, start_time, end_time]
     
     if exclude_shift_id:
         query += " AND s.id != %s"
@@ -44,18 +46,10 @@ def check_conflicts(cur, staff_id: int, start_time: datetime, end_time: datetime
     return conflicts
 
 def log_audit(cur, action: str, shift_id: Optional[int], details: Dict[str, Any], user_id: Optional[int] = None):
-    # If we had a real user session, we would use user_id. 
-    # For now, we might pass a mock admin ID or leave it null if unknown.
-    # We will assume user_id=1 (Admin) for this implementation if not provided.
-    admin_id = user_id or 1 
-    
-    cur.execute(
-        """
-        INSERT INTO schedule_audit_logs (shift_id, action, changed_by, details)
-        VALUES (%s, %s, %s, %s)
-        """,
-        (shift_id, action, admin_id, json.dumps(details, default=str))
-    )
+    if user_id is None:
+        auth = get_authenticated_staff()
+        user_id = auth["id"] if auth else None
+    audit.record(cur, "shift", shift_id, action.lower(), user_id, details)
 
 def send_notification(staff_id: int, message: str):
     # In a real app, this would send an email or push notification
@@ -72,27 +66,35 @@ def ensure_schedule_schema(cur):
             end_time        TIMESTAMPTZ NOT NULL,
             note            TEXT,
             created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            period          TSTZRANGE GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED
         )
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_shifts_time ON shifts (start_time, end_time)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_shifts_staff ON shifts (staff_id)")
+    # Tables created before migration 026 lack period, which every overlap
+    # lookup reads (shift_ranges.overlaps). ALTER TABLE would lock shifts on
+    # every request even with IF NOT EXISTS, so the catalog is checked first.
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS schedule_audit_logs (
-            id              SERIAL PRIMARY KEY,
-            shift_id        INT,
-            action          VARCHAR(20) NOT NULL,
-            changed_by      INT REFERENCES staff(id),
-            details         TEXT,
-            created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        )
+        DO $ensure$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'shifts' AND column_name = 'period'
+            ) THEN
+                ALTER TABLE shifts
+                    ADD COLUMN period TSTZRANGE
+                    GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED;
+                CREATE INDEX IF NOT EXISTS idx_shifts_period ON shifts USING gist (period);
+            END IF;
+        END $ensure$;
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_schedule_audit_logs_shift ON schedule_audit_logs (shift_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shifts_time ON shifts (start_time, end_time)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shifts_staff ON shifts (staff_id)")
 
 @schedule_bp.route("", methods=["GET"])
+@cache_tables("shifts", "staff", "staff_roles")
 def list_shifts():
     start_str = request.args.get("start")
     end_str = request.args.get("end")
@@ -111,13 +113,13 @@ def list_shifts():
     try:
         cur = conn.cursor()
         ensure_schedule_schema(cur)
-        query = """
+        query = f"""
             SELECT s.id, s.staff_id, s.start_time, s.end_time, s.note, 
                    st.first_name, st.last_name, r.name as role_name, r.id as role_id
             FROM shifts s
             JOIN staff st ON s.staff_id = st.id
             JOIN staff_roles r ON st.role_id = r.id
-            WHERE s.start_time >= %s AND s.end_time <= %s
+            WHERE {overlaps("s")}
         """
         params = [start_date, end_date]
         
@@ -307,6 +309,370 @@ def delete_shift(shift_id):
     finally:
         release_connection(conn)
 
+TEMPLATE_MAX_DAYS = 184
+
+# Expands templates into candidate shifts for [from, to] in clinic-local
+# time, minus exceptions and shifts already materialized from the template.
+TEMPLATE_CANDIDATES_SQL = """
+    WITH days AS (
+        SELECT %(from)s::date + n AS day
+        FROM generate_series(0, %(to)s::date - %(from)s::date) AS n
+    ),
+    candidates AS (
+        SELECT t.id AS template_id, t.staff_id, t.note,
+               (d.day + t.start_time) AT TIME ZONE %(tz)s AS start_time,
+               (d.day + t.end_time) AT TIME ZONE %(tz)s AS end_time
+        FROM shift_templates t
+        JOIN days d ON EXTRACT(ISODOW FROM d.day) = t.weekday
+        WHERE d.day >= t.valid_from
+          AND (t.valid_to IS NULL OR d.day <= t.valid_to)
+          AND (%(staff_ids)s::int[] IS NULL OR t.staff_id = ANY(%(staff_ids)s::int[]))
+          AND NOT EXISTS (
+              SELECT 1 FROM shift_template_exceptions e
+              WHERE e.staff_id = t.staff_id
+                AND e.exception_date = d.day
+                AND (e.template_id IS NULL OR e.template_id = t.id)
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM shifts s
+              WHERE s.template_id = t.id
+                AND s.start_time = (d.day + t.start_time) AT TIME ZONE %(tz)s
+          )
+    )
+"""
+
+
+def parse_template(data: Dict[str, Any]) -> Dict[str, Any]:
+    for field in ("staff_id", "weekday", "start_time", "end_time"):
+        if data.get(field) in (None, ""):
+            raise ValueError(f"missing_field_{field}")
+    try:
+        template = {
+            "staff_id": int(data["staff_id"]),
+            "weekday": int(data["weekday"]),
+            "start_time": time.fromisoformat(str(data["start_time"])),
+            "end_time": time.fromisoformat(str(data["end_time"])),
+            "valid_from": date.fromisoformat(data["valid_from"]) if data.get("valid_from") else date.today(),
+            "valid_to": date.fromisoformat(data["valid_to"]) if data.get("valid_to") else None,
+            "note": data.get("note") or None,
+        }
+    except (TypeError, ValueError):
+        raise ValueError("invalid_data_format")
+    if not 1 <= template["weekday"] <= 7:
+        raise ValueError("invalid_weekday")
+    if template["end_time"] <= template["start_time"]:
+        raise ValueError("end_time_must_be_after_start_time")
+    if template["valid_to"] and template["valid_to"] < template["valid_from"]:
+        raise ValueError("valid_to_before_valid_from")
+    return template
+
+
+def serialize_template(row) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "staff_id": row[1],
+        "weekday": row[2],
+        "start_time": row[3].strftime("%H:%M"),
+        "end_time": row[4].strftime("%H:%M"),
+        "valid_from": row[5].isoformat(),
+        "valid_to": row[6].isoformat() if row[6] else None,
+        "note": row[7],
+    }
+
+
+def find_template_conflicts(cur, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every overlap of the batch with existing shifts or with itself, in one query."""
+    cur.execute(
+        TEMPLATE_CANDIDATES_SQL
+        + f"""
+        SELECT c.template_id, c.staff_id, c.start_time, c.end_time, 'shift', s.id, s.start_time, s.end_time
+        FROM candidates c
+        JOIN shifts s
+          ON s.staff_id = c.staff_id AND {overlaps_row("s", "c")}
+        UNION ALL
+        SELECT c.template_id, c.staff_id, c.start_time, c.end_time, 'template', o.template_id, o.start_time, o.end_time
+        FROM candidates c
+        JOIN candidates o
+          ON o.staff_id = c.staff_id AND o.template_id > c.template_id
+         AND o.start_time < c.end_time AND o.end_time > c.start_time
+        ORDER BY 3, 2
+        """,
+        params,
+    )
+    return [
+        {
+            "template_id": row[0],
+            "staff_id": row[1],
+            "start_time": row[2].isoformat(),
+            "end_time": row[3].isoformat(),
+            "conflicts_with": {"type": row[4], "id": row[5], "start_time": row[6].isoformat(), "end_time": row[7].isoformat()},
+        }
+        for row in cur.fetchall()
+    ]
+
+
+def materialize_templates(cur, params: Dict[str, Any]):
+    # Shifts and their audit entries go in with one statement; ON CONFLICT
+    # covers a concurrent run that materialized the same range first.
+    cur.execute(
+        TEMPLATE_CANDIDATES_SQL
+        + """,
+        inserted AS (
+            INSERT INTO shifts (staff_id, start_time, end_time, note, template_id)
+            SELECT staff_id, start_time, end_time, note, template_id FROM candidates
+            ON CONFLICT DO NOTHING
+            RETURNING id, staff_id, start_time, end_time, template_id
+        ),
+        audited AS (
+            INSERT INTO audit_outbox (entity_type, entity_id, action, actor_id, payload)
+            SELECT 'shift', id, 'materialize', %(actor_id)s,
+                   jsonb_build_object('template_id', template_id, 'staff_id', staff_id,
+                                      'start_time', start_time, 'end_time', end_time)
+            FROM inserted
+        )
+        SELECT id, staff_id, start_time, end_time, template_id
+        FROM inserted
+        ORDER BY start_time, staff_id
+        """,
+        params,
+    )
+    return cur.fetchall()
+
+
+@schedule_bp.route("/templates", methods=["GET"])
+@cache_tables("shift_templates")
+def list_templates():
+    staff_id = request.args.get("staff_id")
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        query = """
+            SELECT id, staff_id, weekday, start_time, end_time, valid_from, valid_to, note
+            FROM shift_templates
+        """
+        params = []
+        if staff_id:
+            query += " WHERE staff_id = %s"
+            params.append(int(staff_id))
+        cur.execute(query + " ORDER BY staff_id, weekday, start_time", params)
+        return jsonify([serialize_template(row) for row in cur.fetchall()])
+    except ValueError:
+        return jsonify({"error": "invalid_staff_id"}), 400
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates", methods=["POST"])
+def create_template():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "no_data"}), 400
+    try:
+        template = parse_template(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO shift_templates (staff_id, weekday, start_time, end_time, valid_from, valid_to, note)
+            VALUES (%(staff_id)s, %(weekday)s, %(start_time)s, %(end_time)s, %(valid_from)s, %(valid_to)s, %(note)s)
+            RETURNING id
+            """,
+            template,
+        )
+        template_id = cur.fetchone()[0]
+        conn.commit()
+        return jsonify({"id": template_id, "status": "created"}), 201
+    except psycopg2.errors.ForeignKeyViolation:
+        conn.rollback()
+        return jsonify({"error": "staff_not_found"}), 404
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates/<int:template_id>", methods=["DELETE"])
+def delete_template(template_id):
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # Shifts already materialized stay; their template_id is cleared.
+        cur.execute("DELETE FROM shift_templates WHERE id = %s", (template_id,))
+        if cur.rowcount == 0:
+            return jsonify({"error": "template_not_found"}), 404
+        conn.commit()
+        return jsonify({"status": "deleted"}), 200
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates/exceptions", methods=["GET"])
+@cache_tables("shift_template_exceptions")
+def list_template_exceptions():
+    conditions = []
+    params = []
+    try:
+        if request.args.get("staff_id"):
+            conditions.append("staff_id = %s")
+            params.append(int(request.args["staff_id"]))
+        if request.args.get("from"):
+            conditions.append("exception_date >= %s")
+            params.append(date.fromisoformat(request.args["from"]))
+        if request.args.get("to"):
+            conditions.append("exception_date <= %s")
+            params.append(date.fromisoformat(request.args["to"]))
+    except ValueError:
+        return jsonify({"error": "invalid_filter"}), 400
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT id, staff_id, template_id, exception_date, reason
+            FROM shift_template_exceptions
+            WHERE {" AND ".join(conditions) or "TRUE"}
+            ORDER BY exception_date, staff_id
+            """,
+            params,
+        )
+        return jsonify([
+            {"id": row[0], "staff_id": row[1], "template_id": row[2], "date": row[3].isoformat(), "reason": row[4]}
+            for row in cur.fetchall()
+        ])
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates/exceptions", methods=["POST"])
+def create_template_exception():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "no_data"}), 400
+    try:
+        staff_id = int(data["staff_id"])
+        exception_date = date.fromisoformat(data["date"])
+        template_id = int(data["template_id"]) if data.get("template_id") else None
+    except KeyError as e:
+        return jsonify({"error": f"missing_field_{e.args[0]}"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_data_format"}), 400
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO shift_template_exceptions (staff_id, template_id, exception_date, reason)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
+            RETURNING id
+            """,
+            (staff_id, template_id, exception_date, data.get("reason") or None),
+        )
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return jsonify({"error": "exception_exists"}), 409
+        conn.commit()
+        return jsonify({"id": row[0], "status": "created"}), 201
+    except psycopg2.errors.ForeignKeyViolation:
+        conn.rollback()
+        return jsonify({"error": "staff_or_template_not_found"}), 404
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates/exceptions/<int:exception_id>", methods=["DELETE"])
+def delete_template_exception(exception_id):
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM shift_template_exceptions WHERE id = %s", (exception_id,))
+        if cur.rowcount == 0:
+            return jsonify({"error": "exception_not_found"}), 404
+        conn.commit()
+        return jsonify({"status": "deleted"}), 200
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_connection(conn)
+
+
+@schedule_bp.route("/templates/materialize", methods=["POST"])
+def materialize_shift_templates():
+    data = request.get_json(silent=True) or {}
+    try:
+        start_date = date.fromisoformat(data["from"])
+        end_date = date.fromisoformat(data["to"])
+        staff_ids = data.get("staff_ids")
+        if staff_ids is not None:
+            if not isinstance(staff_ids, list):
+                raise TypeError("staff_ids")
+            staff_ids = [int(value) for value in staff_ids]
+    except KeyError as e:
+        return jsonify({"error": f"missing_field_{e.args[0]}"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_data_format"}), 400
+    if end_date < start_date:
+        return jsonify({"error": "to_before_from"}), 400
+    if (end_date - start_date).days >= TEMPLATE_MAX_DAYS:
+        return jsonify({"error": "range_too_large", "max_days": TEMPLATE_MAX_DAYS}), 400
+    # Omitting staff_ids covers everyone; an empty selection covers no one.
+    if staff_ids == []:
+        return jsonify({"created": 0, "shifts": []}), 200
+
+    auth = get_authenticated_staff()
+    params = {
+        "from": start_date,
+        "to": end_date,
+        "tz": config.CLINIC_TIMEZONE,
+        "staff_ids": staff_ids,
+        "actor_id": auth["id"] if auth else None,
+    }
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        conflicts = find_template_conflicts(cur, params)
+        if conflicts and not data.get("force", False):
+            conn.rollback()
+            return jsonify({"error": "conflict_detected", "conflicts": conflicts}), 409
+
+        rows = materialize_templates(cur, params)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_connection(conn)
+
+    per_staff: Dict[int, int] = {}
+    for row in rows:
+        per_staff[row[1]] = per_staff.get(row[1], 0) + 1
+    for staff_id, count in per_staff.items():
+        send_notification(staff_id, f"{count} new shifts assigned between {start_date} and {end_date}")
+
+    return jsonify({
+        "created": len(rows),
+        "shifts": [
+            {"id": row[0], "staff_id": row[1], "start": row[2].isoformat(), "end": row[3].isoformat(), "template_id": row[4]}
+            for row in rows
+        ],
+    }), 201
+
 @schedule_bp.route("/export", methods=["GET"])
 def export_schedule():
     from reportlab.lib import colors
@@ -330,12 +696,12 @@ def export_schedule():
     try:
         cur = conn.cursor()
         ensure_schedule_schema(cur)
-        query = """
+        query = f"""
             SELECT s.start_time, s.end_time, st.first_name, st.last_name, r.name, s.note
             FROM shifts s
             JOIN staff st ON s.staff_id = st.id
             JOIN staff_roles r ON st.role_id = r.id
-            WHERE s.start_time >= %s AND s.end_time <= %s
+            WHERE {overlaps("s")}
             ORDER BY s.start_time ASC, st.last_name ASC
         """
         cur.execute(query, (start_date, end_date))
@@ -0,0 +1,13 @@
+def overlaps(alias: str = "s") -> str:
+    """Shifts overlapping a half-open [start, end) window; takes (start, end) params.
+
+    Unlike start >= window start AND end <= window end, this also matches
+    shifts that cross a window boundary. It is answered by the GiST indexes
+    on shifts.period (migration 026).
+    """
+    return f"{alias}.period && tstzrange(%s, %s, '[)')"
+
+
+def overlaps_row(alias: str, other: str) -> str:
+    """Join form of `overlaps` against another row's start_time/end_time."""
+    return f"{alias}.period && tstzrange({other}.start_time, {other}.end_time, '[)')"
@@ -9,6 +9,7 @@ import math
 import logging
 import os
 import uuid
+import zipfile
 from typing import Any, Dict, List, Optional, Tuple
 
 import psycopg2
@@ -16,6 +17,10 @@ from flask import Blueprint, jsonify, request, Response, send_file
 
 from .config import config
 from .db import get_connection, release_connection
+from .exports import EXPORT_CHUNK_SIZE, iter_csv, stream_query, zip_response
+from .http_cache import cache_tables
+from . import audit, lookups, storage
+from .shift_ranges import overlaps
 
 
 staff_bp = Blueprint("staff", __name__)
@@ -69,6 +74,10 @@ def get_documents_base_dir() -> str:
     return base_dir
 
 
+def get_document_storage() -> storage.DocumentStorage:
+    return storage.get_storage(get_documents_base_dir())
+
+
 def ensure_staff_documents_table(conn) -> None:
     cur = conn.cursor()
     cur.execute(
@@ -83,8 +92,14 @@ def ensure_staff_documents_table(conn) -> None:
             signer_name     VARCHAR(150) NOT NULL,
             signature_hash  VARCHAR(64) NOT NULL,
             signature_token VARCHAR(64),
-            file_path       TEXT NOT NULL,
-            created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            file_path       TEXT,
+            storage_key     TEXT,
+            sha256          CHAR(64),
+            size_bytes      BIGINT,
+            file_name       TEXT,
+            salary_payment_id INT REFERENCES salary_payments(id) ON DELETE SET NULL,
+            created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            CONSTRAINT staff_documents_location_check CHECK (storage_key IS NOT NULL OR file_path IS NOT NULL)
         )
         """
     )
@@ -94,30 +109,6 @@ def ensure_staff_documents_table(conn) -> None:
     cur.execute("CREATE INDEX IF NOT EXISTS idx_staff_documents_signed_at ON staff_documents(signed_at)")
 
 
-def ensure_salary_amount_audit_table(conn) -> None:
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS salary_amount_audit (
-            id                  SERIAL PRIMARY KEY,
-            staff_id            INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
-            salary_payment_id   INT REFERENCES salary_payments(id) ON DELETE SET NULL,
-            previous_amount     NUMERIC(12, 2) NOT NULL,
-            new_amount          NUMERIC(12, 2) NOT NULL,
-            delta_amount        NUMERIC(12, 2) NOT NULL,
-            change_source       VARCHAR(40) NOT NULL,
-            change_reason       TEXT,
-            changed_by_staff_id INT,
-            metadata            JSONB NOT NULL DEFAULT '{}'::jsonb,
-            created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        )
-        """
-    )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_salary_amount_audit_staff ON salary_amount_audit(staff_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_salary_amount_audit_payment ON salary_amount_audit(salary_payment_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_salary_amount_audit_created ON salary_amount_audit(created_at DESC)")
-
-
 def record_salary_amount_audit(
     conn,
     *,
@@ -130,40 +121,22 @@ def record_salary_amount_audit(
     changed_by_staff_id: Optional[int],
     metadata: Optional[Dict[str, Any]] = None,
 ) -> None:
-    ensure_salary_amount_audit_table(conn)
-    cur = conn.cursor()
     previous = round(float(previous_amount or 0), 2)
     current = round(float(new_amount or 0), 2)
-    delta = round(current - previous, 2)
-    metadata_payload = json.dumps(metadata or {})
-    cur.execute(
-        """
-        INSERT INTO salary_amount_audit
-            (
-                staff_id,
-                salary_payment_id,
-                previous_amount,
-                new_amount,
-                delta_amount,
-                change_source,
-                change_reason,
-                changed_by_staff_id,
-                metadata
-            )
-        VALUES
-            (%s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
-        """,
-        (
-            staff_id,
-            salary_payment_id,
-            previous,
-            current,
-            delta,
-            str(change_source or "unknown"),
-            (change_reason or "").strip() or None,
-            changed_by_staff_id,
-            metadata_payload,
-        ),
+    audit.record(
+        conn.cursor(),
+        "salary_payment",
+        salary_payment_id,
+        str(change_source or "unknown"),
+        changed_by_staff_id,
+        {
+            "staff_id": staff_id,
+            "previous_amount": previous,
+            "new_amount": current,
+            "delta_amount": round(current - previous, 2),
+            "reason": (change_reason or "").strip() or None,
+            "metadata": metadata or {},
+        },
     )
 
 
@@ -296,8 +269,9 @@ def build_salary_report_data(staff_id: int, from_param: Optional[str], to_param:
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT s.id, s.first_name, s.last_name, s.base_salary, s.commission_rate, s.total_revenue, s.last_paid_at, r.name
+            SELECT s.id, s.first_name, s.last_name, s.base_salary, s.commission_rate, sr.total_revenue, s.last_paid_at, r.name
             FROM staff s
+            JOIN staff_revenue sr ON sr.staff_id = s.id
             JOIN staff_roles r ON r.id = s.role_id
             WHERE s.id = %s
             """,
@@ -361,12 +335,13 @@ def build_salary_report_data(staff_id: int, from_param: Optional[str], to_param:
 
             if includes_lab_cost:
                 cur.execute(
-                    """
+                    f"""
                     SELECT
                         p.first_name,
                         p.last_name,
                         COALESCE(SUM(ir.amount), 0) AS total_paid,
-                        COALESCE(SUM(GREATEST(ir.lab_cost, 0)), 0) AS total_lab_fee
+                        COALESCE(SUM(GREATEST(ir.lab_cost, 0)), 0) AS total_lab_fee,
+                        {STAMPED_COMMISSION_SQL} AS commission
                     FROM income_records ir
                     JOIN patients p ON p.id = ir.patient_id
                     WHERE ir.doctor_id = %s
@@ -379,8 +354,9 @@ def build_salary_report_data(staff_id: int, from_param: Optional[str], to_param:
                 )
             else:
                 cur.execute(
-                    """
-                    SELECT p.first_name, p.last_name, COALESCE(SUM(ir.amount), 0) AS total_paid, 0::numeric AS total_lab_fee
+                    f"""
+                    SELECT p.first_name, p.last_name, COALESCE(SUM(ir.amount), 0) AS total_paid, 0::numeric AS total_lab_fee,
+                           {STAMPED_COMMISSION_NO_LAB_SQL} AS commission
                     FROM income_records ir
                     JOIN patients p ON p.id = ir.patient_id
                     WHERE ir.doctor_id = %s
@@ -393,12 +369,12 @@ def build_salary_report_data(staff_id: int, from_param: Optional[str], to_param:
                 )
             patient_rows = cur.fetchall()
 
-            if commission_rate == 0 and float(staff_row[5] or 0) > 0:
-                commission_rate = config.DOCTOR_COMMISSION_RATE
-
             total_income = sum(float(row[2] or 0) for row in patient_rows)
             total_lab_fees = sum(max(float(row[3] or 0), 0.0) for row in patient_rows)
-            commission_metrics = compute_doctor_commission_metrics(total_income, total_lab_fees, commission_rate)
+            stamped_commission = sum(float(row[4] or 0) for row in patient_rows)
+            commission_metrics = compute_doctor_commission_metrics(
+                total_income, total_lab_fees, commission_rate, stamped_commission
+            )
             total_commission = commission_metrics["total_commission"]
 
             cur.execute(
@@ -426,7 +402,7 @@ def build_salary_report_data(staff_id: int, from_param: Optional[str], to_param:
         adjusted_total_salary = round(base_salary + total_commission + adjustments, 2)
         report["summary"] = {
             "base_salary": round(base_salary, 2),
-            "commission_rate": round(commission_rate, 4),
+            "commission_rate": commission_metrics["effective_commission_rate"],
             "total_income": round(total_income, 2),
             "commission_base_income": commission_metrics["commission_base_income"],
             "total_commission": round(total_commission, 2),
@@ -494,18 +470,38 @@ def apply_report_amount_override(report: Dict[str, Any], amount_override: Option
     return report
 
 
-def compute_doctor_commission_metrics(total_income: float, total_lab_fees: float, commission_rate: float) -> Dict[str, float]:
+# Commission over unpaid income at the rate stamped on each row (migration 015),
+# so a later change to staff.commission_rate does not reprice past visits.
+STAMPED_COMMISSION_SQL = "COALESCE(SUM((ir.amount - GREATEST(ir.lab_cost, 0)) * ir.commission_rate), 0)"
+STAMPED_COMMISSION_NO_LAB_SQL = "COALESCE(SUM(ir.amount * ir.commission_rate), 0)"
+
+
+def compute_doctor_commission_metrics(
+    total_income: float,
+    total_lab_fees: float,
+    commission_rate: float,
+    stamped_commission: Optional[float] = None,
+) -> Dict[str, float]:
     gross_income = round(float(total_income or 0), 2)
     lab_fees = round(max(float(total_lab_fees or 0), 0.0), 2)
     commission_base_income = round(max(gross_income - lab_fees, 0.0), 2)
     negative_balance = round(max(lab_fees - gross_income, 0.0), 2)
-    total_commission = round(commission_base_income * float(commission_rate or 0), 2)
+    if stamped_commission is None:
+        total_commission = round(commission_base_income * float(commission_rate or 0), 2)
+    else:
+        # Lab fees above income still leave no commission, whatever the row rates.
+        total_commission = round(max(float(stamped_commission or 0), 0.0), 2)
+    if commission_base_income > 0 and stamped_commission is not None:
+        effective_rate = round(total_commission / commission_base_income, 4)
+    else:
+        effective_rate = round(float(commission_rate or 0), 4)
     return {
         "total_income": gross_income,
         "total_lab_fees": lab_fees,
         "commission_base_income": commission_base_income,
         "negative_balance": negative_balance,
         "total_commission": total_commission,
+        "effective_commission_rate": effective_rate,
     }
 
 
@@ -519,15 +515,11 @@ def save_salary_report(staff_id: int, report: Dict[str, Any], signature_info: Di
         return None, None, "pdf_generation_failed"
 
     signed_date = signature_info["signed_at"][:10]
-    staff_dir = os.path.join(get_documents_base_dir(), f"staff_{staff_id}")
-    os.makedirs(staff_dir, exist_ok=True)
     filename = f"{signature_info['signer_name']} Salary Report {signed_date}.pdf"
-    file_path = os.path.join(staff_dir, filename)
     try:
-        with open(file_path, "wb") as handle:
-            handle.write(pdf_data)
-    except OSError as exc:
-        logger.exception("Failed to write salary report file for staff %s: %s", staff_id, exc)
+        stored = get_document_storage().put(pdf_data, ".pdf")
+    except Exception as exc:
+        logger.exception("Failed to store salary report for staff %s: %s", staff_id, exc)
         return None, None, "document_storage_failed"
 
     conn = get_connection()
@@ -537,9 +529,10 @@ def save_salary_report(staff_id: int, report: Dict[str, Any], signature_info: Di
         cur.execute(
             """
             INSERT INTO staff_documents
-                (staff_id, document_type, period_from, period_to, signed_at, signer_name, signature_hash, signature_token, file_path)
+                (staff_id, document_type, period_from, period_to, signed_at, signer_name, signature_hash, signature_token,
+                 storage_key, sha256, size_bytes, file_name)
             VALUES
-                (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """,
             (
                 staff_id,
@@ -550,7 +543,10 @@ def save_salary_report(staff_id: int, report: Dict[str, Any], signature_info: Di
                 signature_info["signer_name"],
                 signature_info["signature_hash"],
                 signature_info["signature_token"],
-                file_path,
+                stored.key,
+                stored.sha256,
+                stored.size,
+                filename,
             ),
         )
         conn.commit()
@@ -564,13 +560,7 @@ def save_salary_report(staff_id: int, report: Dict[str, Any], signature_info: Di
 
 
 def get_role_id(conn, role_name: str) -> Optional[int]:
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id FROM staff_roles WHERE name = %s",
-        (role_name,),
-    )
-    row = cur.fetchone()
-    return int(row[0]) if row else None
+    return lookups.role_id(conn, role_name)
 
 
 def build_salary_report_pdf(report: Dict[str, Any], signature_info: Optional[Dict[str, Any]]) -> bytes:
@@ -1028,22 +1018,14 @@ def build_salary_report_pdf(report: Dict[str, Any], signature_info: Optional[Dic
 
 
 @staff_bp.route("/roles", methods=["GET"])
+@cache_tables("staff_roles")
 def list_roles():
     conn = get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, name
-            FROM staff_roles
-            ORDER BY name
-            """
-        )
-        rows = cur.fetchall()
+        items = lookups.roles(conn)
     finally:
         release_connection(conn)
 
-    items = [{"id": row[0], "name": row[1]} for row in rows]
     return jsonify(items)
 
 
@@ -1051,23 +1033,10 @@ def list_roles():
 def list_medicines():
     conn = get_connection()
     try:
-        cur = conn.cursor()
-        try:
-            cur.execute(
-                """
-                SELECT id, name
-                FROM medicine_presets
-                ORDER BY name
-                """
-            )
-        except psycopg2.errors.UndefinedTable:
-            conn.rollback()
-            return jsonify([])
-        rows = cur.fetchall()
+        items = lookups.medicines(conn)
     finally:
         release_connection(conn)
 
-    items = [{"id": int(row[0]), "name": row[1]} for row in rows]
     return jsonify(items)
 
 
@@ -1097,6 +1066,7 @@ def create_medicine():
             return jsonify({"error": "medicine_table_missing"}), 400
         row = cur.fetchone()
         conn.commit()
+        lookups.invalidate("medicine_presets")
     except Exception:
         conn.rollback()
         raise
@@ -1120,6 +1090,7 @@ def delete_medicine(medicine_id: int):
             conn.rollback()
             return jsonify({"error": "medicine_not_found"}), 404
         conn.commit()
+        lookups.invalidate("medicine_presets")
     except Exception:
         conn.rollback()
         raise
@@ -1129,6 +1100,116 @@ def delete_medicine(medicine_id: int):
     return jsonify({"status": "ok"})
 
 
+@staff_bp.route("/payroll/preview", methods=["GET"])
+def payroll_preview():
+    """What paying every active staff member now would amount to, computed like pay_salary."""
+    auth = get_authenticated_staff()
+    if not auth:
+        return jsonify({"error": "unauthorized"}), 401
+    if str(auth.get("role") or "").lower() not in {"admin", "administrator"}:
+        return jsonify({"error": "forbidden"}), 403
+
+    role = request.args.get("role")
+    try:
+        start_date = parse_payment_date(request.args["from"]) if request.args.get("from") else None
+        end_date = parse_payment_date(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "invalid_date_format"}), 400
+    if start_date and end_date and start_date > end_date:
+        return jsonify({"error": "invalid_date_range"}), 400
+
+    income_conditions = ["ir.salary_payment_id IS NULL"]
+    income_params: List[Any] = []
+    if start_date:
+        income_conditions.append("ir.service_date >= %s")
+        income_params.append(start_date)
+    if end_date:
+        income_conditions.append("ir.service_date <= %s")
+        income_params.append(end_date)
+    staff_conditions = ["s.is_active = TRUE"]
+    staff_params: List[Any] = []
+
+    conn = get_connection()
+    try:
+        if role:
+            staff_conditions.append("s.role_id = %s")
+            staff_params.append(get_role_id(conn, role))
+        cur = conn.cursor()
+        # Both aggregates are served by the partial unpaid indexes (migrations 027, 032).
+        # Commission uses the same stamped-rate sum as pay_salary.
+        cur.execute(
+            f"""
+            WITH unpaid AS (
+                SELECT ir.doctor_id,
+                       SUM(ir.amount) AS income,
+                       SUM(GREATEST(ir.lab_cost, 0)) AS lab_fees,
+                       COUNT(*) AS records,
+                       MIN(ir.service_date) AS oldest,
+                       {STAMPED_COMMISSION_SQL} AS commission
+                FROM income_records ir
+                WHERE {" AND ".join(income_conditions)}
+                GROUP BY ir.doctor_id
+            ),
+            adjustments AS (
+                SELECT staff_id, SUM(amount) AS amount
+                FROM salary_adjustments
+                WHERE applied_to_salary_payment_id IS NULL
+                GROUP BY staff_id
+            )
+            SELECT s.id, s.first_name, s.last_name, r.name, s.base_salary, s.commission_rate, s.last_paid_at,
+                   COALESCE(u.income, 0), COALESCE(u.lab_fees, 0), COALESCE(u.records, 0), u.oldest,
+                   COALESCE(a.amount, 0), COALESCE(u.commission, 0)
+            FROM staff s
+            JOIN staff_roles r ON r.id = s.role_id
+            LEFT JOIN unpaid u ON u.doctor_id = s.id AND r.name = 'doctor'
+            LEFT JOIN adjustments a ON a.staff_id = s.id
+            WHERE {" AND ".join(staff_conditions)}
+            ORDER BY r.name, s.last_name, s.first_name
+            """,
+            income_params + staff_params,
+        )
+        rows = cur.fetchall()
+    finally:
+        release_connection(conn)
+
+    items = []
+    for row in rows:
+        base_salary = float(row[4] or 0)
+        metrics = compute_doctor_commission_metrics(
+            float(row[7] or 0), float(row[8] or 0), float(row[5] or 0), float(row[12] or 0)
+        )
+        adjustments = float(row[11] or 0)
+        items.append({
+            "staff_id": row[0],
+            "name": " ".join(filter(None, [row[1], row[2]])).strip(),
+            "role": row[3],
+            "last_paid_at": row[6].isoformat() if row[6] else None,
+            "base_salary": round(base_salary, 2),
+            "commission_rate": metrics["effective_commission_rate"],
+            "unpaid_income": metrics["total_income"],
+            "unpaid_lab_fees": metrics["total_lab_fees"],
+            "unpaid_records": int(row[9] or 0),
+            "oldest_unpaid_date": row[10].isoformat() if row[10] else None,
+            "negative_balance": metrics["negative_balance"],
+            "commission": metrics["total_commission"],
+            "adjustments": round(adjustments, 2),
+            "total": round(base_salary + metrics["total_commission"] + adjustments, 2),
+        })
+
+    totals = {
+        key: round(sum(item[key] for item in items), 2)
+        for key in ("base_salary", "unpaid_income", "commission", "adjustments", "total")
+    }
+    return jsonify({
+        "period": {
+            "from": start_date.isoformat() if start_date else None,
+            "to": end_date.isoformat() if end_date else None,
+        },
+        "staff": items,
+        "totals": totals,
+    })
+
+
 @staff_bp.route("/<int:staff_id>/salary-estimate", methods=["GET"])
 def get_salary_estimate(staff_id: int):
     from_param = request.args.get("from")
@@ -1138,8 +1219,9 @@ def get_salary_estimate(staff_id: int):
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT s.base_salary, s.commission_rate, s.total_revenue, r.name, s.last_paid_at
+            SELECT s.base_salary, s.commission_rate, sr.total_revenue, r.name, s.last_paid_at
             FROM staff s
+            JOIN staff_revenue sr ON sr.staff_id = s.id
             JOIN staff_roles r ON r.id = s.role_id
             WHERE s.id = %s
             """,
@@ -1176,12 +1258,13 @@ def get_salary_estimate(staff_id: int):
         if role == "doctor":
             if includes_lab_cost:
                 cur.execute(
-                    """
+                    f"""
                     SELECT
                         p.first_name,
                         p.last_name,
                         COALESCE(SUM(ir.amount), 0) AS total_paid,
-                        COALESCE(SUM(GREATEST(ir.lab_cost, 0)), 0) AS total_lab_fee
+                        COALESCE(SUM(GREATEST(ir.lab_cost, 0)), 0) AS total_lab_fee,
+                        {STAMPED_COMMISSION_SQL} AS commission
                     FROM income_records ir
                     JOIN patients p ON p.id = ir.patient_id
                     WHERE ir.doctor_id = %s
@@ -1194,12 +1277,13 @@ def get_salary_estimate(staff_id: int):
                 )
             else:
                 cur.execute(
-                    """
+                    f"""
                     SELECT
                         p.first_name,
                         p.last_name,
                         COALESCE(SUM(ir.amount), 0) AS total_paid,
-                        0::numeric AS total_lab_fee
+                        0::numeric AS total_lab_fee,
+                        {STAMPED_COMMISSION_NO_LAB_SQL} AS commission
                     FROM income_records ir
                     JOIN patients p ON p.id = ir.patient_id
                     WHERE ir.doctor_id = %s
@@ -1213,7 +1297,10 @@ def get_salary_estimate(staff_id: int):
             patient_rows = cur.fetchall()
             total_income = sum(float(r[2] or 0) for r in patient_rows)
             total_lab_fees = sum(max(float(r[3] or 0), 0.0) for r in patient_rows)
-            commission_metrics = compute_doctor_commission_metrics(total_income, total_lab_fees, commission_rate)
+            stamped_commission = sum(float(r[4] or 0) for r in patient_rows)
+            commission_metrics = compute_doctor_commission_metrics(
+                total_income, total_lab_fees, commission_rate, stamped_commission
+            )
             commission_part = commission_metrics["total_commission"]
             unpaid_patients = [
                 {
@@ -1291,8 +1378,9 @@ def pay_salary():
         # Verify staff exists
         cur.execute(
             """
-            SELECT s.id, s.base_salary, s.commission_rate, s.total_revenue, r.name
+            SELECT s.id, s.base_salary, s.commission_rate, sr.total_revenue, r.name
             FROM staff s
+            JOIN staff_revenue sr ON sr.staff_id = s.id
             JOIN staff_roles r ON r.id = s.role_id
             WHERE s.id = %s
             """,
@@ -1328,56 +1416,30 @@ def pay_salary():
             cur = conn.cursor()
 
         if role_name == "doctor":
-            if includes_lab_cost and has_explicit_period:
-                cur.execute(
-                    """
-                    SELECT
-                        COALESCE(SUM(amount), 0),
-                        COALESCE(SUM(GREATEST(lab_cost, 0)), 0)
-                    FROM income_records
-                    WHERE doctor_id = %s
-                      AND salary_payment_id IS NULL
-                      AND service_date BETWEEN %s AND %s
-                    """,
-                    (staff_id, start_date, end_date),
-                )
-            elif includes_lab_cost:
-                cur.execute(
-                    """
-                    SELECT
-                        COALESCE(SUM(amount), 0),
-                        COALESCE(SUM(GREATEST(lab_cost, 0)), 0)
-                    FROM income_records
-                    WHERE doctor_id = %s
-                      AND salary_payment_id IS NULL
-                    """,
-                    (staff_id,),
-                )
-            elif has_explicit_period:
-                cur.execute(
-                    """
-                    SELECT COALESCE(SUM(amount), 0), 0::numeric
-                    FROM income_records
-                    WHERE doctor_id = %s
-                      AND salary_payment_id IS NULL
-                      AND service_date BETWEEN %s AND %s
-                    """,
-                    (staff_id, start_date, end_date),
-                )
+            income_conditions = ["ir.doctor_id = %s", "ir.salary_payment_id IS NULL"]
+            income_params: List[Any] = [staff_id]
+            if has_explicit_period:
+                income_conditions.append("ir.service_date BETWEEN %s AND %s")
+                income_params.extend([start_date, end_date])
+            if includes_lab_cost:
+                columns = f"COALESCE(SUM(ir.amount), 0), COALESCE(SUM(GREATEST(ir.lab_cost, 0)), 0), {STAMPED_COMMISSION_SQL}"
             else:
-                cur.execute(
-                    """
-                    SELECT COALESCE(SUM(amount), 0), 0::numeric
-                    FROM income_records
-                    WHERE doctor_id = %s
-                      AND salary_payment_id IS NULL
-                    """,
-                    (staff_id,),
-                )
+                columns = f"COALESCE(SUM(ir.amount), 0), 0::numeric, {STAMPED_COMMISSION_NO_LAB_SQL}"
+            cur.execute(
+                f"""
+                SELECT {columns}
+                FROM income_records ir
+                WHERE {" AND ".join(income_conditions)}
+                """,
+                income_params,
+            )
             gross_income_row = cur.fetchone()
             total_income = float(gross_income_row[0] or 0)
             total_lab_fees = max(float(gross_income_row[1] or 0), 0.0)
-            commission_metrics = compute_doctor_commission_metrics(total_income, total_lab_fees, commission_rate)
+            stamped_commission = float(gross_income_row[2] or 0)
+            commission_metrics = compute_doctor_commission_metrics(
+                total_income, total_lab_fees, commission_rate, stamped_commission
+            )
             commission_part = commission_metrics["total_commission"]
         else:
             total_income = 0.0
@@ -1439,14 +1501,31 @@ def pay_salary():
             )
 
         if role_name == "doctor":
+            # Link exactly the rows the commission was computed from.
             cur.execute(
-                """
-                UPDATE income_records
+                f"""
+                UPDATE income_records ir
                 SET salary_payment_id = %s
-                WHERE doctor_id = %s AND salary_payment_id IS NULL
+                WHERE {" AND ".join(income_conditions)}
                 """,
-                (payment_id, staff_id)
+                [payment_id] + income_params,
             )
+            # The ledger accrued every row at its stamped rate; settle what this
+            # payment actually paid beyond base salary, and write off the part of
+            # a net-negative period that payroll does not carry forward.
+            settlements = [
+                ("settlement", -max(round(total_amount - base_salary, 2), 0.0)),
+                ("write_off", round(max(-stamped_commission, 0.0), 4)),
+            ]
+            for entry_type, entry_amount in settlements:
+                if entry_amount:
+                    cur.execute(
+                        """
+                        INSERT INTO commission_ledger (doctor_id, entry_type, amount, salary_payment_id)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        (staff_id, entry_type, entry_amount, payment_id),
+                    )
         else:
             try:
                 cur.execute(
@@ -1470,17 +1549,9 @@ def pay_salary():
             (payment_id, staff_id)
         )
 
-        # Reset total_revenue to 0 for the staff member
+        # Income is now linked to the payment; rebuild the revenue aggregate from it
         if role_name == "doctor":
-            cur.execute(
-                """
-                UPDATE staff
-                SET total_revenue = 0,
-                    updated_at = NOW()
-                WHERE id = %s
-                """,
-                (staff_id,)
-            )
+            cur.execute("SELECT rebuild_doctor_revenue(%s)", (staff_id,))
 
         # Handle Report Generation if signature is provided
         signature_payload = data.get("signature")
@@ -1506,8 +1577,17 @@ def pay_salary():
                     else:
                         # Get the ID of the document we just created
                         cur.execute(
-                            "SELECT id FROM staff_documents WHERE staff_id = %s AND signature_token = %s ORDER BY id DESC LIMIT 1",
-                            (staff_id, signature_info["signature_token"])
+                            """
+                            UPDATE staff_documents
+                            SET salary_payment_id = %s
+                            WHERE id = (
+                                SELECT id FROM staff_documents
+                                WHERE staff_id = %s AND signature_token = %s
+                                ORDER BY id DESC LIMIT 1
+                            )
+                            RETURNING id
+                            """,
+                            (payment_id, staff_id, signature_info["signature_token"])
                         )
                         doc_row = cur.fetchone()
                         if doc_row:
@@ -1530,6 +1610,7 @@ def pay_salary():
 
 
 @staff_bp.route("", methods=["GET"])
+@cache_tables("staff", "staff_roles", "income_records", "salary_payments", "shifts")
 def list_staff():
     role = request.args.get("role")
     q = request.args.get("q", "").strip()
@@ -1549,7 +1630,7 @@ def list_staff():
             except ValueError:
                 return jsonify({"error": "invalid_date_format"}), 400
             day_start = datetime.combine(working_date, time(0, 0, 0))
-            day_end = datetime.combine(working_date, time(23, 59, 59, 999999))
+            day_end = day_start + timedelta(days=1)
             try:
                 cur.execute("SELECT 1 FROM shifts LIMIT 1")
             except psycopg2.errors.UndefinedTable:
@@ -1557,8 +1638,8 @@ def list_staff():
                 return jsonify([])
 
         if role:
-            conditions.append("r.name = %s")
-            params.append(role)
+            conditions.append("s.role_id = %s")
+            params.append(get_role_id(conn, role))
 
         if q:
             pattern = f"%{q.lower()}%"
@@ -1568,10 +1649,8 @@ def list_staff():
             params.extend([pattern, pattern, pattern])
 
         if day_start and day_end:
-            conditions.append(
-                "EXISTS (SELECT 1 FROM shifts sh WHERE sh.staff_id = s.id AND sh.start_time <= %s AND sh.end_time >= %s)"
-            )
-            params.extend([day_end, day_start])
+            conditions.append(f"EXISTS (SELECT 1 FROM shifts sh WHERE sh.staff_id = s.id AND {overlaps('sh')})")
+            params.extend([day_start, day_end])
 
         condition_sql = " AND ".join(conditions)
 
@@ -1587,11 +1666,12 @@ def list_staff():
                        s.base_salary,
                        s.commission_rate,
                        s.last_paid_at,
-                       s.total_revenue,
+                       sr.total_revenue,
                        s.is_active,
                        r.name,
                        COALESCE(SUM(sp.amount), 0) AS commission_income
                 FROM staff s
+                JOIN staff_revenue sr ON sr.staff_id = s.id
                 JOIN staff_roles r ON r.id = s.role_id
                 LEFT JOIN salary_payments sp ON sp.staff_id = s.id
                 WHERE {condition_sql}
@@ -1604,7 +1684,7 @@ def list_staff():
                          s.base_salary,
                          s.commission_rate,
                          s.last_paid_at,
-                         s.total_revenue,
+                         sr.total_revenue,
                          s.is_active,
                          r.name
                 ORDER BY r.name, s.last_name, s.first_name
@@ -1625,11 +1705,12 @@ def list_staff():
                        s.base_salary,
                        0 AS commission_rate,
                        s.last_paid_at,
-                       s.total_revenue,
+                       sr.total_revenue,
                        s.is_active,
                        r.name,
                        COALESCE(SUM(sp.amount), 0) AS commission_income
                 FROM staff s
+                JOIN staff_revenue sr ON sr.staff_id = s.id
                 JOIN staff_roles r ON r.id = s.role_id
                 LEFT JOIN salary_payments sp ON sp.staff_id = s.id
                 WHERE {condition_sql}
@@ -1641,7 +1722,7 @@ def list_staff():
                          s.bio,
                          s.base_salary,
                          s.last_paid_at,
-                         s.total_revenue,
+                         sr.total_revenue,
                          s.is_active,
                          r.name
                 ORDER BY r.name, s.last_name, s.first_name
@@ -1708,11 +1789,12 @@ def get_staff(staff_id: int):
                        s.base_salary,
                        s.commission_rate,
                        s.last_paid_at,
-                       s.total_revenue,
+                       sr.total_revenue,
                        s.is_active,
                        r.name,
                        COALESCE(SUM(sp.amount), 0) AS commission_income
                 FROM staff s
+                JOIN staff_revenue sr ON sr.staff_id = s.id
                 JOIN staff_roles r ON r.id = s.role_id
                 LEFT JOIN salary_payments sp ON sp.staff_id = s.id
                 WHERE s.id = %s
@@ -1725,7 +1807,7 @@ def get_staff(staff_id: int):
                          s.base_salary,
                          s.commission_rate,
                          s.last_paid_at,
-                         s.total_revenue,
+                         sr.total_revenue,
                          s.is_active,
                          r.name
                 """,
@@ -1745,11 +1827,12 @@ def get_staff(staff_id: int):
                        s.base_salary,
                        0 AS commission_rate,
                        s.last_paid_at,
-                       s.total_revenue,
+                       sr.total_revenue,
                        s.is_active,
                        r.name,
                        COALESCE(SUM(sp.amount), 0) AS commission_income
                 FROM staff s
+                JOIN staff_revenue sr ON sr.staff_id = s.id
                 JOIN staff_roles r ON r.id = s.role_id
                 LEFT JOIN salary_payments sp ON sp.staff_id = s.id
                 WHERE s.id = %s
@@ -1761,7 +1844,7 @@ def get_staff(staff_id: int):
                          s.bio,
                          s.base_salary,
                          s.last_paid_at,
-                         s.total_revenue,
+                         sr.total_revenue,
                          s.is_active,
                          r.name
                 """,
@@ -1808,59 +1891,163 @@ def get_staff(staff_id: int):
     return jsonify(item)
 
 
+SALARY_PAGE_DEFAULT = 10
+SALARY_PAGE_MAX = 50
+
+
+def encode_salary_cursor(payment_date: date, created_at: datetime, payment_id: int) -> str:
+    raw = f"{payment_date.isoformat()}|{created_at.isoformat()}|{payment_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_salary_cursor(value: str) -> Tuple[date, datetime, int]:
+    try:
+        payment_date, created_at, payment_id = base64.urlsafe_b64decode(value.encode("ascii")).decode("utf-8").split("|")
+        return date.fromisoformat(payment_date), datetime.fromisoformat(created_at), int(payment_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("invalid_cursor")
+
+
+def parse_salary_page_args() -> Tuple[int, Optional[Tuple[date, datetime, int]]]:
+    limit = int(request.args.get("limit", SALARY_PAGE_DEFAULT))
+    if limit <= 0:
+        limit = SALARY_PAGE_DEFAULT
+    cursor = request.args.get("cursor")
+    return min(limit, SALARY_PAGE_MAX), decode_salary_cursor(cursor) if cursor else None
+
+
+def fetch_salary_page(cur, staff_id: int, limit: int, keyset, extra_columns: str = "") -> Optional[Tuple[int, List[tuple]]]:
+    """One query for existence, the cached payment count and one keyset page (plus one row to detect more).
+
+    Returns None when the staff member does not exist.
+    """
+    keyset_sql = "AND (sp.payment_date, sp.created_at, sp.id) < (%s, %s, %s)" if keyset else ""
+    cur.execute(
+        f"""
+        SELECT s.id, COALESCE(ss.payment_count, 0),
+               p.id, p.payment_date, p.note, p.amount, p.created_at{extra_columns}
+        FROM staff s
+        LEFT JOIN staff_salary_summary ss ON ss.staff_id = s.id
+        LEFT JOIN LATERAL (
+            SELECT sp.id, sp.payment_date, sp.note, sp.amount, sp.created_at
+            FROM salary_payments sp
+            WHERE sp.staff_id = s.id {keyset_sql}
+            ORDER BY sp.payment_date DESC, sp.created_at DESC, sp.id DESC
+            LIMIT %s
+        ) p ON TRUE
+        WHERE s.id = %s
+        ORDER BY p.payment_date DESC, p.created_at DESC, p.id DESC
+        """,
+        list(keyset or ()) + [limit + 1, staff_id],
+    )
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    return int(rows[0][1] or 0), [row for row in rows if row[2] is not None]
+
+
+def _salary_page_response(rows: List[tuple], total: int, limit: int, serialize) -> Dict[str, Any]:
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_salary_cursor(last[3], last[6], int(last[2]))
+    return {"items": [serialize(row) for row in page], "total": total, "limit": limit, "next_cursor": next_cursor}
+
+
+def _serialize_salary_note(row) -> Dict[str, Any]:
+    return {
+        "id": int(row[2]),
+        "payment_date": row[3].isoformat(),
+        "note": row[4] or "",
+        "amount": float(row[5] or 0),
+        "created_at": row[6].isoformat() if row[6] else None,
+    }
+
+
 @staff_bp.route("/<int:staff_id>/salary-notes", methods=["GET"])
 def staff_salary_notes(staff_id: int):
     try:
-        limit = int(request.args.get("limit", 10))
-        offset = int(request.args.get("offset", 0))
+        limit, keyset = parse_salary_page_args()
     except ValueError:
         return jsonify({"error": "invalid_pagination"}), 400
-    if limit <= 0:
-        limit = 10
-    if limit > 50:
-        limit = 50
-    if offset < 0:
-        offset = 0
 
     conn = get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM staff WHERE id = %s", (staff_id,))
-        if not cur.fetchone():
-            return jsonify({"error": "staff_not_found"}), 404
+        page = fetch_salary_page(conn.cursor(), staff_id, limit, keyset)
+    finally:
+        release_connection(conn)
+    if page is None:
+        return jsonify({"error": "staff_not_found"}), 404
 
-        cur.execute(
-            """
-            SELECT sp.id, sp.payment_date, sp.note, sp.amount, sp.created_at
-            FROM salary_payments sp
-            WHERE sp.staff_id = %s
-            ORDER BY sp.payment_date DESC, sp.created_at DESC
-            LIMIT %s OFFSET %s
-            """,
-            (staff_id, limit, offset),
-        )
-        rows = cur.fetchall()
+    total, rows = page
+    return jsonify(_salary_page_response(rows, total, limit, _serialize_salary_note))
+
+
+SALARY_HISTORY_COLUMNS = """,
+               COALESCE((
+                   SELECT json_agg(json_build_object(
+                              'id', d.id,
+                              'document_type', d.document_type,
+                              'period_from', d.period_from,
+                              'period_to', d.period_to,
+                              'signed_at', d.signed_at,
+                              'signer_name', d.signer_name
+                          ) ORDER BY d.id)
+                   FROM staff_documents d
+                   WHERE d.salary_payment_id = p.id
+               ), '[]'::json),
+               COALESCE((
+                   SELECT json_agg(json_build_object(
+                              'id', e.id,
+                              'occurred_at', e.occurred_at,
+                              'action', e.action,
+                              'actor_id', e.actor_id,
+                              'payload', e.payload
+                          ) ORDER BY e.occurred_at, e.id)
+                   FROM (
+                       SELECT id, occurred_at, action, actor_id, payload
+                       FROM audit_events
+                       WHERE entity_type = 'salary_payment' AND entity_id = p.id
+                       UNION ALL
+                       SELECT id, occurred_at, action, actor_id, payload
+                       FROM audit_outbox
+                       WHERE entity_type = 'salary_payment' AND entity_id = p.id
+                   ) e
+               ), '[]'::json)"""
+
+
+def _serialize_salary_history(row, staff_id: int) -> Dict[str, Any]:
+    item = _serialize_salary_note(row)
+    documents = row[7] if isinstance(row[7], list) else json.loads(row[7] or "[]")
+    for document in documents:
+        document["download_url"] = f"/api/staff/{staff_id}/documents/{document['id']}/download"
+    item["documents"] = documents
+    item["audit"] = row[8] if isinstance(row[8], list) else json.loads(row[8] or "[]")
+    return item
+
+
+@staff_bp.route("/<int:staff_id>/salary-history", methods=["GET"])
+def staff_salary_history(staff_id: int):
+    """Salary payments with their signed documents and amount audit entries, one page per query."""
+    auth_error = ensure_staff_authorized(staff_id)
+    if auth_error:
+        return auth_error
+    try:
+        limit, keyset = parse_salary_page_args()
+    except ValueError:
+        return jsonify({"error": "invalid_pagination"}), 400
 
-        cur.execute(
-            "SELECT COUNT(*) FROM salary_payments WHERE staff_id = %s",
-            (staff_id,),
-        )
-        total = int(cur.fetchone()[0] or 0)
+    conn = get_connection()
+    try:
+        page = fetch_salary_page(conn.cursor(), staff_id, limit, keyset, SALARY_HISTORY_COLUMNS)
     finally:
         release_connection(conn)
+    if page is None:
+        return jsonify({"error": "staff_not_found"}), 404
 
-    items = [
-        {
-            "id": int(row[0]),
-            "payment_date": row[1].isoformat(),
-            "note": row[2] or "",
-            "amount": float(row[3] or 0),
-            "created_at": row[4].isoformat() if row[4] else None,
-        }
-        for row in rows
-    ]
-
-    return jsonify({"items": items, "total": total, "limit": limit, "offset": offset})
+    total, rows = page
+    return jsonify(_salary_page_response(rows, total, limit, lambda row: _serialize_salary_history(row, staff_id)))
 
 
 @staff_bp.route("/<int:staff_id>/salary-report", methods=["GET"])
@@ -2019,18 +2206,12 @@ def staff_salary_report_pdf(staff_id: int):
     )
 
 
-@staff_bp.route("/<int:staff_id>/documents", methods=["GET"])
-def staff_documents(staff_id: int):
-    auth_error = ensure_staff_authorized(staff_id)
-    if auth_error:
-        return auth_error
-
+def add_document_filters(conditions: List[str], params: List[Any]) -> Optional[Response]:
+    """Applies the type/from/to query filters shared by document listings and bundles."""
     doc_type = request.args.get("type")
     from_param = request.args.get("from")
     to_param = request.args.get("to")
 
-    conditions = ["staff_id = %s"]
-    params: List[Any] = [staff_id]
     if doc_type:
         conditions.append("document_type = %s")
         params.append(doc_type)
@@ -2048,6 +2229,20 @@ def staff_documents(staff_id: int):
             return jsonify({"error": "invalid_date_format"}), 400
         conditions.append("(period_from IS NULL OR period_from <= %s)")
         params.append(to_date)
+    return None
+
+
+@staff_bp.route("/<int:staff_id>/documents", methods=["GET"])
+def staff_documents(staff_id: int):
+    auth_error = ensure_staff_authorized(staff_id)
+    if auth_error:
+        return auth_error
+
+    conditions = ["staff_id = %s"]
+    params: List[Any] = [staff_id]
+    filter_error = add_document_filters(conditions, params)
+    if filter_error:
+        return filter_error
 
     where_sql = " AND ".join(conditions)
     conn = get_connection()
@@ -2056,7 +2251,8 @@ def staff_documents(staff_id: int):
         ensure_staff_documents_table(conn)
         cur.execute(
             f"""
-            SELECT id, document_type, period_from, period_to, signed_at, signer_name, signature_hash, signature_token, file_path, created_at
+            SELECT id, document_type, period_from, period_to, signed_at, signer_name, signature_hash, signature_token,
+                   COALESCE(file_name, file_path), created_at, sha256, size_bytes
             FROM staff_documents
             WHERE {where_sql}
             ORDER BY signed_at DESC, created_at DESC
@@ -2079,14 +2275,27 @@ def staff_documents(staff_id: int):
             "signature_token": row[7],
             "file_name": os.path.basename(row[8] or ""),
             "created_at": row[9].isoformat() if row[9] else None,
+            "sha256": row[10].strip() if row[10] else None,
+            "size_bytes": int(row[11]) if row[11] is not None else None,
         }
         for row in rows
     ]
     return jsonify(items)
 
 
-@staff_bp.route("/<int:staff_id>/documents/<int:document_id>/download", methods=["GET"])
-def staff_document_download(staff_id: int, document_id: int):
+def resolve_legacy_document(file_path: Optional[str]) -> Optional[str]:
+    """Path of a document written before content-addressed storage, if it is
+    still inside the documents directory."""
+    if not file_path:
+        return None
+    base_dir = os.path.realpath(get_documents_base_dir())
+    resolved = os.path.realpath(file_path)
+    if not resolved.startswith(base_dir) or not os.path.exists(resolved):
+        return None
+    return resolved
+
+
+def send_staff_document(staff_id: int, document_id: int, as_attachment: bool):
     auth_error = ensure_staff_authorized(staff_id)
     if auth_error:
         return auth_error
@@ -2096,7 +2305,7 @@ def staff_document_download(staff_id: int, document_id: int):
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT file_path
+            SELECT storage_key, sha256, file_name, file_path
             FROM staff_documents
             WHERE id = %s AND staff_id = %s
             """,
@@ -2109,60 +2318,153 @@ def staff_document_download(staff_id: int, document_id: int):
     if not row:
         return jsonify({"error": "document_not_found"}), 404
 
-    file_path = row[0]
-    base_dir = os.path.realpath(get_documents_base_dir())
-    resolved = os.path.realpath(file_path)
-    if not resolved.startswith(base_dir):
-        return jsonify({"error": "document_not_found"}), 404
-    if not os.path.exists(resolved):
+    storage_key, sha256, file_name, file_path = row
+    if storage_key:
+        try:
+            return storage.send_document(
+                get_document_storage(),
+                storage_key,
+                sha256=sha256.strip(),
+                download_name=file_name or os.path.basename(storage_key),
+                as_attachment=as_attachment,
+            )
+        except (FileNotFoundError, ValueError):
+            return jsonify({"error": "document_not_found"}), 404
+
+    resolved = resolve_legacy_document(file_path)
+    if not resolved:
         return jsonify({"error": "document_not_found"}), 404
 
     return send_file(
         resolved,
         mimetype="application/pdf",
-        as_attachment=True,
+        as_attachment=as_attachment,
         download_name=os.path.basename(resolved),
     )
 
 
+@staff_bp.route("/<int:staff_id>/documents/<int:document_id>/download", methods=["GET"])
+def staff_document_download(staff_id: int, document_id: int):
+    return send_staff_document(staff_id, document_id, as_attachment=True)
+
+
 @staff_bp.route("/<int:staff_id>/documents/<int:document_id>/view", methods=["GET"])
 def staff_document_view(staff_id: int, document_id: int):
-    auth_error = ensure_staff_authorized(staff_id)
-    if auth_error:
-        return auth_error
+    return send_staff_document(staff_id, document_id, as_attachment=False)
 
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT file_path
-            FROM staff_documents
-            WHERE id = %s AND staff_id = %s
-            """,
-            (document_id, staff_id),
-        )
-        row = cur.fetchone()
-    finally:
-        release_connection(conn)
 
-    if not row:
-        return jsonify({"error": "document_not_found"}), 404
+def _zip_timestamp(value: Optional[datetime]) -> Tuple[int, int, int, int, int, int]:
+    if not value or value.year < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return value.astimezone(timezone.utc).timetuple()[:6]
 
-    file_path = row[0]
-    base_dir = os.path.realpath(get_documents_base_dir())
-    resolved = os.path.realpath(file_path)
-    if not resolved.startswith(base_dir):
-        return jsonify({"error": "document_not_found"}), 404
-    if not os.path.exists(resolved):
-        return jsonify({"error": "document_not_found"}), 404
 
-    return send_file(
-        resolved,
-        mimetype="application/pdf",
-        as_attachment=False,
-        download_name=os.path.basename(resolved),
+DOCUMENT_MANIFEST_HEADER = [
+    "Document ID", "Staff ID", "Staff", "Type", "Period From", "Period To", "Signed At", "Signer",
+    "Signature Hash", "Signature Token", "SHA-256", "Size", "Archive Path",
+]
+
+
+@staff_bp.route("/documents/bundle", methods=["GET"])
+def staff_documents_bundle():
+    """Streams a ZIP of the matching documents plus manifest.csv (admin only)."""
+    auth = get_authenticated_staff()
+    if not auth:
+        return jsonify({"error": "unauthorized"}), 401
+    if str(auth.get("role") or "").lower() not in {"admin", "administrator"}:
+        return jsonify({"error": "forbidden"}), 403
+
+    conditions = ["TRUE"]
+    params: List[Any] = []
+    staff_values = request.args.getlist("staff_id")
+    if staff_values:
+        try:
+            staff_ids = [int(value) for value in staff_values]
+        except ValueError:
+            return jsonify({"error": "invalid_staff_id"}), 400
+        conditions.append("d.staff_id = ANY(%s)")
+        params.append(staff_ids)
+    filter_error = add_document_filters(conditions, params)
+    if filter_error:
+        return filter_error
+
+    rows = stream_query(
+        f"""
+        SELECT d.id, d.staff_id, s.first_name, s.last_name, d.document_type, d.period_from, d.period_to,
+               d.signed_at, d.signer_name, d.signature_hash, d.signature_token,
+               d.storage_key, d.sha256, COALESCE(d.file_name, d.file_path), d.file_path
+        FROM staff_documents d
+        JOIN staff s ON s.id = d.staff_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY d.staff_id, d.signed_at, d.id
+        """,
+        params,
+        connect=get_connection,
+        release=release_connection,
     )
+    document_storage = get_document_storage()
+
+    def open_document(storage_key, file_path):
+        if storage_key:
+            return document_storage.open(storage_key)
+        resolved = resolve_legacy_document(file_path)
+        if not resolved:
+            raise FileNotFoundError(file_path)
+        return open(resolved, "rb")
+
+    def read_document(handle, manifest_row):
+        # Hash while streaming, so the manifest records what is in the archive.
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = handle.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+        finally:
+            handle.close()
+        manifest_row[10] = digest.hexdigest()
+        manifest_row[11] = size
+
+    def entries():
+        manifest: List[List[Any]] = []
+        try:
+            for row in rows:
+                signed_at = row[7]
+                manifest_row = [
+                    row[0],
+                    row[1],
+                    " ".join(filter(None, [row[2], row[3]])).strip(),
+                    row[4],
+                    row[5].isoformat() if row[5] else "",
+                    row[6].isoformat() if row[6] else "",
+                    signed_at.isoformat() if signed_at else "",
+                    row[8],
+                    row[9],
+                    row[10] or "",
+                    "",
+                    "",
+                    "",
+                ]
+                manifest.append(manifest_row)
+                try:
+                    handle = open_document(row[11], row[14])
+                except (FileNotFoundError, ValueError):
+                    logger.warning("Document %s is missing from storage; listed in the manifest only", row[0])
+                    continue
+                archive_path = f"staff_{row[1]}/{row[0]}-{os.path.basename(row[13] or '') or 'document.pdf'}"
+                manifest_row[12] = archive_path
+                info = zipfile.ZipInfo(archive_path, date_time=_zip_timestamp(signed_at))
+                yield info, read_document(handle, manifest_row)
+        finally:
+            rows.close()
+        info = zipfile.ZipInfo("manifest.csv", date_time=_zip_timestamp(datetime.now(timezone.utc)))
+        yield info, iter_csv(DOCUMENT_MANIFEST_HEADER, manifest)
+
+    return zip_response(entries(), f"staff_documents_{date.today().isoformat()}.zip")
 
 
 @staff_bp.route("/<int:staff_id>/salary-report/data", methods=["GET"])
@@ -2438,15 +2740,62 @@ def update_staff_commission(staff_id: int):
     if rate is None:
         return jsonify({"error": "missing_rate"}), 400
 
+    try:
+        rate = round(float(rate), 4)
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_commission_rate"}), 400
+    if rate < 0 or rate > 1:
+        return jsonify({"error": "invalid_commission_rate"}), 400
+
+    # trg_staff_commission_rate appends the change to staff_commission_rates;
+    # income already recorded keeps the rate stamped on it.
     conn = get_connection()
     try:
         cur = conn.cursor()
         cur.execute(
-            "UPDATE staff SET commission_rate = %s WHERE id = %s",
-            (float(rate), staff_id),
+            "UPDATE staff SET commission_rate = %s, updated_at = NOW() WHERE id = %s RETURNING id",
+            (rate, staff_id),
         )
+        if not cur.fetchone():
+            conn.rollback()
+            return jsonify({"error": "staff_not_found"}), 404
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         release_connection(conn)
 
     return jsonify({"status": "ok"})
+
+
+@staff_bp.route("/<int:staff_id>/commission/history", methods=["GET"])
+def get_staff_commission_history(staff_id: int):
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM staff WHERE id = %s", (staff_id,))
+        if not cur.fetchone():
+            return jsonify({"error": "staff_not_found"}), 404
+        cur.execute(
+            """
+            SELECT commission_rate, effective_from
+            FROM staff_commission_rates
+            WHERE staff_id = %s
+            ORDER BY effective_from DESC
+            """,
+            (staff_id,),
+        )
+        rows = cur.fetchall()
+    finally:
+        release_connection(conn)
+
+    return jsonify(
+        [
+            {
+                "commission_rate": float(row[0]),
+                "effective_from": row[1].isoformat() if row[1] else None,
+            }
+            for row in rows
+        ]
+    )
@@ -0,0 +1,209 @@
+import abc
+import hashlib
+import io
+import os
+import re
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional
+
+from flask import send_file
+
+from .config import config
+
+try:
+    import boto3
+    BOTO3_AVAILABLE = True
+except Exception:
+    boto3 = None
+    BOTO3_AVAILABLE = False
+
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]{1,8})?$")
+
+
+class StoredDocument(NamedTuple):
+    key: str
+    sha256: str
+    size: int
+
+
+def content_key(digest: str, suffix: str = "") -> str:
+    """Sharded key for a SHA-256 hex digest: ab/cd/abcd....pdf"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def validate_key(key: str) -> str:
+    if not KEY_PATTERN.match(key or ""):
+        raise ValueError("invalid_storage_key")
+    return key
+
+
+class DocumentStorage(abc.ABC):
+    """Content-addressed blob store. Keys are derived from the SHA-256 of the
+    content, so writing the same bytes twice stores them once and a key
+    never points at different content."""
+
+    def put(self, data: bytes, suffix: str = "") -> StoredDocument:
+        digest = hashlib.sha256(data).hexdigest()
+        key = content_key(digest, suffix)
+        if not self.exists(key):
+            self._write(key, data)
+        return StoredDocument(key, digest, len(data))
+
+    @abc.abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the blob, when the backend keeps one."""
+        return None
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class LocalStorage(DocumentStorage):
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, *validate_key(key).split("/"))
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self.local_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write next to the target and rename over it, so readers never see a
+        # partial file and a crash leaves at most a stray temp file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.local_path(key))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _is_missing(exc: Exception) -> bool:
+    # botocore's ClientError carries the S3 error code in `response`.
+    error = (getattr(exc, "response", None) or {}).get("Error", {})
+    return str(error.get("Code")) in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(DocumentStorage):
+    """Stores blobs in an S3-compatible bucket. `client` is anything with the
+    boto3 S3 client's put_object/get_object/head_object/delete_object, so a
+    MinIO endpoint or an in-memory stand-in works as well as AWS."""
+
+    def __init__(self, bucket: str, prefix: str = "", client=None, endpoint_url: Optional[str] = None):
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("boto3 is required for S3 document storage")
+            client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _object_key(self, key: str) -> str:
+        key = validate_key(key)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _write(self, key: str, data: bytes) -> None:
+        # A PUT is atomic on S3: the object is either absent or complete.
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            Metadata={"sha256": os.path.basename(key).split(".")[0]},
+        )
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as exc:
+            if _is_missing(exc):
+                return False
+            raise
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+        except Exception as exc:
+            if _is_missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+_storages = {}
+
+
+def get_storage(default_root: str) -> DocumentStorage:
+    """Backend selected by DOCUMENT_STORAGE; local storage falls back to
+    `default_root` when DOCUMENT_STORAGE_PATH is unset."""
+    if config.DOCUMENT_STORAGE == "s3":
+        cache_key = ("s3", config.DOCUMENT_S3_BUCKET, config.DOCUMENT_S3_PREFIX, config.DOCUMENT_S3_ENDPOINT_URL)
+        if cache_key not in _storages:
+            _storages[cache_key] = S3Storage(
+                config.DOCUMENT_S3_BUCKET,
+                prefix=config.DOCUMENT_S3_PREFIX,
+                endpoint_url=config.DOCUMENT_S3_ENDPOINT_URL,
+            )
+        return _storages[cache_key]
+    return LocalStorage(config.DOCUMENT_STORAGE_PATH or default_root)
+
+
+def send_document(storage: DocumentStorage, key: str, *, sha256: str, download_name: str,
+                  mimetype: str = "application/pdf", as_attachment: bool = False):
+    """Serves a stored blob with Range and conditional GET support. The
+    content hash is the ETag, so a client revalidating an unchanged document
+    gets a 304 without the body."""
+    path = storage.local_path(key)
+    if path is not None:
+        source = path
+    else:
+        # send_file only honours Range for paths and BytesIO; documents are
+        # small PDFs, so remote blobs are read into memory.
+        body = storage.open(key)
+        try:
+            source = io.BytesIO(body.read())
+        finally:
+            body.close()
+    return send_file(
+        source,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=sha256,
+    )
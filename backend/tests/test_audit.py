@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timezone
+
+from backend import audit as audit_module
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+
+    def fetchall(self):
+        return self.conn.rows
+
+
+class FakeConn:
+    def __init__(self, rows=None):
+        self.queries = []
+        self.rows = rows or []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+ADMIN = {"X-Staff-Id": "1", "X-Staff-Role": "admin"}
+
+
+def _client(monkeypatch, conn):
+    monkeypatch.setattr(audit_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(audit_module, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client()
+
+
+def test_record_writes_to_outbox():
+    conn = FakeConn()
+    audit_module.record(conn.cursor(), "shift", 12, "update", 3, {"old": {"note": None}})
+
+    sql, params = conn.queries[0]
+    assert "INSERT INTO audit_outbox" in sql
+    assert params[:4] == ("shift", 12, "update", 3)
+    assert json.loads(params[4]) == {"old": {"note": None}}
+
+
+def test_events_require_admin(monkeypatch):
+    client = _client(monkeypatch, FakeConn())
+    assert client.get("/api/audit/events").status_code == 401
+    assert client.get("/api/audit/events", headers={"X-Staff-Id": "2", "X-Staff-Role": "doctor"}).status_code == 403
+
+
+def test_events_filter_and_page(monkeypatch):
+    stamp = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+    rows = [
+        (41, stamp, "timesheet", 7, "update", 3, {"staff_id": 3}),
+        (40, stamp, "timesheet", 7, "create", 3, {"staff_id": 3}),
+    ]
+    conn = FakeConn(rows)
+    client = _client(monkeypatch, conn)
+
+    resp = client.get("/api/audit/events?entity_type=timesheet&entity_id=7&actor_id=3&limit=2", headers=ADMIN)
+
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [item["id"] for item in data["items"]] == [41, 40]
+    assert data["next_cursor"] == f"{stamp.isoformat()},40"
+    sql, params = conn.queries[0]
+    assert "FROM audit_events" in sql and "FROM audit_outbox" in sql
+    assert params == ["timesheet", 7, 3, 2, "timesheet", 7, 3, 2, 2]
+
+    client.get("/api/audit/events", query_string={"before": data["next_cursor"]}, headers=ADMIN)
+    sql, params = conn.queries[1]
+    assert "(occurred_at, id) < (%s, %s)" in sql
+    assert params[:2] == [stamp, 40]
+
+
+def test_events_reject_bad_filters(monkeypatch):
+    client = _client(monkeypatch, FakeConn())
+    resp = client.get("/api/audit/events?entity_id=abc", headers=ADMIN)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_filter"
@@ -0,0 +1,140 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend import appointments as appointments_module
+from backend import availability
+from backend.app import create_app
+
+
+def at(day, hour, minute=0):
+    return datetime(2026, 10, day, hour, minute, tzinfo=timezone.utc)
+
+
+def test_subtract_intervals_splits_around_busy_time():
+    free = [(at(1, 8), at(1, 12)), (at(1, 13), at(1, 17))]
+    busy = [(at(1, 9), at(1, 10)), (at(1, 11, 30), at(1, 13, 30)), (at(1, 16), at(1, 18))]
+
+    assert availability.subtract_intervals(free, busy) == [
+        (at(1, 8), at(1, 9)),
+        (at(1, 10), at(1, 11, 30)),
+        (at(1, 13, 30), at(1, 16)),
+    ]
+
+
+def test_merge_intervals_joins_touching_ranges():
+    merged = availability.merge_intervals([(at(1, 10), at(1, 11)), (at(1, 8), at(1, 9)), (at(1, 9), at(1, 9, 30))])
+    assert merged == [(at(1, 8), at(1, 9, 30)), (at(1, 10), at(1, 11))]
+
+
+def test_free_slots_interleaves_doctors_by_start():
+    shifts = {1: [(at(1, 8), at(1, 10))], 2: [(at(1, 8, 30), at(1, 9, 30))]}
+    appointments = {1: [(at(1, 8), at(1, 8, 50))]}
+
+    slots = availability.free_slots(shifts, appointments, timedelta(minutes=30), limit=3)
+
+    assert slots == [
+        {"doctor_id": 2, "start": at(1, 8, 30).isoformat(), "end": at(1, 9).isoformat()},
+        {"doctor_id": 1, "start": at(1, 8, 50).isoformat(), "end": at(1, 9, 20).isoformat()},
+        {"doctor_id": 2, "start": at(1, 9).isoformat(), "end": at(1, 9, 30).isoformat()},
+    ]
+
+
+def test_month_of_busy_doctors_is_fast():
+    shifts = {}
+    appointments = {}
+    for doctor_id in range(20):
+        shifts[doctor_id] = [(at(day, 8), at(day, 16)) for day in range(1, 31)]
+        appointments[doctor_id] = [
+            (at(day, hour), at(day, hour, 45)) for day in range(1, 31) for hour in range(8, 16)
+        ]
+
+    started = time.perf_counter()
+    slots = availability.free_slots(shifts, appointments, timedelta(minutes=15), limit=50)
+    elapsed = time.perf_counter() - started
+
+    assert len(slots) == 50
+    assert elapsed < 0.5
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "FROM shifts" in sql:
+            self._rows = [(4, at(2, 9), at(2, 11))]
+        elif "FROM appointments" in sql:
+            self._rows = [(4, at(2, 9), at(2, 10))]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        return None
+
+
+def test_availability_endpoint(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(appointments_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(appointments_module, "release_connection", lambda c: None)
+    client = create_app(testing=True).test_client()
+
+    resp = client.get(
+        "/api/appointments/availability?doctor_id=4&from=2026-10-01T00:00:00Z&to=2026-10-31T00:00:00Z&duration=30"
+    )
+
+    assert resp.status_code == 200
+    assert [slot["start"] for slot in resp.get_json()["slots"]] == [at(2, 10).isoformat(), at(2, 10, 30).isoformat()]
+    assert len(conn.queries) == 2
+
+
+def test_availability_rejects_long_ranges():
+    client = create_app(testing=True).test_client()
+    resp = client.get("/api/appointments/availability?from=2026-01-01T00:00:00&to=2026-12-31T00:00:00")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_date_range"
+
+
+def test_availability_bounds_appointment_scan_and_normalises_timezones(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(appointments_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(appointments_module, "release_connection", lambda c: None)
+    client = create_app(testing=True).test_client()
+
+    # A naive `from` next to an aware `to` used to raise on comparison.
+    resp = client.get(
+        "/api/appointments/availability?doctor_id=4&from=2026-10-01T00:00:00&to=2026-10-31T00:00:00%2B02:00"
+    )
+
+    assert resp.status_code == 200
+    sql, params = conn.queries[1]
+    assert "start_time > %s AND start_time < %s" in sql
+    window_start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert params[1:] == (
+        window_start - availability.MAX_APPOINTMENT_LENGTH,
+        datetime(2026, 10, 30, 22, tzinfo=timezone.utc),
+        window_start,
+    )
+
+
+def test_appointment_longer_than_limit_is_rejected():
+    client = create_app(testing=True).test_client()
+    resp = client.post(
+        "/api/appointments",
+        json={"doctor_id": 4, "patient_name": "A", "type": "checkup", "start_time": "2026-10-02T09:00:00Z",
+              "duration_minutes": 25 * 60},
+    )
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_duration"
@@ -0,0 +1,143 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from backend import calendar_sync
+from backend.app import create_app
+
+ADMIN = {"X-Staff-Id": "1", "X-Staff-Role": "admin"}
+STAFF_7 = {"X-Staff-Id": "7", "X-Staff-Role": "doctor"}
+
+
+def _at(day, hour):
+    return datetime(2024, 3, day, hour, tzinfo=timezone.utc)
+
+
+SHIFT = (4, 7, _at(4, 8), _at(4, 16), "Front desk", _at(1, 9), "Jana", "Nováková")
+APPOINTMENT = (9, 7, "Petr Svoboda", "cleaning", _at(4, 10), _at(4, 11), 60, "confirmed", None, _at(2, 9), "Jana", "Nováková")
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "pg_current_snapshot" in sql:
+            self._rows = [("1500",)]
+        elif "FROM calendar_tombstones" in sql:
+            self._rows = [("shift", 3), ("shift", 4)]
+        elif "FROM shifts" in sql:
+            self._rows = [SHIFT]
+        elif "FROM appointments" in sql:
+            self._rows = [APPOINTMENT]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+@pytest.fixture
+def client_and_conn(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(calendar_sync, "get_connection", lambda: conn)
+    monkeypatch.setattr(calendar_sync, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client(), conn
+
+
+def test_initial_sync_returns_window_and_token(client_and_conn):
+    client, conn = client_and_conn
+
+    body = client.get("/api/calendar/sync?staff_id=7&from=2024-03-01", headers=STAFF_7).get_json()
+
+    assert body["full"] is True
+    assert body["sync_token"].startswith("1500-")
+    assert [shift["id"] for shift in body["shifts"]] == [4]
+    assert body["appointments"][0]["patient_name"] == "Petr Svoboda"
+    assert "pg_current_snapshot" in conn.queries[0][0]
+    assert not any("calendar_tombstones" in sql for sql, _ in conn.queries)
+
+
+def test_delta_sync_reads_changes_since_token(client_and_conn):
+    client, conn = client_and_conn
+    token = f"1200-{int(time.time())}"
+
+    body = client.get(f"/api/calendar/sync?token={token}", headers=ADMIN).get_json()
+
+    assert body["full"] is False
+    # Shift 4 moved to another staff member and is still present, so only 3 is deleted.
+    assert body["deleted"] == [{"type": "shift", "id": 3}]
+    shift_sql, shift_params = next(q for q in conn.queries if "FROM shifts" in q[0])
+    assert "s.change_xid >= %s::xid8" in shift_sql
+    assert shift_params == ["1200"]
+
+
+def test_bad_and_expired_tokens(client_and_conn):
+    client, _ = client_and_conn
+
+    assert client.get("/api/calendar/sync?token=abc", headers=ADMIN).status_code == 400
+    expired = f"1200-{int(time.time()) - 200 * 86400}"
+    response = client.get(f"/api/calendar/sync?token={expired}", headers=ADMIN)
+    assert response.status_code == 410
+    assert response.get_json()["error"] == "sync_token_expired"
+
+
+def test_staff_feed_is_valid_icalendar(client_and_conn):
+    client, _ = client_and_conn
+
+    response = client.get("/api/calendar/staff/7.ics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/calendar"
+    text = response.get_data(as_text=True)
+    lines = text.split("\r\n")
+    assert lines[0] == "BEGIN:VCALENDAR" and lines[-2] == "END:VCALENDAR"
+    assert "UID:shift-4@karlindent" in lines
+    assert "DTSTART:20240304T080000Z" in lines
+    assert "SUMMARY:Appointment: cleaning" in lines
+    assert "Petr Svoboda" not in text
+
+
+def test_long_lines_are_folded_on_character_boundaries():
+    body = calendar_sync.build_ics("Rozvrh", [{
+        "uid": "shift-1@karlindent",
+        "start": _at(4, 8),
+        "end": _at(4, 16),
+        "summary": "Shift",
+        "description": "Ordinace č. 2, " * 12,
+    }])
+
+    lines = body.split("\r\n")
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    description = [line for line in lines if line.startswith("DESCRIPTION:") or line.startswith(" ")]
+    assert len(description) > 1
+    unfolded = description[0] + "".join(line[1:] for line in description[1:])
+    assert unfolded == "DESCRIPTION:" + "Ordinace č. 2\\, " * 12
+
+
+def test_sync_requires_staff_or_admin(client_and_conn):
+    client, conn = client_and_conn
+
+    assert client.get("/api/calendar/sync?staff_id=7").status_code == 401
+    assert client.get("/api/calendar/sync?staff_id=7", headers={"X-Staff-Id": "8", "X-Staff-Role": "doctor"}).status_code == 403
+    assert client.get("/api/calendar/sync", headers=STAFF_7).status_code == 403
+    assert conn.queries == []
+    assert client.get("/api/calendar/sync?staff_id=8", headers=ADMIN).status_code == 200
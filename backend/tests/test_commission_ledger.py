@@ -0,0 +1,96 @@
+import pytest
+
+from backend.app import create_app
+from backend.db import get_connection, release_connection
+
+
+DOCTOR_ID = 901
+
+
+def _outstanding(cur):
+    cur.execute(
+        "SELECT COALESCE(SUM(outstanding), 0) FROM commission_outstanding WHERE doctor_id = %s",
+        (DOCTOR_ID,),
+    )
+    return float(cur.fetchone()[0])
+
+
+@pytest.fixture
+def paid_income():
+    app = create_app(testing=True)
+    with app.test_client() as client:
+        with app.app_context():
+            try:
+                conn = get_connection()
+            except Exception:
+                pytest.skip("Database not available for commission ledger tests")
+            cur = conn.cursor()
+            cur.execute("INSERT INTO staff_roles (id, name) VALUES (1, 'doctor') ON CONFLICT (id) DO NOTHING")
+            cur.execute(
+                """
+                INSERT INTO staff (id, role_id, first_name, last_name, email, base_salary, commission_rate, is_active)
+                VALUES (%s, 1, 'Ledger', 'Doctor', 'ledger.doctor@test.com', 0, 0.3, TRUE)
+                """,
+                (DOCTOR_ID,),
+            )
+            cur.execute("INSERT INTO patients (last_name) VALUES ('Ledger') RETURNING id")
+            patient_id = cur.fetchone()[0]
+            cur.execute(
+                "INSERT INTO salary_payments (staff_id, amount) VALUES (%s, 240) RETURNING id",
+                (DOCTOR_ID,),
+            )
+            payment_id = cur.fetchone()[0]
+            cur.execute(
+                """
+                INSERT INTO income_records (patient_id, doctor_id, amount, lab_cost, payment_method, commission_rate)
+                VALUES (%s, %s, 1000, 200, 'cash', 0.3) RETURNING id
+                """,
+                (patient_id, DOCTOR_ID),
+            )
+            record_id = cur.fetchone()[0]
+            # What pay_salary books when it settles the row.
+            cur.execute(
+                "UPDATE income_records SET salary_payment_id = %s WHERE id = %s",
+                (payment_id, record_id),
+            )
+            cur.execute(
+                """
+                INSERT INTO commission_ledger (doctor_id, entry_type, amount, salary_payment_id)
+                VALUES (%s, 'settlement', -240, %s)
+                """,
+                (DOCTOR_ID, payment_id),
+            )
+            conn.commit()
+            try:
+                yield client, conn, record_id, payment_id
+            finally:
+                conn.rollback()
+                cur.execute("DELETE FROM income_records WHERE doctor_id = %s", (DOCTOR_ID,))
+                cur.execute("DELETE FROM salary_adjustments WHERE staff_id = %s", (DOCTOR_ID,))
+                cur.execute("DELETE FROM staff WHERE id = %s", (DOCTOR_ID,))
+                cur.execute("DELETE FROM patients WHERE id = %s", (patient_id,))
+                conn.commit()
+                release_connection(conn)
+
+
+@pytest.mark.parametrize("mode, change", [("ignore", 0.0), ("adjust_next", -240.0)])
+def test_deleting_paid_income_reverses_commission_once(paid_income, mode, change):
+    client, conn, record_id, _ = paid_income
+    cur = conn.cursor()
+    before = _outstanding(cur)
+    conn.rollback()
+
+    resp = client.delete(f"/api/income/records/{record_id}?mode={mode}")
+    assert resp.status_code == 200
+
+    assert _outstanding(cur) == pytest.approx(before + change)
+
+
+def test_deleting_payment_restores_its_commission(paid_income):
+    _, conn, _, payment_id = paid_income
+    cur = conn.cursor()
+    before = _outstanding(cur)
+
+    cur.execute("DELETE FROM salary_payments WHERE id = %s", (payment_id,))
+
+    assert _outstanding(cur) == pytest.approx(before + 240)
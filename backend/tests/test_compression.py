@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+
+import pytest
+from flask import Response
+
+from backend import compression
+from backend import http_cache
+from backend import staff as staff_module
+from backend.app import create_app
+
+
+def _app():
+    app = create_app(testing=True)
+
+    @app.route("/test/big")
+    def big():
+        return Response(json.dumps([{"id": i, "name": "row"} for i in range(500)]), mimetype="application/json")
+
+    @app.route("/test/small")
+    def small():
+        return Response("[]", mimetype="application/json")
+
+    @app.route("/test/stream")
+    def stream():
+        return Response((f"{i},row\n".encode() for i in range(2000)), mimetype="text/csv")
+
+    @app.route("/test/events")
+    def events():
+        return Response("data: x\n\n" * 500, mimetype="text/event-stream")
+
+    return app
+
+
+def test_large_json_is_gzipped():
+    client = _app().test_client()
+    resp = client.get("/test/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert len(json.loads(gzip.decompress(resp.data))) == 500
+
+    plain = client.get("/test/big")
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.get_json()) == 500
+
+
+def test_small_and_event_stream_responses_are_left_alone():
+    client = _app().test_client()
+    assert "Content-Encoding" not in client.get("/test/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/test/events", headers={"Accept-Encoding": "gzip"}).headers
+    refused = client.get("/test/big", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_streamed_body_is_compressed_incrementally():
+    client = _app().test_client()
+    resp = client.get("/test/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    lines = gzip.decompress(resp.data).decode().splitlines()
+    assert lines[0] == "0,row" and len(lines) == 2000
+
+
+def test_compressed_etag_still_revalidates(monkeypatch):
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            return None
+
+        def fetchall(self):
+            return [(i, f"category {i}") for i in range(200)]
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+    from backend import outcome as outcome_module
+
+    monkeypatch.setattr(outcome_module, "get_connection", lambda: FakeConn())
+    monkeypatch.setattr(outcome_module, "release_connection", lambda c: None)
+    monkeypatch.setattr(http_cache, "fetch_table_versions", lambda tables: {t: (3, None) for t in tables})
+    app = create_app(testing=True)
+    app.config["HTTP_CACHE"] = True
+    client = app.test_client()
+
+    first = client.get("/api/outcome/categories", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+
+    second = client.get("/api/outcome/categories", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+
+
+def test_gzip_request_body_is_inflated(monkeypatch):
+    captured = []
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            captured.append(params)
+
+        def fetchone(self):
+            return (9,)
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            return None
+
+        def rollback(self):
+            return None
+
+    monkeypatch.setattr(staff_module, "get_connection", lambda: FakeConn())
+    monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+    client = create_app(testing=True).test_client()
+
+    body = gzip.compress(json.dumps({"name": "Paracetamol"}).encode())
+    resp = client.post(
+        "/api/staff/medicines",
+        data=body,
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+    )
+    assert resp.status_code == 201
+    assert captured == [("Paracetamol",)]
+
+
+def test_bad_request_encodings_are_rejected(monkeypatch):
+    client = create_app(testing=True).test_client()
+    garbage = client.post("/api/staff/medicines", data=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert garbage.status_code == 400
+    assert garbage.get_json()["error"] == "invalid_compressed_body"
+
+    unknown = client.post("/api/staff/medicines", data=b"x", headers={"Content-Encoding": "zstd"})
+    assert unknown.status_code == 415
+
+    monkeypatch.setattr(compression, "MAX_REQUEST_BODY", 100)
+    bomb = client.post("/api/staff/medicines", data=gzip.compress(b"0" * 1000), headers={"Content-Encoding": "gzip"})
+    assert bomb.status_code == 413
+
+
+def test_oversized_compressed_body_is_refused_before_reading(monkeypatch):
+    monkeypatch.setattr(compression, "MAX_REQUEST_BODY", 100)
+    client = create_app(testing=True).test_client()
+
+    body = gzip.compress(os.urandom(500))
+    resp = client.post("/api/staff/medicines", data=body, headers={"Content-Encoding": "gzip"})
+    assert resp.status_code == 413
+    assert resp.get_json()["error"] == "request_body_too_large"
+
+
+def test_brotli_bomb_stops_at_limit(monkeypatch):
+    brotli = pytest.importorskip("brotli")
+    if not compression.BROTLI_REQUESTS:
+        pytest.skip("brotli bindings without bounded output")
+    monkeypatch.setattr(compression, "MAX_REQUEST_BODY", 1000)
+
+    payload = os.urandom(800)
+    assert compression._inflate(brotli.compress(payload), "br") == payload
+
+    bomb = brotli.compress(b"0" * 10_000_000)
+    # The output limit is a hint rounded up to the decoder's buffer size.
+    assert 1000 < len(compression._inflate_brotli(bomb)) <= 64 * 1024
+    with pytest.raises(OverflowError):
+        compression._inflate(bomb, "br")
@@ -0,0 +1,21 @@
+import pytest
+
+from backend.config import Config
+
+
+def test_default_workers_fit_postgres_max_connections():
+    cfg = Config()
+    cfg.check_connection_budget(cfg.max_workers)
+    assert cfg.max_workers * cfg.connections_per_worker + cfg.DB_RESERVED_CONNECTIONS <= cfg.DB_MAX_CONNECTIONS
+
+
+def test_connection_budget_rejects_too_many_workers(monkeypatch):
+    cfg = Config()
+    monkeypatch.setattr(cfg, "DB_POOL_SIZE", 21)
+    monkeypatch.setattr(cfg, "ASYNC_POOL_SIZE", 16)
+    monkeypatch.setattr(cfg, "QUERY_MODE", "auto")
+    with pytest.raises(RuntimeError, match="DB_MAX_CONNECTIONS=100"):
+        cfg.check_connection_budget(5)
+    # The async pool does not count when the mode cannot use it.
+    monkeypatch.setattr(cfg, "QUERY_MODE", "threads")
+    cfg.check_connection_budget(4)
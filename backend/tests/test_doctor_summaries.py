@@ -0,0 +1,73 @@
+from datetime import date
+
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._one = None
+        self._all = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if "FROM staff s" in sql:
+            self._one = (7,)
+        elif "FROM doctor_daily_facts" in sql and "f.hour" in sql:
+            self._all = [(9, 120.5, 2), (14, 30, 1)]
+        elif "FROM doctor_daily_facts" in sql and "f.day BETWEEN" in sql:
+            self._all = [(date(2024, 3, 1), 1000, 300)]
+
+    def fetchone(self):
+        return self._one
+
+    def fetchall(self):
+        return self._all
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+        self._cursor = FakeCursor(self)
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+def make_client(monkeypatch, fake_conn):
+    from backend import income as income_module
+
+    monkeypatch.setattr(income_module, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(income_module, "release_connection", lambda conn: None)
+    app = create_app(testing=True)
+    return app.test_client()
+
+
+def test_hourly_summary_reads_facts(monkeypatch):
+    fake_conn = FakeConn()
+    client = make_client(monkeypatch, fake_conn)
+
+    response = client.get("/api/income/doctor/7/summary/hourly?date=2024-03-01")
+
+    assert response.status_code == 200
+    hours = response.get_json()["hours"]
+    assert len(hours) == 24
+    assert hours[9] == {"hour": 9, "label": "09:00", "total_commission": 120.5, "patient_count": 2}
+    assert hours[10]["total_commission"] == 0.0
+    assert not any("FROM income_records" in q for q in fake_conn.queries)
+
+
+def test_daily_summary_reads_facts(monkeypatch):
+    fake_conn = FakeConn()
+    client = make_client(monkeypatch, fake_conn)
+
+    response = client.get("/api/income/doctor/7/summary/daily?from=2024-03-01&to=2024-03-31")
+
+    assert response.status_code == 200
+    assert response.get_json() == [{"day": "2024-03-01", "total_income": 1000.0, "total_commission": 300.0}]
@@ -0,0 +1,117 @@
+import csv
+import hashlib
+import io
+import zipfile
+from datetime import date, datetime, timezone
+
+import pytest
+
+from backend import staff as staff_module
+from backend.app import create_app
+
+ADMIN = {"X-Staff-Id": "1", "X-Staff-Role": "admin"}
+SIGNED = datetime(2024, 3, 20, 10, tzinfo=timezone.utc)
+
+
+class FakeNamedCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.itersize = None
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+
+    def __iter__(self):
+        return iter(self.conn.rows)
+
+    def close(self):
+        return None
+
+
+class FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.released = False
+
+    def cursor(self, name=None):
+        return FakeNamedCursor(self)
+
+    def rollback(self):
+        return None
+
+
+def _row(document_id, staff_id, storage_key, sha256, file_name, file_path=None):
+    return (document_id, staff_id, "Jana", "Nováková", "salary_report", date(2024, 3, 1), date(2024, 3, 20),
+            SIGNED, "Jana Nováková", "a" * 64, "b" * 64, storage_key, sha256, file_name, file_path)
+
+
+@pytest.fixture
+def bundle_client(monkeypatch, tmp_path):
+    monkeypatch.setattr(staff_module, "get_documents_base_dir", lambda: str(tmp_path))
+    document_storage = staff_module.get_document_storage()
+    stored = document_storage.put(b"%PDF-1.4 first report", ".pdf")
+    legacy = tmp_path / "staff_7" / "Jana Nováková Salary Report 2024-02-29.pdf"
+    legacy.parent.mkdir()
+    legacy.write_bytes(b"%PDF-1.4 legacy report")
+    conn = FakeConn([
+        _row(5, 7, stored.key, stored.sha256, "Jana Nováková Salary Report 2024-03-20.pdf"),
+        _row(6, 7, None, None, legacy.name, str(legacy)),
+        _row(8, 7, None, None, "gone.pdf", str(tmp_path / "staff_7" / "gone.pdf")),
+    ])
+
+    def release(c):
+        c.released = True
+
+    monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(staff_module, "release_connection", release)
+    return create_app(testing=True).test_client(), conn, stored
+
+
+def test_bundle_requires_admin(bundle_client):
+    client, _, _ = bundle_client
+
+    assert client.get("/api/staff/documents/bundle").status_code == 401
+    response = client.get("/api/staff/documents/bundle", headers={"X-Staff-Id": "7", "X-Staff-Role": "doctor"})
+    assert response.status_code == 403
+
+
+def test_bundle_streams_documents_and_manifest(bundle_client):
+    client, conn, stored = bundle_client
+
+    response = client.get(
+        "/api/staff/documents/bundle?staff_id=7&type=salary_report&from=2024-03-01&to=2024-03-31",
+        headers=ADMIN,
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    assert response.is_streamed
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.namelist() == [
+        "staff_7/5-Jana Nováková Salary Report 2024-03-20.pdf",
+        "staff_7/6-Jana Nováková Salary Report 2024-02-29.pdf",
+        "manifest.csv",
+    ]
+    assert archive.read(archive.namelist()[0]) == b"%PDF-1.4 first report"
+
+    manifest = list(csv.reader(io.StringIO(archive.read("manifest.csv").decode("utf-8"))))
+    assert manifest[0][8:11] == ["Signature Hash", "Signature Token", "SHA-256"]
+    assert manifest[1][8:11] == ["a" * 64, "b" * 64, stored.sha256]
+    assert manifest[2][10] == hashlib.sha256(b"%PDF-1.4 legacy report").hexdigest()
+    # Missing files stay in the manifest without an archive path.
+    assert manifest[3][0] == "8" and manifest[3][12] == ""
+
+    sql, params = conn.queries[0]
+    assert "d.staff_id = ANY(%s)" in sql
+    assert params == [[7], "salary_report", date(2024, 3, 1), date(2024, 3, 31)]
+    assert conn.released
+
+
+def test_bundle_validates_filters(bundle_client):
+    client, _, _ = bundle_client
+
+    response = client.get("/api/staff/documents/bundle?staff_id=x", headers=ADMIN)
+    assert response.get_json()["error"] == "invalid_staff_id"
+    response = client.get("/api/staff/documents/bundle?from=March", headers=ADMIN)
+    assert response.get_json()["error"] == "invalid_date_format"
@@ -0,0 +1,178 @@
+import hashlib
+import os
+
+import pytest
+
+from backend import staff as staff_module
+from backend import storage
+from backend.app import create_app
+
+PDF = b"%PDF-1.4\n" + b"0123456789" * 100 + b"\n%%EOF"
+DIGEST = hashlib.sha256(PDF).hexdigest()
+
+
+class MissingKey(Exception):
+    def __init__(self):
+        super().__init__("NoSuchKey")
+        self.response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class Body:
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def read(self):
+        return self.data
+
+    def close(self):
+        self.closed = True
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client calls the storage makes."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def put_object(self, Bucket, Key, Body, Metadata=None):
+        self.puts += 1
+        self.objects[(Bucket, Key)] = Body
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise MissingKey()
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise MissingKey()
+        return {"Body": Body(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_local_storage_writes_sharded_content_addressed_files(tmp_path):
+    backend = storage.LocalStorage(str(tmp_path))
+
+    stored = backend.put(PDF, ".pdf")
+    again = backend.put(PDF, ".pdf")
+
+    assert stored == again
+    assert stored.sha256 == DIGEST
+    assert stored.key == f"{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.pdf"
+    shard = tmp_path / DIGEST[:2] / DIGEST[2:4]
+    assert os.listdir(shard) == [f"{DIGEST}.pdf"]
+    with backend.open(stored.key) as handle:
+        assert handle.read() == PDF
+
+    with pytest.raises(ValueError):
+        backend.local_path("../../etc/passwd")
+
+
+def test_incomplete_backend_fails_at_construction():
+    class WriteOnly(storage.DocumentStorage):
+        def _write(self, key, data):
+            pass
+
+    with pytest.raises(TypeError, match="delete"):
+        WriteOnly()
+
+
+def test_s3_storage_against_stand_in():
+    client = FakeS3Client()
+    backend = storage.S3Storage("documents", prefix="clinic/", client=client)
+
+    stored = backend.put(PDF, ".pdf")
+    backend.put(PDF, ".pdf")
+
+    assert client.puts == 1
+    assert ("documents", f"clinic/{stored.key}") in client.objects
+    assert backend.open(stored.key).read() == PDF
+    backend.delete(stored.key)
+    assert not backend.exists(stored.key)
+    with pytest.raises(FileNotFoundError):
+        backend.open(stored.key)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+
+    def fetchone(self):
+        return self.conn.row
+
+
+class FakeConn:
+    def __init__(self, row=None):
+        self.queries = []
+        self.row = row
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+@pytest.fixture
+def stored_document(monkeypatch, tmp_path):
+    monkeypatch.setattr(staff_module, "get_documents_base_dir", lambda: str(tmp_path))
+    stored = staff_module.get_document_storage().put(PDF, ".pdf")
+    conn = FakeConn((stored.key, DIGEST, "Jana Nováková Salary Report 2024-03-20.pdf", None))
+    monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client()
+
+
+def test_download_supports_range_and_conditional_get(stored_document):
+    client = stored_document
+    headers = {"X-Staff-Id": "7", "X-Staff-Role": "doctor"}
+
+    full = client.get("/api/staff/7/documents/5/download", headers=headers)
+    assert full.status_code == 200
+    assert full.data == PDF
+    assert full.headers["ETag"] == f'"{DIGEST}"'
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert "attachment" in full.headers["Content-Disposition"]
+
+    partial = client.get("/api/staff/7/documents/5/view", headers={**headers, "Range": "bytes=0-7"})
+    assert partial.status_code == 206
+    assert partial.data == PDF[:8]
+    assert partial.headers["Content-Range"] == f"bytes 0-7/{len(PDF)}"
+
+    cached = client.get("/api/staff/7/documents/5/view", headers={**headers, "If-None-Match": f'"{DIGEST}"'})
+    assert cached.status_code == 304
+
+
+def test_save_salary_report_records_hash_and_keeps_same_day_resigns(monkeypatch, tmp_path):
+    conn = FakeConn()
+    monkeypatch.setattr(staff_module, "get_documents_base_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+    versions = iter([b"%PDF first", b"%PDF second"])
+    monkeypatch.setattr(staff_module, "build_salary_report_pdf", lambda report, info: next(versions))
+    report = {"period": {"from": "2024-03-01", "to": "2024-03-20"}}
+    info = {"signer_name": "Jana Nováková", "signed_at": "2024-03-20T10:00:00+00:00",
+            "signature_hash": "a" * 64, "signature_token": "b" * 64}
+
+    for _ in range(2):
+        _, filename, error = staff_module.save_salary_report(7, report, info)
+        assert error is None
+        assert filename == "Jana Nováková Salary Report 2024-03-20.pdf"
+
+    inserts = [params for sql, params in conn.queries if "INSERT INTO staff_documents" in sql]
+    assert [params[9] for params in inserts] == [
+        hashlib.sha256(b"%PDF first").hexdigest(),
+        hashlib.sha256(b"%PDF second").hexdigest(),
+    ]
+    backend = staff_module.get_document_storage()
+    assert all(backend.exists(params[8]) for params in inserts)
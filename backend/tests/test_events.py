@@ -0,0 +1,67 @@
+import json
+
+from backend import events
+from backend import app as app_module
+from backend.app import create_app
+
+
+def test_format_sse():
+    text = events.format_sse({"topic": "income", "op": "insert", "id": 5, "seq": 3})
+    lines = text.strip().split("\n")
+    assert lines[0] == "id: 3"
+    assert lines[1] == "event: income"
+    assert json.loads(lines[2][len("data: "):])["id"] == 5
+    assert text.endswith("\n\n")
+
+
+def test_stream_filters_topics_and_unsubscribes(monkeypatch):
+    broker = events.EventBroker()
+    monkeypatch.setattr(events, "broker", broker)
+
+    stream = events.stream_events({"income"}, heartbeat=0.01)
+    assert next(stream).startswith("retry:")
+    assert broker.subscriber_count() == 1
+
+    broker.publish({"topic": "outcome", "id": 1})
+    broker.publish({"topic": "income", "op": "insert", "id": 2, "day": "2026-10-19"})
+    chunk = next(stream)
+    assert "event: income" in chunk
+    assert '"id":2' in chunk
+    assert next(stream) == ": keepalive\n\n"
+
+    stream.close()
+    assert broker.subscriber_count() == 0
+
+
+def test_slow_subscriber_gets_resync(monkeypatch):
+    monkeypatch.setattr(events, "SUBSCRIBER_QUEUE_SIZE", 2)
+    broker = events.EventBroker()
+    q = broker.subscribe()
+    for i in range(3):
+        broker.publish({"topic": "income", "id": i})
+    assert q.get_nowait()["topic"] == "resync"
+    assert q.empty()
+
+
+def test_stream_rejects_unknown_topic():
+    client = create_app(testing=True).test_client()
+    resp = client.get("/api/events/stream?topics=income,bogus")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_topic"
+
+
+def test_events_app_serves_many_streams(monkeypatch):
+    broker = events.EventBroker()
+    monkeypatch.setattr(events, "broker", broker)
+    monkeypatch.setattr(app_module, "events_broker", broker)
+    client = app_module.create_events_app(testing=True).test_client()
+
+    streams = [client.get("/api/events/stream", buffered=False) for _ in range(8)]
+    assert all(resp.status_code == 200 for resp in streams)
+    assert client.get("/api/events/health").get_json()["subscribers"] == 8
+    # Only the live feed is served here.
+    assert client.get("/api/income/records").status_code == 404
+
+    for resp in streams:
+        resp.close()
+    assert broker.subscriber_count() == 0
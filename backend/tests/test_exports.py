@@ -0,0 +1,133 @@
+import gzip
+import io
+import zipfile
+from datetime import date, datetime
+
+from backend import exports
+from backend.app import create_app
+
+
+class FakeNamedCursor:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((self.name, sql, params))
+
+    def __iter__(self):
+        return iter(self.conn.rows)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.rollbacks = 0
+
+    def cursor(self, name=None):
+        return FakeNamedCursor(self, name)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_stream_query_uses_server_side_cursor_and_releases():
+    fake_conn = FakeConn([(1,), (2,)])
+    released = []
+
+    rows = exports.stream_query(
+        "SELECT 1", (), connect=lambda: fake_conn, release=released.append, fetch_size=50
+    )
+    assert fake_conn.executed == []
+
+    assert list(rows) == [(1,), (2,)]
+    assert fake_conn.executed[0][0].startswith("export_")
+    assert released == [fake_conn]
+    assert fake_conn.rollbacks == 1
+
+
+def test_iter_csv_chunks_large_output(monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_SIZE", 32)
+    chunks = list(exports.iter_csv(["a", "b"], ([i, i * 2] for i in range(20))))
+
+    assert len(chunks) > 1
+    text = b"".join(chunks).decode("utf-8")
+    assert text.splitlines()[0] == "a,b"
+    assert text.splitlines()[-1] == "19,38"
+
+
+def test_gzip_chunks_round_trip():
+    payload = [b"day,total\r\n", b"2024-01-01,100.0\r\n" * 100]
+    compressed = b"".join(exports.gzip_chunks(iter(payload)))
+
+    assert gzip.decompress(compressed) == b"".join(payload)
+
+
+def test_export_income_records_streams_csv(monkeypatch):
+    from backend import income as income_module
+
+    fake_conn = FakeConn(
+        [
+            (5, date(2024, 1, 2), "Jan", "Novak", "Eva", "Dvorak", 1500, 200, "card", True, "Crown", datetime(2024, 1, 2, 9, 30)),
+        ]
+    )
+    monkeypatch.setattr(income_module, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(income_module, "release_connection", lambda conn: None)
+    client = create_app(testing=True).test_client()
+
+    response = client.get("/api/income/records/export?from=2024-01-01&to=2024-01-31")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith("ID,Date,Patient,Doctor")
+    assert lines[1] == "5,2024-01-02,Jan Novak,Eva Dvorak,1500.0,200.0,card,yes,Crown,2024-01-02T09:30:00"
+
+
+def test_export_income_records_gzip(monkeypatch):
+    from backend import income as income_module
+
+    fake_conn = FakeConn([])
+    monkeypatch.setattr(income_module, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(income_module, "release_connection", lambda conn: None)
+    client = create_app(testing=True).test_client()
+
+    response = client.get("/api/income/records/export?from=2024-01-01&to=2024-01-31&gzip=1")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/gzip"
+    assert "income_records_2024-01-01_2024-01-31.csv.gz" in response.headers["Content-Disposition"]
+    assert gzip.decompress(response.data).decode("utf-8").startswith("ID,Date")
+
+
+def test_export_income_records_rejects_bad_range(monkeypatch):
+    client = create_app(testing=True).test_client()
+
+    response = client.get("/api/income/records/export?from=2024-02-01&to=2024-01-01")
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "invalid_date_range"
+
+
+def test_iter_zip_writes_members_as_chunks_arrive():
+    consumed = []
+
+    def chunks(name):
+        for i in range(3):
+            consumed.append((name, i))
+            yield f"{name}-{i};".encode()
+
+    entries = ((zipfile.ZipInfo(name), chunks(name)) for name in ("a.txt", "b.txt"))
+    stream = exports.iter_zip(entries)
+    first = next(stream)
+
+    assert first.startswith(b"PK\x03\x04")
+    assert consumed == [("a.txt", 0)]
+    archive = zipfile.ZipFile(io.BytesIO(first + b"".join(stream)))
+    assert archive.read("b.txt") == b"b.txt-0;b.txt-1;b.txt-2;"
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+from backend import http_cache
+from backend import outcome as outcome_module
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+
+    def fetchall(self):
+        return [(1, "materials"), (2, "rent")]
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def _client(monkeypatch, versions):
+    conn = FakeConn()
+    monkeypatch.setattr(outcome_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(outcome_module, "release_connection", lambda c: None)
+    monkeypatch.setattr(http_cache, "fetch_table_versions", lambda tables: {t: versions[t] for t in tables})
+    app = create_app(testing=True)
+    app.config["HTTP_CACHE"] = True
+    return app.test_client(), conn
+
+
+def test_matching_etag_returns_304_without_running_view(monkeypatch):
+    stamp = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+    versions = {"outcome_categories": (4, stamp)}
+    client, conn = _client(monkeypatch, versions)
+
+    first = client.get("/api/outcome/categories")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.last_modified == stamp
+    assert len(conn.queries) == 1
+
+    second = client.get("/api/outcome/categories", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert len(conn.queries) == 1
+
+
+
+def test_if_modified_since_alone_does_not_revalidate(monkeypatch):
+    # A second write within the same second keeps the truncated Last-Modified.
+    stamp = datetime(2026, 10, 19, 8, 30, 0, 700000, tzinfo=timezone.utc)
+    versions = {"outcome_categories": (5, stamp)}
+    client, conn = _client(monkeypatch, versions)
+
+    response = client.get("/api/outcome/categories", headers={"If-Modified-Since": "Mon, 19 Oct 2026 08:30:00 GMT"})
+    assert response.status_code == 200
+    assert response.last_modified == stamp.replace(microsecond=0)
+    assert len(conn.queries) == 1
+
+
+def test_write_changes_etag(monkeypatch):
+    versions = {"outcome_categories": (4, None)}
+    client, _ = _client(monkeypatch, versions)
+    etag = client.get("/api/outcome/categories").headers["ETag"]
+
+    versions["outcome_categories"] = (5, None)
+    resp = client.get("/api/outcome/categories", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_etag_varies_with_staff(monkeypatch):
+    client, _ = _client(monkeypatch, {"outcome_categories": (1, None)})
+    a = client.get("/api/outcome/categories", headers={"X-Staff-Id": "1"}).headers["ETag"]
+    b = client.get("/api/outcome/categories", headers={"X-Staff-Id": "2"}).headers["ETag"]
+    assert a != b
+
+
+def test_uncached_when_versions_unavailable(monkeypatch):
+    client, conn = _client(monkeypatch, {})
+
+    def broken(tables):
+        raise RuntimeError("no table_versions")
+
+    monkeypatch.setattr(http_cache, "fetch_table_versions", broken)
+    resp = client.get("/api/outcome/categories")
+    assert resp.status_code == 200
+    assert "ETag" not in resp.headers
@@ -93,3 +93,46 @@ def test_create_income_record_requires_receipt_note():
 
     assert response.status_code == 400
     assert response.get_json()["error"] == "receipt_note_required"
+
+
+class PaidRecordCursor:
+    def __init__(self):
+        self.adjustments = []
+        self._row = None
+
+    def execute(self, sql, params=None):
+        if "information_schema.columns" in sql:
+            self._row = (1,)
+        elif "SELECT amount, doctor_id" in sql:
+            self._row = (1000, 1, 5, 200)
+        elif "SELECT commission_rate" in sql:
+            self._row = (0.3,)
+        elif "INSERT INTO salary_adjustments" in sql:
+            self.adjustments.append(params)
+
+    def fetchone(self):
+        return self._row
+
+
+class PaidRecordConn(FakeConn):
+    def __init__(self):
+        super().__init__()
+        self._cursor = PaidRecordCursor()
+
+
+def test_delete_paid_income_reverses_commission_net_of_lab_cost(monkeypatch):
+    from backend import income as income_module
+
+    fake_conn = PaidRecordConn()
+    monkeypatch.setattr(income_module, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(income_module, "release_connection", lambda conn: None)
+
+    client = create_app(testing=True).test_client()
+
+    assert client.delete("/api/income/records/10?mode=ignore").status_code == 200
+    assert fake_conn._cursor.adjustments == []
+
+    assert client.delete("/api/income/records/10?mode=adjust_next").status_code == 200
+    (staff_id, amount, _reason), = fake_conn._cursor.adjustments
+    assert staff_id == 1
+    assert amount == -240
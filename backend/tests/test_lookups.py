@@ -0,0 +1,89 @@
+from backend import lookups
+from backend import staff as staff_module
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+        self.rowcount = 1
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if "FROM staff_roles" in sql:
+            self._rows = [(1, "doctor"), (2, "assistant")]
+        elif "FROM medicine_presets" in sql:
+            self._rows = [(5, name) for name in self.conn.medicines]
+        elif "FROM clinic_settings" in sql:
+            self._rows = [("monthly_lease_cost", "1200")]
+        elif "INSERT INTO medicine_presets" in sql:
+            self.conn.medicines.append(params[0])
+            self._rows = [(6,)]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+        self.medicines = ["Ibuprofen"]
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+def _client(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client(), conn
+
+
+def test_roles_are_loaded_once(monkeypatch):
+    client, conn = _client(monkeypatch)
+
+    assert client.get("/api/staff/roles").get_json() == [
+        {"id": 1, "name": "doctor"},
+        {"id": 2, "name": "assistant"},
+    ]
+    client.get("/api/staff/roles")
+
+    assert sum("FROM staff_roles" in q for q in conn.queries) == 1
+    assert lookups.role_id(conn, "assistant") == 2
+    assert lookups.role_id(conn, "janitor") is None
+
+
+def test_medicine_write_invalidates_cache(monkeypatch):
+    client, conn = _client(monkeypatch)
+
+    assert [m["name"] for m in client.get("/api/staff/medicines").get_json()] == ["Ibuprofen"]
+    assert client.post("/api/staff/medicines", json={"name": "Paracetamol"}).status_code == 201
+
+    names = [m["name"] for m in client.get("/api/staff/medicines").get_json()]
+    assert names == ["Ibuprofen", "Paracetamol"]
+    assert sum("FROM medicine_presets" in q for q in conn.queries) == 2
+
+
+def test_version_change_reloads_table(monkeypatch):
+    conn = FakeConn()
+    versions = {table: (1, None) for table in lookups.LOOKUP_TABLES}
+    monkeypatch.setattr(lookups, "fetch_table_versions", lambda tables: dict(versions))
+    cache = lookups.LookupCache(recheck_seconds=0)
+
+    assert cache.get(conn, "clinic_settings") == {"monthly_lease_cost": "1200"}
+    cache.get(conn, "clinic_settings")
+    versions["clinic_settings"] = (2, None)
+    cache.get(conn, "clinic_settings")
+
+    assert sum("FROM clinic_settings" in q for q in conn.queries) == 2
@@ -0,0 +1,110 @@
+import pytest
+
+from backend import maintenance
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if "compact_doctor_revenue" in sql:
+            self.result = (3,)
+        if "compact_commission_ledger" in sql:
+            self.result = (2,)
+        if "rebuild_dashboard_accumulators" in sql:
+            self.result = (5,)
+        if "drain_audit_outbox" in sql:
+            self.result = (params[0],) if not self.conn.drained else (4,)
+            self.conn.drained = True
+        if "ensure_monthly_partitions" in sql:
+            self.conn.partition_calls.append(params)
+            self.result = (1,)
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+        self.partition_calls = []
+        self.drained = False
+        self.commits = 0
+        self.rollbacks = 0
+        self._cursor = FakeCursor(self)
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_compact_revenue_commits(monkeypatch):
+    fake_conn = FakeConn()
+    released = []
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: released.append(conn))
+
+    assert maintenance.run_task("compact-revenue") == 3
+    assert fake_conn.commits == 1
+    assert released == [fake_conn]
+    assert "compact_doctor_revenue" in fake_conn.queries[0]
+
+
+def test_failed_task_rolls_back(monkeypatch):
+    fake_conn = FakeConn()
+
+    def broken(conn):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: None)
+    monkeypatch.setitem(maintenance.TASKS, "compact-revenue", broken)
+
+    with pytest.raises(RuntimeError):
+        maintenance.run_task("compact-revenue")
+    assert fake_conn.rollbacks == 1
+    assert fake_conn.commits == 0
+
+
+def test_ensure_partitions_covers_both_tables(monkeypatch):
+    fake_conn = FakeConn()
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: None)
+
+    assert maintenance.run_task("ensure-partitions") == 3
+    assert [call[0] for call in fake_conn.partition_calls] == ["income_records", "outcome_records", "audit_events"]
+
+
+def test_rebuild_accumulators(monkeypatch):
+    fake_conn = FakeConn()
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: None)
+
+    assert maintenance.run_task("rebuild-accumulators") == 5
+    assert fake_conn.commits == 1
+
+
+def test_compact_commission(monkeypatch):
+    fake_conn = FakeConn()
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: None)
+
+    assert maintenance.run_task("compact-commission") == 2
+    assert "compact_commission_ledger" in fake_conn.queries[0]
+
+
+def test_drain_audit_repeats_until_outbox_is_short(monkeypatch):
+    fake_conn = FakeConn()
+    monkeypatch.setattr(maintenance, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(maintenance, "release_connection", lambda conn: None)
+
+    assert maintenance.run_task("drain-audit") == 504
+    assert sum("drain_audit_outbox" in q for q in fake_conn.queries) == 2
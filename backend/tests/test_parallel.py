@@ -0,0 +1,165 @@
+import threading
+
+from backend import parallel
+from backend.app import create_app
+from backend import clinic as clinic_module
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if "pg_export_snapshot" in sql:
+            self.rows = [("00000003-0000001B-1",)]
+        elif sql.startswith("SET TRANSACTION"):
+            self.rows = []
+        else:
+            self.rows = self.conn.responder(sql)
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    def __init__(self, responder):
+        self.responder = responder
+        self.queries = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_sequential_mode_uses_one_connection(monkeypatch):
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "sequential")
+    conns = []
+
+    def connect():
+        conn = FakeConn(lambda sql: [(sql.split()[-1],)])
+        conns.append(conn)
+        return conn
+
+    released = []
+    results = parallel.run_queries(
+        {"a": ("SELECT a", ()), "b": ("SELECT b", ())},
+        connect=connect,
+        release=released.append,
+    )
+    assert results == {"a": [("a",)], "b": [("b",)]}
+    assert len(conns) == 1
+    assert released == conns
+    assert conns[0].queries[0] == parallel.SNAPSHOT_ISOLATION
+
+
+def test_threads_mode_shares_exported_snapshot(monkeypatch):
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "threads")
+    monkeypatch.setattr(parallel, "FANOUT_WIDTH", 2)
+    conns = []
+
+    def connect():
+        conn = FakeConn(lambda sql: [(sql.split()[-1],)])
+        conns.append(conn)
+        return conn
+
+    released = []
+    results = parallel.run_queries(
+        {"a": ("SELECT a", ()), "b": ("SELECT b", ()), "c": ("SELECT c", ())},
+        connect=connect,
+        release=released.append,
+    )
+    assert list(results) == ["a", "b", "c"]
+    assert results["b"] == [("b",)]
+    assert len(conns) == 2
+    assert sorted(map(id, released)) == sorted(map(id, conns))
+
+    leader, follower = conns
+    assert "pg_export_snapshot" in leader.queries[1]
+    assert follower.queries[:2] == [
+        parallel.SNAPSHOT_ISOLATION,
+        "SET TRANSACTION SNAPSHOT '00000003-0000001B-1'",
+    ]
+    assert leader.queries[2:] == ["SELECT a", "SELECT c"]
+    assert follower.queries[2:] == ["SELECT b"]
+
+
+def test_snapshot_id_is_validated():
+    try:
+        parallel._snapshot_sql("x'; DROP TABLE staff; --")
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_async_mode_falls_back_without_driver(monkeypatch):
+    monkeypatch.setattr(parallel, "ASYNC_AVAILABLE", False)
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "async")
+    assert parallel.query_mode() == "threads"
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "auto")
+    assert parallel.query_mode() == "threads"
+
+
+def test_day_details_combines_parallel_results(monkeypatch):
+    def responder(sql):
+        if "ORDER BY total DESC" in sql:
+            return [(4, "Eva", "Dvorak", 900)]
+        if "GROUP BY payment_method" in sql:
+            return [("cash", 600), ("card", 400)]
+        if "COUNT(DISTINCT patient_id)" in sql:
+            return [(3, 1000)]
+        if "FROM outcome_records" in sql:
+            return [(150,)]
+        if "FROM salary_payments" in sql:
+            return [(50,)]
+        return []
+
+    parallel.reset_fanout_stats()
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "threads")
+    monkeypatch.setattr(clinic_module, "get_connection", lambda: FakeConn(responder))
+    monkeypatch.setattr(clinic_module, "release_connection", lambda conn: None)
+    client = create_app(testing=True).test_client()
+
+    resp = client.get("/api/clinic/dashboard/day-details?date=2026-10-19")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["metrics"] == {"total_income": 1000.0, "total_outcome": 200.0, "net_profit": 800.0}
+    assert data["highest_earning_doctor"]["name"] == "Eva Dvorak"
+    assert data["revenue_breakdown"] == {"cash": 600.0, "card": 400.0}
+    assert data["patient_count"] == 3
+    assert data["appointment_types"] == []
+    assert "db-serial;dur=" in resp.headers["Server-Timing"]
+
+    stats = client.get("/api/clinic/dashboard/fanout-stats").get_json()
+    assert stats["clinic.get_day_details"]["runs"] == 1
+    assert stats["clinic.get_day_details"]["queries"] == 6
+
+
+def test_threads_mode_runs_sequentially_when_fanout_slots_are_taken(monkeypatch):
+    monkeypatch.setattr(parallel.config, "QUERY_MODE", "threads")
+    monkeypatch.setattr(parallel, "_fanout_slots", {"threads": threading.BoundedSemaphore(1), "async": None})
+    parallel._fanout_slots["threads"].acquire()
+    conns = []
+
+    def connect():
+        conn = FakeConn(lambda sql: [(sql.split()[-1],)])
+        conns.append(conn)
+        return conn
+
+    results = parallel.run_queries(
+        {"a": ("SELECT a", ()), "b": ("SELECT b", ())},
+        connect=connect,
+        release=lambda conn: None,
+    )
+    assert results == {"a": [("a",)], "b": [("b",)]}
+    assert len(conns) == 1
+
+    parallel._fanout_slots["threads"].release()
+    parallel.run_queries({"a": ("SELECT a", ()), "b": ("SELECT b", ())}, connect=connect, release=lambda conn: None)
+    assert len(conns) == 3
+    # The slot is handed back after the fan-out.
+    assert parallel._fanout_slots["threads"].acquire(blocking=False)
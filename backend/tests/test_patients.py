@@ -1,3 +1,5 @@
+from datetime import date
+
 from backend.app import create_app
 from backend.patients import parse_patient_input
 
@@ -116,3 +118,70 @@ def test_search_endpoint_partial_name(monkeypatch):
     # Partial matches should not be exact unless logic determines full equality
     # In this mock, score is 3 (partial)
     assert data[0]["exact"] is False
+
+
+class _StatsCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if "FROM patients p" in sql:
+            self._rows = [(7, "Anna", "Novak", 0)]
+        elif "FROM patient_stats ps" in sql:
+            self._rows = [(1500, "Eva", "Dvorak", date(2026, 3, 2))]
+        elif "FROM patient_stats" in sql:
+            self._rows = [(date(2026, 1, 1), 4, 3, 2400, 2.5), (date(2026, 2, 1), 2, 0, 300, 1)]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+class _StatsConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return _StatsCursor(self)
+
+
+def _stats_client(monkeypatch, conn):
+    from backend import patients as patients_module
+    monkeypatch.setattr(patients_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(patients_module, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client()
+
+
+def test_search_banner_reads_patient_stats(monkeypatch):
+    conn = _StatsConn()
+    client = _stats_client(monkeypatch, conn)
+
+    resp = client.get("/api/patients/search?q=Novak")
+    assert resp.status_code == 200
+    banner = resp.get_json()[0]["banner"]
+    assert banner == {
+        "total_paid": 1500.0,
+        "last_treatment_doctor": "Eva Dvorak",
+        "last_treatment_date": "2026-03-02",
+    }
+    assert not any("FROM income_records" in q for q in conn.queries)
+
+
+def test_patient_cohorts(monkeypatch):
+    client = _stats_client(monkeypatch, _StatsConn())
+
+    resp = client.get("/api/patients/cohorts?from=2026-01-01&to=2026-02-28")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data[0]["cohort"] == "2026-01-01"
+    assert data[0]["retention_rate"] == 0.75
+    assert data[1]["returning_patients"] == 0
+
+    resp = client.get("/api/patients/cohorts?from=2026-03-01&to=2026-01-01")
+    assert resp.status_code == 400
@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from backend import staff as staff_module
+from backend.app import create_app
+
+ADMIN = {"X-Staff-Id": "1", "X-Staff-Role": "admin"}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "FROM staff_roles" in sql:
+            self._rows = [(1, "doctor"), (2, "assistant")]
+        elif "WITH unpaid AS" in sql:
+            self._rows = [
+                (2, "Eva", "Malá", "assistant", 30000, 0, None, 0, 0, 0, None, 500, 0),
+                # Part of the income was stamped at 0.25 before the rate went up to 0.3.
+                (7, "Jana", "Nováková", "doctor", 20000, 0.3, date(2024, 2, 29), 10000, 2000, 12, date(2024, 3, 1), -1000,
+                 2160),
+            ]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+@pytest.fixture
+def client_and_conn(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+    return create_app(testing=True).test_client(), conn
+
+
+def test_preview_requires_admin(client_and_conn):
+    client, _ = client_and_conn
+
+    assert client.get("/api/staff/payroll/preview").status_code == 401
+    response = client.get("/api/staff/payroll/preview", headers={"X-Staff-Id": "7", "X-Staff-Role": "doctor"})
+    assert response.status_code == 403
+
+
+def test_preview_computes_every_staff_member_in_one_query(client_and_conn):
+    client, conn = client_and_conn
+
+    response = client.get("/api/staff/payroll/preview?from=2024-03-01&to=2024-03-31", headers=ADMIN)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    doctor = body["staff"][1]
+    assert doctor["unpaid_income"] == 10000
+    assert doctor["commission"] == 2160
+    assert doctor["commission_rate"] == 0.27
+    assert doctor["total"] == 21160
+    assert doctor["oldest_unpaid_date"] == "2024-03-01"
+    assert body["staff"][0]["total"] == 30500
+    assert body["totals"]["total"] == 51660
+
+    previews = [q for q in conn.queries if "WITH unpaid AS" in q[0]]
+    assert len(previews) == 1
+    sql, params = previews[0]
+    assert "ir.salary_payment_id IS NULL" in sql
+    assert staff_module.STAMPED_COMMISSION_SQL in sql
+    assert params == [date(2024, 3, 1), date(2024, 3, 31)]
+
+
+def test_preview_validates_period(client_and_conn):
+    client, _ = client_and_conn
+
+    response = client.get("/api/staff/payroll/preview?from=2024-04-01&to=2024-03-01", headers=ADMIN)
+    assert response.get_json()["error"] == "invalid_date_range"
+    response = client.get("/api/staff/payroll/preview?from=yesterday", headers=ADMIN)
+    assert response.get_json()["error"] == "invalid_date_format"
@@ -31,7 +31,11 @@ def client():
                     signer_name     VARCHAR(150) NOT NULL,
                     signature_hash  VARCHAR(64) NOT NULL,
                     signature_token VARCHAR(64),
-                    file_path       TEXT NOT NULL,
+                    file_path       TEXT,
+                    storage_key     TEXT,
+                    sha256          CHAR(64),
+                    size_bytes      BIGINT,
+                    file_name       TEXT,
                     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
                 )
                 """
@@ -0,0 +1,95 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from backend import staff as staff_module
+from backend.app import create_app
+
+
+def _payment(payment_id, day, extra=()):
+    created = datetime(2024, 3, day, 12, tzinfo=timezone.utc)
+    return (7, 3, payment_id, date(2024, 3, day), f"note {payment_id}", 1000 + payment_id, created) + extra
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "FROM staff s" in sql and "staff_salary_summary" in sql:
+            self._rows = self.conn.page_rows
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, page_rows):
+        self.queries = []
+        self.page_rows = page_rows
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def _make(page_rows):
+        conn = FakeConn(page_rows)
+        monkeypatch.setattr(staff_module, "get_connection", lambda: conn)
+        monkeypatch.setattr(staff_module, "release_connection", lambda c: None)
+        return create_app(testing=True).test_client(), conn
+
+    return _make
+
+
+def test_salary_notes_page_through_keyset_cursor(make_client):
+    client, conn = make_client([_payment(3, 20), _payment(2, 10), _payment(1, 1)])
+
+    body = client.get("/api/staff/7/salary-notes?limit=2").get_json()
+
+    assert [item["id"] for item in body["items"]] == [3, 2]
+    assert body["total"] == 3
+    assert body["next_cursor"]
+    assert len(conn.queries) == 1
+    assert conn.queries[0][1] == [3, 7]
+
+    client.get(f"/api/staff/7/salary-notes?limit=2&cursor={body['next_cursor']}")
+    sql, params = conn.queries[1]
+    assert "(sp.payment_date, sp.created_at, sp.id) < (%s, %s, %s)" in sql
+    assert params == [date(2024, 3, 10), datetime(2024, 3, 10, 12, tzinfo=timezone.utc), 2, 3, 7]
+
+
+def test_salary_notes_unknown_staff_and_bad_cursor(make_client):
+    client, _ = make_client([])
+
+    assert client.get("/api/staff/99/salary-notes").status_code == 404
+    response = client.get("/api/staff/99/salary-notes?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "invalid_pagination"
+
+
+def test_staff_without_payments_has_empty_page(make_client):
+    client, _ = make_client([(7, 0, None, None, None, None, None)])
+
+    body = client.get("/api/staff/7/salary-notes").get_json()
+    assert body == {"items": [], "total": 0, "limit": 10, "next_cursor": None}
+
+
+def test_salary_history_bundles_documents_and_audit(make_client):
+    documents = [{"id": 5, "document_type": "salary_report", "signed_at": "2024-03-20T12:00:00+00:00"}]
+    audit = [{"id": 40, "action": "manual_override", "actor_id": 1, "payload": {"new_amount": 1003}}]
+    client, conn = make_client([_payment(3, 20, (documents, audit))])
+
+    assert client.get("/api/staff/7/salary-history").status_code == 401
+    response = client.get("/api/staff/7/salary-history", headers={"X-Staff-Id": "8", "X-Staff-Role": "doctor"})
+    assert response.status_code == 403
+
+    body = client.get("/api/staff/7/salary-history", headers={"X-Staff-Id": "7", "X-Staff-Role": "doctor"}).get_json()
+    item = body["items"][0]
+    assert item["documents"][0]["download_url"] == "/api/staff/7/documents/5/download"
+    assert item["audit"][0]["action"] == "manual_override"
+    assert len(conn.queries) == 1
+    assert "audit_outbox" in conn.queries[0][0]
@@ -272,7 +272,7 @@ def test_build_salary_report_data_doctor_uses_requested_period(monkeypatch):
                 self.rows = [(date(2026, 3, 5),)]
                 return
             if "JOIN patients p" in sql:
-                self.rows = [("Alice", "Novak", 4567.0, 300.0)]
+                self.rows = [("Alice", "Novak", 4567.0, 300.0, 1280.1)]
                 return
             if "FROM salary_adjustments" in sql:
                 self.rows = [(0.0,)]
@@ -320,7 +320,7 @@ def test_salary_estimate_clamps_negative_lab_fee(monkeypatch):
                 self.rows = []
                 return
             if "JOIN patients p" in sql:
-                self.rows = [("Alice", "Novak", 1000.0, -50.0)]
+                self.rows = [("Alice", "Novak", 1000.0, -50.0, 300.0)]
                 return
             if "FROM salary_adjustments" in sql:
                 self.rows = [(0.0,)]
@@ -366,7 +366,7 @@ def test_salary_estimate_prevents_negative_commission_base(monkeypatch):
                 self.rows = []
                 return
             if "JOIN patients p" in sql:
-                self.rows = [("Alice", "Novak", 1000.0, 2500.0)]
+                self.rows = [("Alice", "Novak", 1000.0, 2500.0, -600.0)]
                 return
             if "FROM salary_adjustments" in sql:
                 self.rows = [(0.0,)]
@@ -398,3 +398,100 @@ def test_salary_estimate_prevents_negative_commission_base(monkeypatch):
     assert response.json["commission_base_income"] == 0.0
     assert response.json["negative_balance"] == 1500.0
     assert response.json["commission_part"] == 0.0
+
+
+def test_salary_estimate_uses_stamped_commission_rates(monkeypatch):
+    executed = []
+
+    class FakeCursor:
+        def __init__(self):
+            self.rows = []
+
+        def execute(self, sql, params=None):
+            executed.append(sql)
+            if "FROM staff s" in sql:
+                self.rows = [(0.0, 0.5, 0.0, "doctor", date(2026, 2, 28))]
+            elif "JOIN patients p" in sql:
+                # Visits billed while the doctor's rate was still 0.2.
+                self.rows = [("Alice", "Novak", 4000.0, 0.0, 800.0)]
+            elif "FROM salary_adjustments" in sql:
+                self.rows = [(0.0,)]
+            else:
+                self.rows = []
+
+        def fetchone(self):
+            return self.rows[0] if self.rows else None
+
+        def fetchall(self):
+            return list(self.rows)
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+        def rollback(self):
+            return None
+
+    monkeypatch.setattr(staff_module, "get_connection", lambda: FakeConn())
+    monkeypatch.setattr(staff_module, "release_connection", lambda conn: None)
+
+    client = create_app(testing=True).test_client()
+    response = client.get("/api/staff/2/salary-estimate?from=2026-03-01&to=2026-03-31")
+
+    assert response.json["commission_part"] == 800.0
+    assert any("ir.commission_rate" in sql for sql in executed if "JOIN patients p" in sql)
+
+
+def test_pay_salary_settles_ledger_with_amount_paid(monkeypatch):
+    executed = []
+
+    class FakeCursor:
+        def __init__(self):
+            self.row = None
+
+        def execute(self, sql, params=None):
+            executed.append((sql, params))
+            if "FROM staff s" in sql:
+                self.row = (2, 1000.0, 0.3, 0.0, "doctor")
+            elif "FROM income_records ir" in sql and "SELECT" in sql:
+                self.row = (5000.0, 0.0, 1500.0)
+            elif "FROM salary_adjustments" in sql:
+                self.row = (0.0,)
+            elif "INSERT INTO salary_payments" in sql:
+                self.row = (41,)
+            else:
+                self.row = None
+
+        def fetchone(self):
+            return self.row
+
+        def fetchall(self):
+            return []
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            return None
+
+        def rollback(self):
+            return None
+
+    monkeypatch.setattr(staff_module, "get_connection", lambda: FakeConn())
+    monkeypatch.setattr(staff_module, "release_connection", lambda conn: None)
+
+    client = create_app(testing=True).test_client()
+    response = client.post(
+        "/api/staff/salaries",
+        json={"staff_id": 2, "amount": 2200.0, "from": "2026-03-01", "to": "2026-03-31"},
+        headers={"X-Staff-Id": "1", "X-Staff-Role": "admin"},
+    )
+
+    assert response.status_code == 201
+    link_sql, link_params = next(q for q in executed if "UPDATE income_records" in q[0])
+    assert "ir.service_date BETWEEN %s AND %s" in link_sql
+    assert link_params == [41, 2, date(2026, 3, 1), date(2026, 3, 31)]
+    ledger = [params for sql, params in executed if "INSERT INTO commission_ledger" in sql]
+    # The admin paid 1200 beyond base, not the computed 1500 commission.
+    assert ledger == [(2, "settlement", -1200.0, 41)]
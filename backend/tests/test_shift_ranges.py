@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from backend import schedule
+from backend.app import create_app
+from backend.shift_ranges import overlaps
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "FROM shifts s" in sql:
+            # Night shift starting before the window and ending inside it.
+            self._rows = [(1, 7, datetime(2024, 3, 3, 20, tzinfo=timezone.utc), datetime(2024, 3, 4, 4, tzinfo=timezone.utc),
+                           None, "Jana", "Nováková", "doctor", 1)]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def test_overlap_predicate_uses_period():
+    assert overlaps("sh") == "sh.period && tstzrange(%s, %s, '[)')"
+
+
+def test_list_shifts_includes_shifts_crossing_the_window(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(schedule, "get_connection", lambda: conn)
+    monkeypatch.setattr(schedule, "release_connection", lambda c: None)
+    client = create_app(testing=True).test_client()
+
+    response = client.get("/api/schedule?start=2024-03-04T00:00:00Z&end=2024-03-11T00:00:00Z&staff_id=7")
+
+    assert [shift["id"] for shift in response.get_json()] == [1]
+    sql, params = next(q for q in conn.queries if "FROM shifts s" in q[0])
+    assert overlaps("s") in sql
+    assert params[:2] == [datetime(2024, 3, 4, tzinfo=timezone.utc), datetime(2024, 3, 11, tzinfo=timezone.utc)]
+    assert params[2] == 7
+
+
+def test_schedule_schema_adds_missing_period_column():
+    conn = FakeConn()
+    schedule.ensure_schedule_schema(conn.cursor())
+
+    statements = [sql for sql, _ in conn.queries]
+    backfill = next(sql for sql in statements if "ADD COLUMN period" in sql)
+    assert "column_name = 'period'" in backfill
+    assert statements.index(backfill) == 1
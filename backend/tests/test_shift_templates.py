@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend import schedule
+from backend.app import create_app
+
+
+def _at(hour):
+    return datetime(2024, 3, 4, hour, tzinfo=timezone.utc)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+        self.rowcount = 1
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "INSERT INTO shifts" in sql:
+            self._rows = [(10, 7, _at(8), _at(16), 1), (11, 8, _at(9), _at(17), 2)]
+        elif "JOIN candidates o" in sql:
+            self._rows = self.conn.conflicts
+        elif "INSERT INTO shift_templates" in sql:
+            self._rows = [(3,)]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, conflicts=None):
+        self.queries = []
+        self.conflicts = conflicts or []
+        self.committed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        return None
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def _make(conn):
+        monkeypatch.setattr(schedule, "get_connection", lambda: conn)
+        monkeypatch.setattr(schedule, "release_connection", lambda c: None)
+        return create_app(testing=True).test_client()
+
+    return _make
+
+
+def test_template_validation(make_client):
+    client = make_client(FakeConn())
+    base = {"staff_id": 7, "weekday": 1, "start_time": "08:00", "end_time": "16:00"}
+
+    assert client.post("/api/schedule/templates", json={**base, "weekday": 8}).get_json()["error"] == "invalid_weekday"
+    response = client.post("/api/schedule/templates", json={**base, "end_time": "07:00"})
+    assert response.get_json()["error"] == "end_time_must_be_after_start_time"
+
+    response = client.post("/api/schedule/templates", json=base)
+    assert response.status_code == 201
+    assert response.get_json()["id"] == 3
+
+
+def test_materialize_inserts_batch_in_one_statement(make_client):
+    conn = FakeConn()
+    client = make_client(conn)
+
+    response = client.post(
+        "/api/schedule/templates/materialize",
+        json={"from": "2024-03-01", "to": "2024-03-31", "staff_ids": [7, 8]},
+        headers={"X-Staff-Id": "1", "X-Staff-Role": "admin"},
+    )
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["created"] == 2
+    assert [shift["template_id"] for shift in body["shifts"]] == [1, 2]
+    assert conn.committed
+
+    assert len(conn.queries) == 2
+    insert_sql, params = conn.queries[1]
+    assert "INSERT INTO audit_outbox" in insert_sql
+    assert params["staff_ids"] == [7, 8]
+    assert params["tz"] == schedule.config.CLINIC_TIMEZONE
+
+
+def test_materialize_reports_conflicts(make_client):
+    conflict = (1, 7, _at(8), _at(16), "shift", 55, _at(12), _at(18))
+    conn = FakeConn(conflicts=[conflict])
+    client = make_client(conn)
+
+    response = client.post("/api/schedule/templates/materialize", json={"from": "2024-03-01", "to": "2024-03-07"})
+
+    assert response.status_code == 409
+    assert response.get_json()["conflicts"][0]["conflicts_with"] == {
+        "type": "shift",
+        "id": 55,
+        "start_time": _at(12).isoformat(),
+        "end_time": _at(18).isoformat(),
+    }
+    assert not any("INSERT INTO shifts" in sql for sql, _ in conn.queries)
+
+
+def test_materialize_range_is_bounded(make_client):
+    client = make_client(FakeConn())
+
+    response = client.post("/api/schedule/templates/materialize", json={"from": "2024-01-01", "to": "2024-12-31"})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "range_too_large"
+
+    response = client.post("/api/schedule/templates/materialize", json={"to": "2024-12-31"})
+    assert response.get_json()["error"] == "missing_field_from"
+
+
+def test_materialize_with_empty_staff_selection_creates_nothing(make_client):
+    conn = FakeConn()
+    client = make_client(conn)
+
+    response = client.post(
+        "/api/schedule/templates/materialize",
+        json={"from": "2024-03-01", "to": "2024-03-31", "staff_ids": []},
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {"created": 0, "shifts": []}
+    assert conn.queries == []
+
+    response = client.post(
+        "/api/schedule/templates/materialize",
+        json={"from": "2024-03-01", "to": "2024-03-31", "staff_ids": "12"},
+    )
+    assert response.get_json()["error"] == "invalid_data_format"
@@ -0,0 +1,73 @@
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._one = None
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+        if "UPDATE staff SET commission_rate" in sql:
+            self._one = (params[1],) if params[1] in self.conn.staff_ids else None
+
+    def fetchone(self):
+        return self._one
+
+
+class FakeConn:
+    def __init__(self, staff_ids):
+        self.staff_ids = staff_ids
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._cursor = FakeCursor(self)
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def make_client(monkeypatch, fake_conn):
+    from backend import staff as staff_module
+
+    monkeypatch.setattr(staff_module, "get_connection", lambda: fake_conn)
+    monkeypatch.setattr(staff_module, "release_connection", lambda conn: None)
+    return create_app(testing=True).test_client()
+
+
+def test_update_commission_rate(monkeypatch):
+    fake_conn = FakeConn({3})
+    client = make_client(monkeypatch, fake_conn)
+
+    response = client.post("/api/staff/3/commission", json={"rate": "0.35"})
+
+    assert response.status_code == 200
+    assert fake_conn.commits == 1
+    assert fake_conn.executed[0][1] == (0.35, 3)
+
+
+def test_update_commission_rate_rejects_out_of_range(monkeypatch):
+    fake_conn = FakeConn({3})
+    client = make_client(monkeypatch, fake_conn)
+
+    response = client.post("/api/staff/3/commission", json={"rate": 1.5})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "invalid_commission_rate"
+    assert fake_conn.executed == []
+
+
+def test_update_commission_rate_unknown_staff(monkeypatch):
+    fake_conn = FakeConn(set())
+    client = make_client(monkeypatch, fake_conn)
+
+    response = client.post("/api/staff/9/commission", json={"rate": 0.2})
+
+    assert response.status_code == 404
+    assert fake_conn.commits == 0
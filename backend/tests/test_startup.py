@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from backend.benchmarks import startup
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_create_app_does_not_load_pdf_stack():
+    result = startup.probe(ROOT)
+    assert "reportlab" not in result["heavy"]
+    assert "PIL" not in result["heavy"]
+    assert result["create_ms"] >= 0
+
+
+def test_probe_runs_from_any_directory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert startup.probe()["import_ms"] >= 0
@@ -0,0 +1,177 @@
+import json
+
+from backend import outcome as outcome_module
+from backend.app import create_app
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append((sql, params))
+        if "FROM unnest" in sql:
+            self._rows = self.conn.conflicts
+        else:
+            self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, conflicts=None):
+        self.queries = []
+        self.conflicts = conflicts or []
+        self.inserted = []
+        self.committed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        return None
+
+
+def _client(monkeypatch, conn):
+    def fake_execute_values(cur, sql, rows, page_size=100, fetch=False):
+        conn.inserted.extend(rows)
+        return [(100 + i,) for i in range(len(rows))]
+
+    monkeypatch.setattr(outcome_module, "get_connection", lambda: conn)
+    monkeypatch.setattr(outcome_module, "release_connection", lambda c: None)
+    monkeypatch.setattr(outcome_module, "execute_values", fake_execute_values)
+    return create_app(testing=True).test_client()
+
+
+def _audit_inserts(conn):
+    return [params for sql, params in conn.queries if "INSERT INTO audit_outbox" in sql]
+
+
+def test_bulk_inserts_batch_with_single_audit_entry(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    entries = [
+        {"staff_id": 3, "work_date": "2026-10-01", "start_time": "08:00", "end_time": "12:00"},
+        {"staff_id": 3, "work_date": "2026-10-02", "start_time": "08:00", "end_time": "16:30", "note": "late"},
+        {"staff_id": 4, "work_date": "2026-10-01", "start_time": "09:00", "end_time": "17:00"},
+    ]
+
+    resp = client.post("/api/outcome/timesheets/bulk", json={"entries": entries}, headers={"X-Staff-Id": "1"})
+
+    assert resp.status_code == 201
+    assert resp.get_json() == {"created": 3, "ids": [100, 101, 102]}
+    assert [row[4] for row in conn.inserted] == [4.0, 8.5, 8.0]
+    assert sum("FROM unnest" in sql for sql, _ in conn.queries) == 1
+    audits = _audit_inserts(conn)
+    assert len(audits) == 1
+    assert audits[0][:4] == ("timesheet", None, "bulk_create", 1)
+    assert json.loads(audits[0][4])["new"]["ids"] == [100, 101, 102]
+    assert conn.committed
+
+
+def test_bulk_rejects_bad_rows_before_touching_database(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    entries = [
+        {"staff_id": 3, "work_date": "2026-10-01", "start_time": "12:00", "end_time": "08:00"},
+        {"staff_id": "x", "work_date": "2026-10-01", "start_time": "08:00", "end_time": "09:00"},
+    ]
+
+    resp = client.post("/api/outcome/timesheets/bulk", json={"entries": entries})
+
+    assert resp.status_code == 400
+    assert resp.get_json()["rows"] == [
+        {"row": 0, "error": "invalid_time_range"},
+        {"row": 1, "error": "invalid_data"},
+    ]
+    assert conn.queries == []
+
+
+def test_bulk_reports_overlaps_found_by_database(monkeypatch):
+    conn = FakeConn(conflicts=[(1, "overlaps_batch")])
+    client = _client(monkeypatch, conn)
+    entries = [
+        {"staff_id": 3, "work_date": "2026-10-01", "start_time": "08:00", "end_time": "12:00"},
+        {"staff_id": 3, "work_date": "2026-10-01", "start_time": "11:00", "end_time": "13:00"},
+    ]
+
+    resp = client.post("/api/outcome/timesheets/bulk", json={"entries": entries})
+
+    assert resp.status_code == 409
+    assert resp.get_json()["rows"] == [{"row": 1, "error": "overlaps_batch"}]
+    assert conn.inserted == []
+    assert not conn.committed
+
+
+def test_csv_import_uses_same_batch_path(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    body = "staff_id,work_date,start_time,end_time,note\n5,2026-10-05,07:30,15:30,\n5,2026-10-06,07:30,11:30,half day\n"
+
+    resp = client.post("/api/outcome/timesheets/import", data=body, content_type="text/csv")
+
+    assert resp.status_code == 201
+    assert resp.get_json()["created"] == 2
+    assert conn.inserted[1][5] == "half day"
+    assert len(_audit_inserts(conn)) == 1
+
+
+def test_csv_import_requires_columns(monkeypatch):
+    client = _client(monkeypatch, FakeConn())
+    resp = client.post("/api/outcome/timesheets/import", data="staff,day\n1,2\n", content_type="text/csv")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_csv"
+
+
+def test_csv_import_rejects_oversized_body(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    monkeypatch.setattr(outcome_module, "TIMESHEET_CSV_MAX_BYTES", 64)
+    body = "staff_id,work_date,start_time,end_time,note\n" + "5,2026-10-05,07:30,15:30,\n" * 4
+
+    resp = client.post("/api/outcome/timesheets/import", data=body, content_type="text/csv")
+
+    assert resp.status_code == 413
+    assert resp.get_json()["error"] == "request_body_too_large"
+    assert conn.queries == []
+
+
+def test_csv_import_stops_reading_past_batch_limit(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    monkeypatch.setattr(outcome_module, "TIMESHEET_BATCH_LIMIT", 2)
+    body = "staff_id,work_date,start_time,end_time,note\n" + "5,2026-10-05,07:30,15:30,\n" * 3
+
+    resp = client.post("/api/outcome/timesheets/import", data=body, content_type="text/csv")
+
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "batch_too_large", "limit": 2}
+    assert conn.queries == []
+
+
+def test_bulk_locks_staff_and_leaves_anonymous_actor_empty(monkeypatch):
+    conn = FakeConn()
+    client = _client(monkeypatch, conn)
+    entries = [
+        {"staff_id": 7, "work_date": "2026-10-01", "start_time": "08:00", "end_time": "12:00"},
+        {"staff_id": 3, "work_date": "2026-10-01", "start_time": "08:00", "end_time": "12:00"},
+    ]
+
+    resp = client.post("/api/outcome/timesheets/bulk", json={"entries": entries})
+
+    assert resp.status_code == 201
+    lock_index = next(i for i, (sql, _) in enumerate(conn.queries) if "pg_advisory_xact_lock" in sql)
+    check_index = next(i for i, (sql, _) in enumerate(conn.queries) if "FROM unnest" in sql)
+    assert lock_index < check_index
+    assert conn.queries[lock_index][1] == ([3, 7],)
+    audit = _audit_inserts(conn)[0]
+    assert audit[3] is None
+    assert json.loads(audit[4])["staff_id"] is None
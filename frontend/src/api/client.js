@@ -59,3 +59,39 @@ export function useApi() {
     delete: (path) => apiRequest(path, { method: "DELETE" })
   };
 }
+
+const EVENT_RETRY_MS = 5000;
+
+export function subscribeEvents(topics, onEvent) {
+  const query = topics && topics.length ? `?topics=${encodeURIComponent(topics.join(","))}` : "";
+  const handler = (message) => {
+    try {
+      onEvent(JSON.parse(message.data));
+    } catch {
+    }
+  };
+  let source = null;
+  let retryTimer = null;
+  let closed = false;
+  const connect = () => {
+    source = new EventSource(`${API_BASE}/events/stream${query}`);
+    [...(topics || []), "resync"].forEach((topic) => source.addEventListener(topic, handler));
+    // EventSource gives up on an error status, e.g. a 502 while the events
+    // service restarts; try again after the server's retry delay
+    // (RECONNECT_DELAY in backend/events.py) and resync on reconnect.
+    source.onerror = () => {
+      if (closed || source.readyState !== EventSource.CLOSED) return;
+      retryTimer = setTimeout(() => {
+        if (closed) return;
+        connect();
+        onEvent({ topic: "resync" });
+      }, EVENT_RETRY_MS);
+    };
+  };
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source.close();
+  };
+}
@@ -1,6 +1,6 @@
-import React, { useState, useEffect, useCallback, useMemo } from "react";
+import React, { useState, useEffect, useCallback, useMemo, useRef } from "react";
 import { useTranslation } from "react-i18next";
-import { useApi } from "../api/client";
+import { subscribeEvents, useApi } from "../api/client";
 import PeriodSelector from "./PeriodSelector";
 
 const C = {
@@ -253,6 +253,14 @@ export default function ClinicSchedule({ api: injectedApi }) {
     fetchTodayOnDutyDoctors();
   }, [fetchTodayOnDutyDoctors]);
 
+  // One subscription for the component's lifetime; the ref picks up the current week.
+  const refreshShiftsRef = useRef(null);
+  refreshShiftsRef.current = () => {
+    fetchShifts();
+    fetchTodayOnDutyDoctors();
+  };
+  useEffect(() => subscribeEvents(["shift"], () => refreshShiftsRef.current()), []);
+
   useEffect(() => {
     const handler = (event) => {
       const next = event?.detail?.period;
@@ -7,7 +7,8 @@ import { useApi } from "../api/client";
 import "@testing-library/jest-dom/vitest";
 
 vi.mock("../api/client", () => ({
-  useApi: vi.fn()
+  useApi: vi.fn(),
+  subscribeEvents: vi.fn(() => () => {})
 }));
 vi.mock("react-i18next", () => ({
   useTranslation: () => ({
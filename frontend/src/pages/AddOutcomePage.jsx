@@ -42,6 +42,8 @@ export default function AddOutcomePage() {
   const [salaryNotesPage, setSalaryNotesPage] = useState(1);
   const [salaryNotesLoading, setSalaryNotesLoading] = useState(false);
   const [salaryNotesError, setSalaryNotesError] = useState("");
+  // Keyset cursors by page index; page 1 starts without one.
+  const salaryNoteCursors = useRef([null]);
   const [signatureModalOpen, setSignatureModalOpen] = useState(false);
   const [amountDiscrepancyModal, setAmountDiscrepancyModal] = useState(null);
   const [signatureSubmitting, setSignatureSubmitting] = useState(false);
@@ -188,6 +190,7 @@ export default function AddOutcomePage() {
 
   useEffect(() => {
     if (!selectedStaffId) return;
+    salaryNoteCursors.current = [null];
     setSalaryNotesPage(1);
   }, [selectedStaffId]);
 
@@ -198,8 +201,10 @@ export default function AddOutcomePage() {
       setSalaryNotesError("");
       try {
         const limit = 10;
-        const offset = (salaryNotesPage - 1) * limit;
-        const data = await api.get(`/staff/${selectedStaffId}/salary-notes?limit=${limit}&offset=${offset}`);
+        const cursor = salaryNoteCursors.current[salaryNotesPage - 1];
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+        const data = await api.get(`/staff/${selectedStaffId}/salary-notes?limit=${limit}${cursorParam}`);
+        salaryNoteCursors.current[salaryNotesPage] = data.next_cursor || null;
         setSalaryNotes(data.items || []);
         setSalaryNotesTotal(Number(data.total || 0));
       } catch (err) {
@@ -809,7 +814,7 @@ export default function AddOutcomePage() {
                   <button
                     type="button"
                     className="btn btn-secondary"
-                    disabled={salaryNotesPage >= totalSalaryNotePages}
+                    disabled={salaryNotesPage >= totalSalaryNotePages || !salaryNoteCursors.current[salaryNotesPage]}
                     onClick={() => setSalaryNotesPage((p) => Math.min(totalSalaryNotePages, p + 1))}
                   >
                     {t("outcome.salary_notes.next")}
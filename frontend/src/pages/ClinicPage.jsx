@@ -11,7 +11,7 @@ import {
   Tooltip,
   Legend
 } from "chart.js";
-import { useApi } from "../api/client.js";
+import { subscribeEvents, useApi } from "../api/client.js";
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Tooltip, Legend);
 
@@ -57,6 +57,19 @@ export default function ClinicPage() {
     load();
   }, [period, date]);
 
+  // Totals are aggregates over the whole period, so any change refetches them
+  // in the background instead of patching.
+  useEffect(
+    () =>
+      subscribeEvents(["income", "outcome", "salary"], () => {
+        api
+          .get(`/clinic/dashboard-data?period=${period}&date=${date}`)
+          .then(setDashboard)
+          .catch(() => {});
+      }),
+    [period, date]
+  );
+
   // Listen for global period changes if any
   useEffect(() => {
     const handler = (event) => {
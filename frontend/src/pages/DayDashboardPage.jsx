@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { useTranslation } from "react-i18next";
-import { useApi } from "../api/client.js";
+import { subscribeEvents, useApi } from "../api/client.js";
 
 export default function DayDashboardPage() {
   const { t } = useTranslation();
@@ -28,6 +28,17 @@ export default function DayDashboardPage() {
     if (date) load();
   }, [date]);
 
+  useEffect(() => {
+    if (!date) return undefined;
+    return subscribeEvents(["income", "outcome", "salary"], (event) => {
+      if (event.topic !== "resync" && event.day !== date) return;
+      api
+        .get(`/clinic/dashboard/day-details?date=${date}`)
+        .then(setData)
+        .catch(() => {});
+    });
+  }, [date]);
+
   if (loading) return <div className="content"><div>{t("common.loading")}</div></div>;
   if (error) return <div className="content"><div className="form-error">{error}</div></div>;
   if (!data) return null;
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { Line } from "react-chartjs-2";
 import {
   Chart as ChartJS,
@@ -11,7 +11,7 @@ import {
 } from "chart.js";
 import { useTranslation } from "react-i18next";
 import { useNavigate } from "react-router-dom";
-import { useApi } from "../api/client.js";
+import { subscribeEvents, useApi } from "../api/client.js";
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Tooltip, Legend);
 
@@ -22,10 +22,14 @@ export default function IncomePage() {
   const storedPeriod = typeof window !== "undefined" ? window.localStorage.getItem("globalPeriod") : null;
 
   const [records, setRecords] = useState([]);
+  const recordsRef = useRef(records);
+  recordsRef.current = records;
   const [period, setPeriod] = useState(storedPeriod || "month");
   const [customRange, setCustomRange] = useState({ from: "", to: "" });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
+  // Day total from the latest income event; null until one arrives for the day shown.
+  const [dayTotal, setDayTotal] = useState(null);
 
   const [selectedIds, setSelectedIds] = useState([]);
   const [deletingIds, setDeletingIds] = useState([]);
@@ -77,6 +81,7 @@ export default function IncomePage() {
         )}`
       );
       setRecords(items);
+      setDayTotal(null);
       setSelectedIds([]);
     } catch (err) {
       setError(err.message || t("income.errors.load_records"));
@@ -95,6 +100,51 @@ export default function IncomePage() {
     return () => window.removeEventListener("incomeAdded", handleRefresh);
   }, [period, customRange]);
 
+  useEffect(() => {
+    if (!range.from || !range.to) return undefined;
+    const inRange = (day) => day && day >= range.from && day <= range.to;
+    const fetchRecord = async (id, day) => {
+      // The list endpoint carries the doctor and created_at fields the table needs;
+      // a one-day window keeps the fetch to that day's rows.
+      const items = await api.get(`/income/records?from=${encodeURIComponent(day)}&to=${encodeURIComponent(day)}`);
+      const fetched = items.find((item) => item.id === id);
+      if (!fetched) return;
+      setRecords((prev) => [fetched, ...prev.filter((item) => item.id !== id)]);
+    };
+    return subscribeEvents(["income"], (event) => {
+      if (event.topic === "resync") {
+        loadRecords(range.from, range.to);
+        return;
+      }
+      if (range.from === range.to) {
+        // day_total is for the event's day; a record moved away from the shown day
+        // falls back to summing the list.
+        setDayTotal(event.day === range.from && event.day_total != null ? Number(event.day_total) : null);
+      }
+      if (event.op === "delete") {
+        setRecords((prev) => prev.filter((item) => item.id !== event.id));
+        return;
+      }
+      const known = recordsRef.current.some((item) => item.id === event.id);
+      if (event.op === "update" && known) {
+        if (!inRange(event.day)) {
+          setRecords((prev) => prev.filter((item) => item.id !== event.id));
+          return;
+        }
+        const amount = event.amount != null ? Number(event.amount) : null;
+        setRecords((prev) =>
+          prev.map((item) =>
+            item.id === event.id ? { ...item, amount: amount ?? item.amount, service_date: event.day } : item
+          )
+        );
+        return;
+      }
+      if (!inRange(event.day)) return;
+      // Inserts, and updates that moved a record into the range.
+      fetchRecord(event.id, event.day).catch(() => loadRecords(range.from, range.to));
+    });
+  }, [range.from, range.to]);
+
   useEffect(() => {
     const handler = (event) => {
       if (event?.detail?.period) {
@@ -105,10 +155,6 @@ export default function IncomePage() {
     return () => window.removeEventListener("periodChanged", handler);
   }, []);
 
-  const dailyTotal = useMemo(
-    () => records.reduce((sum, item) => sum + item.amount, 0),
-    [records]
-  );
 
   const paymentTotals = useMemo(() => {
     return records.reduce(
@@ -285,7 +331,7 @@ export default function IncomePage() {
           <div className="stat-icon">↗</div>
           <div className="stat-label">{t("income.stats.total")}</div>
           <div className="stat-value">
-            {loading ? "—" : (paymentTotals.total || 0).toLocaleString(undefined, { style: "currency", currency: "CZK" })}
+            {loading ? "—" : (dayTotal ?? paymentTotals.total ?? 0).toLocaleString(undefined, { style: "currency", currency: "CZK" })}
           </div>
         </div>
         <div className="stat-card s-blue">
@@ -42,12 +42,19 @@ vi.mock("react-i18next", () => ({
 
 const getMock = vi.fn();
 const deleteMock = vi.fn();
+let emitEvent = null;
 
 vi.mock("../api/client.js", () => ({
   useApi: () => ({
     get: getMock,
     delete: deleteMock
-  })
+  }),
+  subscribeEvents: (topics, onEvent) => {
+    emitEvent = onEvent;
+    return () => {
+      emitEvent = null;
+    };
+  }
 }));
 
 const navigateMock = vi.fn();
@@ -124,3 +131,26 @@ test("shows error and retries data load", async () => {
   await userEvent.click(retryButton);
   await waitFor(() => expect(getMock).toHaveBeenCalledTimes(2));
 });
+
+test("patches records from income events without reloading the period", async () => {
+  localStorage.setItem("globalPeriod", "day");
+  const now = new Date();
+  const today = new Date(Date.UTC(now.getFullYear(), now.getMonth(), now.getDate())).toISOString().slice(0, 10);
+  render(<IncomePage />);
+  await waitFor(() => expect(screen.getByText("House")).toBeTruthy());
+  expect(getMock).toHaveBeenCalledTimes(1);
+
+  emitEvent({ topic: "income", op: "update", id: 1, day: today, amount: 250, day_total: 250 });
+  expect(getMock).toHaveBeenCalledTimes(1);
+
+  getMock.mockResolvedValueOnce([
+    { ...sampleRecords[0], id: 2, service_date: today, doctor: { last_name: "Wilson" } }
+  ]);
+  emitEvent({ topic: "income", op: "insert", id: 2, day: today, amount: 100, day_total: 350 });
+  await waitFor(() => expect(screen.getByText("Wilson")).toBeTruthy());
+  expect(getMock).toHaveBeenLastCalledWith(`/income/records?from=${today}&to=${today}`);
+
+  emitEvent({ topic: "income", op: "delete", id: 1, day: today, amount: 250, day_total: 100 });
+  await waitFor(() => expect(screen.queryByText("House")).toBeNull());
+  expect(getMock).toHaveBeenCalledTimes(2);
+});
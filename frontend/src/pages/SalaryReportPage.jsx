@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
-import { useApi } from "../api/client.js";
+import { subscribeEvents, useApi } from "../api/client.js";
 import { useAuth } from "../App.jsx";
 
 export default function SalaryReportPage() {
@@ -49,6 +49,22 @@ export default function SalaryReportPage() {
     load();
   }, [staffId, from, to]);
 
+  useEffect(() => {
+    if (!staffId) return undefined;
+    return subscribeEvents(["income", "salary"], (event) => {
+      const owner = event.doctor_id ?? event.staff_id;
+      if (event.topic !== "resync" && String(owner) !== String(staffId)) return;
+      const query = new URLSearchParams();
+      if (from) query.set("from", from);
+      if (to) query.set("to", to);
+      const suffix = query.toString() ? `?${query.toString()}` : "";
+      api
+        .get(`/staff/${staffId}/salary-report/data${suffix}`)
+        .then(setData)
+        .catch(() => {});
+    });
+  }, [staffId, from, to]);
+
   useEffect(() => {
     const canvas = canvasRef.current;
     if (!canvas) return;
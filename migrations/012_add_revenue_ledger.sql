@@ -0,0 +1,110 @@
+-- ============================================================
+-- DOCTOR REVENUE LEDGER
+-- Replaces the row-level trigger that updated staff.total_revenue on
+-- every income insert. Income writes now append signed deltas, and
+-- compact_doctor_revenue() folds them into staff.total_revenue in batches.
+-- staff.total_revenue tracks income that is not yet linked to a salary payment.
+-- ============================================================
+DROP TRIGGER IF EXISTS trg_income_after_insert ON income_records;
+DROP FUNCTION IF EXISTS update_doctor_total_revenue();
+
+CREATE TABLE IF NOT EXISTS doctor_revenue_deltas (
+    id              BIGSERIAL PRIMARY KEY,
+    doctor_id       INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    income_id       INT,
+    delta           NUMERIC(14, 2) NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_doctor_revenue_deltas_doctor ON doctor_revenue_deltas (doctor_id);
+
+CREATE OR REPLACE FUNCTION record_doctor_revenue_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.amount = OLD.amount
+       AND (NEW.salary_payment_id IS NULL) = (OLD.salary_payment_id IS NULL) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.salary_payment_id IS NULL THEN
+        INSERT INTO doctor_revenue_deltas (doctor_id, income_id, delta)
+        VALUES (OLD.doctor_id, OLD.id, -OLD.amount);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.salary_payment_id IS NULL THEN
+        INSERT INTO doctor_revenue_deltas (doctor_id, income_id, delta)
+        VALUES (NEW.doctor_id, NEW.id, NEW.amount);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_revenue_delta ON income_records;
+CREATE TRIGGER trg_income_revenue_delta
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION record_doctor_revenue_delta();
+
+-- Folds pending deltas into staff.total_revenue, one UPDATE per doctor.
+CREATE OR REPLACE FUNCTION compact_doctor_revenue()
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM doctor_revenue_deltas
+        RETURNING doctor_id, delta
+    ),
+    totals AS (
+        SELECT doctor_id, SUM(delta) AS delta
+        FROM moved
+        GROUP BY doctor_id
+    )
+    UPDATE staff s
+    SET total_revenue = s.total_revenue + t.delta,
+        updated_at    = NOW()
+    FROM totals t
+    WHERE s.id = t.doctor_id AND t.delta <> 0;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recomputes one doctor's aggregate from income_records and drops the pending deltas.
+CREATE OR REPLACE FUNCTION rebuild_doctor_revenue(p_doctor_id INT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM doctor_revenue_deltas WHERE doctor_id = p_doctor_id;
+    UPDATE staff
+    SET total_revenue = (
+            SELECT COALESCE(SUM(amount), 0)
+            FROM income_records
+            WHERE doctor_id = p_doctor_id AND salary_payment_id IS NULL
+        ),
+        updated_at = NOW()
+    WHERE id = p_doctor_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Compacted aggregate plus pending deltas; read this instead of staff.total_revenue.
+CREATE OR REPLACE VIEW staff_revenue AS
+SELECT
+    s.id AS staff_id,
+    s.total_revenue + COALESCE(d.pending, 0) AS total_revenue
+FROM staff s
+LEFT JOIN (
+    SELECT doctor_id, SUM(delta) AS pending
+    FROM doctor_revenue_deltas
+    GROUP BY doctor_id
+) d ON d.doctor_id = s.id;
+
+-- The old trigger ignored updates and deletes, so rebuild every doctor once.
+UPDATE staff s
+SET total_revenue = COALESCE((
+        SELECT SUM(ir.amount)
+        FROM income_records ir
+        WHERE ir.doctor_id = s.id AND ir.salary_payment_id IS NULL
+    ), 0)
+WHERE s.role_id = (SELECT id FROM staff_roles WHERE name = 'doctor');
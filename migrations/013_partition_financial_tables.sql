@@ -0,0 +1,212 @@
+-- ============================================================
+-- MONTHLY PARTITIONING OF income_records / outcome_records
+-- Both tables become RANGE partitioned on their date column, one
+-- partition per month plus a DEFAULT partition that catches rows for
+-- months nobody created yet. ensure_monthly_partitions() creates the
+-- upcoming months (python -m backend.maintenance ensure-partitions).
+--
+-- salary_payments stays a plain table: income_records, salary_adjustments
+-- and salary_amount_audit reference salary_payments(id), and a partitioned
+-- table cannot expose a unique key on id alone.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, key_column TEXT, month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound    DATE := date_trunc('month', month_start)::DATE;
+    upper_bound    DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+    default_name   TEXT := parent || '_default';
+    moved          INT := 0;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Rows for this month may already sit in the default partition; park them
+    -- so the new partition's bounds do not conflict with it.
+    IF to_regclass(default_name) IS NOT NULL THEN
+        EXECUTE format('CREATE TEMP TABLE partition_backlog (LIKE %I) ON COMMIT DROP', parent);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+            'INSERT INTO partition_backlog SELECT * FROM moved',
+            default_name, key_column, lower_bound, key_column, upper_bound
+        );
+        GET DIAGNOSTICS moved = ROW_COUNT;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, parent, lower_bound, upper_bound
+    );
+
+    IF to_regclass('pg_temp.partition_backlog') IS NOT NULL THEN
+        IF moved > 0 THEN
+            EXECUTE format('INSERT INTO %I SELECT * FROM partition_backlog', partition_name);
+        END IF;
+        DROP TABLE partition_backlog;
+    END IF;
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creates partitions for months already present in the default partition and
+-- for the current month plus months_ahead. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent TEXT, key_column TEXT, months_ahead INT DEFAULT 3)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE;
+    created     INT := 0;
+BEGIN
+    IF to_regclass(parent || '_default') IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    END IF;
+
+    FOR month_start IN EXECUTE format(
+        'SELECT DISTINCT date_trunc(''month'', %I)::DATE FROM %I',
+        key_column, parent || '_default'
+    ) LOOP
+        IF to_regclass(format('%s_%s', parent, to_char(month_start, 'YYYY_MM'))) IS NULL THEN
+            PERFORM create_monthly_partition(parent, key_column, month_start);
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', CURRENT_DATE),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        IF to_regclass(format('%s_%s', parent, to_char(month_start, 'YYYY_MM'))) IS NULL THEN
+            PERFORM create_monthly_partition(parent, key_column, month_start);
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ------------------------------------------------------------
+-- income_records
+-- ------------------------------------------------------------
+-- A database created from schema.sql already has a partitioned
+-- income_records; renaming it would orphan its partitions.
+DO $migrate$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'income_records'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE income_records RENAME TO income_records_unpartitioned;
+    ALTER SEQUENCE income_records_id_seq OWNED BY NONE;
+
+    CREATE TABLE income_records (
+        LIKE income_records_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE (service_date);
+
+    PERFORM create_monthly_partition('income_records', 'service_date', m)
+    FROM (SELECT DISTINCT date_trunc('month', service_date)::DATE AS m FROM income_records_unpartitioned) months;
+    PERFORM ensure_monthly_partitions('income_records', 'service_date', 12);
+
+    INSERT INTO income_records SELECT * FROM income_records_unpartitioned;
+
+    -- Drops the old trigger and the views that pointed at the renamed table.
+    DROP TABLE income_records_unpartitioned CASCADE;
+    ALTER SEQUENCE income_records_id_seq OWNED BY income_records.id;
+
+    ALTER TABLE income_records ADD PRIMARY KEY (id, service_date);
+    ALTER TABLE income_records ADD FOREIGN KEY (patient_id) REFERENCES patients(id);
+    ALTER TABLE income_records ADD FOREIGN KEY (doctor_id) REFERENCES staff(id);
+    ALTER TABLE income_records ADD FOREIGN KEY (salary_payment_id) REFERENCES salary_payments(id) ON DELETE SET NULL;
+
+    CREATE INDEX idx_income_service_date_brin ON income_records USING BRIN (service_date);
+    CREATE INDEX idx_income_records_doctor_date ON income_records (doctor_id, service_date);
+    CREATE INDEX idx_income_records_patient_date ON income_records (patient_id, service_date);
+    CREATE INDEX idx_income_records_doctor_time ON income_records (doctor_id, service_time);
+    CREATE INDEX idx_income_salary_payment ON income_records (salary_payment_id);
+
+    CREATE TRIGGER trg_income_revenue_delta
+    AFTER INSERT OR UPDATE OR DELETE ON income_records
+    FOR EACH ROW EXECUTE FUNCTION record_doctor_revenue_delta();
+END
+$migrate$;
+
+-- ------------------------------------------------------------
+-- outcome_records
+-- ------------------------------------------------------------
+-- A database created from schema.sql already has a partitioned
+-- outcome_records; renaming it would orphan its partitions.
+DO $migrate$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'outcome_records'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE outcome_records RENAME TO outcome_records_unpartitioned;
+    ALTER SEQUENCE outcome_records_id_seq OWNED BY NONE;
+
+    CREATE TABLE outcome_records (
+        LIKE outcome_records_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE (expense_date);
+
+    PERFORM create_monthly_partition('outcome_records', 'expense_date', m)
+    FROM (SELECT DISTINCT date_trunc('month', expense_date)::DATE AS m FROM outcome_records_unpartitioned) months;
+    PERFORM ensure_monthly_partitions('outcome_records', 'expense_date', 12);
+
+    INSERT INTO outcome_records SELECT * FROM outcome_records_unpartitioned;
+
+    DROP TABLE outcome_records_unpartitioned CASCADE;
+    ALTER SEQUENCE outcome_records_id_seq OWNED BY outcome_records.id;
+
+    ALTER TABLE outcome_records ADD PRIMARY KEY (id, expense_date);
+    ALTER TABLE outcome_records ADD FOREIGN KEY (category_id) REFERENCES outcome_categories(id);
+
+    CREATE INDEX idx_outcome_expense_date_brin ON outcome_records USING BRIN (expense_date);
+    CREATE INDEX idx_outcome_category_date ON outcome_records (category_id, expense_date);
+END
+$migrate$;
+
+-- ------------------------------------------------------------
+-- Views dropped with the old tables
+-- ------------------------------------------------------------
+CREATE OR REPLACE VIEW daily_pnl AS
+SELECT
+    d::DATE AS day,
+    COALESCE(inc.total_income, 0)  AS total_income,
+    COALESCE(out.total_outcome, 0) + COALESCE(sal.total_salaries, 0) AS total_outcome,
+    COALESCE(inc.total_income, 0)
+        - COALESCE(out.total_outcome, 0)
+        - COALESCE(sal.total_salaries, 0) AS pnl
+FROM
+    generate_series(
+        (SELECT MIN(LEAST(service_date, expense_date)) FROM
+            (SELECT MIN(service_date) AS service_date, NULL::DATE AS expense_date FROM income_records
+             UNION ALL
+             SELECT NULL, MIN(expense_date) FROM outcome_records) sub),
+        CURRENT_DATE,
+        '1 day'::INTERVAL
+    ) d
+LEFT JOIN (
+    SELECT service_date AS day, SUM(amount) AS total_income
+    FROM income_records
+    GROUP BY service_date
+) inc ON inc.day = d::DATE
+LEFT JOIN (
+    SELECT expense_date AS day, SUM(amount) AS total_outcome
+    FROM outcome_records
+    GROUP BY expense_date
+) out ON out.day = d::DATE
+LEFT JOIN (
+    SELECT payment_date AS day, SUM(amount) AS total_salaries
+    FROM salary_payments
+    GROUP BY payment_date
+) sal ON sal.day = d::DATE;
+
+CREATE OR REPLACE VIEW avg_patient_payment AS
+SELECT
+    ROUND(AVG(amount), 2) AS avg_payment
+FROM income_records;
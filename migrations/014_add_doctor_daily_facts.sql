@@ -0,0 +1,121 @@
+-- ============================================================
+-- DOCTOR DAILY FACTS
+-- Per doctor / day / hour totals behind the /api/income/doctor/<id>/summary
+-- endpoints. Each income write recomputes only the buckets it touched.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS doctor_daily_facts (
+    doctor_id           INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    day                 DATE NOT NULL,
+    hour                SMALLINT NOT NULL,
+    total_income        NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_lab_cost      NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_commission    NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    visit_count         INT NOT NULL DEFAULT 0,
+    patient_count       INT NOT NULL DEFAULT 0,
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (doctor_id, day, hour)
+);
+
+CREATE OR REPLACE FUNCTION refresh_doctor_daily_fact(p_doctor_id INT, p_day DATE, p_hour INT)
+RETURNS VOID AS $$
+BEGIN
+    -- Lock the bucket so concurrent writers to the same hour recompute one after another.
+    INSERT INTO doctor_daily_facts (doctor_id, day, hour)
+    VALUES (p_doctor_id, p_day, p_hour)
+    ON CONFLICT DO NOTHING;
+    PERFORM 1 FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour
+    FOR UPDATE;
+
+    UPDATE doctor_daily_facts f
+    SET total_income     = agg.total_income,
+        total_lab_cost   = agg.total_lab_cost,
+        total_commission = agg.total_commission,
+        visit_count      = agg.visit_count,
+        patient_count    = agg.patient_count,
+        updated_at       = NOW()
+    FROM (
+        SELECT COALESCE(SUM(ir.amount), 0) AS total_income,
+               COALESCE(SUM(ir.lab_cost), 0) AS total_lab_cost,
+               COALESCE(SUM(ir.amount * s.commission_rate), 0) AS total_commission,
+               COUNT(ir.id) AS visit_count,
+               COUNT(DISTINCT ir.patient_id) AS patient_count
+        FROM income_records ir
+        JOIN staff s ON s.id = ir.doctor_id
+        WHERE ir.doctor_id = p_doctor_id
+          AND ir.service_date = p_day
+          AND EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT = p_hour
+    ) agg
+    WHERE f.doctor_id = p_doctor_id AND f.day = p_day AND f.hour = p_hour;
+
+    DELETE FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour AND visit_count = 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_doctor_daily_facts()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_hour INT;
+    new_hour INT;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_hour := EXTRACT(HOUR FROM COALESCE(OLD.service_time, OLD.created_at::TIME))::INT;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_hour := EXTRACT(HOUR FROM COALESCE(NEW.service_time, NEW.created_at::TIME))::INT;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.service_date = OLD.service_date
+       AND new_hour = old_hour
+       AND NEW.patient_id = OLD.patient_id
+       AND NEW.amount = OLD.amount
+       AND NEW.lab_cost = OLD.lab_cost THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_doctor_daily_fact(OLD.doctor_id, OLD.service_date, old_hour);
+    END IF;
+    IF TG_OP = 'INSERT'
+       OR (TG_OP = 'UPDATE' AND (NEW.doctor_id, NEW.service_date, new_hour) IS DISTINCT FROM (OLD.doctor_id, OLD.service_date, old_hour)) THEN
+        PERFORM refresh_doctor_daily_fact(NEW.doctor_id, NEW.service_date, new_hour);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_doctor_facts ON income_records;
+CREATE TRIGGER trg_income_doctor_facts
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION sync_doctor_daily_facts();
+
+CREATE OR REPLACE FUNCTION rebuild_doctor_daily_facts()
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    DELETE FROM doctor_daily_facts;
+    INSERT INTO doctor_daily_facts (
+        doctor_id, day, hour, total_income, total_lab_cost, total_commission, visit_count, patient_count
+    )
+    SELECT ir.doctor_id,
+           ir.service_date,
+           EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT AS hour,
+           SUM(ir.amount),
+           SUM(ir.lab_cost),
+           SUM(ir.amount * s.commission_rate),
+           COUNT(ir.id),
+           COUNT(DISTINCT ir.patient_id)
+    FROM income_records ir
+    JOIN staff s ON s.id = ir.doctor_id
+    GROUP BY ir.doctor_id, ir.service_date, hour;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_doctor_daily_facts();
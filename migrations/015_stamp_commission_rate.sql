@@ -0,0 +1,182 @@
+-- ============================================================
+-- COMMISSION RATE HISTORY
+-- staff_commission_rates records every rate a staff member has had.
+-- Each income record stores the rate in effect on its service_date,
+-- so historical commission no longer depends on today's staff rate.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS staff_commission_rates (
+    id                  SERIAL PRIMARY KEY,
+    staff_id            INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    commission_rate     NUMERIC(5, 4) NOT NULL,
+    effective_from      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_staff_commission_rates_staff
+    ON staff_commission_rates (staff_id, effective_from DESC);
+
+CREATE OR REPLACE FUNCTION record_staff_commission_rate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.commission_rate IS NOT DISTINCT FROM OLD.commission_rate THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO staff_commission_rates (staff_id, commission_rate)
+    VALUES (NEW.id, COALESCE(NEW.commission_rate, 0));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_staff_commission_rate ON staff;
+CREATE TRIGGER trg_staff_commission_rate
+AFTER INSERT OR UPDATE OF commission_rate ON staff
+FOR EACH ROW EXECUTE FUNCTION record_staff_commission_rate();
+
+INSERT INTO staff_commission_rates (staff_id, commission_rate, effective_from)
+SELECT s.id, s.commission_rate, s.created_at
+FROM staff s
+WHERE NOT EXISTS (SELECT 1 FROM staff_commission_rates h WHERE h.staff_id = s.id);
+
+-- Rate in effect for a staff member on a given day; falls back to the current rate.
+CREATE OR REPLACE FUNCTION commission_rate_on(p_staff_id INT, p_day DATE)
+RETURNS NUMERIC AS $$
+    SELECT COALESCE(
+        (
+            SELECT h.commission_rate
+            FROM staff_commission_rates h
+            WHERE h.staff_id = p_staff_id
+              AND h.effective_from < (p_day + 1)
+            ORDER BY h.effective_from DESC
+            LIMIT 1
+        ),
+        (SELECT s.commission_rate FROM staff s WHERE s.id = p_staff_id),
+        0
+    );
+$$ LANGUAGE sql STABLE;
+
+-- ------------------------------------------------------------
+-- Stamp the rate on income_records
+-- ------------------------------------------------------------
+ALTER TABLE income_records ADD COLUMN IF NOT EXISTS commission_rate NUMERIC(5, 4);
+
+UPDATE income_records ir
+SET commission_rate = s.commission_rate
+FROM staff s
+WHERE s.id = ir.doctor_id AND ir.commission_rate IS NULL;
+
+ALTER TABLE income_records ALTER COLUMN commission_rate SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION stamp_income_commission_rate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.commission_rate IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.doctor_id <> OLD.doctor_id) THEN
+        NEW.commission_rate := commission_rate_on(NEW.doctor_id, NEW.service_date);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_stamp_commission_rate ON income_records;
+CREATE TRIGGER trg_income_stamp_commission_rate
+BEFORE INSERT OR UPDATE OF doctor_id, commission_rate ON income_records
+FOR EACH ROW EXECUTE FUNCTION stamp_income_commission_rate();
+
+-- ------------------------------------------------------------
+-- doctor_daily_facts now sums the stamped rate
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION refresh_doctor_daily_fact(p_doctor_id INT, p_day DATE, p_hour INT)
+RETURNS VOID AS $$
+BEGIN
+    -- Lock the bucket so concurrent writers to the same hour recompute one after another.
+    INSERT INTO doctor_daily_facts (doctor_id, day, hour)
+    VALUES (p_doctor_id, p_day, p_hour)
+    ON CONFLICT DO NOTHING;
+    PERFORM 1 FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour
+    FOR UPDATE;
+
+    UPDATE doctor_daily_facts f
+    SET total_income     = agg.total_income,
+        total_lab_cost   = agg.total_lab_cost,
+        total_commission = agg.total_commission,
+        visit_count      = agg.visit_count,
+        patient_count    = agg.patient_count,
+        updated_at       = NOW()
+    FROM (
+        SELECT COALESCE(SUM(ir.amount), 0) AS total_income,
+               COALESCE(SUM(ir.lab_cost), 0) AS total_lab_cost,
+               COALESCE(SUM(ir.amount * ir.commission_rate), 0) AS total_commission,
+               COUNT(ir.id) AS visit_count,
+               COUNT(DISTINCT ir.patient_id) AS patient_count
+        FROM income_records ir
+        WHERE ir.doctor_id = p_doctor_id
+          AND ir.service_date = p_day
+          AND EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT = p_hour
+    ) agg
+    WHERE f.doctor_id = p_doctor_id AND f.day = p_day AND f.hour = p_hour;
+
+    DELETE FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour AND visit_count = 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_doctor_daily_facts()
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    DELETE FROM doctor_daily_facts;
+    INSERT INTO doctor_daily_facts (
+        doctor_id, day, hour, total_income, total_lab_cost, total_commission, visit_count, patient_count
+    )
+    SELECT ir.doctor_id,
+           ir.service_date,
+           EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT AS hour,
+           SUM(ir.amount),
+           SUM(ir.lab_cost),
+           SUM(ir.amount * ir.commission_rate),
+           COUNT(ir.id),
+           COUNT(DISTINCT ir.patient_id)
+    FROM income_records ir
+    GROUP BY ir.doctor_id, ir.service_date, hour;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_doctor_daily_facts()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_hour INT;
+    new_hour INT;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_hour := EXTRACT(HOUR FROM COALESCE(OLD.service_time, OLD.created_at::TIME))::INT;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_hour := EXTRACT(HOUR FROM COALESCE(NEW.service_time, NEW.created_at::TIME))::INT;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.service_date = OLD.service_date
+       AND new_hour = old_hour
+       AND NEW.patient_id = OLD.patient_id
+       AND NEW.amount = OLD.amount
+       AND NEW.lab_cost = OLD.lab_cost
+       AND NEW.commission_rate = OLD.commission_rate THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_doctor_daily_fact(OLD.doctor_id, OLD.service_date, old_hour);
+    END IF;
+    IF TG_OP = 'INSERT'
+       OR (TG_OP = 'UPDATE' AND (NEW.doctor_id, NEW.service_date, new_hour) IS DISTINCT FROM (OLD.doctor_id, OLD.service_date, old_hour)) THEN
+        PERFORM refresh_doctor_daily_fact(NEW.doctor_id, NEW.service_date, new_hour);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,126 @@
+-- ============================================================
+-- PATIENT STATS
+-- One row per patient with at least one income record. Income writes
+-- recompute the affected patient's row; rebuild_patient_stats() (or
+-- python -m backend.maintenance rebuild-patient-stats) recomputes all.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS patient_stats (
+    patient_id      INT PRIMARY KEY REFERENCES patients(id) ON DELETE CASCADE,
+    first_visit     DATE NOT NULL,
+    last_visit      DATE NOT NULL,
+    visit_count     INT NOT NULL DEFAULT 0,
+    lifetime_paid   NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    last_doctor_id  INT REFERENCES staff(id) ON DELETE SET NULL,
+    last_income_id  INT,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_patient_stats_first_visit ON patient_stats (first_visit);
+CREATE INDEX IF NOT EXISTS idx_patient_stats_last_visit ON patient_stats (last_visit);
+
+CREATE OR REPLACE FUNCTION refresh_patient_stats(p_patient_id INT)
+RETURNS VOID AS $$
+BEGIN
+    -- Serialise concurrent writers for the same patient before recomputing.
+    INSERT INTO patient_stats (patient_id, first_visit, last_visit)
+    VALUES (p_patient_id, CURRENT_DATE, CURRENT_DATE)
+    ON CONFLICT DO NOTHING;
+    PERFORM 1 FROM patient_stats WHERE patient_id = p_patient_id FOR UPDATE;
+
+    UPDATE patient_stats ps
+    SET first_visit    = agg.first_visit,
+        last_visit     = agg.last_visit,
+        visit_count    = agg.visit_count,
+        lifetime_paid  = agg.lifetime_paid,
+        last_doctor_id = latest.doctor_id,
+        last_income_id = latest.id,
+        updated_at     = NOW()
+    FROM (
+        SELECT MIN(service_date) AS first_visit,
+               MAX(service_date) AS last_visit,
+               COUNT(*) AS visit_count,
+               COALESCE(SUM(amount), 0) AS lifetime_paid
+        FROM income_records
+        WHERE patient_id = p_patient_id
+    ) agg,
+    LATERAL (
+        SELECT ir.id, ir.doctor_id
+        FROM income_records ir
+        WHERE ir.patient_id = p_patient_id
+        ORDER BY ir.service_date DESC, ir.id DESC
+        LIMIT 1
+    ) latest
+    WHERE ps.patient_id = p_patient_id;
+
+    -- No income left: the LATERAL join found no row, so drop the placeholder.
+    DELETE FROM patient_stats ps
+    WHERE ps.patient_id = p_patient_id
+      AND NOT EXISTS (SELECT 1 FROM income_records ir WHERE ir.patient_id = p_patient_id);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_patient_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.patient_id = OLD.patient_id
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.service_date = OLD.service_date
+       AND NEW.amount = OLD.amount THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_patient_stats(OLD.patient_id);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.patient_id <> OLD.patient_id) THEN
+        PERFORM refresh_patient_stats(NEW.patient_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_patient_stats ON income_records;
+CREATE TRIGGER trg_income_patient_stats
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION sync_patient_stats();
+
+CREATE OR REPLACE FUNCTION rebuild_patient_stats()
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    DELETE FROM patient_stats;
+    INSERT INTO patient_stats (
+        patient_id, first_visit, last_visit, visit_count, lifetime_paid, last_doctor_id, last_income_id
+    )
+    SELECT agg.patient_id,
+           agg.first_visit,
+           agg.last_visit,
+           agg.visit_count,
+           agg.lifetime_paid,
+           latest.doctor_id,
+           latest.id
+    FROM (
+        SELECT patient_id,
+               MIN(service_date) AS first_visit,
+               MAX(service_date) AS last_visit,
+               COUNT(*) AS visit_count,
+               COALESCE(SUM(amount), 0) AS lifetime_paid
+        FROM income_records
+        GROUP BY patient_id
+    ) agg
+    JOIN LATERAL (
+        SELECT ir.id, ir.doctor_id
+        FROM income_records ir
+        WHERE ir.patient_id = agg.patient_id
+        ORDER BY ir.service_date DESC, ir.id DESC
+        LIMIT 1
+    ) latest ON TRUE;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_patient_stats();
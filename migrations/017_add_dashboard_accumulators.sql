@@ -0,0 +1,122 @@
+-- ============================================================
+-- DASHBOARD ACCUMULATORS
+-- Running sum/count pairs behind avg_patient_payment and
+-- avg_salary_by_role, updated in the same transaction as the writes.
+-- Income totals are striped over 16 rows (id % 16) so concurrent
+-- inserts do not all wait on one row lock.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS income_payment_totals (
+    shard           SMALLINT PRIMARY KEY,
+    total_amount    NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    record_count    BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS role_salary_totals (
+    role_id         INT PRIMARY KEY REFERENCES staff_roles(id) ON DELETE CASCADE,
+    total_salary    NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    staff_count     INT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION accumulate_income_payment()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta_amount NUMERIC := 0;
+    delta_count  INT := 0;
+    row_id       INT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        row_id := NEW.id;
+        delta_amount := NEW.amount;
+        delta_count := 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        row_id := OLD.id;
+        delta_amount := -OLD.amount;
+        delta_count := -1;
+    ELSE
+        IF NEW.amount = OLD.amount THEN
+            RETURN NULL;
+        END IF;
+        row_id := NEW.id;
+        delta_amount := NEW.amount - OLD.amount;
+    END IF;
+
+    INSERT INTO income_payment_totals (shard, total_amount, record_count)
+    VALUES (row_id % 16, delta_amount, delta_count)
+    ON CONFLICT (shard) DO UPDATE
+    SET total_amount = income_payment_totals.total_amount + EXCLUDED.total_amount,
+        record_count = income_payment_totals.record_count + EXCLUDED.record_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_payment_totals ON income_records;
+CREATE TRIGGER trg_income_payment_totals
+AFTER INSERT OR DELETE OR UPDATE OF amount ON income_records
+FOR EACH ROW EXECUTE FUNCTION accumulate_income_payment();
+
+CREATE OR REPLACE FUNCTION accumulate_role_salary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active THEN
+        UPDATE role_salary_totals
+        SET total_salary = total_salary - OLD.base_salary,
+            staff_count = staff_count - 1
+        WHERE role_id = OLD.role_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active THEN
+        INSERT INTO role_salary_totals (role_id, total_salary, staff_count)
+        VALUES (NEW.role_id, NEW.base_salary, 1)
+        ON CONFLICT (role_id) DO UPDATE
+        SET total_salary = role_salary_totals.total_salary + EXCLUDED.total_salary,
+            staff_count = role_salary_totals.staff_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_staff_role_salary ON staff;
+CREATE TRIGGER trg_staff_role_salary
+AFTER INSERT OR DELETE OR UPDATE OF base_salary, role_id, is_active ON staff
+FOR EACH ROW EXECUTE FUNCTION accumulate_role_salary();
+
+CREATE OR REPLACE FUNCTION rebuild_dashboard_accumulators()
+RETURNS INT AS $$
+DECLARE
+    income_rows INT;
+    role_rows   INT;
+BEGIN
+    LOCK TABLE income_payment_totals, role_salary_totals IN EXCLUSIVE MODE;
+
+    DELETE FROM income_payment_totals;
+    INSERT INTO income_payment_totals (shard, total_amount, record_count)
+    SELECT id % 16, SUM(amount), COUNT(*)
+    FROM income_records
+    GROUP BY id % 16;
+    GET DIAGNOSTICS income_rows = ROW_COUNT;
+
+    DELETE FROM role_salary_totals;
+    INSERT INTO role_salary_totals (role_id, total_salary, staff_count)
+    SELECT role_id, SUM(base_salary), COUNT(*)
+    FROM staff
+    WHERE is_active = TRUE
+    GROUP BY role_id;
+    GET DIAGNOSTICS role_rows = ROW_COUNT;
+
+    RETURN income_rows + role_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_dashboard_accumulators();
+
+CREATE OR REPLACE VIEW avg_patient_payment AS
+SELECT
+    ROUND(SUM(total_amount) / NULLIF(SUM(record_count), 0), 2) AS avg_payment
+FROM income_payment_totals;
+
+CREATE OR REPLACE VIEW avg_salary_by_role AS
+SELECT
+    r.name AS role,
+    ROUND(t.total_salary / t.staff_count, 2) AS avg_salary
+FROM role_salary_totals t
+JOIN staff_roles r ON r.id = t.role_id
+WHERE t.staff_count > 0;
@@ -0,0 +1,159 @@
+-- ============================================================
+-- COMMISSION LEDGER
+-- Outstanding commission per doctor = commission on income not yet
+-- linked to a salary payment + adjustments not yet applied.
+-- Income and adjustment writes append signed entries to
+-- commission_ledger; pay_salary settles them by linking the rows to
+-- the payment. compact_commission_ledger() (maintenance task
+-- compact-commission) folds entries into commission_balances.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS commission_ledger (
+    id              BIGSERIAL PRIMARY KEY,
+    doctor_id       INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    entry_type      VARCHAR(20) NOT NULL CHECK (entry_type IN ('income', 'adjustment', 'settlement')),
+    amount          NUMERIC(14, 4) NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_commission_ledger_doctor ON commission_ledger (doctor_id);
+
+CREATE TABLE IF NOT EXISTS commission_balances (
+    doctor_id       INT PRIMARY KEY REFERENCES staff(id) ON DELETE CASCADE,
+    outstanding     NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION record_income_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+    kind       VARCHAR(20) := 'income';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.salary_payment_id IS NULL THEN
+        old_amount := (OLD.amount - GREATEST(OLD.lab_cost, 0)) * OLD.commission_rate;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.salary_payment_id IS NULL THEN
+        new_amount := (NEW.amount - GREATEST(NEW.lab_cost, 0)) * NEW.commission_rate;
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.salary_payment_id IS DISTINCT FROM OLD.salary_payment_id THEN
+        kind := 'settlement';
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.doctor_id = OLD.doctor_id THEN
+        IF new_amount <> old_amount THEN
+            INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+            VALUES (NEW.doctor_id, kind, new_amount - old_amount);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF old_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.doctor_id, kind, -old_amount);
+    END IF;
+    IF new_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.doctor_id, kind, new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_commission_ledger ON income_records;
+CREATE TRIGGER trg_income_commission_ledger
+AFTER INSERT OR DELETE OR UPDATE OF doctor_id, amount, lab_cost, commission_rate, salary_payment_id ON income_records
+FOR EACH ROW EXECUTE FUNCTION record_income_commission();
+
+CREATE OR REPLACE FUNCTION record_adjustment_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+    kind       VARCHAR(20) := 'adjustment';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.applied_to_salary_payment_id IS NULL THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.applied_to_salary_payment_id IS NULL THEN
+        new_amount := NEW.amount;
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.applied_to_salary_payment_id IS DISTINCT FROM OLD.applied_to_salary_payment_id THEN
+        kind := 'settlement';
+    END IF;
+
+    -- Only doctors carry a commission balance.
+    IF old_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = OLD.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.staff_id, kind, -old_amount);
+    END IF;
+    IF new_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = NEW.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.staff_id, kind, new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_adjustment_commission_ledger ON salary_adjustments;
+CREATE TRIGGER trg_adjustment_commission_ledger
+AFTER INSERT OR DELETE OR UPDATE OF staff_id, amount, applied_to_salary_payment_id ON salary_adjustments
+FOR EACH ROW EXECUTE FUNCTION record_adjustment_commission();
+
+CREATE OR REPLACE FUNCTION compact_commission_ledger()
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM commission_ledger
+        RETURNING doctor_id, amount
+    ), totals AS (
+        SELECT doctor_id, SUM(amount) AS delta
+        FROM drained
+        GROUP BY doctor_id
+    )
+    INSERT INTO commission_balances (doctor_id, outstanding, updated_at)
+    SELECT doctor_id, delta, NOW() FROM totals
+    ON CONFLICT (doctor_id) DO UPDATE
+    SET outstanding = commission_balances.outstanding + EXCLUDED.outstanding,
+        updated_at = NOW();
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE VIEW commission_outstanding AS
+SELECT
+    COALESCE(b.doctor_id, l.doctor_id) AS doctor_id,
+    COALESCE(b.outstanding, 0) + COALESCE(l.pending, 0) AS outstanding
+FROM commission_balances b
+FULL JOIN (
+    SELECT doctor_id, SUM(amount) AS pending
+    FROM commission_ledger
+    GROUP BY doctor_id
+) l ON l.doctor_id = b.doctor_id;
+
+-- Opening balances from the current unpaid income and unapplied adjustments
+DELETE FROM commission_ledger;
+DELETE FROM commission_balances;
+INSERT INTO commission_balances (doctor_id, outstanding)
+SELECT doctor_id, SUM(amount)
+FROM (
+    SELECT ir.doctor_id, (ir.amount - GREATEST(ir.lab_cost, 0)) * ir.commission_rate AS amount
+    FROM income_records ir
+    WHERE ir.salary_payment_id IS NULL
+    UNION ALL
+    SELECT sa.staff_id, sa.amount
+    FROM salary_adjustments sa
+    JOIN staff s ON s.id = sa.staff_id
+    JOIN staff_roles r ON r.id = s.role_id
+    WHERE sa.applied_to_salary_payment_id IS NULL AND r.name = 'doctor'
+) opening
+GROUP BY doctor_id;
@@ -0,0 +1,69 @@
+-- ============================================================
+-- CLINIC EVENT NOTIFICATIONS
+-- Row changes on income, outcome, salary and shift tables are sent
+-- on the clinic_events channel as compact JSON. The backend keeps one
+-- LISTEN connection and relays them to /api/events/stream.
+-- TG_ARGV: topic, date column, optional amount column.
+-- ============================================================
+CREATE OR REPLACE FUNCTION notify_clinic_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    rec       JSONB;
+    payload   JSONB;
+    event_day DATE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+    END IF;
+    event_day := (rec ->> TG_ARGV[1])::TIMESTAMPTZ::DATE;
+
+    payload := jsonb_build_object(
+        'topic', TG_ARGV[0],
+        'op', lower(TG_OP),
+        'id', (rec ->> 'id')::BIGINT,
+        'day', event_day
+    );
+    IF TG_NARGS > 2 THEN
+        payload := payload || jsonb_build_object('amount', (rec ->> TG_ARGV[2])::NUMERIC);
+    END IF;
+    IF rec ? 'doctor_id' THEN
+        payload := payload || jsonb_build_object('doctor_id', (rec ->> 'doctor_id')::INT);
+    ELSIF rec ? 'staff_id' THEN
+        payload := payload || jsonb_build_object('staff_id', (rec ->> 'staff_id')::INT);
+    END IF;
+
+    -- Income events carry the new day total so dashboards can patch in place.
+    -- doctor_daily_facts is refreshed by trg_income_doctor_facts, which fires first.
+    IF TG_ARGV[0] = 'income' THEN
+        payload := payload || jsonb_build_object(
+            'day_total',
+            (SELECT COALESCE(SUM(total_income), 0) FROM doctor_daily_facts WHERE day = event_day)
+        );
+    END IF;
+
+    PERFORM pg_notify('clinic_events', payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_notify ON income_records;
+CREATE TRIGGER trg_income_notify
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('income', 'service_date', 'amount');
+
+DROP TRIGGER IF EXISTS trg_outcome_notify ON outcome_records;
+CREATE TRIGGER trg_outcome_notify
+AFTER INSERT OR UPDATE OR DELETE ON outcome_records
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('outcome', 'expense_date', 'amount');
+
+DROP TRIGGER IF EXISTS trg_salary_notify ON salary_payments;
+CREATE TRIGGER trg_salary_notify
+AFTER INSERT OR UPDATE OR DELETE ON salary_payments
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('salary', 'payment_date', 'amount');
+
+DROP TRIGGER IF EXISTS trg_shift_notify ON shifts;
+CREATE TRIGGER trg_shift_notify
+AFTER INSERT OR UPDATE OR DELETE ON shifts
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('shift', 'start_time');
@@ -0,0 +1,47 @@
+-- ============================================================
+-- TABLE VERSIONS
+-- Change counters behind the HTTP ETag/Last-Modified validators
+-- (backend/http_cache.py). Every write statement bumps its table's
+-- counter; counters are striped over 8 rows by backend pid so
+-- concurrent writers do not queue on a single row.
+-- A table's version is SUM(version) over its stripes.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name      TEXT NOT NULL,
+    shard           SMALLINT NOT NULL,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (table_name, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, shard, version, updated_at)
+    VALUES (TG_TABLE_NAME, pg_backend_pid() % 8, 1, clock_timestamp())
+    ON CONFLICT (table_name, shard) DO UPDATE
+    SET version = table_versions.version + 1,
+        updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'income_records', 'outcome_records', 'salary_payments', 'salary_adjustments',
+        'staff', 'staff_roles', 'shifts', 'patients', 'outcome_categories', 'clinic_settings'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+            tbl, tbl
+        );
+        INSERT INTO table_versions (table_name, shard) VALUES (tbl, 0)
+        ON CONFLICT DO NOTHING;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- ============================================================
+-- LOOKUP CACHE
+-- backend/lookups.py keeps staff_roles, outcome_categories,
+-- medicine_presets and clinic_settings in process memory and reloads
+-- a table when its table_versions counter moves. medicine_presets was
+-- the only one of them without a version trigger.
+-- ============================================================
+DROP TRIGGER IF EXISTS trg_medicine_presets_version ON medicine_presets;
+CREATE TRIGGER trg_medicine_presets_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON medicine_presets
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+INSERT INTO table_versions (table_name, shard) VALUES ('medicine_presets', 0)
+ON CONFLICT DO NOTHING;
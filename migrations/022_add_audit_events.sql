@@ -0,0 +1,128 @@
+-- ============================================================
+-- AUDIT EVENTS
+-- One append-only audit log for shifts, timesheets and salary
+-- payments (backend/audit.py). Business transactions only insert
+-- into audit_outbox: no foreign keys, no DDL probes. A background
+-- drainer moves outbox rows into the monthly partitioned
+-- audit_events table in batches with drain_audit_outbox().
+-- ============================================================
+CREATE TABLE IF NOT EXISTS audit_outbox (
+    id              BIGSERIAL PRIMARY KEY,
+    occurred_at     TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    entity_type     TEXT NOT NULL,
+    entity_id       BIGINT,
+    action          TEXT NOT NULL,
+    actor_id        INT,
+    payload         JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+
+CREATE TABLE IF NOT EXISTS audit_events (
+    id              BIGINT NOT NULL,
+    occurred_at     TIMESTAMPTZ NOT NULL,
+    entity_type     TEXT NOT NULL,
+    entity_id       BIGINT,
+    action          TEXT NOT NULL,
+    actor_id        INT,
+    payload         JSONB NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+
+CREATE INDEX IF NOT EXISTS idx_audit_events_entity ON audit_events (entity_type, entity_id, occurred_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_events_actor  ON audit_events (actor_id, occurred_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_events_time   ON audit_events (occurred_at DESC, id DESC);
+
+SELECT ensure_monthly_partitions('audit_events', 'occurred_at', 3);
+
+-- Moves up to p_limit outbox rows into audit_events. SKIP LOCKED lets every
+-- worker run the drainer without two of them moving the same rows.
+CREATE OR REPLACE FUNCTION drain_audit_outbox(p_limit INT DEFAULT 500)
+RETURNS INT AS $$
+DECLARE
+    moved INT;
+BEGIN
+    WITH batch AS (
+        DELETE FROM audit_outbox
+        WHERE id IN (
+            SELECT id FROM audit_outbox
+            ORDER BY id
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, occurred_at, entity_type, entity_id, action, actor_id, payload
+    )
+    INSERT INTO audit_events (id, occurred_at, entity_type, entity_id, action, actor_id, payload)
+    SELECT id, occurred_at, entity_type, entity_id, action, actor_id, payload
+    FROM batch;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carry over the per-feature audit tables where they exist. They are kept
+-- for reference but no longer written, so every audit entry of the same
+-- entity type up to a legacy table's newest row can only be a copy of it:
+-- when one exists the table was carried over by an earlier run.
+CREATE OR REPLACE FUNCTION audit_history_copied(p_entity_type TEXT, p_until TIMESTAMPTZ)
+RETURNS BOOLEAN AS $$
+    SELECT p_until IS NULL
+        OR EXISTS (
+            SELECT 1 FROM audit_events
+            WHERE entity_type = p_entity_type AND occurred_at <= p_until
+        )
+        OR EXISTS (
+            SELECT 1 FROM audit_outbox
+            WHERE entity_type = p_entity_type AND occurred_at <= p_until
+        );
+$$ LANGUAGE sql STABLE;
+
+DO $$
+DECLARE
+    newest TIMESTAMPTZ;
+BEGIN
+    IF to_regclass('schedule_audit_logs') IS NOT NULL THEN
+        SELECT max(created_at) INTO newest FROM schedule_audit_logs;
+        IF NOT audit_history_copied('shift', newest) THEN
+            INSERT INTO audit_outbox (occurred_at, entity_type, entity_id, action, actor_id, payload)
+            SELECT created_at, 'shift', shift_id, lower(action), changed_by,
+                   CASE WHEN details IS NULL THEN '{}'::jsonb ELSE jsonb_build_object('details', details) END
+            FROM schedule_audit_logs
+            ORDER BY id;
+        END IF;
+    END IF;
+
+    IF to_regclass('timesheets_audit') IS NOT NULL THEN
+        SELECT max(created_at) INTO newest FROM timesheets_audit;
+        IF NOT audit_history_copied('timesheet', newest) THEN
+            INSERT INTO audit_outbox (occurred_at, entity_type, entity_id, action, actor_id, payload)
+            SELECT created_at, 'timesheet', timesheet_id, action, changed_by_id,
+                   jsonb_build_object('staff_id', staff_id, 'old', old_data, 'new', new_data)
+            FROM timesheets_audit
+            ORDER BY id;
+        END IF;
+    END IF;
+
+    IF to_regclass('salary_amount_audit') IS NOT NULL THEN
+        SELECT max(created_at) INTO newest FROM salary_amount_audit;
+        IF NOT audit_history_copied('salary_payment', newest) THEN
+            INSERT INTO audit_outbox (occurred_at, entity_type, entity_id, action, actor_id, payload)
+            SELECT created_at, 'salary_payment', salary_payment_id, change_source, changed_by_staff_id,
+                   jsonb_build_object(
+                       'staff_id', staff_id,
+                       'previous_amount', previous_amount,
+                       'new_amount', new_amount,
+                       'delta_amount', delta_amount,
+                       'reason', change_reason,
+                       'metadata', metadata
+                   )
+            FROM salary_amount_audit
+            ORDER BY id;
+        END IF;
+    END IF;
+END;
+$$;
+
+DROP FUNCTION audit_history_copied(TEXT, TIMESTAMPTZ);
+
+SELECT drain_audit_outbox(1000000);
+-- Carried-over rows for older months landed in the default partition; split them out.
+SELECT ensure_monthly_partitions('audit_events', 'occurred_at', 3);
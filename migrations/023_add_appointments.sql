@@ -0,0 +1,33 @@
+-- ============================================================
+-- APPOINTMENTS
+-- Table behind backend/appointments.py, plus the indexes the
+-- availability search (backend/availability.py) reads through:
+-- both shifts and appointments are scanned per doctor over a time
+-- window, so each gets a (doctor, start_time) index.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS appointments (
+    id                  SERIAL PRIMARY KEY,
+    doctor_id           INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    patient_name        VARCHAR(200) NOT NULL,
+    type                VARCHAR(50) NOT NULL,
+    start_time          TIMESTAMPTZ NOT NULL,
+    end_time            TIMESTAMPTZ NOT NULL,
+    duration_minutes    INT NOT NULL CHECK (duration_minutes > 0),
+    status              VARCHAR(20) NOT NULL DEFAULT 'confirmed',
+    note                TEXT,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CHECK (end_time > start_time)
+);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_start ON appointments (doctor_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_appointments_start ON appointments (start_time);
+CREATE INDEX IF NOT EXISTS idx_shifts_staff_start ON shifts (staff_id, start_time);
+
+DROP TRIGGER IF EXISTS trg_appointments_version ON appointments;
+CREATE TRIGGER trg_appointments_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON appointments
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+INSERT INTO table_versions (table_name, shard) VALUES ('appointments', 0)
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,61 @@
+-- ============================================================
+-- SHIFT TEMPLATES
+-- Weekly recurring shifts per staff member (backend/schedule.py).
+-- Templates hold clinic-local wall-clock times; the materializer
+-- expands a date range into shifts with one INSERT ... SELECT,
+-- converting through CLINIC_TIMEZONE so DST changes land correctly.
+-- Exceptions skip a date for one template, or for every template of
+-- the staff member when template_id is NULL (leave, holidays).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS shift_templates (
+    id              SERIAL PRIMARY KEY,
+    staff_id        INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    weekday         SMALLINT NOT NULL CHECK (weekday BETWEEN 1 AND 7),   -- ISO: 1 = Monday
+    start_time      TIME NOT NULL,
+    end_time        TIME NOT NULL,
+    valid_from      DATE NOT NULL DEFAULT CURRENT_DATE,
+    valid_to        DATE,
+    note            TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CHECK (end_time > start_time),
+    CHECK (valid_to IS NULL OR valid_to >= valid_from)
+);
+
+CREATE INDEX IF NOT EXISTS idx_shift_templates_staff ON shift_templates (staff_id, weekday);
+
+CREATE TABLE IF NOT EXISTS shift_template_exceptions (
+    id              SERIAL PRIMARY KEY,
+    staff_id        INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    template_id     INT REFERENCES shift_templates(id) ON DELETE CASCADE,
+    exception_date  DATE NOT NULL,
+    reason          TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_shift_template_exceptions_unique
+    ON shift_template_exceptions (staff_id, exception_date, COALESCE(template_id, 0));
+
+-- Materialized shifts remember their template; the unique index makes
+-- re-running the materializer over the same range a no-op.
+ALTER TABLE shifts
+    ADD COLUMN IF NOT EXISTS template_id INT REFERENCES shift_templates(id) ON DELETE SET NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_shifts_template_start
+    ON shifts (template_id, start_time) WHERE template_id IS NOT NULL;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['shift_templates', 'shift_template_exceptions'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+            tbl, tbl
+        );
+        INSERT INTO table_versions (table_name, shard) VALUES (tbl, 0)
+        ON CONFLICT DO NOTHING;
+    END LOOP;
+END;
+$$;
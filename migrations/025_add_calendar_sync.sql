@@ -0,0 +1,77 @@
+-- ============================================================
+-- CALENDAR SYNC
+-- Change tracking behind backend/calendar_sync.py. Every shift and
+-- appointment row carries the id of the transaction that last wrote
+-- it (change_xid). Deletes, and moves to another staff member, leave
+-- a row in calendar_tombstones. A sync token is the xmin of the
+-- snapshot the previous sync read with: everything written by a
+-- transaction at or after it is sent again, so no commit that was
+-- still in flight is ever missed, whatever order transactions commit in.
+-- ============================================================
+ALTER TABLE shifts
+    ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE appointments
+    ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS idx_shifts_change_xid ON shifts (change_xid);
+CREATE INDEX IF NOT EXISTS idx_appointments_change_xid ON appointments (change_xid);
+
+CREATE TABLE IF NOT EXISTS calendar_tombstones (
+    id              BIGSERIAL PRIMARY KEY,
+    entity_type     TEXT NOT NULL,              -- 'shift' | 'appointment'
+    entity_id       INT NOT NULL,
+    staff_id        INT NOT NULL,
+    change_xid      xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_calendar_tombstones_change_xid ON calendar_tombstones (change_xid);
+CREATE INDEX IF NOT EXISTS idx_calendar_tombstones_deleted_at ON calendar_tombstones (deleted_at);
+
+CREATE OR REPLACE FUNCTION calendar_touch()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TG_ARGV[0] is the entity type, TG_ARGV[1] the owning staff column.
+CREATE OR REPLACE FUNCTION calendar_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_staff INT;
+    new_staff INT;
+BEGIN
+    EXECUTE format('SELECT ($1).%I', TG_ARGV[1]) INTO old_staff USING OLD;
+    IF TG_OP = 'UPDATE' THEN
+        EXECUTE format('SELECT ($1).%I', TG_ARGV[1]) INTO new_staff USING NEW;
+        IF new_staff IS NOT DISTINCT FROM old_staff THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO calendar_tombstones (entity_type, entity_id, staff_id)
+    VALUES (TG_ARGV[0], OLD.id, old_staff);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_shifts_calendar_touch ON shifts;
+CREATE TRIGGER trg_shifts_calendar_touch
+BEFORE UPDATE ON shifts
+FOR EACH ROW EXECUTE FUNCTION calendar_touch();
+
+DROP TRIGGER IF EXISTS trg_shifts_calendar_tombstone ON shifts;
+CREATE TRIGGER trg_shifts_calendar_tombstone
+AFTER DELETE OR UPDATE OF staff_id ON shifts
+FOR EACH ROW EXECUTE FUNCTION calendar_tombstone('shift', 'staff_id');
+
+DROP TRIGGER IF EXISTS trg_appointments_calendar_touch ON appointments;
+CREATE TRIGGER trg_appointments_calendar_touch
+BEFORE UPDATE ON appointments
+FOR EACH ROW EXECUTE FUNCTION calendar_touch();
+
+DROP TRIGGER IF EXISTS trg_appointments_calendar_tombstone ON appointments;
+CREATE TRIGGER trg_appointments_calendar_tombstone
+AFTER DELETE OR UPDATE OF doctor_id ON appointments
+FOR EACH ROW EXECUTE FUNCTION calendar_tombstone('appointment', 'doctor_id');
@@ -0,0 +1,17 @@
+-- ============================================================
+-- SHIFT PERIODS
+-- One overlap predicate for every shift range lookup
+-- (backend/shift_ranges.py): period && tstzrange(start, end).
+-- The generated column keeps the range in step with start_time and
+-- end_time; btree_gist lets staff_id and period share one GiST index,
+-- so per-staff lookups stay cheap however long the shift history gets.
+-- Adding a stored generated column rewrites shifts once.
+-- ============================================================
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE shifts
+    ADD COLUMN IF NOT EXISTS period tstzrange
+    GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_shifts_staff_period ON shifts USING gist (staff_id, period);
+CREATE INDEX IF NOT EXISTS idx_shifts_period ON shifts USING gist (period);
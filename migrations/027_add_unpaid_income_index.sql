@@ -0,0 +1,17 @@
+-- ============================================================
+-- UNPAID INCOME INDEXES
+-- Salary estimates, reports, payments and the payroll preview
+-- (GET /api/staff/payroll/preview) all read a doctor's income that is
+-- not yet linked to a salary payment. Paid rows are the bulk of the
+-- history and never match, so the index only holds unpaid rows; the
+-- INCLUDE columns let the sums be answered from the index alone.
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_income_records_unpaid
+    ON income_records (doctor_id, service_date)
+    INCLUDE (amount, lab_cost, patient_id)
+    WHERE salary_payment_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_salary_adjustments_unapplied
+    ON salary_adjustments (staff_id)
+    INCLUDE (amount)
+    WHERE applied_to_salary_payment_id IS NULL;
@@ -0,0 +1,93 @@
+-- ============================================================
+-- STAFF SALARY SUMMARY
+-- Per-staff payment count and total, kept by a trigger on
+-- salary_payments, so salary notes and history pages read their total
+-- from one row instead of counting the staff member's payments on
+-- every page. Pages are keyset-paginated on
+-- (payment_date, created_at, id), served by the index below.
+-- Salary documents created by a payment now point back to it.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS staff_salary_summary (
+    staff_id        INT PRIMARY KEY REFERENCES staff(id) ON DELETE CASCADE,
+    payment_count   INT NOT NULL DEFAULT 0,
+    total_paid      NUMERIC(16, 2) NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION accumulate_staff_salary_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.staff_id = OLD.staff_id AND NEW.amount = OLD.amount THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE staff_salary_summary
+        SET payment_count = payment_count - 1,
+            total_paid = total_paid - OLD.amount
+        WHERE staff_id = OLD.staff_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO staff_salary_summary (staff_id, payment_count, total_paid)
+        VALUES (NEW.staff_id, 1, NEW.amount)
+        ON CONFLICT (staff_id) DO UPDATE
+        SET payment_count = staff_salary_summary.payment_count + 1,
+            total_paid = staff_salary_summary.total_paid + EXCLUDED.total_paid;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_staff_salary_summary ON salary_payments;
+CREATE TRIGGER trg_staff_salary_summary
+AFTER INSERT OR DELETE OR UPDATE OF staff_id, amount ON salary_payments
+FOR EACH ROW EXECUTE FUNCTION accumulate_staff_salary_summary();
+
+CREATE INDEX IF NOT EXISTS idx_salary_payments_staff_keyset
+    ON salary_payments (staff_id, payment_date DESC, created_at DESC, id DESC);
+
+ALTER TABLE staff_documents
+    ADD COLUMN IF NOT EXISTS salary_payment_id INT REFERENCES salary_payments(id) ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS idx_staff_documents_salary_payment
+    ON staff_documents (salary_payment_id) WHERE salary_payment_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION rebuild_dashboard_accumulators()
+RETURNS INT AS $$
+DECLARE
+    income_rows  INT;
+    role_rows    INT;
+    salary_rows  INT;
+BEGIN
+    LOCK TABLE income_payment_totals, role_salary_totals, staff_salary_summary IN EXCLUSIVE MODE;
+
+    DELETE FROM income_payment_totals;
+    INSERT INTO income_payment_totals (shard, total_amount, record_count)
+    SELECT id % 16, SUM(amount), COUNT(*)
+    FROM income_records
+    GROUP BY id % 16;
+    GET DIAGNOSTICS income_rows = ROW_COUNT;
+
+    DELETE FROM role_salary_totals;
+    INSERT INTO role_salary_totals (role_id, total_salary, staff_count)
+    SELECT role_id, SUM(base_salary), COUNT(*)
+    FROM staff
+    WHERE is_active = TRUE
+    GROUP BY role_id;
+    GET DIAGNOSTICS role_rows = ROW_COUNT;
+
+    DELETE FROM staff_salary_summary;
+    INSERT INTO staff_salary_summary (staff_id, payment_count, total_paid)
+    SELECT staff_id, COUNT(*), SUM(amount)
+    FROM salary_payments
+    GROUP BY staff_id;
+    GET DIAGNOSTICS salary_rows = ROW_COUNT;
+
+    RETURN income_rows + role_rows + salary_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO staff_salary_summary (staff_id, payment_count, total_paid)
+SELECT staff_id, COUNT(*), SUM(amount)
+FROM salary_payments
+GROUP BY staff_id
+ON CONFLICT (staff_id) DO UPDATE
+SET payment_count = EXCLUDED.payment_count,
+    total_paid = EXCLUDED.total_paid;
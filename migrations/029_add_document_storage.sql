@@ -0,0 +1,19 @@
+-- ============================================================
+-- CONTENT-ADDRESSED DOCUMENT STORAGE
+-- New salary documents are stored under a key derived from the
+-- SHA-256 of their bytes (see backend/storage.py) instead of a
+-- signer-and-date file name, so a same-day re-sign no longer
+-- overwrites the earlier PDF. The hash doubles as the download ETag.
+-- Rows written before this migration keep their file_path.
+-- ============================================================
+ALTER TABLE staff_documents
+    ADD COLUMN IF NOT EXISTS storage_key TEXT,
+    ADD COLUMN IF NOT EXISTS sha256      CHAR(64),
+    ADD COLUMN IF NOT EXISTS size_bytes  BIGINT,
+    ADD COLUMN IF NOT EXISTS file_name   TEXT,
+    ALTER COLUMN file_path DROP NOT NULL;
+
+ALTER TABLE staff_documents DROP CONSTRAINT IF EXISTS staff_documents_location_check;
+ALTER TABLE staff_documents
+    ADD CONSTRAINT staff_documents_location_check
+    CHECK (storage_key IS NOT NULL OR file_path IS NOT NULL);
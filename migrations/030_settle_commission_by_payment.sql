@@ -0,0 +1,97 @@
+-- ============================================================
+-- COMMISSION SETTLEMENTS
+-- Linking income or adjustments to a salary payment no longer zeroes
+-- their ledger entries. Commission accrues once per income row, at the
+-- row's stamped rate (the same expression payroll sums), and pay_salary
+-- settles it with an entry for what the payment actually paid beyond
+-- base salary, keyed to the payment. A period whose lab fees exceed its
+-- income earns no commission in payroll; that negative remainder is
+-- written off in the same payment so the ledger follows payroll.
+-- Balances already in commission_balances stay valid: they are
+-- accrued minus paid as of this migration.
+-- ============================================================
+ALTER TABLE commission_ledger
+    ADD COLUMN IF NOT EXISTS salary_payment_id INT REFERENCES salary_payments(id) ON DELETE SET NULL;
+
+ALTER TABLE commission_ledger DROP CONSTRAINT IF EXISTS commission_ledger_entry_type_check;
+ALTER TABLE commission_ledger
+    ADD CONSTRAINT commission_ledger_entry_type_check
+    CHECK (entry_type IN ('income', 'adjustment', 'settlement', 'write_off'));
+
+CREATE INDEX IF NOT EXISTS idx_commission_ledger_payment
+    ON commission_ledger (salary_payment_id) WHERE salary_payment_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION record_income_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_amount := (OLD.amount - GREATEST(OLD.lab_cost, 0)) * OLD.commission_rate;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_amount := (NEW.amount - GREATEST(NEW.lab_cost, 0)) * NEW.commission_rate;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.doctor_id = OLD.doctor_id THEN
+        IF new_amount <> old_amount THEN
+            INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+            VALUES (NEW.doctor_id, 'income', new_amount - old_amount);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF old_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.doctor_id, 'income', -old_amount);
+    END IF;
+    IF new_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.doctor_id, 'income', new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_income_commission_ledger ON income_records;
+CREATE TRIGGER trg_income_commission_ledger
+AFTER INSERT OR DELETE OR UPDATE OF doctor_id, amount, lab_cost, commission_rate ON income_records
+FOR EACH ROW EXECUTE FUNCTION record_income_commission();
+
+CREATE OR REPLACE FUNCTION record_adjustment_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_amount := NEW.amount;
+    END IF;
+
+    -- Only doctors carry a commission balance.
+    IF old_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = OLD.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.staff_id, 'adjustment', -old_amount);
+    END IF;
+    IF new_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = NEW.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.staff_id, 'adjustment', new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_adjustment_commission_ledger ON salary_adjustments;
+CREATE TRIGGER trg_adjustment_commission_ledger
+AFTER INSERT OR DELETE OR UPDATE OF staff_id, amount ON salary_adjustments
+FOR EACH ROW EXECUTE FUNCTION record_adjustment_commission();
@@ -0,0 +1,11 @@
+-- ============================================================
+-- APPOINTMENT LENGTH LIMIT
+-- The availability search finds appointments overlapping a window
+-- through the (doctor_id, start_time) index, bounded below by the
+-- window start minus the longest allowed appointment. NOT VALID
+-- leaves existing rows unchecked; VALIDATE it once they are fixed.
+-- ============================================================
+ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_max_length;
+ALTER TABLE appointments
+    ADD CONSTRAINT appointments_max_length
+    CHECK (end_time - start_time <= INTERVAL '24 hours') NOT VALID;
@@ -0,0 +1,12 @@
+-- ============================================================
+-- UNPAID INCOME INDEX: STAMPED RATES
+-- Salary reports, estimates, payments and the payroll preview sum
+-- commission at each row's stamped commission_rate. Adding the rate to
+-- the INCLUDE list keeps those sums answerable from the index alone.
+-- ============================================================
+DROP INDEX IF EXISTS idx_income_records_unpaid;
+
+CREATE INDEX idx_income_records_unpaid
+    ON income_records (doctor_id, service_date)
+    INCLUDE (amount, lab_cost, commission_rate, patient_id)
+    WHERE salary_payment_id IS NULL;
@@ -0,0 +1,85 @@
+-- ============================================================
+-- PAID INCOME AND THE COMMISSION LEDGER
+-- Once an income row is linked to a salary payment its commission has
+-- been settled, so editing or deleting it no longer books ledger
+-- deltas. The reversal, if any, comes from the salary_adjustments row
+-- that the adjust_next mode inserts; the ignore mode leaves the
+-- balance alone.
+-- A payment's settlement and write_off entries now go with the
+-- payment, so deleting it puts its commission back to outstanding.
+-- compact_commission_ledger() leaves payment-keyed entries in the
+-- ledger so that the cascade can still find them. Settlements that
+-- were compacted before this migration are already in
+-- commission_balances and cannot be reversed this way.
+-- ============================================================
+CREATE OR REPLACE FUNCTION record_income_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+BEGIN
+    -- Paid rows were settled by their salary payment.
+    IF TG_OP = 'DELETE' AND OLD.salary_payment_id IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD.salary_payment_id IS NOT NULL
+       AND NEW.salary_payment_id IS NOT DISTINCT FROM OLD.salary_payment_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_amount := (OLD.amount - GREATEST(OLD.lab_cost, 0)) * OLD.commission_rate;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_amount := (NEW.amount - GREATEST(NEW.lab_cost, 0)) * NEW.commission_rate;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.doctor_id = OLD.doctor_id THEN
+        IF new_amount <> old_amount THEN
+            INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+            VALUES (NEW.doctor_id, 'income', new_amount - old_amount);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF old_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.doctor_id, 'income', -old_amount);
+    END IF;
+    IF new_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.doctor_id, 'income', new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE commission_ledger
+    DROP CONSTRAINT IF EXISTS commission_ledger_salary_payment_id_fkey;
+ALTER TABLE commission_ledger
+    ADD CONSTRAINT commission_ledger_salary_payment_id_fkey
+    FOREIGN KEY (salary_payment_id) REFERENCES salary_payments(id) ON DELETE CASCADE;
+
+CREATE OR REPLACE FUNCTION compact_commission_ledger()
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM commission_ledger
+        WHERE salary_payment_id IS NULL
+        RETURNING doctor_id, amount
+    ), totals AS (
+        SELECT doctor_id, SUM(amount) AS delta
+        FROM drained
+        GROUP BY doctor_id
+    )
+    INSERT INTO commission_balances (doctor_id, outstanding, updated_at)
+    SELECT doctor_id, delta, NOW() FROM totals
+    ON CONFLICT (doctor_id) DO UPDATE
+    SET outstanding = commission_balances.outstanding + EXCLUDED.outstanding,
+        updated_at = NOW();
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
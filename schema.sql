@@ -14,6 +14,22 @@ DROP TABLE IF EXISTS staff CASCADE;
 DROP TABLE IF EXISTS staff_roles CASCADE;
 DROP TABLE IF EXISTS clinic_settings CASCADE;
 DROP TABLE IF EXISTS clinic_expenses CASCADE;
+DROP TABLE IF EXISTS doctor_revenue_deltas CASCADE;
+DROP TABLE IF EXISTS doctor_daily_facts CASCADE;
+DROP TABLE IF EXISTS staff_commission_rates CASCADE;
+DROP TABLE IF EXISTS patient_stats CASCADE;
+DROP TABLE IF EXISTS income_payment_totals CASCADE;
+DROP TABLE IF EXISTS role_salary_totals CASCADE;
+DROP TABLE IF EXISTS staff_salary_summary CASCADE;
+DROP TABLE IF EXISTS commission_ledger CASCADE;
+DROP TABLE IF EXISTS commission_balances CASCADE;
+DROP TABLE IF EXISTS table_versions CASCADE;
+DROP TABLE IF EXISTS audit_outbox CASCADE;
+DROP TABLE IF EXISTS audit_events CASCADE;
+DROP TABLE IF EXISTS appointments CASCADE;
+DROP TABLE IF EXISTS shift_template_exceptions CASCADE;
+DROP TABLE IF EXISTS shift_templates CASCADE;
+DROP TABLE IF EXISTS calendar_tombstones CASCADE;
 
 -- ============================================================
 -- STAFF ROLES (lookup table)
@@ -52,6 +68,53 @@ CREATE TABLE staff (
     updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- ============================================================
+-- STAFF COMMISSION RATE HISTORY
+-- ============================================================
+CREATE TABLE staff_commission_rates (
+    id                  SERIAL PRIMARY KEY,
+    staff_id            INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    commission_rate     NUMERIC(5, 4) NOT NULL,
+    effective_from      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_staff_commission_rates_staff
+    ON staff_commission_rates (staff_id, effective_from DESC);
+
+CREATE OR REPLACE FUNCTION record_staff_commission_rate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.commission_rate IS NOT DISTINCT FROM OLD.commission_rate THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO staff_commission_rates (staff_id, commission_rate)
+    VALUES (NEW.id, COALESCE(NEW.commission_rate, 0));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_staff_commission_rate
+AFTER INSERT OR UPDATE OF commission_rate ON staff
+FOR EACH ROW EXECUTE FUNCTION record_staff_commission_rate();
+
+-- Rate in effect for a staff member on a given day; falls back to the current rate.
+CREATE OR REPLACE FUNCTION commission_rate_on(p_staff_id INT, p_day DATE)
+RETURNS NUMERIC AS $$
+    SELECT COALESCE(
+        (
+            SELECT h.commission_rate
+            FROM staff_commission_rates h
+            WHERE h.staff_id = p_staff_id
+              AND h.effective_from < (p_day + 1)
+            ORDER BY h.effective_from DESC
+            LIMIT 1
+        ),
+        (SELECT s.commission_rate FROM staff s WHERE s.id = p_staff_id),
+        0
+    );
+$$ LANGUAGE sql STABLE;
+
 -- ============================================================
 -- SALARY PAYMENTS  (Outcome sub-type: staff salaries)
 -- ============================================================
@@ -93,11 +156,18 @@ CREATE TABLE staff_documents (
     signer_name     VARCHAR(150) NOT NULL,
     signature_hash  VARCHAR(64) NOT NULL,
     signature_token VARCHAR(64),
-    file_path       TEXT NOT NULL,
-    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    file_path       TEXT,
+    storage_key     TEXT,
+    sha256          CHAR(64),
+    size_bytes      BIGINT,
+    file_name       TEXT,
+    salary_payment_id INT REFERENCES salary_payments(id) ON DELETE SET NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT staff_documents_location_check CHECK (storage_key IS NOT NULL OR file_path IS NOT NULL)
 );
 
 CREATE INDEX idx_staff_documents_staff ON staff_documents(staff_id);
+CREATE INDEX idx_staff_documents_salary_payment ON staff_documents(salary_payment_id) WHERE salary_payment_id IS NOT NULL;
 CREATE INDEX idx_staff_documents_type ON staff_documents(document_type);
 CREATE INDEX idx_staff_documents_period ON staff_documents(period_from, period_to);
 CREATE INDEX idx_staff_documents_signed_at ON staff_documents(signed_at);
@@ -119,11 +189,96 @@ CREATE TABLE patients (
 
 CREATE UNIQUE INDEX idx_patients_last_first_name ON patients (last_name, first_name);
 
+-- ============================================================
+-- MONTHLY PARTITIONS
+-- income_records and outcome_records are partitioned by month on their
+-- date column, with a DEFAULT partition for months not created yet.
+-- ============================================================
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, key_column TEXT, month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound    DATE := date_trunc('month', month_start)::DATE;
+    upper_bound    DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+    default_name   TEXT := parent || '_default';
+    moved          INT := 0;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Rows for this month may already sit in the default partition; park them
+    -- so the new partition's bounds do not conflict with it.
+    IF to_regclass(default_name) IS NOT NULL THEN
+        EXECUTE format('CREATE TEMP TABLE partition_backlog (LIKE %I) ON COMMIT DROP', parent);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+            'INSERT INTO partition_backlog SELECT * FROM moved',
+            default_name, key_column, lower_bound, key_column, upper_bound
+        );
+        GET DIAGNOSTICS moved = ROW_COUNT;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, parent, lower_bound, upper_bound
+    );
+
+    IF to_regclass('pg_temp.partition_backlog') IS NOT NULL THEN
+        IF moved > 0 THEN
+            EXECUTE format('INSERT INTO %I SELECT * FROM partition_backlog', partition_name);
+        END IF;
+        DROP TABLE partition_backlog;
+    END IF;
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creates partitions for months already present in the default partition and
+-- for the current month plus months_ahead. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent TEXT, key_column TEXT, months_ahead INT DEFAULT 3)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE;
+    created     INT := 0;
+BEGIN
+    IF to_regclass(parent || '_default') IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    END IF;
+
+    FOR month_start IN EXECUTE format(
+        'SELECT DISTINCT date_trunc(''month'', %I)::DATE FROM %I',
+        key_column, parent || '_default'
+    ) LOOP
+        IF to_regclass(format('%s_%s', parent, to_char(month_start, 'YYYY_MM'))) IS NULL THEN
+            PERFORM create_monthly_partition(parent, key_column, month_start);
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', CURRENT_DATE),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        IF to_regclass(format('%s_%s', parent, to_char(month_start, 'YYYY_MM'))) IS NULL THEN
+            PERFORM create_monthly_partition(parent, key_column, month_start);
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================
 -- INCOME RECORDS  (/Income page)
 -- ============================================================
 CREATE TABLE income_records (
-    id              SERIAL PRIMARY KEY,
+    id              SERIAL,
     patient_id      INT NOT NULL REFERENCES patients(id),
     doctor_id       INT NOT NULL REFERENCES staff(id),   -- must be role=doctor
     amount          NUMERIC(12, 2) NOT NULL,
@@ -131,24 +286,644 @@ CREATE TABLE income_records (
     payment_method  VARCHAR(10) NOT NULL CHECK (payment_method IN ('cash', 'card')),
     service_date    DATE NOT NULL DEFAULT CURRENT_DATE,
     note            TEXT,
+    commission_rate NUMERIC(5, 4) NOT NULL,         -- doctor's rate on service_date, stamped on insert
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, service_date)
+) PARTITION BY RANGE (service_date);
+
+SELECT ensure_monthly_partitions('income_records', 'service_date', 12);
+
+CREATE OR REPLACE FUNCTION stamp_income_commission_rate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.commission_rate IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.doctor_id <> OLD.doctor_id) THEN
+        NEW.commission_rate := commission_rate_on(NEW.doctor_id, NEW.service_date);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_stamp_commission_rate
+BEFORE INSERT OR UPDATE OF doctor_id, commission_rate ON income_records
+FOR EACH ROW EXECUTE FUNCTION stamp_income_commission_rate();
+
+-- ============================================================
+-- DOCTOR REVENUE LEDGER
+-- Income writes append signed deltas; compact_doctor_revenue() folds them
+-- into staff.total_revenue in batches. Read totals through staff_revenue.
+-- staff.total_revenue tracks income not yet linked to a salary payment
+-- (income_records.salary_payment_id, migration 007).
+-- ============================================================
+CREATE TABLE doctor_revenue_deltas (
+    id              BIGSERIAL PRIMARY KEY,
+    doctor_id       INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    income_id       INT,
+    delta           NUMERIC(14, 2) NOT NULL,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
--- Trigger: keep staff.total_revenue up to date for doctors
-CREATE OR REPLACE FUNCTION update_doctor_total_revenue()
+CREATE INDEX idx_doctor_revenue_deltas_doctor ON doctor_revenue_deltas (doctor_id);
+
+CREATE OR REPLACE FUNCTION record_doctor_revenue_delta()
 RETURNS TRIGGER AS $$
 BEGIN
-    UPDATE staff
-    SET total_revenue = total_revenue + NEW.amount,
+    IF TG_OP = 'UPDATE'
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.amount = OLD.amount
+       AND (NEW.salary_payment_id IS NULL) = (OLD.salary_payment_id IS NULL) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.salary_payment_id IS NULL THEN
+        INSERT INTO doctor_revenue_deltas (doctor_id, income_id, delta)
+        VALUES (OLD.doctor_id, OLD.id, -OLD.amount);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.salary_payment_id IS NULL THEN
+        INSERT INTO doctor_revenue_deltas (doctor_id, income_id, delta)
+        VALUES (NEW.doctor_id, NEW.id, NEW.amount);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_revenue_delta
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION record_doctor_revenue_delta();
+
+CREATE OR REPLACE FUNCTION compact_doctor_revenue()
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM doctor_revenue_deltas
+        RETURNING doctor_id, delta
+    ),
+    totals AS (
+        SELECT doctor_id, SUM(delta) AS delta
+        FROM moved
+        GROUP BY doctor_id
+    )
+    UPDATE staff s
+    SET total_revenue = s.total_revenue + t.delta,
         updated_at    = NOW()
-    WHERE id = NEW.doctor_id;
-    RETURN NEW;
+    FROM totals t
+    WHERE s.id = t.doctor_id AND t.delta <> 0;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_doctor_revenue(p_doctor_id INT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM doctor_revenue_deltas WHERE doctor_id = p_doctor_id;
+    UPDATE staff
+    SET total_revenue = (
+            SELECT COALESCE(SUM(amount), 0)
+            FROM income_records
+            WHERE doctor_id = p_doctor_id AND salary_payment_id IS NULL
+        ),
+        updated_at = NOW()
+    WHERE id = p_doctor_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- COMMISSION LEDGER
+-- Outstanding commission per doctor: commission accrued on income at
+-- each row's stamped rate plus salary_adjustments, minus what salary
+-- payments settled (entries keyed to salary_payment_id, written by
+-- pay_salary). Editing or deleting a paid income row books nothing;
+-- adjust_next reverses it through salary_adjustments. A payment's
+-- settlement entries are deleted with it. Writes append to
+-- commission_ledger; compact_commission_ledger() folds entries not
+-- keyed to a payment into commission_balances. Read through
+-- commission_outstanding.
+-- ============================================================
+CREATE TABLE commission_ledger (
+    id              BIGSERIAL PRIMARY KEY,
+    doctor_id       INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    entry_type      VARCHAR(20) NOT NULL,
+    amount          NUMERIC(14, 4) NOT NULL,
+    salary_payment_id INT REFERENCES salary_payments(id) ON DELETE CASCADE,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT commission_ledger_entry_type_check
+        CHECK (entry_type IN ('income', 'adjustment', 'settlement', 'write_off'))
+);
+
+CREATE INDEX idx_commission_ledger_doctor ON commission_ledger (doctor_id);
+CREATE INDEX idx_commission_ledger_payment ON commission_ledger (salary_payment_id) WHERE salary_payment_id IS NOT NULL;
+
+CREATE TABLE commission_balances (
+    doctor_id       INT PRIMARY KEY REFERENCES staff(id) ON DELETE CASCADE,
+    outstanding     NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION record_income_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+BEGIN
+    -- Paid rows were settled by their salary payment.
+    IF TG_OP = 'DELETE' AND OLD.salary_payment_id IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD.salary_payment_id IS NOT NULL
+       AND NEW.salary_payment_id IS NOT DISTINCT FROM OLD.salary_payment_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_amount := (OLD.amount - GREATEST(OLD.lab_cost, 0)) * OLD.commission_rate;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_amount := (NEW.amount - GREATEST(NEW.lab_cost, 0)) * NEW.commission_rate;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.doctor_id = OLD.doctor_id THEN
+        IF new_amount <> old_amount THEN
+            INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+            VALUES (NEW.doctor_id, 'income', new_amount - old_amount);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF old_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.doctor_id, 'income', -old_amount);
+    END IF;
+    IF new_amount <> 0 THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.doctor_id, 'income', new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_commission_ledger
+AFTER INSERT OR DELETE OR UPDATE OF doctor_id, amount, lab_cost, commission_rate ON income_records
+FOR EACH ROW EXECUTE FUNCTION record_income_commission();
+
+CREATE OR REPLACE FUNCTION record_adjustment_commission()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_amount NUMERIC := 0;
+    new_amount NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_amount := NEW.amount;
+    END IF;
+
+    -- Only doctors carry a commission balance.
+    IF old_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = OLD.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (OLD.staff_id, 'adjustment', -old_amount);
+    END IF;
+    IF new_amount <> 0 AND EXISTS (
+        SELECT 1 FROM staff s JOIN staff_roles r ON r.id = s.role_id
+        WHERE s.id = NEW.staff_id AND r.name = 'doctor'
+    ) THEN
+        INSERT INTO commission_ledger (doctor_id, entry_type, amount)
+        VALUES (NEW.staff_id, 'adjustment', new_amount);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- trg_adjustment_commission_ledger is created by migration 018 (redefined in 030), after
+-- salary_adjustments exists (migration 007).
+
+CREATE OR REPLACE FUNCTION compact_commission_ledger()
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM commission_ledger
+        WHERE salary_payment_id IS NULL
+        RETURNING doctor_id, amount
+    ), totals AS (
+        SELECT doctor_id, SUM(amount) AS delta
+        FROM drained
+        GROUP BY doctor_id
+    )
+    INSERT INTO commission_balances (doctor_id, outstanding, updated_at)
+    SELECT doctor_id, delta, NOW() FROM totals
+    ON CONFLICT (doctor_id) DO UPDATE
+    SET outstanding = commission_balances.outstanding + EXCLUDED.outstanding,
+        updated_at = NOW();
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE VIEW commission_outstanding AS
+SELECT
+    COALESCE(b.doctor_id, l.doctor_id) AS doctor_id,
+    COALESCE(b.outstanding, 0) + COALESCE(l.pending, 0) AS outstanding
+FROM commission_balances b
+FULL JOIN (
+    SELECT doctor_id, SUM(amount) AS pending
+    FROM commission_ledger
+    GROUP BY doctor_id
+) l ON l.doctor_id = b.doctor_id;
+
+-- ============================================================
+-- DOCTOR DAILY FACTS
+-- Per doctor / day / hour income totals, recomputed per touched bucket.
+-- ============================================================
+CREATE TABLE doctor_daily_facts (
+    doctor_id           INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    day                 DATE NOT NULL,
+    hour                SMALLINT NOT NULL,
+    total_income        NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_lab_cost      NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_commission    NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    visit_count         INT NOT NULL DEFAULT 0,
+    patient_count       INT NOT NULL DEFAULT 0,
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (doctor_id, day, hour)
+);
+
+CREATE OR REPLACE FUNCTION refresh_doctor_daily_fact(p_doctor_id INT, p_day DATE, p_hour INT)
+RETURNS VOID AS $$
+BEGIN
+    -- Lock the bucket so concurrent writers to the same hour recompute one after another.
+    INSERT INTO doctor_daily_facts (doctor_id, day, hour)
+    VALUES (p_doctor_id, p_day, p_hour)
+    ON CONFLICT DO NOTHING;
+    PERFORM 1 FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour
+    FOR UPDATE;
+
+    UPDATE doctor_daily_facts f
+    SET total_income     = agg.total_income,
+        total_lab_cost   = agg.total_lab_cost,
+        total_commission = agg.total_commission,
+        visit_count      = agg.visit_count,
+        patient_count    = agg.patient_count,
+        updated_at       = NOW()
+    FROM (
+        SELECT COALESCE(SUM(ir.amount), 0) AS total_income,
+               COALESCE(SUM(ir.lab_cost), 0) AS total_lab_cost,
+               COALESCE(SUM(ir.amount * ir.commission_rate), 0) AS total_commission,
+               COUNT(ir.id) AS visit_count,
+               COUNT(DISTINCT ir.patient_id) AS patient_count
+        FROM income_records ir
+        WHERE ir.doctor_id = p_doctor_id
+          AND ir.service_date = p_day
+          AND EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT = p_hour
+    ) agg
+    WHERE f.doctor_id = p_doctor_id AND f.day = p_day AND f.hour = p_hour;
+
+    DELETE FROM doctor_daily_facts
+    WHERE doctor_id = p_doctor_id AND day = p_day AND hour = p_hour AND visit_count = 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_doctor_daily_facts()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_hour INT;
+    new_hour INT;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_hour := EXTRACT(HOUR FROM COALESCE(OLD.service_time, OLD.created_at::TIME))::INT;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_hour := EXTRACT(HOUR FROM COALESCE(NEW.service_time, NEW.created_at::TIME))::INT;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.service_date = OLD.service_date
+       AND new_hour = old_hour
+       AND NEW.patient_id = OLD.patient_id
+       AND NEW.amount = OLD.amount
+       AND NEW.lab_cost = OLD.lab_cost
+       AND NEW.commission_rate = OLD.commission_rate THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_doctor_daily_fact(OLD.doctor_id, OLD.service_date, old_hour);
+    END IF;
+    IF TG_OP = 'INSERT'
+       OR (TG_OP = 'UPDATE' AND (NEW.doctor_id, NEW.service_date, new_hour) IS DISTINCT FROM (OLD.doctor_id, OLD.service_date, old_hour)) THEN
+        PERFORM refresh_doctor_daily_fact(NEW.doctor_id, NEW.service_date, new_hour);
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER trg_income_after_insert
-AFTER INSERT ON income_records
-FOR EACH ROW EXECUTE FUNCTION update_doctor_total_revenue();
+CREATE TRIGGER trg_income_doctor_facts
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION sync_doctor_daily_facts();
+
+CREATE OR REPLACE FUNCTION rebuild_doctor_daily_facts()
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    DELETE FROM doctor_daily_facts;
+    INSERT INTO doctor_daily_facts (
+        doctor_id, day, hour, total_income, total_lab_cost, total_commission, visit_count, patient_count
+    )
+    SELECT ir.doctor_id,
+           ir.service_date,
+           EXTRACT(HOUR FROM COALESCE(ir.service_time, ir.created_at::TIME))::INT AS hour,
+           SUM(ir.amount),
+           SUM(ir.lab_cost),
+           SUM(ir.amount * ir.commission_rate),
+           COUNT(ir.id),
+           COUNT(DISTINCT ir.patient_id)
+    FROM income_records ir
+    GROUP BY ir.doctor_id, ir.service_date, hour;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- PATIENT STATS
+-- First/last visit, visit count, lifetime paid and last doctor per patient.
+-- ============================================================
+CREATE TABLE patient_stats (
+    patient_id      INT PRIMARY KEY REFERENCES patients(id) ON DELETE CASCADE,
+    first_visit     DATE NOT NULL,
+    last_visit      DATE NOT NULL,
+    visit_count     INT NOT NULL DEFAULT 0,
+    lifetime_paid   NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    last_doctor_id  INT REFERENCES staff(id) ON DELETE SET NULL,
+    last_income_id  INT,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_patient_stats_first_visit ON patient_stats (first_visit);
+CREATE INDEX idx_patient_stats_last_visit ON patient_stats (last_visit);
+
+CREATE OR REPLACE FUNCTION refresh_patient_stats(p_patient_id INT)
+RETURNS VOID AS $$
+BEGIN
+    -- Serialise concurrent writers for the same patient before recomputing.
+    INSERT INTO patient_stats (patient_id, first_visit, last_visit)
+    VALUES (p_patient_id, CURRENT_DATE, CURRENT_DATE)
+    ON CONFLICT DO NOTHING;
+    PERFORM 1 FROM patient_stats WHERE patient_id = p_patient_id FOR UPDATE;
+
+    UPDATE patient_stats ps
+    SET first_visit    = agg.first_visit,
+        last_visit     = agg.last_visit,
+        visit_count    = agg.visit_count,
+        lifetime_paid  = agg.lifetime_paid,
+        last_doctor_id = latest.doctor_id,
+        last_income_id = latest.id,
+        updated_at     = NOW()
+    FROM (
+        SELECT MIN(service_date) AS first_visit,
+               MAX(service_date) AS last_visit,
+               COUNT(*) AS visit_count,
+               COALESCE(SUM(amount), 0) AS lifetime_paid
+        FROM income_records
+        WHERE patient_id = p_patient_id
+    ) agg,
+    LATERAL (
+        SELECT ir.id, ir.doctor_id
+        FROM income_records ir
+        WHERE ir.patient_id = p_patient_id
+        ORDER BY ir.service_date DESC, ir.id DESC
+        LIMIT 1
+    ) latest
+    WHERE ps.patient_id = p_patient_id;
+
+    -- No income left: the LATERAL join found no row, so drop the placeholder.
+    DELETE FROM patient_stats ps
+    WHERE ps.patient_id = p_patient_id
+      AND NOT EXISTS (SELECT 1 FROM income_records ir WHERE ir.patient_id = p_patient_id);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_patient_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.patient_id = OLD.patient_id
+       AND NEW.doctor_id = OLD.doctor_id
+       AND NEW.service_date = OLD.service_date
+       AND NEW.amount = OLD.amount THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_patient_stats(OLD.patient_id);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.patient_id <> OLD.patient_id) THEN
+        PERFORM refresh_patient_stats(NEW.patient_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_patient_stats
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION sync_patient_stats();
+
+CREATE OR REPLACE FUNCTION rebuild_patient_stats()
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    DELETE FROM patient_stats;
+    INSERT INTO patient_stats (
+        patient_id, first_visit, last_visit, visit_count, lifetime_paid, last_doctor_id, last_income_id
+    )
+    SELECT agg.patient_id,
+           agg.first_visit,
+           agg.last_visit,
+           agg.visit_count,
+           agg.lifetime_paid,
+           latest.doctor_id,
+           latest.id
+    FROM (
+        SELECT patient_id,
+               MIN(service_date) AS first_visit,
+               MAX(service_date) AS last_visit,
+               COUNT(*) AS visit_count,
+               COALESCE(SUM(amount), 0) AS lifetime_paid
+        FROM income_records
+        GROUP BY patient_id
+    ) agg
+    JOIN LATERAL (
+        SELECT ir.id, ir.doctor_id
+        FROM income_records ir
+        WHERE ir.patient_id = agg.patient_id
+        ORDER BY ir.service_date DESC, ir.id DESC
+        LIMIT 1
+    ) latest ON TRUE;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- DASHBOARD ACCUMULATORS
+-- Running sum/count pairs behind avg_patient_payment and avg_salary_by_role.
+-- Income totals are striped over 16 rows (id % 16) to spread row locks.
+-- ============================================================
+CREATE TABLE income_payment_totals (
+    shard           SMALLINT PRIMARY KEY,
+    total_amount    NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    record_count    BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE role_salary_totals (
+    role_id         INT PRIMARY KEY REFERENCES staff_roles(id) ON DELETE CASCADE,
+    total_salary    NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    staff_count     INT NOT NULL DEFAULT 0
+);
+
+-- Per-staff payment count and total for salary notes/history pages.
+CREATE TABLE staff_salary_summary (
+    staff_id        INT PRIMARY KEY REFERENCES staff(id) ON DELETE CASCADE,
+    payment_count   INT NOT NULL DEFAULT 0,
+    total_paid      NUMERIC(16, 2) NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION accumulate_income_payment()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta_amount NUMERIC := 0;
+    delta_count  INT := 0;
+    row_id       INT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        row_id := NEW.id;
+        delta_amount := NEW.amount;
+        delta_count := 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        row_id := OLD.id;
+        delta_amount := -OLD.amount;
+        delta_count := -1;
+    ELSE
+        IF NEW.amount = OLD.amount THEN
+            RETURN NULL;
+        END IF;
+        row_id := NEW.id;
+        delta_amount := NEW.amount - OLD.amount;
+    END IF;
+
+    INSERT INTO income_payment_totals (shard, total_amount, record_count)
+    VALUES (row_id % 16, delta_amount, delta_count)
+    ON CONFLICT (shard) DO UPDATE
+    SET total_amount = income_payment_totals.total_amount + EXCLUDED.total_amount,
+        record_count = income_payment_totals.record_count + EXCLUDED.record_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_payment_totals
+AFTER INSERT OR DELETE OR UPDATE OF amount ON income_records
+FOR EACH ROW EXECUTE FUNCTION accumulate_income_payment();
+
+CREATE OR REPLACE FUNCTION accumulate_role_salary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active THEN
+        UPDATE role_salary_totals
+        SET total_salary = total_salary - OLD.base_salary,
+            staff_count = staff_count - 1
+        WHERE role_id = OLD.role_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active THEN
+        INSERT INTO role_salary_totals (role_id, total_salary, staff_count)
+        VALUES (NEW.role_id, NEW.base_salary, 1)
+        ON CONFLICT (role_id) DO UPDATE
+        SET total_salary = role_salary_totals.total_salary + EXCLUDED.total_salary,
+            staff_count = role_salary_totals.staff_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_staff_role_salary
+AFTER INSERT OR DELETE OR UPDATE OF base_salary, role_id, is_active ON staff
+FOR EACH ROW EXECUTE FUNCTION accumulate_role_salary();
+
+CREATE OR REPLACE FUNCTION accumulate_staff_salary_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.staff_id = OLD.staff_id AND NEW.amount = OLD.amount THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE staff_salary_summary
+        SET payment_count = payment_count - 1,
+            total_paid = total_paid - OLD.amount
+        WHERE staff_id = OLD.staff_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO staff_salary_summary (staff_id, payment_count, total_paid)
+        VALUES (NEW.staff_id, 1, NEW.amount)
+        ON CONFLICT (staff_id) DO UPDATE
+        SET payment_count = staff_salary_summary.payment_count + 1,
+            total_paid = staff_salary_summary.total_paid + EXCLUDED.total_paid;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_staff_salary_summary
+AFTER INSERT OR DELETE OR UPDATE OF staff_id, amount ON salary_payments
+FOR EACH ROW EXECUTE FUNCTION accumulate_staff_salary_summary();
+
+CREATE OR REPLACE FUNCTION rebuild_dashboard_accumulators()
+RETURNS INT AS $$
+DECLARE
+    income_rows  INT;
+    role_rows    INT;
+    salary_rows  INT;
+BEGIN
+    LOCK TABLE income_payment_totals, role_salary_totals, staff_salary_summary IN EXCLUSIVE MODE;
+
+    DELETE FROM income_payment_totals;
+    INSERT INTO income_payment_totals (shard, total_amount, record_count)
+    SELECT id % 16, SUM(amount), COUNT(*)
+    FROM income_records
+    GROUP BY id % 16;
+    GET DIAGNOSTICS income_rows = ROW_COUNT;
+
+    DELETE FROM role_salary_totals;
+    INSERT INTO role_salary_totals (role_id, total_salary, staff_count)
+    SELECT role_id, SUM(base_salary), COUNT(*)
+    FROM staff
+    WHERE is_active = TRUE
+    GROUP BY role_id;
+    GET DIAGNOSTICS role_rows = ROW_COUNT;
+
+    DELETE FROM staff_salary_summary;
+    INSERT INTO staff_salary_summary (staff_id, payment_count, total_paid)
+    SELECT staff_id, COUNT(*), SUM(amount)
+    FROM salary_payments
+    GROUP BY staff_id;
+    GET DIAGNOSTICS salary_rows = ROW_COUNT;
+
+    RETURN income_rows + role_rows + salary_rows;
+END;
+$$ LANGUAGE plpgsql;
 
 -- ============================================================
 -- OUTCOME CATEGORIES  (materials, rent, utilities, etc.)
@@ -178,13 +953,16 @@ CREATE TABLE medicine_presets (
 -- OUTCOME RECORDS  (/Outcome page — non-salary expenses)
 -- ============================================================
 CREATE TABLE outcome_records (
-    id              SERIAL PRIMARY KEY,
+    id              SERIAL,
     category_id     INT NOT NULL REFERENCES outcome_categories(id),
     amount          NUMERIC(12, 2) NOT NULL,
     expense_date    DATE NOT NULL DEFAULT CURRENT_DATE,
     description     TEXT,
-    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, expense_date)
+) PARTITION BY RANGE (expense_date);
+
+SELECT ensure_monthly_partitions('outcome_records', 'expense_date', 12);
 
 -- ============================================================
 -- CLINIC SETTINGS  (/Clinic page — static config values)
@@ -204,6 +982,289 @@ INSERT INTO clinic_settings (setting_key, description) VALUES
     ('avg_administrator_salary',    'Average monthly salary for administrators'),
     ('avg_janitor_salary',          'Average monthly salary for janitors');
 
+-- ============================================================
+-- APPOINTMENTS
+-- The (doctor_id, start_time) index serves the availability search.
+-- The matching shifts index is created in migration 023.
+-- ============================================================
+CREATE TABLE appointments (
+    id                  SERIAL PRIMARY KEY,
+    doctor_id           INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    patient_name        VARCHAR(200) NOT NULL,
+    type                VARCHAR(50) NOT NULL,
+    start_time          TIMESTAMPTZ NOT NULL,
+    end_time            TIMESTAMPTZ NOT NULL,
+    duration_minutes    INT NOT NULL CHECK (duration_minutes > 0),
+    status              VARCHAR(20) NOT NULL DEFAULT 'confirmed',
+    note                TEXT,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    change_xid          xid8 NOT NULL DEFAULT pg_current_xact_id(),   -- calendar sync
+    CHECK (end_time > start_time),
+    -- Bounds the availability search's index scan (backend/availability.py).
+    CONSTRAINT appointments_max_length CHECK (end_time - start_time <= INTERVAL '24 hours')
+);
+
+CREATE INDEX idx_appointments_doctor_start ON appointments (doctor_id, start_time);
+CREATE INDEX idx_appointments_start ON appointments (start_time);
+CREATE INDEX idx_appointments_change_xid ON appointments (change_xid);
+
+-- ============================================================
+-- CALENDAR SYNC
+-- change_xid is the last writing transaction; deletes and moves to
+-- another staff member leave a tombstone. Sync tokens are snapshot
+-- xmins (backend/calendar_sync.py). The shifts columns and triggers
+-- are added in migration 025, once shifts exists.
+-- ============================================================
+CREATE TABLE calendar_tombstones (
+    id              BIGSERIAL PRIMARY KEY,
+    entity_type     TEXT NOT NULL,              -- 'shift' | 'appointment'
+    entity_id       INT NOT NULL,
+    staff_id        INT NOT NULL,
+    change_xid      xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_calendar_tombstones_change_xid ON calendar_tombstones (change_xid);
+CREATE INDEX idx_calendar_tombstones_deleted_at ON calendar_tombstones (deleted_at);
+
+CREATE OR REPLACE FUNCTION calendar_touch()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TG_ARGV[0] is the entity type, TG_ARGV[1] the owning staff column.
+CREATE OR REPLACE FUNCTION calendar_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_staff INT;
+    new_staff INT;
+BEGIN
+    EXECUTE format('SELECT ($1).%I', TG_ARGV[1]) INTO old_staff USING OLD;
+    IF TG_OP = 'UPDATE' THEN
+        EXECUTE format('SELECT ($1).%I', TG_ARGV[1]) INTO new_staff USING NEW;
+        IF new_staff IS NOT DISTINCT FROM old_staff THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO calendar_tombstones (entity_type, entity_id, staff_id)
+    VALUES (TG_ARGV[0], OLD.id, old_staff);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_appointments_calendar_touch
+BEFORE UPDATE ON appointments
+FOR EACH ROW EXECUTE FUNCTION calendar_touch();
+
+CREATE TRIGGER trg_appointments_calendar_tombstone
+AFTER DELETE OR UPDATE OF doctor_id ON appointments
+FOR EACH ROW EXECUTE FUNCTION calendar_tombstone('appointment', 'doctor_id');
+
+-- ============================================================
+-- SHIFT TEMPLATES
+-- Weekly recurring shifts per staff member, in clinic-local time.
+-- Exceptions with a NULL template_id skip every template of that
+-- staff member on the date. shifts.template_id and its unique index
+-- are added in migration 024, once shifts exists.
+-- ============================================================
+CREATE TABLE shift_templates (
+    id              SERIAL PRIMARY KEY,
+    staff_id        INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    weekday         SMALLINT NOT NULL CHECK (weekday BETWEEN 1 AND 7),   -- ISO: 1 = Monday
+    start_time      TIME NOT NULL,
+    end_time        TIME NOT NULL,
+    valid_from      DATE NOT NULL DEFAULT CURRENT_DATE,
+    valid_to        DATE,
+    note            TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CHECK (end_time > start_time),
+    CHECK (valid_to IS NULL OR valid_to >= valid_from)
+);
+
+CREATE INDEX idx_shift_templates_staff ON shift_templates (staff_id, weekday);
+
+CREATE TABLE shift_template_exceptions (
+    id              SERIAL PRIMARY KEY,
+    staff_id        INT NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    template_id     INT REFERENCES shift_templates(id) ON DELETE CASCADE,
+    exception_date  DATE NOT NULL,
+    reason          TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX idx_shift_template_exceptions_unique
+    ON shift_template_exceptions (staff_id, exception_date, COALESCE(template_id, 0));
+
+-- ============================================================
+-- CLINIC EVENT NOTIFICATIONS
+-- Row changes on income, outcome, salary and shift tables are sent
+-- on the clinic_events channel as compact JSON. The backend keeps one
+-- LISTEN connection and relays them to /api/events/stream.
+-- TG_ARGV: topic, date column, optional amount column.
+-- trg_shift_notify is created in migration 019, once shifts exists.
+-- ============================================================
+CREATE OR REPLACE FUNCTION notify_clinic_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    rec       JSONB;
+    payload   JSONB;
+    event_day DATE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+    END IF;
+    event_day := (rec ->> TG_ARGV[1])::TIMESTAMPTZ::DATE;
+
+    payload := jsonb_build_object(
+        'topic', TG_ARGV[0],
+        'op', lower(TG_OP),
+        'id', (rec ->> 'id')::BIGINT,
+        'day', event_day
+    );
+    IF TG_NARGS > 2 THEN
+        payload := payload || jsonb_build_object('amount', (rec ->> TG_ARGV[2])::NUMERIC);
+    END IF;
+    IF rec ? 'doctor_id' THEN
+        payload := payload || jsonb_build_object('doctor_id', (rec ->> 'doctor_id')::INT);
+    ELSIF rec ? 'staff_id' THEN
+        payload := payload || jsonb_build_object('staff_id', (rec ->> 'staff_id')::INT);
+    END IF;
+
+    -- Income events carry the new day total so dashboards can patch in place.
+    -- doctor_daily_facts is refreshed by trg_income_doctor_facts, which fires first.
+    IF TG_ARGV[0] = 'income' THEN
+        payload := payload || jsonb_build_object(
+            'day_total',
+            (SELECT COALESCE(SUM(total_income), 0) FROM doctor_daily_facts WHERE day = event_day)
+        );
+    END IF;
+
+    PERFORM pg_notify('clinic_events', payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_income_notify
+AFTER INSERT OR UPDATE OR DELETE ON income_records
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('income', 'service_date', 'amount');
+
+CREATE TRIGGER trg_outcome_notify
+AFTER INSERT OR UPDATE OR DELETE ON outcome_records
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('outcome', 'expense_date', 'amount');
+
+CREATE TRIGGER trg_salary_notify
+AFTER INSERT OR UPDATE OR DELETE ON salary_payments
+FOR EACH ROW EXECUTE FUNCTION notify_clinic_event('salary', 'payment_date', 'amount');
+
+-- ============================================================
+-- TABLE VERSIONS
+-- Per-table change counters for HTTP cache validators, striped over 8
+-- rows by backend pid. shifts and salary_adjustments get their triggers
+-- in migration 020, once those tables exist.
+-- ============================================================
+CREATE TABLE table_versions (
+    table_name      TEXT NOT NULL,
+    shard           SMALLINT NOT NULL,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (table_name, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, shard, version, updated_at)
+    VALUES (TG_TABLE_NAME, pg_backend_pid() % 8, 1, clock_timestamp())
+    ON CONFLICT (table_name, shard) DO UPDATE
+    SET version = table_versions.version + 1,
+        updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'income_records', 'outcome_records', 'salary_payments',
+        'staff', 'staff_roles', 'patients', 'outcome_categories', 'clinic_settings',
+        'medicine_presets', 'appointments', 'shift_templates', 'shift_template_exceptions'
+    ] LOOP
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+            tbl, tbl
+        );
+        INSERT INTO table_versions (table_name, shard) VALUES (tbl, 0);
+    END LOOP;
+END;
+$$;
+
+-- ============================================================
+-- AUDIT EVENTS
+-- Append-only audit log. Transactions write audit_outbox; the
+-- drainer in backend/audit.py moves rows into the monthly
+-- partitioned audit_events table.
+-- ============================================================
+CREATE TABLE audit_outbox (
+    id              BIGSERIAL PRIMARY KEY,
+    occurred_at     TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    entity_type     TEXT NOT NULL,
+    entity_id       BIGINT,
+    action          TEXT NOT NULL,
+    actor_id        INT,
+    payload         JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+
+CREATE TABLE audit_events (
+    id              BIGINT NOT NULL,
+    occurred_at     TIMESTAMPTZ NOT NULL,
+    entity_type     TEXT NOT NULL,
+    entity_id       BIGINT,
+    action          TEXT NOT NULL,
+    actor_id        INT,
+    payload         JSONB NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+
+CREATE INDEX idx_audit_events_entity ON audit_events (entity_type, entity_id, occurred_at DESC);
+CREATE INDEX idx_audit_events_actor  ON audit_events (actor_id, occurred_at DESC);
+CREATE INDEX idx_audit_events_time   ON audit_events (occurred_at DESC, id DESC);
+
+SELECT ensure_monthly_partitions('audit_events', 'occurred_at', 12);
+
+-- Moves up to p_limit outbox rows into audit_events. SKIP LOCKED lets every
+-- worker run the drainer without two of them moving the same rows.
+CREATE OR REPLACE FUNCTION drain_audit_outbox(p_limit INT DEFAULT 500)
+RETURNS INT AS $$
+DECLARE
+    moved INT;
+BEGIN
+    WITH batch AS (
+        DELETE FROM audit_outbox
+        WHERE id IN (
+            SELECT id FROM audit_outbox
+            ORDER BY id
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, occurred_at, entity_type, entity_id, action, actor_id, payload
+    )
+    INSERT INTO audit_events (id, occurred_at, entity_type, entity_id, action, actor_id, payload)
+    SELECT id, occurred_at, entity_type, entity_id, action, actor_id, payload
+    FROM batch;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================
 -- HELPFUL VIEWS
 -- ============================================================
@@ -245,24 +1306,44 @@ LEFT JOIN (
 -- Average payment per patient visit
 CREATE OR REPLACE VIEW avg_patient_payment AS
 SELECT
-    ROUND(AVG(amount), 2) AS avg_payment
-FROM income_records;
+    ROUND(SUM(total_amount) / NULLIF(SUM(record_count), 0), 2) AS avg_payment
+FROM income_payment_totals;
 
 -- Average salary per role
 CREATE OR REPLACE VIEW avg_salary_by_role AS
 SELECT
     r.name AS role,
-    ROUND(AVG(s.base_salary), 2) AS avg_salary
+    ROUND(t.total_salary / t.staff_count, 2) AS avg_salary
+FROM role_salary_totals t
+JOIN staff_roles r ON r.id = t.role_id
+WHERE t.staff_count > 0;
+
+-- Doctor revenue: compacted aggregate plus pending ledger deltas
+CREATE OR REPLACE VIEW staff_revenue AS
+SELECT
+    s.id AS staff_id,
+    s.total_revenue + COALESCE(d.pending, 0) AS total_revenue
 FROM staff s
-JOIN staff_roles r ON r.id = s.role_id
-WHERE s.is_active = TRUE
-GROUP BY r.name;
+LEFT JOIN (
+    SELECT doctor_id, SUM(delta) AS pending
+    FROM doctor_revenue_deltas
+    GROUP BY doctor_id
+) d ON d.doctor_id = s.id;
 
 -- ============================================================
 -- INDEXES
 -- ============================================================
-CREATE INDEX idx_income_service_date  ON income_records(service_date);
-CREATE INDEX idx_income_doctor        ON income_records(doctor_id);
-CREATE INDEX idx_outcome_expense_date ON outcome_records(expense_date);
+CREATE INDEX idx_income_service_date_brin  ON income_records USING BRIN (service_date);
+CREATE INDEX idx_income_records_doctor_date ON income_records(doctor_id, service_date);
+CREATE INDEX idx_income_records_patient_date ON income_records(patient_id, service_date);
+-- Unpaid income per doctor for salary computations. The matching
+-- salary_adjustments index is created in migration 027.
+CREATE INDEX idx_income_records_unpaid ON income_records(doctor_id, service_date)
+    INCLUDE (amount, lab_cost, commission_rate, patient_id)
+    WHERE salary_payment_id IS NULL;
+CREATE INDEX idx_outcome_expense_date_brin ON outcome_records USING BRIN (expense_date);
+CREATE INDEX idx_outcome_category_date    ON outcome_records(category_id, expense_date);
 CREATE INDEX idx_salary_payment_date  ON salary_payments(payment_date);
+CREATE INDEX idx_salary_payments_staff_keyset ON salary_payments(staff_id, payment_date DESC, created_at DESC, id DESC);
 CREATE INDEX idx_staff_role           ON staff(role_id);
+